@@ -0,0 +1,140 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class DataVolumeWriter(object):
+    """DataVolumeWriter uploads data volumes to Imaris in the background (write-behind), so that the upload of a
+    volume overlaps with the processing of the next one.
+
+    :param conn: connector used to upload the volumes.
+    :type conn: pIceImarisConnector
+    :param maxPending: (optional, default 2) maximum number of volumes waiting to be uploaded. When the queue is
+                       full, ``setDataVolume()`` blocks until the oldest upload is completed.
+    :type maxPending: int
+    :param maxChunkBytes: (optional) if set, the volumes are uploaded in chunks of at most ``maxChunkBytes`` bytes
+                          (see ``pIceImarisConnector.setDataVolume()``).
+    :type maxChunkBytes: int
+
+    Errors raised by a background upload are never lost: they are re-raised by the next call to
+    ``setDataVolume()``, ``flush()`` or ``close()``.
+
+    Example:
+
+    >>> with DataVolumeWriter(conn) as writer:
+    ...     for t, stack in conn.iterTimepoints(0):
+    ...         writer.setDataVolume(process(stack), 1, t)
+
+    Leaving the ``with`` block flushes the queue and raises the first error of the background uploads, if any.
+
+    **REMARKS**
+
+    The stacks are not copied: they must not be modified after they were passed to ``setDataVolume()``.
+    """
+
+    def __init__(self, conn, maxPending=2, maxChunkBytes=None):
+        """Initializes the DataVolumeWriter object."""
+
+        if maxPending < 1:
+            raise ValueError("maxPending must be at least 1.")
+
+        # Connector
+        self._mConn = conn
+
+        # Maximum number of pending uploads
+        self._mMaxPending = maxPending
+
+        # Maximum size of the uploaded chunks
+        self._mMaxChunkBytes = maxChunkBytes
+
+        # Pending uploads
+        self._mPending = deque()
+
+        # Uploads run one after the other in a single background thread
+        self._mExecutor = ThreadPoolExecutor(max_workers=1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # Do not mask the original exception
+            try:
+                self.close()
+            except Exception:
+                pass
+
+    @property
+    def pending(self):
+        """Return the number of volumes that are still waiting to be uploaded."""
+        return sum(1 for future in self._mPending if not future.done())
+
+    def close(self):
+        """Flushes the queue and stops the background thread.
+
+        Errors of the background uploads are re-raised after the thread was stopped.
+        """
+
+        try:
+            self.flush()
+        finally:
+            self._mExecutor.shutdown(wait=True)
+
+    def flush(self):
+        """Waits until all queued volumes have been uploaded.
+
+        If any of the uploads failed, the exception of the first failed upload is raised (after all uploads have
+        completed).
+        """
+
+        self._collect(0)
+
+    def setDataVolume(self, stack, channel, timepoint):
+        """Queues a data volume for upload to Imaris (see ``pIceImarisConnector.setDataVolume()``).
+
+        :param stack: 3D array.
+        :type stack: np.uint8, np.uint16 or np.float32
+        :param channel: channel index.
+        :type channel: int
+        :param timepoint: timepoint index.
+        :type timepoint: int
+        """
+
+        # Make room in the queue (and report failed uploads)
+        self._collect(self._mMaxPending - 1)
+
+        future = self._mExecutor.submit(
+            self._mConn.setDataVolume,
+            stack,
+            channel,
+            timepoint,
+            maxChunkBytes=self._mMaxChunkBytes,
+        )
+        self._mPending.append(future)
+
+    # --------------------------------------------------------------------------
+    #
+    # PRIVATE METHODS FOR INTERNAL USE ONLY.
+    #
+    #    Please do not rely on the API of these methods to be preserved!
+    #
+    # --------------------------------------------------------------------------
+    def _collect(self, maxPending):
+        """Waits for the oldest uploads until at most maxPending are left. For internal use only!
+
+        :param maxPending: number of uploads that may still be pending on return.
+        :type maxPending: int
+        """
+
+        error = None
+        while len(self._mPending) > maxPending or (
+            self._mPending and self._mPending[0].done()
+        ):
+            future = self._mPending.popleft()
+            exception = future.exception()
+            if exception is not None and error is None:
+                error = exception
+
+        if error is not None:
+            raise error
@@ -0,0 +1,340 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+try:
+    from .pIceImarisConnector import pIceImarisConnector
+except ImportError:
+    # Imported as a top-level module (e.g. by Sphinx)
+    from pIceImarisConnector import pIceImarisConnector
+
+
+class ImarisPool(object):
+    """ImarisPool starts and holds a number of Imaris instances and leases them out one at a time, so that batch
+    processing pays the launch of Imaris once per instance instead of once per file.
+
+    :param size: number of Imaris instances.
+    :type size: int
+    :param timeout: (optional, default 60) maximum time (in seconds) to wait for an instance to start (see
+                    ``pIceImarisConnector.startImaris()``).
+    :type timeout: float
+    :param maxLeases: (optional) if set, an instance is replaced by a new one after it was leased this many times.
+    :type maxLeases: int
+    :param connectorFactory: (optional, default ``pIceImarisConnector``) function without arguments that returns
+                             a new pIceImarisConnector object; the ones that are not connected to Imaris yet are
+                             started with ``startImaris()``.
+    :type connectorFactory: callable
+
+    Example:
+
+    >>> with ImarisPool(4) as pool:
+    ...     def process(fileName):
+    ...         with pool.lease() as conn:
+    ...             conn.mImarisApplication.FileOpen(fileName, "")
+    ...             return conn.getSizes()
+    ...     with ThreadPoolExecutor(4) as executor:
+    ...         sizes = list(executor.map(process, fileNames))
+
+    **REMARKS**
+
+    * Each instance has its own object ID. The first instance is started alone (it also starts ImarisServerIce),
+      the others in parallel.
+    * When a lease ends, the instance is reset (see ``pIceImarisConnector.resetState()``): current dataset is
+      closed without saving, the Surpass Scene is emptied and the cached state of the connector is cleared, so
+      that the next lessee sees neither the data nor the objects of the previous one.
+    * An instance that is not alive (see ``pIceImarisConnector.isAlive()``) when it is leased or returned, or that
+      could not be reset, is closed and replaced in the background. If a replacement cannot be started, the pool
+      shrinks; ``lease()`` fails when no instance is left.
+    * The instances are closed (without saving) by ``close()``, or when leaving the ``with`` block.
+    """
+
+    def __init__(self, size, timeout=60.0, maxLeases=None, connectorFactory=None):
+        """Initializes the ImarisPool object by starting the Imaris instances."""
+
+        if size < 1:
+            raise ValueError("size must be positive.")
+        if maxLeases is not None and maxLeases < 1:
+            raise ValueError("maxLeases must be positive.")
+
+        # Launch parameters
+        self._mTimeout = timeout
+        self._mMaxLeases = maxLeases
+        if connectorFactory is None:
+            connectorFactory = pIceImarisConnector
+        self._mConnectorFactory = connectorFactory
+
+        # Idle connectors, number of leases of every held connector (by id()), object
+        # IDs in use and number of instances being started (guarded by the condition)
+        self._mCondition = threading.Condition()
+        self._mIdle = deque()
+        self._mLeases = {}
+        self._mObjectIDs = set()
+        self._mStarting = size
+        self._mClosed = False
+        self._mStatistics = {
+            "leases": 0,
+            "started": 0,
+            "recycled": 0,
+            "failed": 0,
+            "lastError": None,
+        }
+
+        # Start the first instance alone, since it also starts ImarisServerIce
+        started = [self._launch()]
+        if size > 1:
+            with ThreadPoolExecutor(max_workers=size - 1) as executor:
+                others = executor.map(lambda _: self._launch(), range(size - 1))
+                started += list(others)
+
+        if not all(started):
+            self.close()
+            raise Exception(
+                "Could only start "
+                + str(sum(started))
+                + " of "
+                + str(size)
+                + " Imaris instances: "
+                + str(self._mStatistics["lastError"])
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        with self._mCondition:
+            return len(self._mLeases)
+
+    def __repr__(self):
+        with self._mCondition:
+            return (
+                "ImarisPool(instances="
+                + str(len(self._mLeases))
+                + ", idle="
+                + str(len(self._mIdle))
+                + ")"
+            )
+
+    def close(self):
+        """Closes the idle Imaris instances (without saving); the leased ones are closed when their lease ends."""
+
+        with self._mCondition:
+            if self._mClosed:
+                return
+            self._mClosed = True
+            idle = list(self._mIdle)
+            self._mIdle.clear()
+            for conn in idle:
+                del self._mLeases[id(conn)]
+            self._mCondition.notify_all()
+
+        for conn in idle:
+            self._retire(conn)
+
+    def getStatistics(self):
+        """Returns the state of the pool.
+
+        :return: dictionary with the number of ``idle``, ``leased`` and ``starting`` instances, the total number of
+                 ``leases``, the number of instances ``started``, ``recycled`` (closed and replaced) and ``failed``
+                 to start, and the message of the ``lastError`` that prevented an instance from starting (or None).
+        :rtype: dict
+        """
+
+        with self._mCondition:
+            statistics = dict(self._mStatistics)
+            statistics["idle"] = len(self._mIdle)
+            statistics["leased"] = len(self._mLeases) - len(self._mIdle)
+            statistics["starting"] = self._mStarting
+            return statistics
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Leases an Imaris instance for the duration of a ``with`` block.
+
+        :param timeout: (optional) maximum time (in seconds) to wait for an idle instance; if omitted, wait until
+                        one is available.
+        :type timeout: float
+
+        :return: context manager that yields the pIceImarisConnector object of the leased instance.
+        :rtype: pIceImarisConnector
+
+        **EXAMPLE**
+
+        >>> with pool.lease() as conn:
+        ...     conn.mImarisApplication.FileOpen(fileName, "")
+
+        **REMARKS**
+
+        An exception is raised if no instance becomes available before the timeout, if the pool is closed, or if
+        no instance is left in the pool.
+        """
+
+        conn = self._acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def _acquire(self, timeout):
+        """Takes an idle and alive instance out of the pool, waiting if needed. For internal use only!
+
+        :param timeout: maximum time (in seconds) to wait, or None to wait forever.
+        :type timeout: float
+
+        :return: connector of the leased instance.
+        :rtype: pIceImarisConnector
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+
+            with self._mCondition:
+                while not self._mIdle:
+                    if self._mClosed:
+                        raise Exception("The pool is closed!")
+                    if not self._mLeases and self._mStarting == 0:
+                        raise Exception("There are no Imaris instances left!")
+                    remaining = None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise Exception("No Imaris instance became available!")
+                    self._mCondition.wait(remaining)
+
+                conn = self._mIdle.popleft()
+
+            # The instance may have died while idle
+            if not conn.isAlive():
+                self._recycle(conn)
+                continue
+
+            with self._mCondition:
+                self._mLeases[id(conn)] += 1
+                self._mStatistics["leases"] += 1
+            return conn
+
+    def _launch(self):
+        """Creates and starts a new instance, and adds it to the idle ones. For internal use only!
+
+        The caller must have counted the instance in ``_mStarting``.
+
+        :return: True if the instance could be started, False otherwise.
+        :rtype: Boolean
+        """
+
+        conn = None
+        error = None
+        try:
+
+            # Create a connector with an object ID that is not in use yet; the lock is
+            # only held to reserve the ID, so that the connectors are created in parallel
+            while conn is None:
+                candidate = self._mConnectorFactory()
+                with self._mCondition:
+                    if candidate.mImarisObjectID not in self._mObjectIDs:
+                        self._mObjectIDs.add(candidate.mImarisObjectID)
+                        conn = candidate
+
+            started = conn.isAlive() or conn.startImaris(
+                userControl=False, timeout=self._mTimeout
+            )
+            if not started:
+                error = "Imaris could not be started."
+
+        except Exception as e:
+
+            error = str(e)
+            started = False
+
+        with self._mCondition:
+            self._mStarting -= 1
+            if started:
+                self._mStatistics["started"] += 1
+            else:
+                self._mStatistics["failed"] += 1
+                self._mStatistics["lastError"] = error
+                if conn is not None:
+                    self._mObjectIDs.discard(conn.mImarisObjectID)
+            closed = self._mClosed
+            if started and not closed:
+                self._mLeases[id(conn)] = 0
+                self._mIdle.append(conn)
+            self._mCondition.notify_all()
+
+        if started and closed:
+            self._retire(conn)
+
+        return bool(started)
+
+    def _recycle(self, conn):
+        """Removes a leased instance from the pool, closes it and starts a replacement in the background. For
+        internal use only!
+
+        :param conn: connector of the instance.
+        :type conn: pIceImarisConnector
+        """
+
+        with self._mCondition:
+            del self._mLeases[id(conn)]
+            self._mStatistics["recycled"] += 1
+            replace = not self._mClosed
+            if replace:
+                self._mStarting += 1
+            self._mCondition.notify_all()
+
+        if not replace:
+            self._retire(conn)
+            return
+
+        def replaceInstance():
+            self._retire(conn)
+            self._launch()
+
+        threading.Thread(target=replaceInstance, daemon=True).start()
+
+    def _release(self, conn):
+        """Resets a leased instance and returns it to the pool, or recycles it. For internal use only!
+
+        :param conn: connector of the instance.
+        :type conn: pIceImarisConnector
+        """
+
+        with self._mCondition:
+            leases = self._mLeases[id(conn)]
+
+        if self._mMaxLeases is not None and leases >= self._mMaxLeases:
+            self._recycle(conn)
+            return
+
+        # resetState() also checks that the instance is alive
+        if not conn.resetState(quiet=True):
+            self._recycle(conn)
+            return
+
+        with self._mCondition:
+            closed = self._mClosed
+            if closed:
+                del self._mLeases[id(conn)]
+            else:
+                self._mIdle.append(conn)
+                self._mCondition.notify_all()
+
+        if closed:
+            self._retire(conn)
+
+    def _retire(self, conn):
+        """Closes an instance (without saving) and frees its object ID. For internal use only!
+
+        :param conn: connector of the instance.
+        :type conn: pIceImarisConnector
+        """
+
+        conn.closeImaris(quiet=True)
+
+        with self._mCondition:
+            self._mObjectIDs.discard(conn.mImarisObjectID)
@@ -0,0 +1,221 @@
+import numpy as np
+
+
+class SpotsEditor(object):
+    """SpotsEditor edits the spots of an ISpots object through a local columnar copy, and sends the changes to
+    Imaris only when they are committed.
+
+    The positions, time indices and radii are read from Imaris once. They can then be changed in place (through
+    the ``positions``, ``timeIndices`` and ``radii`` arrays) or with ``add()`` and ``remove()``. ``commit()``
+    compares the local copy with the last committed state and only talks to Imaris if something changed.
+
+    :param iSpots: spots to edit.
+    :type iSpots: Imaris::ISpots
+
+    Example:
+
+    >>> with SpotsEditor(iSpots) as editor:
+    ...     editor.positions[12] += [0.5, 0.0, 0.0]
+    ...     editor.remove([3, 7])
+    ...     editor.add([[10.0, 20.0, 5.0]], [0], [1.5])
+
+    Leaving the ``with`` block commits the changes (unless an exception was raised).
+
+    **REMARKS**
+
+    * ISpots can only replace all spots at once (``Set()``), or all radii at once (``SetRadiiXYZ()``). A commit
+      therefore sends nothing if nothing changed, only the radii if only radii changed, and all spots otherwise.
+      Track edges are sent again (and remapped to the new spot indices) after all spots were replaced; edges to
+      removed spots are dropped.
+    * Changes made to the spots in Imaris while the editor is open are overwritten by the next commit (see
+      ``reload()``).
+    """
+
+    def __init__(self, iSpots):
+        """Initializes the SpotsEditor object by reading the spots."""
+
+        # Spots
+        self._mSpots = iSpots
+
+        self.reload()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+
+    def __len__(self):
+        return self._mPositions.shape[0]
+
+    def __repr__(self):
+        return "SpotsEditor(spots=" + str(len(self)) + ")"
+
+    @property
+    def hasChanges(self):
+        """Return True if the local copy differs from the last committed state."""
+        return self._diff() != "none"
+
+    @property
+    def positions(self):
+        """Return the (nx3) positions of the spots (in place changes are committed)."""
+        return self._mPositions
+
+    @property
+    def radii(self):
+        """Return the (nx3) [rx, ry, rz] radii of the spots (in place changes are committed)."""
+        return self._mRadii
+
+    @property
+    def timeIndices(self):
+        """Return the time indices of the spots (in place changes are committed)."""
+        return self._mTimeIndices
+
+    def add(self, positions, timeIndices, radii):
+        """Appends spots.
+
+        :param positions: (mx3) positions of the new spots.
+        :type positions: list or Numpy array
+        :param timeIndices: time indices of the new spots.
+        :type timeIndices: list or Numpy array
+        :param radii: radii of the new spots: either one radius per spot, or an (mx3) matrix of anisotropic radii.
+        :type radii: list or Numpy array
+
+        :return: indices of the new spots.
+        :rtype: Numpy array
+        """
+
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        m = positions.shape[0]
+        timeIndices = np.asarray(timeIndices, dtype=np.int32).reshape(-1)
+        if timeIndices.shape != (m,):
+            raise ValueError("timeIndices must contain " + str(m) + " elements.")
+        radii = np.asarray(radii, dtype=np.float32)
+        if radii.shape == (m,):
+            radii = np.repeat(radii, 3).reshape(m, 3)
+        elif radii.shape != (m, 3):
+            raise ValueError(
+                "radii must contain " + str(m) + " elements or be an mx3 matrix."
+            )
+
+        n = len(self)
+        self._mPositions = np.concatenate([self._mPositions, positions])
+        self._mTimeIndices = np.concatenate([self._mTimeIndices, timeIndices])
+        self._mRadii = np.concatenate([self._mRadii, radii])
+        self._mOrigins = np.concatenate(
+            [self._mOrigins, np.full(m, -1, dtype=np.int64)]
+        )
+        return np.arange(n, n + m)
+
+    def commit(self):
+        """Sends the changes to Imaris.
+
+        :return: what was sent: "none", "radii" or "all".
+        :rtype: str
+        """
+
+        diff = self._diff()
+        if diff == "radii":
+            self._mSpots.SetRadiiXYZ(self._mRadii)
+        elif diff == "all":
+            self._mSpots.Set(
+                self._mPositions,
+                self._mTimeIndices,
+                np.ascontiguousarray(self._mRadii[:, 0]),
+            )
+            if np.any(self._mRadii != self._mRadii[:, :1]):
+                self._mSpots.SetRadiiXYZ(self._mRadii)
+
+            # Remap the track edges to the new spot indices
+            if self._mTrackEdges.shape[0] > 0:
+                newIndices = np.full(self._mCommitted[0].shape[0], -1, dtype=np.int64)
+                kept = self._mOrigins >= 0
+                newIndices[self._mOrigins[kept]] = np.flatnonzero(kept)
+                edges = newIndices[self._mTrackEdges]
+                self._mTrackEdges = edges[np.all(edges >= 0, axis=1)]
+                if self._mTrackEdges.shape[0] > 0:
+                    self._mSpots.SetTrackEdges(
+                        np.ascontiguousarray(self._mTrackEdges, dtype=np.int32)
+                    )
+
+        # The local copy is the new committed state
+        self._snapshot()
+        return diff
+
+    def reload(self):
+        """Discards the local changes and reads the spots from Imaris again."""
+
+        self._mPositions = np.array(
+            self._mSpots.GetPositionsXYZ(), dtype=np.float32
+        ).reshape(-1, 3)
+        self._mTimeIndices = np.array(self._mSpots.GetIndicesT(), dtype=np.int32)
+        self._mRadii = np.array(self._mSpots.GetRadiiXYZ(), dtype=np.float32).reshape(
+            -1, 3
+        )
+        self._mTrackEdges = np.array(
+            self._mSpots.GetTrackEdges(), dtype=np.int64
+        ).reshape(-1, 2)
+        self._snapshot()
+
+    def remove(self, indices):
+        """Removes spots; the following spots move up.
+
+        :param indices: indices of the spots to remove.
+        :type indices: list or Numpy array
+        """
+
+        keep = np.ones(len(self), dtype=bool)
+        keep[np.asarray(indices, dtype=np.int64)] = False
+        self._mPositions = self._mPositions[keep]
+        self._mTimeIndices = self._mTimeIndices[keep]
+        self._mRadii = self._mRadii[keep]
+        self._mOrigins = self._mOrigins[keep]
+
+    def revert(self):
+        """Discards the local changes (without reading the spots from Imaris again)."""
+
+        positions, timeIndices, radii = self._mCommitted
+        self._mPositions = positions.copy()
+        self._mTimeIndices = timeIndices.copy()
+        self._mRadii = radii.copy()
+        self._mOrigins = np.arange(positions.shape[0])
+
+    # --------------------------------------------------------------------------
+    #
+    # PRIVATE METHODS FOR INTERNAL USE ONLY.
+    #
+    #    Please do not rely on the API of these methods to be preserved!
+    #
+    # --------------------------------------------------------------------------
+    def _diff(self):
+        """Compares the local copy with the committed state. For internal use only!
+
+        :return: "none" if nothing changed, "radii" if only radii changed, "all" otherwise.
+        :rtype: str
+        """
+
+        positions, timeIndices, radii = self._mCommitted
+        if len(self) != positions.shape[0] or np.any(
+            self._mOrigins != np.arange(len(self))
+        ):
+            return "all"
+        if not np.array_equal(self._mPositions, positions) or not np.array_equal(
+            self._mTimeIndices, timeIndices
+        ):
+            return "all"
+        if not np.array_equal(self._mRadii, radii):
+            return "radii"
+        return "none"
+
+    def _snapshot(self):
+        """Stores a copy of the local state as the committed state. For internal use only!"""
+
+        self._mCommitted = (
+            self._mPositions.copy(),
+            self._mTimeIndices.copy(),
+            self._mRadii.copy(),
+        )
+
+        # Committed index of each local spot (-1 for added spots)
+        self._mOrigins = np.arange(len(self))
@@ -0,0 +1,493 @@
+import itertools
+
+import numpy as np
+
+
+class SpotsIndex(object):
+    """SpotsIndex answers neighbor queries on spots: radius queries, k-nearest-neighbor queries and pairs of spots
+    within a distance. Only spots at the same time index are neighbors.
+
+    The spots are grouped by time index (CSR offsets) and binned into a uniform grid of cubic cells, so that a
+    query only visits the cells around the query point. All queries are vectorized over the query points.
+
+    :param positions: (nx3) [x, y, z]\\ :sub:`n` coordinates of the spots in dataset units.
+    :type positions: list or Numpy array
+    :param timeIndices: (optional) time index of each spot; if omitted, all spots are at time index 0.
+    :type timeIndices: list or Numpy array
+    :param voxelSizes: (optional) [vX, vY, vZ] voxel sizes of the dataset, to query distances in voxel units.
+    :type voxelSizes: list or Numpy array
+    :param cellSize: (optional) edge of the grid cells in dataset units; if omitted, it is set to the average
+                     spot spacing.
+    :type cellSize: float
+
+    Distances are either in dataset units (``units="dataset"``, default) or in voxel units (``units="voxels"``):
+    in the latter case, each coordinate difference is divided by the voxel size along its axis.
+
+    Spots are always identified by their index in ``positions`` (i.e. in ``ISpots.GetPositionsXYZ()``).
+
+    Example:
+
+    >>> index = SpotsIndex.fromSpots(conn, iSpots)
+    >>> pairs, distances = index.queryPairs(2.0, returnDistances=True)
+    >>> neighbors, distances = index.queryKNearest(index.positions, 4, index.timeIndices)
+    """
+
+    def __init__(self, positions, timeIndices=None, voxelSizes=None, cellSize=None):
+        """Initializes the SpotsIndex object and builds the grid."""
+
+        positions = np.asarray(positions, dtype=np.float64)
+        if positions.size == 0:
+            positions = positions.reshape(0, 3)
+        if positions.ndim != 2 or positions.shape[1] != 3:
+            raise ValueError("positions must be an nx3 matrix of coordinates.")
+        n = positions.shape[0]
+
+        if timeIndices is None:
+            timeIndices = np.zeros(n, dtype=np.int64)
+        timeIndices = np.asarray(timeIndices, dtype=np.int64)
+        if timeIndices.shape != (n,):
+            raise ValueError("timeIndices must contain " + str(n) + " elements.")
+        if n > 0 and timeIndices.min() < 0:
+            raise ValueError("timeIndices must not be negative.")
+
+        if voxelSizes is not None:
+            voxelSizes = np.asarray(voxelSizes, dtype=np.float64)
+            if voxelSizes.shape != (3,) or np.any(voxelSizes <= 0):
+                raise ValueError("voxelSizes must contain 3 positive values.")
+
+        # Spots
+        self._mPositions = positions
+        self._mTimeIndices = timeIndices
+        self._mVoxelSizes = voxelSizes
+
+        # Group the spots by time index
+        self._mSpotsByTime = np.argsort(timeIndices, kind="stable")
+        counts = np.bincount(timeIndices) if n > 0 else np.zeros(0, dtype=np.int64)
+        self._mTimeOffsets = np.concatenate([[0], np.cumsum(counts)])
+
+        # Grid
+        self._mOrigin = positions.min(axis=0) if n > 0 else np.zeros(3)
+        extent = positions.max(axis=0) - self._mOrigin if n > 0 else np.zeros(3)
+        if cellSize is None:
+            cellSize = self._estimateCellSize(extent, n, max(1, len(counts)))
+        elif cellSize <= 0:
+            raise ValueError("cellSize must be positive.")
+
+        # Make sure that the cell codes fit into int64
+        self._mCellSize = float(cellSize)
+        while True:
+            self._mDims = (extent // self._mCellSize).astype(np.int64) + 1
+            if np.prod(self._mDims.astype(float)) * max(1, len(counts)) < 2**62:
+                break
+            self._mCellSize *= 2
+
+        # Sort the spots by cell
+        codes = self._cellCodes(self._cellCoordinates(positions), timeIndices)
+        self._mSpotsByCell = np.argsort(codes, kind="stable")
+        self._mSortedPositions = positions[self._mSpotsByCell]
+        self._mCells, self._mCellStarts, cellCounts = np.unique(
+            codes[self._mSpotsByCell], return_index=True, return_counts=True
+        )
+        self._mCellEnds = self._mCellStarts + cellCounts
+
+        # Dense lookup table from cell code to cell, if it is not much larger than the spots
+        nCodes = int(np.prod(self._mDims)) * max(1, len(counts))
+        if nCodes <= 8 * n + 2**16:
+            self._mCellTable = np.full(nCodes, -1, dtype=np.int64)
+            self._mCellTable[self._mCells] = np.arange(len(self._mCells))
+        else:
+            self._mCellTable = None
+
+    @classmethod
+    def fromSpots(cls, conn, iSpots=None, cellSize=None):
+        """Builds a SpotsIndex from an ISpots object.
+
+        :param conn: connector used to read the dataset calibration.
+        :type conn: pIceImarisConnector
+        :param iSpots: (optional) spots; if omitted, the Spots object currently selected in the Surpass Scene.
+        :type iSpots: Imaris::ISpots
+        :param cellSize: (optional) edge of the grid cells in dataset units (see ``SpotsIndex``).
+        :type cellSize: float
+
+        :return: spots index; distances in voxel units are only available if a dataset is loaded.
+        :rtype: SpotsIndex
+        """
+
+        if iSpots is None:
+            iSpots = conn.getSurpassSelection("Spots")
+            if iSpots is None:
+                raise Exception("No Spots object selected in the Surpass Scene.")
+
+        # Voxel sizes
+        info = conn.getDatasetInfo()
+        voxelSizes = None if info is None else info.voxelSizes
+
+        return cls(
+            np.asarray(iSpots.GetPositionsXYZ(), dtype=np.float64),
+            np.asarray(iSpots.GetIndicesT(), dtype=np.int64),
+            voxelSizes,
+            cellSize,
+        )
+
+    def __len__(self):
+        return self._mPositions.shape[0]
+
+    def __repr__(self):
+        return (
+            "SpotsIndex(spots="
+            + str(len(self))
+            + ", timepoints="
+            + str(len(self._mTimeOffsets) - 1)
+            + ", cellSize="
+            + str(self._mCellSize)
+            + ")"
+        )
+
+    @property
+    def cellSize(self):
+        """Return the edge of the grid cells in dataset units."""
+        return self._mCellSize
+
+    @property
+    def positions(self):
+        """Return the (nx3) coordinates of the spots in dataset units."""
+        return self._mPositions
+
+    @property
+    def timeIndices(self):
+        """Return the time index of each spot."""
+        return self._mTimeIndices
+
+    @property
+    def voxelSizes(self):
+        """Return the voxel sizes used for distances in voxel units (or None)."""
+        return self._mVoxelSizes
+
+    def queryKNearest(self, points, k, timeIndices=0, units="dataset"):
+        """Returns the k nearest spots of each query point.
+
+        :param points: (mx3) coordinates of the query points in dataset units.
+        :type points: list or Numpy array
+        :param k: number of neighbors.
+        :type k: int
+        :param timeIndices: (optional, default 0) time index of all query points (int) or of each query point.
+        :type timeIndices: int, list or Numpy array
+        :param units: (optional, default "dataset") units of the distances: "dataset" or "voxels".
+        :type units: str
+
+        :return: tuple ``(indices, distances)`` of (mxk) arrays sorted by distance. If fewer than k spots exist at
+                 the time index of a query point, the missing neighbors have index -1 and distance inf.
+        :rtype: tuple
+
+        **REMARKS**
+
+        A query point that coincides with a spot returns that spot as its nearest neighbor (at distance 0).
+        """
+
+        points, times = self._checkPoints(points, timeIndices)
+        scales = self._scales(units)
+        m = points.shape[0]
+        indices = np.full((m, k), -1, dtype=np.int64)
+        distances = np.full((m, k), np.inf)
+        if m == 0 or k <= 0 or len(self) == 0:
+            return indices, distances
+
+        # Grow the searched ball of cells until it contains the k nearest spots
+        pending = np.arange(m)
+        halfWidth = 1
+        while pending.size > 0:
+            if (2 * halfWidth + 1) ** 3 > len(self._mCells):
+                # The ball has more cells than the grid: compare with all spots at the same time index
+                q, s, d = self._candidatesAtSameTime(
+                    points[pending], times[pending], scales
+                )
+                done = np.ones(pending.size, dtype=bool)
+            else:
+                # Only the spots within the radius covered by the ball are certain
+                covered = halfWidth * self._mCellSize / scales.max()
+                q, s, d = self._candidates(
+                    points[pending], times[pending], halfWidth, scales, covered
+                )
+                done = np.bincount(q, minlength=pending.size) >= k
+
+            # Keep the k nearest candidates of the completed queries
+            keep = done[q]
+            q, s, d = q[keep], s[keep], d[keep]
+            order = np.lexsort((d, q))
+            q, s, d = q[order], s[order], d[order]
+            first = np.searchsorted(q, np.arange(pending.size))
+            rank = np.arange(q.size) - first[q]
+            keep = rank < k
+            indices[pending[q[keep]], rank[keep]] = s[keep]
+            distances[pending[q[keep]], rank[keep]] = d[keep]
+
+            pending = pending[~done]
+            halfWidth = halfWidth + 1 if halfWidth < 4 else 2 * halfWidth
+
+        return indices, distances
+
+    def queryPairs(
+        self, radius, timeIndex=None, units="dataset", returnDistances=False
+    ):
+        """Returns all pairs of spots closer than a distance.
+
+        :param radius: maximum distance (inclusive).
+        :type radius: float
+        :param timeIndex: (optional) only return the pairs at this time index; if omitted, the pairs at all time
+                          indices.
+        :type timeIndex: int
+        :param units: (optional, default "dataset") units of radius and distances: "dataset" or "voxels".
+        :type units: str
+        :param returnDistances: (optional, default False) if True, also return the distances.
+        :type returnDistances: bool
+
+        :return: (px2) array of spot indices (i < j in each row, rows sorted), and the array of distances if
+                 returnDistances is True.
+        :rtype: Numpy array or tuple
+        """
+
+        if timeIndex is None:
+            spots = np.arange(len(self))
+        else:
+            spots = self.spotsAtTimeIndex(timeIndex)
+
+        q, s, d = self._withinRadius(
+            self._mPositions[spots], self._mTimeIndices[spots], radius, units
+        )
+        q = spots[q]
+        keep = q < s
+        q, s, d = q[keep], s[keep], d[keep]
+        order = np.lexsort((s, q))
+        pairs = np.stack([q[order], s[order]], axis=1)
+        if returnDistances:
+            return pairs, d[order]
+        return pairs
+
+    def queryRadius(
+        self, points, radius, timeIndices=0, units="dataset", returnDistances=False
+    ):
+        """Returns the spots within a distance of each query point.
+
+        :param points: (mx3) coordinates of the query points in dataset units.
+        :type points: list or Numpy array
+        :param radius: maximum distance (inclusive).
+        :type radius: float
+        :param timeIndices: (optional, default 0) time index of all query points (int) or of each query point.
+        :type timeIndices: int, list or Numpy array
+        :param units: (optional, default "dataset") units of radius and distances: "dataset" or "voxels".
+        :type units: str
+        :param returnDistances: (optional, default False) if True, also return the distances.
+        :type returnDistances: bool
+
+        :return: tuple ``(indices, offsets)`` in CSR form: the spots around query point i are
+                 ``indices[offsets[i]:offsets[i + 1]]``, sorted by spot index. If returnDistances is True, the
+                 tuple ``(indices, offsets, distances)``.
+        :rtype: tuple
+        """
+
+        points, times = self._checkPoints(points, timeIndices)
+        q, s, d = self._withinRadius(points, times, radius, units)
+        order = np.lexsort((s, q))
+        offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(q, minlength=points.shape[0]))]
+        )
+        if returnDistances:
+            return s[order], offsets, d[order]
+        return s[order], offsets
+
+    def spotsAtTimeIndex(self, timeIndex):
+        """Returns the spots at a time index.
+
+        :param timeIndex: time index.
+        :type timeIndex: int
+
+        :return: spot indices (sorted).
+        :rtype: Numpy array
+        """
+
+        if timeIndex < 0 or timeIndex >= len(self._mTimeOffsets) - 1:
+            return np.empty(0, dtype=np.int64)
+        return self._mSpotsByTime[
+            self._mTimeOffsets[timeIndex] : self._mTimeOffsets[timeIndex + 1]
+        ]
+
+    # --------------------------------------------------------------------------
+    #
+    # PRIVATE METHODS FOR INTERNAL USE ONLY.
+    #
+    #    Please do not rely on the API of these methods to be preserved!
+    #
+    # --------------------------------------------------------------------------
+    def _candidates(self, points, times, halfWidth, scales, maxDistance=None):
+        """Returns the spots in the cells around each point. For internal use only!
+
+        The cells are the ones of the cube of given half width (in cells) that intersect the ball of radius
+        ``halfWidth * cellSize`` (in dataset units) around the cell of the point.
+
+        :param maxDistance: (optional) if set, only return the spots within this distance (in the units of scales).
+        :type maxDistance: float
+
+        :return: tuple ``(q, s, d)`` of query point indices, spot indices and distances.
+        :rtype: tuple
+        """
+
+        # If the cube has more cells than the grid, compare with all spots at the same time index instead
+        if (2 * halfWidth + 1) ** 3 > len(self._mCells):
+            q, s, d = self._candidatesAtSameTime(points, times, scales)
+            if maxDistance is not None:
+                keep = d <= maxDistance
+                q, s, d = q[keep], s[keep], d[keep]
+            return q, s, d
+
+        # Process the points in grid order, for locality
+        cells = self._cellCoordinates(points)
+        order = np.argsort(
+            self._cellCodes(np.clip(cells, 0, self._mDims - 1), times), kind="stable"
+        )
+        points, times, cells = points[order], times[order], cells[order]
+
+        inTime = (times >= 0) & (times < len(self._mTimeOffsets) - 1)
+
+        q, s, d = [], [], []
+        r = range(-halfWidth, halfWidth + 1)
+        for offset in itertools.product(r, r, r):
+
+            # Skip the corners of the cube that are farther than the ball
+            gaps = np.maximum(np.abs(offset) - 1, 0)
+            if np.sum(gaps**2) > halfWidth**2:
+                continue
+
+            neighbors = cells + np.array(offset)
+            valid = inTime & np.all(
+                (neighbors >= 0) & (neighbors < self._mDims), axis=1
+            )
+            query = np.flatnonzero(valid)
+            codes = self._cellCodes(neighbors[valid], times[valid])
+
+            # Find the cells in the grid
+            if self._mCellTable is not None:
+                found = self._mCellTable[codes]
+                hit = found >= 0
+            else:
+                found = np.searchsorted(self._mCells, codes)
+                found[found == len(self._mCells)] = 0
+                hit = self._mCells[found] == codes
+            query, found = query[hit], found[hit]
+
+            # Expand the cells into their spots
+            starts = self._mCellStarts[found]
+            counts = self._mCellEnds[found] - starts
+            total = int(counts.sum())
+            if total == 0:
+                continue
+            ends = np.cumsum(counts)
+            cellQ = np.repeat(query, counts)
+            cellS = np.repeat(starts - ends + counts, counts) + np.arange(total)
+            cellD = np.sqrt(
+                np.sum(
+                    ((self._mSortedPositions[cellS] - points[cellQ]) / scales) ** 2,
+                    axis=1,
+                )
+            )
+            if maxDistance is not None:
+                keep = cellD <= maxDistance
+                cellQ, cellS, cellD = cellQ[keep], cellS[keep], cellD[keep]
+            q.append(cellQ)
+            s.append(cellS)
+            d.append(cellD)
+
+        if not q:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0)
+
+        return (
+            order[np.concatenate(q)],
+            self._mSpotsByCell[np.concatenate(s)],
+            np.concatenate(d),
+        )
+
+    def _candidatesAtSameTime(self, points, times, scales):
+        """Returns all spots at the time index of each point. For internal use only!
+
+        :return: tuple ``(q, s, d)`` of query point indices, spot indices and distances.
+        :rtype: tuple
+        """
+
+        # Spots at the time index of each point
+        nTimepoints = len(self._mTimeOffsets) - 1
+        valid = np.flatnonzero((times >= 0) & (times < nTimepoints))
+        starts = self._mTimeOffsets[times[valid]]
+        counts = self._mTimeOffsets[times[valid] + 1] - starts
+        total = int(counts.sum())
+        ends = np.cumsum(counts)
+        q = np.repeat(valid, counts)
+        s = self._mSpotsByTime[
+            np.repeat(starts - ends + counts, counts) + np.arange(total)
+        ]
+        d = np.sqrt(np.sum(((self._mPositions[s] - points[q]) / scales) ** 2, axis=1))
+        return q, s, d
+
+    def _cellCodes(self, cells, times):
+        """Returns a single int64 code for each (time index, cell) combination. For internal use only!"""
+
+        dims = self._mDims
+        return ((times * dims[2] + cells[:, 2]) * dims[1] + cells[:, 1]) * dims[
+            0
+        ] + cells[:, 0]
+
+    def _cellCoordinates(self, points):
+        """Returns the (integer) grid cell coordinates of points. For internal use only!"""
+
+        return np.floor((points - self._mOrigin) / self._mCellSize).astype(np.int64)
+
+    def _checkPoints(self, points, timeIndices):
+        """Checks the query points and broadcasts their time indices. For internal use only!"""
+
+        points = np.asarray(points, dtype=np.float64)
+        if points.size == 0:
+            points = points.reshape(0, 3)
+        if points.ndim == 1:
+            points = points.reshape(1, -1)
+        if points.ndim != 2 or points.shape[1] != 3:
+            raise ValueError("points must be an mx3 matrix of coordinates.")
+        times = np.broadcast_to(
+            np.asarray(timeIndices, dtype=np.int64), (points.shape[0],)
+        )
+        return points, times
+
+    @staticmethod
+    def _estimateCellSize(extent, nSpots, nTimepoints):
+        """Returns the average spot spacing (per timepoint) as default cell size. For internal use only!"""
+
+        if nSpots == 0:
+            return 1.0
+        extent = np.where(extent > 0, extent, max(extent.max(), 1.0))
+        spacing = (np.prod(extent) * nTimepoints / nSpots) ** (1.0 / 3.0)
+        return float(max(spacing, extent.max() * 1e-6))
+
+    def _scales(self, units):
+        """Returns the per-axis divisors that convert dataset units to the requested units. For internal use only!"""
+
+        if units == "dataset":
+            return np.ones(3)
+        elif units == "voxels":
+            if self._mVoxelSizes is None:
+                raise ValueError("Distances in voxels require the voxel sizes.")
+            return self._mVoxelSizes
+        else:
+            raise ValueError('units must be one of "dataset" or "voxels".')
+
+    def _withinRadius(self, points, times, radius, units):
+        """Returns all (query point, spot) pairs within radius. For internal use only!
+
+        :return: tuple ``(q, s, d)`` of query point indices, spot indices and distances.
+        :rtype: tuple
+        """
+
+        if radius < 0:
+            raise ValueError("radius must not be negative.")
+        scales = self._scales(units)
+
+        # The ball of given radius (in the requested units) fits in a cube of this many cells
+        halfWidth = int(np.ceil(radius * scales.max() / self._mCellSize))
+        return self._candidates(points, times, halfWidth, scales, radius)
@@ -0,0 +1,263 @@
+import numpy as np
+
+try:
+    from .SpotsIndex import SpotsIndex
+except ImportError:
+    # Imported as a top-level module (e.g. by Sphinx)
+    from SpotsIndex import SpotsIndex
+
+
+class SpotsLinker(object):
+    """SpotsLinker links spots into tracks: spots in consecutive frames are linked by solving a sparse linear
+    assignment problem, and track segments are then bridged over missing detections (gap closing).
+
+    :param maxDistance: maximum distance (in dataset units) between linked spots in consecutive frames.
+    :type maxDistance: float
+    :param maxGap: (optional, default 0) maximum number of consecutive frames in which a spot may be missing from
+                   a track; 0 disables gap closing.
+    :type maxGap: int
+    :param alternativeCostFactor: (optional, default 1.05) the cost of not linking a spot, relative to the cost of
+                                  a link at maxDistance.
+    :type alternativeCostFactor: float
+
+    The cost of a link is the squared distance between the spots, divided by the number of frames it spans (as
+    expected for Brownian motion); gap-closing links may span a distance of up to
+    ``maxDistance * sqrt(frames)``. Link candidates are found with a ``SpotsIndex``, and each assignment problem
+    only contains the candidate links.
+
+    The linker returns the track edges as pairs of spot indices, as ``ISpots.SetTrackEdges()`` expects them, so
+    that the tracks can be read back with ``pIceImarisConnector.getTracks()``.
+
+    Example:
+
+    >>> linker = SpotsLinker(maxDistance=5.0, maxGap=2)
+    >>> edges = linker.linkSpots(iSpots)
+    >>> tracks, startTimes = conn.getTracks(iSpots)
+    """
+
+    def __init__(self, maxDistance, maxGap=0, alternativeCostFactor=1.05):
+        """Initializes the SpotsLinker object."""
+
+        if maxDistance <= 0:
+            raise ValueError("maxDistance must be positive.")
+        if maxGap < 0:
+            raise ValueError("maxGap must not be negative.")
+        if alternativeCostFactor <= 1:
+            raise ValueError("alternativeCostFactor must be larger than 1.")
+
+        # Linking parameters
+        self._mMaxDistance = float(maxDistance)
+        self._mMaxGap = int(maxGap)
+        self._mAlternativeCost = alternativeCostFactor * self._mMaxDistance**2
+
+        # Assignments are optimal up to epsilon per assigned spot
+        self._mEpsilon = 1e-4 * self._mAlternativeCost
+
+    def link(self, positions, timeIndices):
+        """Links spots into tracks.
+
+        :param positions: (nx3) [x, y, z]\\ :sub:`n` coordinates of the spots in dataset units.
+        :type positions: list or Numpy array
+        :param timeIndices: time index of each spot.
+        :type timeIndices: list or Numpy array
+
+        :return: (mx2) track edges: each row contains the indices of two linked spots (the earlier spot first).
+        :rtype: Numpy array
+        """
+
+        index = SpotsIndex(positions, timeIndices, cellSize=self._mMaxDistance)
+        positions = index.positions
+        timeIndices = index.timeIndices
+        n = len(index)
+
+        # Link consecutive frames
+        sources, targets, costs = self._candidateLinks(
+            index, positions, timeIndices, np.arange(n), np.arange(n), 1
+        )
+        assignment = self._solve(n, n, sources, targets, costs)
+        linked = np.flatnonzero(assignment >= 0)
+        edges = [np.stack([linked, assignment[linked]], axis=1)]
+
+        # Close gaps between the ends and the starts of the track segments
+        if self._mMaxGap > 0 and linked.size < n:
+            hasNext = assignment >= 0
+            hasPrevious = np.zeros(n, dtype=bool)
+            hasPrevious[assignment[linked]] = True
+            ends = np.flatnonzero(~hasNext)
+            starts = np.flatnonzero(~hasPrevious)
+            starts = starts[timeIndices[starts] > 0]
+
+            # Candidate links for all allowed gaps
+            startIndex = SpotsIndex(
+                positions[starts],
+                timeIndices[starts],
+                cellSize=self._mMaxDistance,
+            )
+            sources, targets, costs = [], [], []
+            for frames in range(2, self._mMaxGap + 2):
+                s, t, c = self._candidateLinks(
+                    startIndex, positions, timeIndices, ends, starts, frames
+                )
+                sources.append(s)
+                targets.append(t)
+                costs.append(c)
+            sources = np.concatenate(sources)
+            targets = np.concatenate(targets)
+            costs = np.concatenate(costs)
+
+            # Sources and targets are indices into ends and starts
+            endOf = np.full(n, -1, dtype=np.int64)
+            endOf[ends] = np.arange(ends.size)
+            startOf = np.full(n, -1, dtype=np.int64)
+            startOf[starts] = np.arange(starts.size)
+            assignment = self._solve(
+                ends.size, starts.size, endOf[sources], startOf[targets], costs
+            )
+            bridged = np.flatnonzero(assignment >= 0)
+            edges.append(np.stack([ends[bridged], starts[assignment[bridged]]], axis=1))
+
+        edges = np.concatenate(edges)
+        return edges[np.lexsort((edges[:, 1], edges[:, 0]))]
+
+    def linkSpots(self, iSpots):
+        """Links the spots of an ISpots object into tracks and sets the track edges of the object.
+
+        :param iSpots: spots to link; existing tracks are replaced.
+        :type iSpots: Imaris::ISpots
+
+        :return: (mx2) track edges (see ``link()``).
+        :rtype: Numpy array
+        """
+
+        edges = self.link(
+            np.asarray(iSpots.GetPositionsXYZ(), dtype=np.float64),
+            np.asarray(iSpots.GetIndicesT(), dtype=np.int64),
+        )
+        iSpots.SetTrackEdges(np.ascontiguousarray(edges, dtype=np.int32))
+        return edges
+
+    # --------------------------------------------------------------------------
+    #
+    # PRIVATE METHODS FOR INTERNAL USE ONLY.
+    #
+    #    Please do not rely on the API of these methods to be preserved!
+    #
+    # --------------------------------------------------------------------------
+    def _candidateLinks(
+        self, targetIndex, positions, timeIndices, sources, targets, frames
+    ):
+        """Returns the candidate links from the sources to the targets the given number of frames later. For
+        internal use only!
+
+        :param targetIndex: index of the target spots.
+        :type targetIndex: SpotsIndex
+        :param positions: (nx3) coordinates of all spots.
+        :type positions: Numpy array
+        :param timeIndices: time indices of all spots.
+        :type timeIndices: Numpy array
+        :param sources: spot indices of the sources.
+        :type sources: Numpy array
+        :param targets: spot indices of the targets (the spots of targetIndex).
+        :type targets: Numpy array
+        :param frames: number of frames between sources and targets.
+        :type frames: int
+
+        :return: tuple ``(sources, targets, costs)`` of the candidate links.
+        :rtype: tuple
+        """
+
+        radius = self._mMaxDistance * np.sqrt(frames)
+        spots, offsets, distances = targetIndex.queryRadius(
+            positions[sources],
+            radius,
+            timeIndices[sources] + frames,
+            returnDistances=True,
+        )
+        linkSources = np.repeat(sources, np.diff(offsets))
+        return linkSources, targets[spots], distances**2 / frames
+
+    def _solve(self, nSources, nTargets, sources, targets, costs):
+        """Solves the sparse linear assignment problem with the auction algorithm. For internal use only!
+
+        Every source is either assigned to one of its candidate targets, or left unassigned at the alternative
+        cost; every target is assigned to at most one source. The total cost is minimal up to epsilon per source.
+
+        :param nSources: number of sources.
+        :type nSources: int
+        :param nTargets: number of targets.
+        :type nTargets: int
+        :param sources: source of each candidate link.
+        :type sources: Numpy array
+        :param targets: target of each candidate link.
+        :type targets: Numpy array
+        :param costs: cost of each candidate link.
+        :type costs: Numpy array
+
+        :return: the target of each source (-1 if the source is not assigned).
+        :rtype: Numpy array
+        """
+
+        # Candidate links of each source (CSR)
+        order = np.argsort(sources, kind="stable")
+        targets, costs = targets[order], costs[order]
+        offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(sources, minlength=nSources))]
+        )
+        benefits = -costs
+        alternative = -self._mAlternativeCost
+
+        prices = np.zeros(nTargets)
+        owners = np.full(nTargets, -1, dtype=np.int64)
+        assignment = np.full(nSources, -1, dtype=np.int64)
+        bidders = np.flatnonzero(np.diff(offsets) > 0)
+
+        while bidders.size > 0:
+
+            # Values of the candidate links of the bidders
+            starts = offsets[bidders]
+            counts = offsets[bidders + 1] - starts
+            ends = np.cumsum(counts)
+            bidder = np.repeat(np.arange(bidders.size), counts)
+            links = np.repeat(starts - ends + counts, counts) + np.arange(ends[-1])
+            values = benefits[links] - prices[targets[links]]
+
+            # Best and second best value of each bidder (not linking is always an option)
+            segments = ends - counts
+            best = np.maximum.reduceat(values, segments)
+            isBest = values == best[bidder]
+            first = np.flatnonzero(isBest)
+            _, index = np.unique(bidder[first], return_index=True)
+            bestLink = links[first[index]]
+            values[first[index]] = -np.inf
+            second = np.maximum(np.maximum.reduceat(values, segments), alternative)
+
+            # Bidders for which not linking is best give up
+            bidding = best > alternative
+            bidders, best, second, bestLink = (
+                bidders[bidding],
+                best[bidding],
+                second[bidding],
+                bestLink[bidding],
+            )
+            if bidders.size == 0:
+                break
+
+            # The highest bid for each target wins
+            bidTargets = targets[bestLink]
+            bids = prices[bidTargets] + best - second + self._mEpsilon
+            order = np.lexsort((-bids, bidTargets))
+            winners = order[np.unique(bidTargets[order], return_index=True)[1]]
+            wonTargets = bidTargets[winners]
+
+            # Winners replace the previous owners, which bid again with the losers
+            displaced = owners[wonTargets]
+            displaced = displaced[displaced >= 0]
+            assignment[displaced] = -1
+            prices[wonTargets] = bids[winners]
+            owners[wonTargets] = bidders[winners]
+            assignment[bidders[winners]] = wonTargets
+            lost = np.ones(bidders.size, dtype=bool)
+            lost[winners] = False
+            bidders = np.concatenate([bidders[lost], displaced])
+
+        return assignment
@@ -1,3 +1,8 @@
+from .DataVolumeWriter import DataVolumeWriter
+from .ImarisPool import ImarisPool
 from .pIceImarisConnector import pIceImarisConnector
+from .SpotsEditor import SpotsEditor
+from .SpotsIndex import SpotsIndex
+from .SpotsLinker import SpotsLinker
 
 __version__ = pIceImarisConnector.__version__
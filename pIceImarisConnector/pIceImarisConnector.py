@@ -1,18 +1,41 @@
-import glob
-import imp  # Deprecated; used only as fallback until we are sure that importlib works fine.
+import functools
 import importlib
 import math
 import os
 import platform
-import random
 import re
-import subprocess
 import sys
+import threading
 import time
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import numpy as np
 
 
+def _tracksConnection(method):
+    """Decorates a method of pIceImarisConnector that calls Imaris. For internal use only!
+
+    A successful call renews the liveness of the connection (see ``pIceImarisConnector.isAlive()``); an ICE
+    exception that signals a lost connection marks the connection as dead before it is re-raised.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            result = method(self, *args, **kwargs)
+        except Exception as e:
+            if self._isConnectionException(e):
+                self._markDead()
+            raise
+        if self._mImarisApplication is not None:
+            self._mLastAliveTime = time.monotonic()
+        return result
+
+    return wrapper
+
+
 class pIceImarisConnector(object):
     """pIceImarisConnector is a simple Python class that eases communication between Bitplane Imaris and Python using the Imaris XT interface.
 
@@ -46,6 +69,28 @@ class pIceImarisConnector(object):
     # pIceImarisConnector version
     __version__ = "0.4.2"
 
+    # Folders searched for Imaris installations if IMARISPATH is not set
+    _WINDOWS_SEARCH_DIR = "C:\\Program Files\\Bitplane"
+    _MAC_SEARCH_DIR = "/Applications"
+
+    # Results of the discovery of Imaris in this process (see _findImaris())
+    _DISCOVERY_CACHE = {}
+
+    # Endpoint of ImarisServerIce (as used by ImarisLib)
+    _SERVER_ENDPOINT = ("127.0.0.1", 4029)
+
+    # Names of the ICE exceptions (and base classes) that signal a lost connection
+    _CONNECTION_EXCEPTIONS = frozenset(
+        [
+            "CommunicatorDestroyedException",
+            "ConnectFailedException",
+            "ConnectionLostException",
+            "ObjectNotExistException",
+            "SocketException",
+            "TimeoutException",
+        ]
+    )
+
     @property
     def version(self):
         """Return the version number."""
@@ -56,6 +101,11 @@ class pIceImarisConnector(object):
         """Return the ICE ImarisApplication object"""
         return self._mImarisApplication
 
+    @property
+    def mImarisObjectID(self):
+        """Return the object ID of the Imaris instance (as passed to Imaris by startImaris())"""
+        return self._mImarisObjectID
+
     def __new__(cls, *args, **kwargs):
         """Create or re-use a pIceImarisConnector object.
 
@@ -113,6 +163,59 @@ class pIceImarisConnector(object):
         # Use control
         self._mUserControl = False
 
+        # Timings and number of probes of the last startImaris()
+        self._mLaunchStatistics = None
+
+        # Liveness: time of the last successful call to Imaris, how long (in seconds)
+        # it is trusted, and the heartbeat thread with its stop event
+        self._mLastAliveTime = None
+        self._mLivenessTTL = 1.0
+        self._mHeartbeat = None
+
+        # Data volume cache (disabled by default)
+        self._mVolumeCache = None
+
+        # Cached dataset metadata (DatasetInfo objects and the time they were fetched,
+        # by dataset key) and how long (in seconds) it is trusted
+        self._mDatasetInfos = {}
+        self._mDatasetInfoTTL = 1.0
+
+        # Cached statistics (StatisticsTable objects by object key and names)
+        self._mStatisticsTables = {}
+
+        # Cached index of the Surpass Scene (see getSceneIndex())
+        self._mSceneIndex = None
+
+        # Cached factory, and the application it was obtained from
+        self._mFactory = None
+        self._mFactoryApplication = None
+
+        # Resolved types (type names by object key)
+        self._mObjectTypes = {}
+
+        # Types probed by autocast(), most frequently resolved first (ties in the order
+        # below), the number of objects resolved per type and in total
+        self._mCastTypes = [
+            "LightSource",
+            "Frame",
+            "Volume",
+            "Spots",
+            "Surfaces",
+            "DataSet",
+            "SurpassCamera",
+            "Filaments",
+            "ClippingPlane",
+            "Application",
+            "MeasurementPoints",
+            "DataContainer",
+            "Cells",
+            "Factory",
+            "ImageProcessing",
+        ]
+        self._mCastTypeCounts = dict.fromkeys(self._mCastTypes, 0)
+        self._mCastTypeOrder = {name: i for i, name in enumerate(self._mCastTypes)}
+        self._mCastTypeResolutions = 0
+
         # Possible type filters
         self._mPossibleTypeFilters = [
             "Cells",
@@ -140,30 +243,43 @@ class pIceImarisConnector(object):
         ):
             return
 
-        # Store the required paths
-        self._findImaris()
+        # When connecting to a running Imaris (e.g. from an XT function), ImarisLib
+        # can usually be imported already: then Imaris does not need to be found
+        ImarisLib = None
+        if imarisApplication is not None:
+            try:
+                ImarisLib = importlib.import_module("ImarisLib")
+            except ImportError:
+                pass
+
+        if ImarisLib is None:
 
-        # Change to the Imaris path folder. This is needed to make sure
-        # that the required dynamic libraries are imported correctly.
-        os.chdir(self._mImarisPath)
+            # Store the required paths
+            self._findImaris()
 
-        # Temporarily add Imaris path to system path (if needed)
-        systemPath = os.environ["PATH"]
-        if not self._mImarisPath in systemPath:
-            systemPath = self._mImarisPath + os.pathsep + systemPath
-        os.environ["PATH"] = systemPath
+            # Change to the Imaris path folder. This is needed to make sure
+            # that the required dynamic libraries are imported correctly.
+            os.chdir(self._mImarisPath)
 
-        # Add the python lib folder to the python path
-        sys.path.append(self._mImarisLibPath)
+            # Temporarily add Imaris path to system path (if needed)
+            systemPath = os.environ["PATH"]
+            if not self._mImarisPath in systemPath:
+                systemPath = self._mImarisPath + os.pathsep + systemPath
+            os.environ["PATH"] = systemPath
 
-        # Import the ImarisLib module
-        ImarisLib = self._importImarisLib()
+            # Add the python lib folder to the python path
+            sys.path.append(self._mImarisLibPath)
+
+            # Import the ImarisLib module
+            ImarisLib = self._importImarisLib()
 
         # Instantiate and store the ImarisLib object
         self._mImarisLib = ImarisLib.ImarisLib()
 
         # Assign a random id. We reserve the first 1000 to manually
         # started Imaris instances.
+        import random
+
         self._mImarisObjectID = 1000 + random.randint(0, 100000)
 
         # Now we check the (optional) input parameter imarisApplication.
@@ -251,6 +367,47 @@ class pIceImarisConnector(object):
 
         return self.__str__()
 
+    def asLazyArray(self, iDataSet=None, maxChunkBytes=2**24):
+        """Returns a lazy, Numpy-indexable view of a dataset.
+
+        :param iDataSet: (optional) wrap the passed IDataSet object instead of current one; if omitted, current
+                         dataset (i.e. ``conn.mImarisApplication.GetDataSet()``) will be used.
+        :type iDataSet: Imaris::IDataSet
+        :param maxChunkBytes: (optional, default 16 MB) maximum size of the subvolumes sent to Imaris when writing
+                              through the array.
+        :type maxChunkBytes: int
+
+        :return: lazy array with shape ``(sizeT, sizeC, sizeZ, sizeY, sizeX)``, or None if there is no dataset.
+        :rtype: LazyDataArray
+
+        **EXAMPLE**
+
+        Only the requested voxels are transferred from and to Imaris:
+
+        >>> arr = conn.asLazyArray()
+        >>> block = arr[5, 0, 10:20, :, 100:300]
+        >>> arr[5, 1, 10:20, :, 100:300] = block // 2
+
+        **REMARKS**
+
+        See ``LazyDataArray`` for the supported indexing.
+        """
+
+        if not self.isAlive():
+            return None
+
+        if iDataSet is None:
+            iDataSet = self._mImarisApplication.GetDataSet()
+        else:
+            # Is the passed argument a valid iDataSet?
+            if not self._getFactory().IsDataSet(iDataSet):
+                raise Exception("Invalid IDataSet object.")
+
+        if iDataSet is None:
+            return None
+
+        return LazyDataArray(self, iDataSet, maxChunkBytes)
+
     def autocast(self, dataItem):
         """Casts IDataItems to their derived types.
 
@@ -274,49 +431,22 @@ class pIceImarisConnector(object):
         * Imaris::ISurpassCamera
         * Imaris::IImageProcessing
         * Imaris::IFactory
+
+        **REMARKS**
+
+        The type of each object is resolved only once per connection: casting the same object again costs a single
+        call to Imaris.
         """
 
-        # Get the factory
-        factory = self.mImarisApplication.GetFactory()
-
-        # Cast
-        if factory.IsLightSource(dataItem):
-            return factory.ToLightSource(dataItem)
-        elif factory.IsFrame(dataItem):
-            return factory.ToFrame(dataItem)
-        elif factory.IsVolume(dataItem):
-            return factory.ToVolume(dataItem)
-        elif factory.IsSpots(dataItem):
-            return factory.ToSpots(dataItem)
-        elif factory.IsSurfaces(dataItem):
-            return factory.ToSurfaces(dataItem)
-        elif factory.IsDataSet(dataItem):
-            return factory.ToDataSet(dataItem)
-        elif factory.IsSurpassCamera(dataItem):
-            return factory.ToSurpassCamera(dataItem)
-        elif factory.IsFilaments(dataItem):
-            return factory.ToFilaments(dataItem)
-        elif factory.IsClippingPlane(dataItem):
-            return factory.ToClippingPlane(dataItem)
-        elif factory.IsApplication(dataItem):
-            return factory.ToApplication(dataItem)
-        elif factory.IsMeasurementPoints(dataItem):
-            return factory.ToMeasurementPoints(dataItem)
-        elif factory.IsDataContainer(dataItem):
-            return factory.ToDataContainer(dataItem)
-        elif factory.IsCells(dataItem):
-            return factory.ToCells(dataItem)
-        elif factory.IsFactory(dataItem):
-            return factory.ToFactory(dataItem)
-        elif factory.IsImageProcessing(dataItem):
-            return factory.ToImageProcessing(dataItem)
-        else:
-            try:
-                # The Reference Frame object does not have an Is...() method
-                return factory.ToReferenceFrames(dataItem)
-            except Exception as e:
-                print(e)
-                return None
+        if dataItem is None:
+            return None
+
+        # The type is resolved once per object
+        typeName = self._resolveType(dataItem)
+        if typeName is None:
+            return None
+
+        return getattr(self._getFactory(), "To" + typeName)(dataItem)
 
     @staticmethod
     def calcRotationBetweenVectors3D(start, dest):
@@ -386,6 +516,32 @@ class pIceImarisConnector(object):
 
         return q
 
+    def clearVolumeCache(self):
+        """Removes all volumes from the volume cache (see ``enableVolumeCache()``).
+
+        The cache is cleared automatically when the dataset is replaced through pIceImarisConnector; it must be
+        cleared explicitly if the data is changed in other ways (e.g. from Imaris or directly through the ICE API).
+        """
+
+        if self._mVolumeCache is not None:
+            self._mVolumeCache.clear()
+
+    def clearStatisticsCache(self, iObject=None):
+        """Removes the cached statistics tables (see ``getStatisticsTable()``).
+
+        :param iObject: (optional) remove the tables of this object only; if omitted, all tables are removed.
+        :type iObject: Imaris::IDataItem
+        """
+
+        if iObject is None:
+            self._mStatisticsTables.clear()
+            return
+
+        key = self._getObjectKey(iObject)
+        for tableKey in list(self._mStatisticsTables):
+            if tableKey[0] == key:
+                del self._mStatisticsTables[tableKey]
+
     def cloneDataSet(self, iDataSet=None):
         """
         This method returns a clone of the dataset.
@@ -424,8 +580,11 @@ class pIceImarisConnector(object):
                     iDataSet.SetModified(False)
                 self._mImarisApplication.SetVisible(False)
 
+            self.stopHeartbeat()
             self._mImarisApplication.Quit()
             self._mImarisApplication = None
+            self._mLastAliveTime = None
+            self._clearCachedState()
             return True
 
         except:
@@ -433,11 +592,37 @@ class pIceImarisConnector(object):
             print("Error: " + str(sys.exc_info()[1]))
             return False
 
-    def copyChannels(self, channelIndices):
+    def copyChannels(
+        self,
+        channelIndices,
+        maxChunkBytes=None,
+        returnThroughput=False,
+        workers=2,
+        maxInFlightBytes=2**28,
+    ):
         """Copies one or more channels.
 
         :param channelIndices: channel indices to be copied.
         :type  channelIndices: list (or scalar)
+        :param maxChunkBytes: (optional) if set, the volumes are copied in chunks of at most ``maxChunkBytes``
+                              bytes (see ``setDataVolume()``); otherwise, one volume at a time.
+        :type maxChunkBytes: int
+        :param returnThroughput: (optional, default False) if True, return the effective copy speed.
+        :type returnThroughput: Boolean
+        :param workers: (optional, default 2) number of chunks copied concurrently.
+        :type workers: int
+        :param maxInFlightBytes: (optional, default 256 MB) maximum total size of the chunks being copied at the
+                                 same time. At least one chunk is always copied.
+        :type maxInFlightBytes: int
+
+        :return: if ``returnThroughput`` is True, the effective copy speed in MB/s (bytes copied per second).
+        :rtype: float
+
+        **REMARKS**
+
+        * The channel dimension is resized once; then the chunks of all timepoints are copied by a pool of
+          ``workers`` threads, so that reading a chunk overlaps with writing the previous one.
+        * If the copy fails, the new channels are left in the dataset.
         """
 
         # Check if the connection is still alive
@@ -446,69 +631,127 @@ class pIceImarisConnector(object):
 
         # Is there a dataset loaded?
         iDataSet = self._mImarisApplication.GetDataSet()
-        if iDataSet is None or iDataSet.GetSizeX() == 0:
+        if iDataSet is None:
             return None
 
-        # Get the dataset sizes
-        sz = self.getSizes()
-
-        # Some aliases
-        nChannels = sz[3]
-        nTimepoints = sz[4]
+        # Get the dataset metadata. The names and colors of the channels are
+        # copied: fetch them again, since they may have been changed through
+        # the IDataSet object
+        self._invalidateDatasetInfo(iDataSet)
+        info = self._getDatasetInfo(iDataSet)
+        (sizeX, sizeY, sizeZ, nChannels, nTimepoints) = info.sizes
+        if sizeX == 0:
+            return None
 
         # Make sure to have a valid array
-        npChannelIndices = np.array(channelIndices)
-        if npChannelIndices.ndim == 0:
-            npChannelIndices = np.array([channelIndices])
+        npChannelIndices = np.array(channelIndices, dtype=np.int64, ndmin=1)
 
         # Check the passed indices are within bounds
         if np.any(
             np.logical_or(npChannelIndices < 0, npChannelIndices > (nChannels - 1))
         ):
-            ValueError("channelIndices is out of bounds.")
+            raise ValueError("channelIndices is out of bounds.")
 
-        # Collect the channel names
-        channelNames = []
-        for i in range(nChannels):
-            channelNames.append(iDataSet.GetChannelName(i))
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
 
-        # Copy the channels
-        for c in range(npChannelIndices.size):
+        # Get the dataset class
+        dtype = info.datatype
+        if dtype is None:
+            raise Exception("Bad value for iDataSet::getType().")
+        imarisDataType = info.imarisDataType
 
-            # Add a channel
-            nChannels = nChannels + 1
-            iDataSet.SetSizeC(nChannels)
+        # Add all channels at once
+        iDataSet.SetSizeC(nChannels + npChannelIndices.size)
+        self._invalidateDatasetInfo(iDataSet)
 
-            # New channel index
-            newChannelIndex = nChannels - 1
+        # Set the new channel names and colors
+        for c, source in enumerate(npChannelIndices):
+            iDataSet.SetChannelName(
+                nChannels + c, "Copy of " + info.channelNames[source]
+            )
+            iDataSet.SetChannelColorRGBA(nChannels + c, info.channelColors[source])
 
-            # Set the new channel name
-            newChannelName = "Copy of " + channelNames[npChannelIndices[c]]
-            iDataSet.SetChannelName(newChannelIndex, newChannelName)
+        # Chunks of a volume
+        if maxChunkBytes is None:
+            chunks = [(0, 0, 0, sizeZ, sizeY, sizeX)]
+        else:
+            chunks = self._splitIntoChunks(
+                (sizeZ, sizeY, sizeX), np.dtype(dtype).itemsize, maxChunkBytes
+            )
+        chunkBytes = max(c[3] * c[4] * c[5] for c in chunks) * np.dtype(dtype).itemsize
 
-            # Set the new channel color
-            iDataSet.SetChannelColorRGBA(
-                newChannelIndex, iDataSet.GetChannelColorRGBA(npChannelIndices[c])
+        # Copy a chunk
+        def copy(source, target, t, chunk):
+            (z0, y0, x0, dZ, dY, dX) = chunk
+            block = self._readDataSubVolume(
+                iDataSet, imarisDataType, x0, y0, z0, source, t, dX, dY, dZ
             )
+            self._writeDataSubVolume(
+                iDataSet, imarisDataType, block, x0, y0, z0, target, t
+            )
+            return block.nbytes
+
+        # Chunks to copy, timepoint after timepoint
+        tasks = (
+            (int(source), nChannels + c, t, chunk)
+            for t in range(nTimepoints)
+            for c, source in enumerate(npChannelIndices)
+            for chunk in chunks
+        )
+
+        # Number of chunks in flight
+        maxInFlight = max(1, min(workers, maxInFlightBytes // chunkBytes))
+
+        # Copy all chunks. On failure, the pending copies are cancelled and the
+        # first exception is re-raised.
+        tic = time.perf_counter()
+        nBytes = 0
+        pending = set()
+        executor = ThreadPoolExecutor(max_workers=maxInFlight)
+        try:
+            for task in tasks:
+                if len(pending) >= maxInFlight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    nBytes += sum(future.result() for future in done)
+                pending.add(executor.submit(copy, *task))
+            for future in pending:
+                nBytes += future.result()
+        except:
+            for future in pending:
+                future.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=True)
 
-            for t in range(nTimepoints):
-                # Get the stack
-                stack = self.getDataVolume(npChannelIndices[c], t)
+            # Cached volumes and metadata of the dataset are outdated
+            if self._mVolumeCache is not None:
+                self._mVolumeCache.invalidate(self._getObjectKey(iDataSet))
+            self._invalidateDatasetInfo(iDataSet)
 
-                # Set the stack
-                self.setDataVolume(stack, newChannelIndex, t)
+        if returnThroughput:
+            return self._throughput(nBytes, tic)
 
     def createAndSetSpots(
-        self, coords, timeIndices, radii, name, color, container=None
+        self,
+        coords,
+        timeIndices,
+        radii,
+        name,
+        color,
+        container=None,
+        trackEdges=None,
+        maxMessageBytes=None,
     ):
         """Creates Spots and adds them to the Surpass Scene.
 
         :param coords: (nx3) [x, y, z]\ :sub:`n` coordinate matrix in dataset units.
-        :type coords: list
+        :type coords: list or Numpy array
         :param timeIndices: spots time indices.
-        :type timeIndices: list
-        :param radii: spots radii.
-        :type radii: list
+        :type timeIndices: list or Numpy array
+        :param radii: spots radii: either one radius per spot, or an (nx3) [rx, ry, rz]\ :sub:`n` matrix of
+                      anisotropic radii.
+        :type radii: list or Numpy array
         :param name: name of the Spots object.
         :type name: string
         :param color: (1x4), (0..1) vector of [R, G, B, A] values. Example: [0.5, 1.0, 1.0, 1.0].
@@ -517,56 +760,124 @@ class pIceImarisConnector(object):
                           Please note that it is the user's responsibility to attach the container to the surpass
                           scene!
         :type container: an Imaris::IDataContainer object
-
+        :param trackEdges: (optional) (mx2) matrix of spot indices: each row connects two spots of the same track.
+        :type trackEdges: list or Numpy array
+        :param maxMessageBytes: (optional) largest message (in bytes) that can be sent to Imaris, i.e. the
+                                ``Ice.MessageSizeMax`` of the connection. If set, a ValueError is raised before
+                                anything is created if the spots do not fit.
+        :type maxMessageBytes: int
 
         :return: the generated Spots object.
         :rtype: Imaris::ISpots
 
+        **EXAMPLE**
+
+        Create 5 million spots with anisotropic radii directly from Numpy arrays:
+
+        >>> coords = np.random.uniform(0, 100, (5000000, 3)).astype(np.float32)
+        >>> timeIndices = np.zeros(5000000, dtype=np.int32)
+        >>> radii = np.tile(np.array([1.0, 1.0, 3.0], dtype=np.float32), (5000000, 1))
+        >>> spots = conn.createAndSetSpots(coords, timeIndices, radii, "Detections", [1.0, 0.0, 0.0, 1.0])
+
+        **REMARKS**
+
+        * Numpy arrays are sent to Imaris without conversion to lists. Arrays that are already C-contiguous and of
+          type float32 (coords, radii) and int32 (timeIndices, trackEdges) are not copied.
+        * Anisotropic radii and track edges are sent with separate calls, so that the largest message to Imaris
+          stays at 20 bytes per spot (8 bytes per track edge).
+        * ISpots can only be set as a whole (``Set()``, ``SetRadiiXYZ()``, ``SetTrackEdges()``): the spots cannot be
+          sent in chunks. If a message exceeds ``Ice.MessageSizeMax``, an exception that says so is raised and no
+          Spots object is added; pass ``maxMessageBytes`` to check this before anything is sent.
         """
 
         if not self.isAlive():
             return None
 
         # Check input argument coords
-        if not isinstance(coords, list):
-            raise TypeError("coords must be a list.")
-
-        nDims = len(coords[0]) if len(coords) != 0 else 0
-        if nDims == 0:
+        coords = np.ascontiguousarray(coords, dtype=np.float32)
+        if coords.size == 0:
             return None
 
-        if nDims != 3:
+        if coords.ndim != 2 or coords.shape[1] != 3:
             raise ValueError("coords must be an nx3 matrix of coordinates.")
+        nSpots = coords.shape[0]
 
         # Check input argument timeIndices
-        if not isinstance(timeIndices, list):
-            raise TypeError("timeIndices must be a list.")
+        timeIndices = np.ascontiguousarray(timeIndices, dtype=np.int32)
+        if timeIndices.shape != (nSpots,):
+            raise ValueError("timeIndices must contain " + str(nSpots) + " elements.")
 
         # Check input argument radii
-        if not isinstance(radii, list):
-            raise TypeError("radii must be a list.")
-
-        # Check argument size consistency
-        nSpots = len(coords)
-        if len(timeIndices) != nSpots:
-            raise ValueError("timeIndices must contain " + str(nSpots) + "elements.")
+        radii = np.ascontiguousarray(radii, dtype=np.float32)
+        if radii.shape == (nSpots, 3):
+            radiiXYZ = radii
+            radii = np.ascontiguousarray(radii[:, 0])
+        elif radii.shape == (nSpots,):
+            radiiXYZ = None
+        else:
+            raise ValueError(
+                "radii must contain " + str(nSpots) + " elements or be an nx3 matrix."
+            )
 
-        if len(radii) != nSpots:
-            raise ValueError("radii must contain " + str(nSpots) + "elements.")
+        # Check input argument trackEdges
+        if trackEdges is not None:
+            trackEdges = np.ascontiguousarray(trackEdges, dtype=np.int32)
+            if trackEdges.size == 0:
+                trackEdges = None
+            elif trackEdges.ndim != 2 or trackEdges.shape[1] != 2:
+                raise ValueError("trackEdges must be an mx2 matrix of spot indices.")
+            elif trackEdges.min() < 0 or trackEdges.max() >= nSpots:
+                raise ValueError("trackEdges contains invalid spot indices.")
+
+        # Check that each call fits into one message
+        if maxMessageBytes is not None:
+            messageBytes = coords.nbytes + timeIndices.nbytes + radii.nbytes
+            if radiiXYZ is not None:
+                messageBytes = max(messageBytes, radiiXYZ.nbytes)
+            if trackEdges is not None:
+                messageBytes = max(messageBytes, trackEdges.nbytes)
+            if messageBytes > maxMessageBytes:
+                raise ValueError(
+                    "The spots need a message of "
+                    + str(messageBytes)
+                    + " bytes, but maxMessageBytes is "
+                    + str(maxMessageBytes)
+                    + ": increase Ice.MessageSizeMax."
+                )
 
         # If the container was not specified, add to the Surpass Scene
         if container is None:
             container = self._mImarisApplication.GetSurpassScene()
         else:
             # Make sure the container is valid
-            if not self._mImarisApplication.GetFactory().IsDataContainer():
+            if not self._getFactory().IsDataContainer(container):
                 raise ValueError("Invalid data container!")
 
         # Create a new Spots object
-        newSpots = self._mImarisApplication.GetFactory().CreateSpots()
+        newSpots = self._getFactory().CreateSpots()
+
+        try:
+
+            # Set coordinates, time indices and radii
+            newSpots.Set(coords, timeIndices, radii)
+
+            # Set the anisotropic radii
+            if radiiXYZ is not None:
+                newSpots.SetRadiiXYZ(radiiXYZ)
 
-        # Set coordinates, time indices and radii
-        newSpots.Set(coords, timeIndices, radii)
+            # Set the tracks
+            if trackEdges is not None:
+                newSpots.SetTrackEdges(trackEdges)
+
+        except Exception as e:
+
+            # Ice.MemoryLimitException is matched by name, because Ice is only
+            # importable through ImarisLib
+            if type(e).__name__ != "MemoryLimitException":
+                raise
+            raise Exception(
+                "The spots do not fit into one message to Imaris: increase Ice.MessageSizeMax."
+            )
 
         # Set the name
         newSpots.SetName(name)
@@ -635,7 +946,7 @@ class pIceImarisConnector(object):
             return
 
         # Get the Factory
-        factory = self._mImarisApplication.GetFactory()
+        factory = self._getFactory()
 
         # Get the ImarisType object
         if self._mImarisApplication.GetDataSet() is not None:
@@ -690,14 +1001,56 @@ class pIceImarisConnector(object):
         # Set the dataset in Imaris
         self._mImarisApplication.SetDataSet(iDataSet)
 
+        # The cached volumes and metadata belong to the replaced dataset
+        if self._mVolumeCache is not None:
+            self._mVolumeCache.clear()
+        self._invalidateDatasetInfo()
+
         # Return the created dataset
         return iDataSet
 
+    def disableVolumeCache(self):
+        """Disables the volume cache and releases all cached volumes (see ``enableVolumeCache()``)."""
+
+        self._mVolumeCache = None
+
     def display(self):
         """Displays the string representation of the pIceImarisConnector object."""
 
         print(self.__str__())
 
+    def enableVolumeCache(self, maxBytes):
+        """Enables caching of the data volumes fetched from Imaris.
+
+        :param maxBytes: maximum total size (in bytes) of the cached volumes. When it is exceeded, the least
+                         recently used volumes are evicted. If the cache is already enabled, it is resized.
+        :type maxBytes: int
+
+        **EXAMPLE**
+
+        >>> conn.enableVolumeCache(2 * 1024**3)
+        >>> stack = conn.getDataVolume(0, 0)        # Fetched from Imaris
+        >>> plane = conn.getDataSlice(10, 0, 0)     # Served from the cache
+        >>> conn.getVolumeCacheStatistics()
+        {'hits': 1, 'misses': 1, 'evictions': 0, 'entries': 1, 'bytes': ..., 'maxBytes': 2147483648}
+
+        **REMARKS**
+
+        * Volumes are cached by ``getDataVolume()``; ``getDataSlice()`` and ``getDataSubVolume()`` are served
+          from a cached volume when it is present.
+        * Cached volumes are invalidated by ``setDataVolume()`` and ``copyChannels()``; the cache is cleared when
+          the dataset is replaced by ``createDataSet()`` or a test dataset is loaded. Use ``clearVolumeCache()``
+          after changing the data in any other way.
+        """
+
+        if maxBytes < 0:
+            raise ValueError("maxBytes must be non-negative.")
+
+        if self._mVolumeCache is None:
+            self._mVolumeCache = VolumeCache(maxBytes)
+        else:
+            self._mVolumeCache.resize(maxBytes)
+
     def getChannelNames(self):
         """Returns the channel names.
 
@@ -705,9 +1058,6 @@ class pIceImarisConnector(object):
         :rtype: list
         """
 
-        # Initialize output
-        channelNames = []
-
         # Is Imaris running?
         if not self.isAlive():
             return []
@@ -717,17 +1067,158 @@ class pIceImarisConnector(object):
         if iDataSet is None:
             return []
 
-        # Number of channels
-        nChannels = iDataSet.GetSizeC()
+        # Return the list of channel names
+        return list(self._getDatasetInfo(iDataSet).channelNames)
 
-        # Fill the list of channel names
-        for c in range(nChannels):
-            channelNames.append(iDataSet.GetChannelName(c))
+    def getDatasetInfo(self, iDataSet=None):
+        """Returns a snapshot of the dataset metadata.
 
-        # Return the list of channel names
-        return channelNames
+        :param iDataSet: (optional) get the metadata of the passed IDataSet object instead of current one;
+                         if omitted, current dataset (i.e. ``conn.mImarisApplication.GetDataSet()``) will be used.
+        :type iDataSet: Imaris::IDataSet
+
+        :return: dataset metadata (sizes, extends, voxel sizes, datatype, channel names and colors, time delta), or
+                 None if there is no dataset.
+        :rtype: DatasetInfo
+
+        **REMARKS**
+
+        The metadata is fetched from Imaris once per dataset and cached; all getters of pIceImarisConnector
+        (``getSizes()``, ``getExtends()``, ``getVoxelSizes()``, ...) read from it. The cache is updated when the
+        dataset is changed through pIceImarisConnector (e.g. by ``setVoxelSizes()`` or ``copyChannels()``).
+        Changes made through the IDataSet object are picked up:
+
+        * at once by the data-transfer methods if they change the sizes: the metadata is fetched again if a requested
+          channel, timepoint or voxel lies beyond the cached sizes (e.g. after ``SetSizeC()``), or if a volume or a
+          slice returned by Imaris does not have the cached sizes (e.g. after ``SetSizeX()``);
+        * otherwise (e.g. after ``SetType()`` or ``SetExtendMinX()``), when the cached metadata expires (see
+          ``setDatasetInfoTTL()``), or by calling ``refreshDatasetInfo()``.
+        """
+
+        if not self.isAlive():
+            return None
+
+        if iDataSet is None:
+            iDataSet = self._mImarisApplication.GetDataSet()
+
+        if iDataSet is None:
+            return None
+
+        return self._getDatasetInfo(iDataSet)
+
+    def getDataHyperstack(
+        self,
+        channels=None,
+        timepoints=None,
+        workers=4,
+        iDataSet=None,
+        returnTimings=False,
+    ):
+        """Returns several channels and timepoints of the dataset at once, fetched concurrently.
+
+        :param channels: (optional) channel indices; if omitted, all channels are returned.
+        :type channels: list (or scalar)
+        :param timepoints: (optional) timepoint indices; if omitted, all timepoints are returned.
+        :type timepoints: list (or scalar)
+        :param workers: (optional, default 4) maximum number of volumes that are fetched concurrently.
+        :type workers: int
+        :param iDataSet: (optional) get the data from the passed IDataSet object instead of current one;
+                         if omitted, current dataset (i.e. ``conn.mImarisApplication.GetDataSet()``) will be used.
+        :type iDataSet: Imaris::IDataSet
+        :param returnTimings: (optional, default False) if True, the time spent fetching each of the volumes is
+                              returned as well.
+        :type returnTimings: Boolean
+
+        :return: 5D Numpy array with shape ``(nTimepoints, nChannels, sizeZ, sizeY, sizeX)``; if returnTimings is
+                 True, a tuple (hyperstack, timings) is returned instead, where timings is a
+                 ``(nTimepoints, nChannels)`` Numpy array of the durations (in seconds) of the individual calls.
+        :rtype: Numpy array with dtype being one of ``np.uint8``, ``np.uint16``, ``np.float32``, or tuple.
+
+        **EXAMPLE**
+
+        >>> hyperstack = conn.getDataHyperstack(channels=[0, 2], workers=8)
+        >>> stack = hyperstack[5, 1]  # Channel 2, timepoint 5
+
+        **REMARKS**
+
+        The hyperstack is allocated once and every (channel, timepoint) volume is decoded straight into it by
+        ``getDataVolume()``. The remote calls run on a pool of at most ``workers`` threads; the GIL is released
+        while waiting for Imaris.
+        """
+
+        if not self.isAlive():
+            return None
+
+        if iDataSet is None:
+            currentDataSet = self.mImarisApplication.GetDataSet()
+        else:
+            # Is the passed argument a valid iDataSet?
+            if not self._getFactory().IsDataSet(iDataSet):
+                raise Exception("Invalid IDataSet object.")
+            currentDataSet = iDataSet
+
+        if currentDataSet is None:
+            return None
+
+        info = self._getDatasetInfo(currentDataSet)
+        sizeX, sizeY, sizeZ, sizeC, sizeT = info.sizes
+        if sizeX == 0:
+            return None
+
+        # Channels and timepoints to fetch
+        if channels is None:
+            channels = range(sizeC)
+        if timepoints is None:
+            timepoints = range(sizeT)
+        channels = np.array(channels, dtype=np.int64, ndmin=1)
+        timepoints = np.array(timepoints, dtype=np.int64, ndmin=1)
+
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+
+        # Get the dataset class
+        dtype = info.datatype
+        if dtype is None:
+            raise Exception("Bad value for iDataSet::getType().")
+
+        # Allocate the hyperstack
+        hyperstack = np.empty(
+            (timepoints.size, channels.size, sizeZ, sizeY, sizeX), dtype=dtype
+        )
+        timings = np.zeros((timepoints.size, channels.size))
 
-    def getDataSlice(self, plane, channel, timepoint, iDataSet=None):
+        def fetch(t, c):
+            start = time.perf_counter()
+            stack = self.getDataVolume(
+                int(channels[c]), int(timepoints[t]), iDataSet, out=hyperstack[t, c]
+            )
+            if stack is None:
+                raise Exception("Could not get the data volume from Imaris.")
+            timings[t, c] = time.perf_counter() - start
+
+        # Fetch all volumes. On failure, the pending calls are cancelled and
+        # the first exception is re-raised.
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(fetch, t, c)
+                for t in range(timepoints.size)
+                for c in range(channels.size)
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            except:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        if returnTimings:
+            return hyperstack, timings
+
+        return hyperstack
+
+    @_tracksConnection
+    def getDataSlice(self, plane, channel, timepoint, iDataSet=None, out=None):
         """Returns a data slice from Imaris.
 
         :param plane: plane index.
@@ -739,8 +1230,11 @@ class pIceImarisConnector(object):
         :param iDataSet: (optional) get the data slice from the passed IDataSet object instead of current one;
                          if omitted, current dataset (i.e. ``conn.mImarisApplication.GetDataSet()``) will be used.
         :type iDataSet: Imaris::IDataSet
+        :param out: (optional) C-contiguous array of shape ``(sizeY, sizeX)`` and of the dataset type into which
+                    the slice is written. If omitted, a new array is allocated.
+        :type out: Numpy array
 
-        :return:  data slice (2D Numpy array).
+        :return:  data slice (2D, C-contiguous Numpy array); if ``out`` is passed, ``out`` itself.
         :rtype: Numpy array with dtype being one of ``np.uint8``, ``np.uint16``, ``np.float32``.
         """
 
@@ -751,13 +1245,19 @@ class pIceImarisConnector(object):
             iDataSet = self._mImarisApplication.GetDataSet()
         else:
             # Is the passed argument a valid iDataSet?
-            if not self._mImarisApplication.GetFactory().IsDataSet(iDataSet):
+            if not self._getFactory().IsDataSet(iDataSet):
                 raise Exception("Invalid IDataSet object.")
 
+        if iDataSet is None:
+            return None
+
         # Get sizes
-        (sizeX, sizeY, sizeZ, sizeC, sizeT) = self.getSizes()
+        info = self._getDatasetInfo(
+            iDataSet, (0, 0, plane + 1, channel + 1, timepoint + 1)
+        )
+        (sizeX, sizeY, sizeZ, sizeC, sizeT) = info.sizes
 
-        if iDataSet is None or sizeX == 0:
+        if sizeX == 0:
             return None
 
         # Check that the requested plane, channel and timepoint exist
@@ -770,32 +1270,111 @@ class pIceImarisConnector(object):
         if timepoint < 0 or timepoint > sizeT - 1:
             raise Exception("The requested time index is out of bounds!")
 
+        # Serve the slice from the cache, if the volume is there
+        if self._mVolumeCache is not None:
+            key = (self._getObjectKey(iDataSet), channel, timepoint)
+            cached = self._mVolumeCache.get(key)
+            if cached is not None:
+                return self._copyToOutput(cached[plane], out)
+
         # Get the dataset class
-        imarisDataType = str(iDataSet.GetType())
+        imarisDataType = info.imarisDataType
         if imarisDataType == "eTypeUInt8":
-            # Ice returns uint8 as a string: we must cast. This behavior might
-            # be changed in the future.
-            arr = np.array(iDataSet.GetDataSliceBytes(plane, channel, timepoint))
-            arr = np.frombuffer(arr.data, dtype=np.uint8)
-            arr = np.reshape(arr, (sizeX, sizeY))
+            payload = iDataSet.GetDataSliceBytes(plane, channel, timepoint)
+            dtype = np.uint8
         elif imarisDataType == "eTypeUInt16":
-            arr = np.array(
-                iDataSet.GetDataSliceShorts(plane, channel, timepoint), dtype=np.uint16
-            )
+            payload = iDataSet.GetDataSliceShorts(plane, channel, timepoint)
+            dtype = np.uint16
         elif imarisDataType == "eTypeFloat":
-            arr = np.array(
-                iDataSet.GetDataSliceFloats(plane, channel, timepoint), dtype=np.float32
-            )
+            payload = iDataSet.GetDataSliceFloats(plane, channel, timepoint)
+            dtype = np.float32
         else:
             raise Exception("Bad value for iDataSet::getType().")
 
-        # Transpose
-        arr = np.transpose(arr)
+        # The dataset may have been resized through the IDataSet object: try again with fresh metadata
+        if self._isStalePayload(iDataSet, info, payload, sizeX * sizeY):
+            return self.getDataSlice(
+                plane, channel, timepoint, iDataSet=iDataSet, out=out
+            )
 
-        # Return
-        return arr
+        # The slice is returned by Imaris in [x][y] order: we decode and transpose it
+        return self._decodeDataPayload(
+            payload, dtype, (sizeY, sizeX), out=out, transposed=True
+        )
+
+    async def getDataSliceAsync(
+        self, plane, channel, timepoint, iDataSet=None, out=None
+    ):
+        """Returns a data slice from Imaris, asynchronously (see ``getDataSlice()``).
+
+        :param plane: plane index.
+        :type plane: int
+        :param channel: channel index.
+        :type channel: int
+        :param timepoint: timepoint index.
+        :type timepoint: int
+        :param iDataSet: (optional) get the data slice from the passed IDataSet object instead of current one.
+        :type iDataSet: Imaris::IDataSet
+        :param out: (optional) C-contiguous array of shape ``(sizeY, sizeX)`` into which the slice is written.
+        :type out: Numpy array
+
+        :return:  data slice (2D, C-contiguous Numpy array); if ``out`` is passed, ``out`` itself.
+        :rtype: Numpy array with dtype being one of ``np.uint8``, ``np.uint16``, ``np.float32``.
+
+        **REMARKS**
+
+        See ``getDataVolumeAsync()``.
+        """
+
+        if self._mImarisApplication is None:
+            return None
+
+        iDataSet = await self._resolveDataSetAsync(iDataSet)
+        if iDataSet is None:
+            return None
+
+        # Get sizes
+        info = self._getDatasetInfo(
+            iDataSet, (0, 0, plane + 1, channel + 1, timepoint + 1)
+        )
+        (sizeX, sizeY, sizeZ, sizeC, sizeT) = info.sizes
+
+        if sizeX == 0:
+            return None
+
+        # Check that the requested plane, channel and timepoint exist
+        if plane < 0 or plane > sizeZ - 1:
+            raise Exception("The requested plane index is out of bounds!")
+        if channel < 0 or channel > sizeC - 1:
+            raise Exception("The requested channel index is out of bounds!")
+        if timepoint < 0 or timepoint > sizeT - 1:
+            raise Exception("The requested time index is out of bounds!")
+
+        # Serve the slice from the cache, if the volume is there
+        if self._mVolumeCache is not None:
+            key = (self._getObjectKey(iDataSet), channel, timepoint)
+            cached = self._mVolumeCache.get(key)
+            if cached is not None:
+                return self._copyToOutput(cached[plane], out)
+
+        # Get the slice
+        suffix, dtype = self._getPayloadType(info.imarisDataType)
+        payload = await self._invokeAsync(
+            iDataSet, "GetDataSlice" + suffix, plane, channel, timepoint
+        )
+
+        # The dataset may have been resized through the IDataSet object: try again with fresh metadata
+        if self._isStalePayload(iDataSet, info, payload, sizeX * sizeY):
+            return await self.getDataSliceAsync(
+                plane, channel, timepoint, iDataSet=iDataSet, out=out
+            )
 
-    def getAllSurpassChildren(self, recursive, typeFilter=None):
+        # The slice is returned by Imaris in [x][y] order: we decode and transpose it
+        return self._decodeDataPayload(
+            payload, dtype, (sizeY, sizeX), out=out, transposed=True
+        )
+
+    def getAllSurpassChildren(self, recursive, typeFilter=None, sceneIndex=None):
         """Returns all children of the surpass scene recursively. Folders (i.e. IDataContainer objects) may be
         scanned (recursively) but are not returned. Optionally, the returned objects may be filtered by type.
 
@@ -819,6 +1398,10 @@ class pIceImarisConnector(object):
             * 'SurpassCamera'
             * 'Volume'
 
+        :param sceneIndex: (optional) answer from this index of the Surpass Scene (see ``getSceneIndex()``) instead
+                           of scanning the scene: no calls to Imaris are made.
+        :type sceneIndex: SceneIndex
+
         :return: child objects.
         :rtype: list
         """
@@ -832,6 +1415,10 @@ class pIceImarisConnector(object):
             if typeFilter not in self._mPossibleTypeFilters:
                 raise ValueError("Invalid value for ''typeFilter''.")
 
+        # Answer from the index
+        if sceneIndex is not None:
+            return sceneIndex.children(recursive, typeFilter)
+
         # Check that there is a Surpass Scene and there are children
         surpassScene = self.mImarisApplication.GetSurpassScene()
         if surpassScene is None:
@@ -853,8 +1440,9 @@ class pIceImarisConnector(object):
 
         return children
 
+    @_tracksConnection
     def getDataSubVolume(
-        self, x0, y0, z0, channel, timepoint, dX, dY, dZ, iDataSet=None
+        self, x0, y0, z0, channel, timepoint, dX, dY, dZ, iDataSet=None, out=None
     ):
         """Returns a data subvolume from Imaris.
 
@@ -878,8 +1466,11 @@ class pIceImarisConnector(object):
                          if omitted, current dataset (i.e. ``conn.mImarisApplication.GetDataSet()``) will be used.
                          This is useful for instance when masking channels.
         :type iDataSet: Imaris::IDataSet
+        :param out: (optional) C-contiguous array of shape ``(dZ, dY, dX)`` and of the dataset type into which the
+                    subvolume is written. If omitted, a new array is allocated.
+        :type out: Numpy array
 
-        :return: data subvolume.
+        :return: data subvolume (C-contiguous); if ``out`` is passed, ``out`` itself.
         :rtype: Numpy array with dtype being one of ``numpy.uint8``, ``numpy.uint16``, ``numpy.float32``.
 
         **EXAMPLE**
@@ -894,7 +1485,8 @@ class pIceImarisConnector(object):
 
         **REMARKS**
 
-        * Implementation detail: this function gets the subvolume as a 1D array and reshapes it in place.
+        * Implementation detail: this function gets the subvolume as a 1D array and decodes it in place (or into
+          ``out``).
         * Coordinates and extensions are in voxels (integers) and not in units!
         """
 
@@ -905,79 +1497,140 @@ class pIceImarisConnector(object):
             iDataSet = self.mImarisApplication.GetDataSet()
         else:
             # Is the passed argument a valid iDataSet?
-            if not self.mImarisApplication.GetFactory().IsDataSet(iDataSet):
+            if not self._getFactory().IsDataSet(iDataSet):
                 raise Exception("Invalid IDataSet object.")
 
-        if iDataSet is None or iDataSet.GetSizeX() == 0:
+        if iDataSet is None:
             return None
 
-        # Check the boundaries
-        if x0 < 0 or x0 > iDataSet.GetSizeX() - 1:
-            raise ValueError("The requested starting position x0 is out of bounds.")
-
-        if y0 < 0 or y0 > iDataSet.GetSizeY() - 1:
-            raise ValueError("The requested starting position y0 is out of bounds.")
+        # Get sizes
+        info = self._getDatasetInfo(
+            iDataSet, (x0 + dX, y0 + dY, z0 + dZ, channel + 1, timepoint + 1)
+        )
+        (sizeX, sizeY, sizeZ, sizeC, sizeT) = info.sizes
 
-        if z0 < 0 or z0 > iDataSet.GetSizeZ() - 1:
-            raise ValueError("The requested starting position z0 is out of bounds.")
+        if sizeX == 0:
+            return None
 
-        if channel < 0 or channel > iDataSet.GetSizeC() - 1:
-            raise ValueError("The requested channel index is out of bounds.")
+        # Check the boundaries
+        self._checkSubVolumeBounds(
+            info.sizes, x0, y0, z0, channel, timepoint, dX, dY, dZ
+        )
 
-        if timepoint < 0 or timepoint > iDataSet.GetSizeT() - 1:
-            raise ValueError("The requested timepoint index is out of bounds.")
+        # Serve the subvolume from the cache, if the volume is there
+        if self._mVolumeCache is not None:
+            key = (self._getObjectKey(iDataSet), channel, timepoint)
+            cached = self._mVolumeCache.get(key)
+            if cached is not None:
+                return self._copyToOutput(
+                    cached[z0 : z0 + dZ, y0 : y0 + dY, x0 : x0 + dX], out
+                )
 
-        # Check that we are within bounds
-        if x0 + dX > iDataSet.GetSizeX():
-            raise ValueError("The requested x range dimension is out of bounds.")
+        # Get and decode the subvolume
+        return self._readDataSubVolume(
+            iDataSet,
+            info.imarisDataType,
+            x0,
+            y0,
+            z0,
+            channel,
+            timepoint,
+            dX,
+            dY,
+            dZ,
+            out=out,
+        )
 
-        if y0 + dY > iDataSet.GetSizeY():
-            raise ValueError("The requested x range dimension is out of bounds.")
+    async def getDataSubVolumeAsync(
+        self, x0, y0, z0, channel, timepoint, dX, dY, dZ, iDataSet=None, out=None
+    ):
+        """Returns a data subvolume from Imaris, asynchronously (see ``getDataSubVolume()``).
 
-        if z0 + dZ > iDataSet.GetSizeZ():
-            raise ValueError("The requested x range dimension is out of bounds.")
+        :param x0: x coordinate of the top-left vertex of the subvolume to be returned.
+        :type x0: int
+        :param y0: y coordinate of the top-left vertex of the subvolume to be returned.
+        :type y0: int
+        :param z0: z coordinate of the top-left vertex of the subvolume to be returned.
+        :type z0: int
+        :param channel: channel index.
+        :type channel: int
+        :param timepoint: timepoint index.
+        :type timepoint: int
+        :param dX: extension in x direction of the subvolume to be returned.
+        :type dX: int
+        :param dY: extension in y direction of the subvolume to be returned.
+        :type dY: int
+        :param dZ: extension in z direction of the subvolume to be returned.
+        :type dZ: int
+        :param iDataSet: (optional) get the data subvolume from the passed IDataSet object instead of current one.
+        :type iDataSet: Imaris::IDataSet
+        :param out: (optional) C-contiguous array of shape ``(dZ, dY, dX)`` into which the subvolume is written.
+        :type out: Numpy array
 
-        # Check that the requested channel and timepoint exist
-        if channel < 0 or channel > iDataSet.GetSizeC() - 1:
-            raise Exception("The requested channel index is out of bounds!")
-        if timepoint < 0 or timepoint > iDataSet.GetSizeT() - 1:
-            raise Exception("The requested time index is out of bounds!")
+        :return: data subvolume (C-contiguous); if ``out`` is passed, ``out`` itself.
+        :rtype: Numpy array with dtype being one of ``numpy.uint8``, ``numpy.uint16``, ``numpy.float32``.
 
-        # Get the dataset class
-        imarisDataType = str(iDataSet.GetType())
-        if imarisDataType == "eTypeUInt8":
-            # Ice returns uint8 as a string: we must cast. This behavior might
-            # be changed in the future.
-            arr = np.array(
-                iDataSet.GetDataSubVolumeAs1DArrayBytes(
-                    x0, y0, z0, channel, timepoint, dX, dY, dZ
+        **EXAMPLE**
+
+        Fetch all tiles of a plane concurrently, from a single thread:
+
+        >>> tiles = await asyncio.gather(
+        ...     *[conn.getDataSubVolumeAsync(x, y, 0, 0, 0, 256, 256, 1) for y, x in origins]
+        ... )
+
+        **REMARKS**
+
+        See ``getDataVolumeAsync()``.
+        """
+
+        if self._mImarisApplication is None:
+            return None
+
+        iDataSet = await self._resolveDataSetAsync(iDataSet)
+        if iDataSet is None:
+            return None
+
+        # Get sizes
+        info = self._getDatasetInfo(
+            iDataSet, (x0 + dX, y0 + dY, z0 + dZ, channel + 1, timepoint + 1)
+        )
+        if info.sizes[0] == 0:
+            return None
+
+        # Check the boundaries
+        self._checkSubVolumeBounds(
+            info.sizes, x0, y0, z0, channel, timepoint, dX, dY, dZ
+        )
+
+        # Serve the subvolume from the cache, if the volume is there
+        if self._mVolumeCache is not None:
+            key = (self._getObjectKey(iDataSet), channel, timepoint)
+            cached = self._mVolumeCache.get(key)
+            if cached is not None:
+                return self._copyToOutput(
+                    cached[z0 : z0 + dZ, y0 : y0 + dY, x0 : x0 + dX], out
                 )
-            )
-            arr = np.frombuffer(arr.data, dtype=np.uint8)
-        elif imarisDataType == "eTypeUInt16":
-            arr = np.array(
-                iDataSet.GetDataSubVolumeAs1DArrayShorts(
-                    x0, y0, z0, channel, timepoint, dX, dY, dZ
-                ),
-                dtype=np.uint16,
-            )
-        elif imarisDataType == "eTypeFloat":
-            arr = np.array(
-                iDataSet.GetDataSubVolumeAs1DArrayFloats(
-                    x0, y0, z0, channel, timepoint, dX, dY, dZ
-                ),
-                dtype=np.float32,
-            )
-        else:
-            raise Exception("Bad value for iDataSet::getType().")
 
-        # Reshape
-        arr = np.reshape(arr, (dZ, dY, dX))
+        # Get the subvolume
+        suffix, dtype = self._getPayloadType(info.imarisDataType)
+        payload = await self._invokeAsync(
+            iDataSet,
+            "GetDataSubVolumeAs1DArray" + suffix,
+            x0,
+            y0,
+            z0,
+            channel,
+            timepoint,
+            dX,
+            dY,
+            dZ,
+        )
 
-        # Return
-        return arr
+        # Decode
+        return self._decodeDataPayload(payload, dtype, (dZ, dY, dX), out=out)
 
-    def getDataVolume(self, channel, timepoint, iDataSet=None):
+    @_tracksConnection
+    def getDataVolume(self, channel, timepoint, iDataSet=None, out=None):
         """Returns the data volume from Imaris.
 
         :param channel: channel index.
@@ -988,13 +1641,27 @@ class pIceImarisConnector(object):
                          if omitted, current dataset (i.e. ``conn.mImarisApplication.GetDataSet()``) will be used.
                          This is useful for instance when masking channels.
         :type iDataSet: Imaris::IDataSet
+        :param out: (optional) C-contiguous array of shape ``(sizeZ, sizeY, sizeX)`` and of the dataset type into
+                    which the volume is written. If omitted, a new array is allocated.
+        :type out: Numpy array
 
-        :return:  data volume (3D Numpy array).
+        :return:  data volume (3D, C-contiguous Numpy array); if ``out`` is passed, ``out`` itself.
         :rtype: Numpy array with dtype being one of ``np.uint8``, ``np.uint16``, ``np.float32``.
 
+        **EXAMPLE**
+
+        A single buffer can be reused for all timepoints:
+
+        >>> stack = None
+        >>> for t in range(sizeT):
+        ...     stack = conn.getDataVolume(0, t, out=stack)
+
         **REMARKS**
 
-        Implementation detail: this function gets the volume as a 1D array and reshapes it in place.
+        * Implementation detail: this function gets the volume as a 1D array and decodes it in place (or into
+          ``out``).
+        * If the volume cache is enabled (see ``enableVolumeCache()``), the volume is served from the cache when
+          possible. ``getDataSlice()`` and ``getDataSubVolume()`` are served from a cached volume as well.
         """
 
         if not self.isAlive():
@@ -1004,43 +1671,139 @@ class pIceImarisConnector(object):
             iDataSet = self.mImarisApplication.GetDataSet()
         else:
             # Is the passed argument a valid iDataSet?
-            if not self.mImarisApplication.GetFactory().IsDataSet(iDataSet):
+            if not self._getFactory().IsDataSet(iDataSet):
                 raise Exception("Invalid IDataSet object.")
 
-        if iDataSet is None or iDataSet.GetSizeX() == 0:
+        if iDataSet is None:
+            return None
+
+        # Get sizes
+        info = self._getDatasetInfo(iDataSet, (0, 0, 0, channel + 1, timepoint + 1))
+        (sizeX, sizeY, sizeZ, sizeC, sizeT) = info.sizes
+
+        if sizeX == 0:
             return None
 
         # Check that the requested channel and timepoint exist
-        if channel < 0 or channel > iDataSet.GetSizeC() - 1:
+        if channel < 0 or channel > sizeC - 1:
             raise Exception("The requested channel index is out of bounds!")
-        if timepoint < 0 or timepoint > iDataSet.GetSizeT() - 1:
+        if timepoint < 0 or timepoint > sizeT - 1:
             raise Exception("The requested time index is out of bounds!")
 
+        # Serve the volume from the cache, if possible
+        cache = self._mVolumeCache
+        if cache is not None:
+            key = (self._getObjectKey(iDataSet), channel, timepoint)
+            cached = cache.get(key)
+            if cached is not None:
+                return self._copyToOutput(cached, out)
+            generation = cache.getGeneration(key[0])
+
         # Get the dataset class
-        imarisDataType = str(iDataSet.GetType())
+        imarisDataType = info.imarisDataType
         if imarisDataType == "eTypeUInt8":
-            # Ice returns uint8 as a string: we must cast. This behavior might
-            # be changed in the future.
-            arr = np.array(iDataSet.GetDataVolumeAs1DArrayBytes(channel, timepoint))
-            arr = np.frombuffer(arr.data, dtype=np.uint8)
+            payload = iDataSet.GetDataVolumeAs1DArrayBytes(channel, timepoint)
+            dtype = np.uint8
         elif imarisDataType == "eTypeUInt16":
-            arr = np.array(
-                iDataSet.GetDataVolumeAs1DArrayShorts(channel, timepoint),
-                dtype=np.uint16,
-            )
+            payload = iDataSet.GetDataVolumeAs1DArrayShorts(channel, timepoint)
+            dtype = np.uint16
         elif imarisDataType == "eTypeFloat":
-            arr = np.array(
-                iDataSet.GetDataVolumeAs1DArrayFloats(channel, timepoint),
-                dtype=np.float32,
-            )
+            payload = iDataSet.GetDataVolumeAs1DArrayFloats(channel, timepoint)
+            dtype = np.float32
         else:
             raise Exception("Bad value for iDataSet::getType().")
 
-        # Reshape
-        sz = self.getSizes()
-        arr = np.reshape(arr, (sz[2], sz[1], sz[0]))
+        # The dataset may have been resized through the IDataSet object: try again with fresh metadata
+        if self._isStalePayload(iDataSet, info, payload, sizeX * sizeY * sizeZ):
+            return self.getDataVolume(channel, timepoint, iDataSet=iDataSet, out=out)
+
+        # Decode
+        arr = self._decodeDataPayload(payload, dtype, (sizeZ, sizeY, sizeX), out=out)
+
+        # Store a copy in the cache, unless the volume was invalidated while it was fetched
+        if cache is not None:
+            cache.put(key, arr.copy(), generation)
+
+        return arr
+
+    async def getDataVolumeAsync(self, channel, timepoint, iDataSet=None, out=None):
+        """Returns the data volume from Imaris, asynchronously (see ``getDataVolume()``).
+
+        :param channel: channel index.
+        :type channel: int
+        :param timepoint: timepoint index.
+        :type timepoint: int
+        :param iDataSet: (optional) get the data volume from the passed IDataSet object instead of current one.
+        :type iDataSet: Imaris::IDataSet
+        :param out: (optional) C-contiguous array of shape ``(sizeZ, sizeY, sizeX)`` into which the volume is
+                    written.
+        :type out: Numpy array
+
+        :return:  data volume (3D, C-contiguous Numpy array); if ``out`` is passed, ``out`` itself.
+        :rtype: Numpy array with dtype being one of ``np.uint8``, ``np.uint16``, ``np.float32``.
+
+        **EXAMPLE**
+
+        >>> stacks = await asyncio.gather(*[conn.getDataVolumeAsync(0, t) for t in range(sizeT)])
+
+        **REMARKS**
+
+        * The request is sent with the asynchronous method invocation of ICE (``<operation>Async()`` with Ice 3.7,
+          ``begin_<operation>()`` with Ice 3.6), so that any number of requests can be in flight without a thread
+          per request. Proxies that support neither are called in the default executor of the event loop.
+        * The liveness of the connection is not checked and passed datasets are not validated, since both would
+          block the event loop. The dataset metadata is fetched (synchronously) on first use and then cached
+          (see ``getDatasetInfo()``).
+        """
+
+        if self._mImarisApplication is None:
+            return None
+
+        iDataSet = await self._resolveDataSetAsync(iDataSet)
+        if iDataSet is None:
+            return None
+
+        # Get sizes
+        info = self._getDatasetInfo(iDataSet, (0, 0, 0, channel + 1, timepoint + 1))
+        (sizeX, sizeY, sizeZ, sizeC, sizeT) = info.sizes
+
+        if sizeX == 0:
+            return None
+
+        # Check that the requested channel and timepoint exist
+        if channel < 0 or channel > sizeC - 1:
+            raise Exception("The requested channel index is out of bounds!")
+        if timepoint < 0 or timepoint > sizeT - 1:
+            raise Exception("The requested time index is out of bounds!")
+
+        # Serve the volume from the cache, if possible
+        cache = self._mVolumeCache
+        if cache is not None:
+            key = (self._getObjectKey(iDataSet), channel, timepoint)
+            cached = cache.get(key)
+            if cached is not None:
+                return self._copyToOutput(cached, out)
+            generation = cache.getGeneration(key[0])
+
+        # Get the volume
+        suffix, dtype = self._getPayloadType(info.imarisDataType)
+        payload = await self._invokeAsync(
+            iDataSet, "GetDataVolumeAs1DArray" + suffix, channel, timepoint
+        )
+
+        # The dataset may have been resized through the IDataSet object: try again with fresh metadata
+        if self._isStalePayload(iDataSet, info, payload, sizeX * sizeY * sizeZ):
+            return await self.getDataVolumeAsync(
+                channel, timepoint, iDataSet=iDataSet, out=out
+            )
+
+        # Decode
+        arr = self._decodeDataPayload(payload, dtype, (sizeZ, sizeY, sizeX), out=out)
+
+        # Store a copy in the cache, unless the volume was invalidated while it was fetched
+        if cache is not None:
+            cache.put(key, arr.copy(), generation)
 
-        # Return
         return arr
 
     def getExtends(self):
@@ -1060,19 +1823,123 @@ class pIceImarisConnector(object):
         """
 
         # Do we have a dataset?
-        if self._mImarisApplication.GetDataSet() is None:
+        iDataSet = self._mImarisApplication.GetDataSet()
+        if iDataSet is None:
             return None
 
-        # Wrap the extends into a tuple
-        return (
-            self._mImarisApplication.GetDataSet().GetExtendMinX(),
-            self._mImarisApplication.GetDataSet().GetExtendMaxX(),
-            self._mImarisApplication.GetDataSet().GetExtendMinY(),
-            self._mImarisApplication.GetDataSet().GetExtendMaxY(),
-            self._mImarisApplication.GetDataSet().GetExtendMinZ(),
-            self._mImarisApplication.GetDataSet().GetExtendMaxZ(),
+        # The extends are read from the cached dataset metadata
+        return self._getDatasetInfo(iDataSet).extends
+
+    def getFilamentGraphs(self, iFilaments=None, workers=8):
+        """Returns the graphs of all filaments of an IFilaments object (all timepoints), packed into a few arrays.
+
+        :param iFilaments: (optional) filaments; if omitted, the Filaments object currently selected in the Surpass
+                           Scene.
+        :type iFilaments: Imaris::IFilaments
+        :param workers: (optional, default 8) number of threads that query the filaments concurrently.
+        :type workers: int
+
+        :return: dictionary with the following arrays:
+
+                 * "ids": filament IDs (N).
+                 * "timeIndices": time index of each filament (N).
+                 * "positions": [x, y, z] coordinates of the vertices of all filaments (V x 3, float32).
+                 * "radii": radius of each vertex (V, float32).
+                 * "types": type of each vertex (V, int32): 0 for dendrites, 1 for spines.
+                 * "edges": edges of all filaments (E x 2, int32), as indices into "positions".
+                 * "roots": index into "positions" of the beginning vertex of each filament (N).
+                 * "vertexOffsets", "edgeOffsets": offsets (CSR-style, N + 1) of the filaments into the vertices
+                   and the edges: the vertices of filament i are ``positions[vertexOffsets[i] : vertexOffsets[i + 1]]``.
+
+        :rtype: dict
+
+        **EXAMPLE**
+
+        Build the (undirected) adjacency matrix of all filaments and compute the lengths of the edges:
+
+        >>> graphs = conn.getFilamentGraphs(iFilaments)
+        >>> edges = graphs["edges"]
+        >>> lengths = np.linalg.norm(graphs["positions"][edges[:, 0]] - graphs["positions"][edges[:, 1]], axis=1)
+        >>> n = graphs["positions"].shape[0]
+        >>> adjacency = scipy.sparse.coo_matrix((lengths, (edges[:, 0], edges[:, 1])), shape=(n, n))
+
+        **REMARKS**
+
+        * The edges refer to the packed vertices: the vertex offsets of the filaments are already added. Since the
+          filaments are not connected to each other, the connected components of the graph are the filaments.
+        * The type of the object is checked once, and the filaments are then queried in batches by a pool of
+          threads.
+        """
+
+        if not self.isAlive():
+            return None
+
+        if iFilaments is None:
+            iFilaments = self.getSurpassSelection("Filaments")
+            if iFilaments is None:
+                raise Exception("No Filaments object selected in the Surpass Scene.")
+        else:
+            factory = self._getFactory()
+            if not factory.IsFilaments(iFilaments):
+                raise Exception("Expected IFilaments object.")
+            iFilaments = factory.ToFilaments(iFilaments)
+
+        nFilaments = iFilaments.GetNumberOfFilaments()
+        ids = np.array(iFilaments.GetIds(), dtype=np.int64)
+        timeIndices = np.zeros(nFilaments, dtype=np.int64)
+        roots = np.zeros(nFilaments, dtype=np.int64)
+        graphs = [None] * nFilaments
+
+        # Query the filaments in batches, concurrently
+        def query(batch):
+            for i in batch:
+                i = int(i)
+                timeIndices[i] = iFilaments.GetTimeIndex(i)
+                roots[i] = iFilaments.GetBeginningVertexIndex(i)
+                graphs[i] = (
+                    np.asarray(iFilaments.GetPositionsXYZ(i), dtype=np.float32),
+                    np.asarray(iFilaments.GetRadii(i), dtype=np.float32),
+                    np.asarray(iFilaments.GetTypes(i), dtype=np.int32),
+                    np.asarray(iFilaments.GetEdges(i), dtype=np.int32),
+                )
+
+        if nFilaments > 0:
+            batches = np.array_split(
+                np.arange(nFilaments), min(nFilaments, 4 * workers)
+            )
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for _ in executor.map(query, batches):
+                    pass
+
+        # Pack
+        vertexCounts = np.array([g[1].size for g in graphs], dtype=np.int64)
+        edgeCounts = np.array([g[3].size // 2 for g in graphs], dtype=np.int64)
+        vertexOffsets = np.concatenate([[0], np.cumsum(vertexCounts)])
+        edgeOffsets = np.concatenate([[0], np.cumsum(edgeCounts)])
+
+        def pack(k, dtype, columns=None):
+            arrays = [np.empty(0, dtype=dtype)] + [g[k].ravel() for g in graphs]
+            packed = np.concatenate(arrays)
+            return packed if columns is None else packed.reshape(-1, columns)
+
+        # Make the edges refer to the packed vertices
+        edges = pack(3, np.int32, 2)
+        edges += np.repeat(vertexOffsets[:-1], edgeCounts)[:, np.newaxis].astype(
+            np.int32
         )
 
+        return {
+            "ids": ids,
+            "timeIndices": timeIndices,
+            "positions": pack(0, np.float32, 3),
+            "radii": pack(1, np.float32),
+            "types": pack(2, np.int32),
+            "edges": edges,
+            "roots": roots + vertexOffsets[:-1],
+            "vertexOffsets": vertexOffsets,
+            "edgeOffsets": edgeOffsets,
+        }
+
     def getImarisVersionAsInteger(self):
         """Returns the Imaris version as an integer.
 
@@ -1119,6 +1986,21 @@ class pIceImarisConnector(object):
         # Cast into an integer and return
         return int(version)
 
+    def getLaunchStatistics(self):
+        """Returns the timings of the last launch of Imaris by ``startImaris()``.
+
+        :return: dictionary with the wall-clock time (``elapsed``) and the CPU time of this process (``cpuTime``)
+                 spent in ``startImaris()``, in seconds, and the number of times ImarisServerIce (``serverProbes``)
+                 and Imaris (``applicationProbes``) were probed for readiness; or None if Imaris was not started by
+                 this connector.
+        :rtype: dict
+        """
+
+        if self._mLaunchStatistics is None:
+            return None
+
+        return dict(self._mLaunchStatistics)
+
     def getNumpyDatatype(self):
         """Returns the datatype of the dataset as a python Numpy type (or None).
 
@@ -1137,17 +2019,7 @@ class pIceImarisConnector(object):
             return None
 
         # Get the dataset class
-        imarisDataType = str(iDataSet.GetType())
-        if imarisDataType == "eTypeUInt8":
-            return np.uint8
-        elif imarisDataType == "seTypeUInt16":
-            return np.uint16
-        elif imarisDataType == "eTypeFloat":
-            return np.float32
-        elif imarisDataType == "eTypeUnknown":
-            return None
-        else:
-            raise Exception("Bad value for iDataSet::GetType().")
+        return self._getDatasetInfo(iDataSet).datatype
 
     def getSizes(self):
         """Returns the dataset sizes.
@@ -1164,14 +2036,249 @@ class pIceImarisConnector(object):
         * sizeT : number of time points.
         """
 
-        # Wrap the sizes into a tuple
-        return (
-            self._mImarisApplication.GetDataSet().GetSizeX(),
-            self._mImarisApplication.GetDataSet().GetSizeY(),
-            self._mImarisApplication.GetDataSet().GetSizeZ(),
-            self._mImarisApplication.GetDataSet().GetSizeC(),
-            self._mImarisApplication.GetDataSet().GetSizeT(),
-        )
+        # Do we have a dataset?
+        iDataSet = self._mImarisApplication.GetDataSet()
+        if iDataSet is None:
+            return None
+
+        # The sizes are read from the cached dataset metadata
+        return self._getDatasetInfo(iDataSet).sizes
+
+    def getSceneIndex(self, refresh=False):
+        """Returns an index of all objects of the Surpass Scene by type, name and folder.
+
+        :param refresh: (optional, default False) if True, the scene is scanned again even if it does not seem to
+                        have changed.
+        :type refresh: Boolean
+
+        :return: index of the Surpass Scene, or None if there is no Surpass Scene.
+        :rtype: SceneIndex
+
+        **EXAMPLE**
+
+        Scan the scene once and query it several times:
+
+        >>> index = conn.getSceneIndex()
+        >>> spots = conn.getAllSurpassChildren(True, "Spots", sceneIndex=index)
+        >>> surfaces = conn.getAllSurpassChildren(True, "Surfaces", sceneIndex=index)
+        >>> cells = index.ofType("Cells")
+
+        **REMARKS**
+
+        The index is cached. It is returned again as long as the number of children and the name of every folder
+        are unchanged, which costs two calls per folder instead of a full scan. Changes that keep these unchanged
+        (e.g. renaming an object, or replacing an object by another one in the same folder) are not detected: pass
+        ``refresh=True`` after such changes.
+        """
+
+        if not self.isAlive():
+            return None
+
+        surpassScene = self.mImarisApplication.GetSurpassScene()
+        if surpassScene is None:
+            self._mSceneIndex = None
+            return None
+
+        if (
+            refresh
+            or self._mSceneIndex is None
+            or self._mSceneIndex.isStale(surpassScene)
+        ):
+            # Forget the types of the objects that may have been removed
+            self._mObjectTypes.clear()
+            self._mSceneIndex = SceneIndex(self, surpassScene)
+        return self._mSceneIndex
+
+    def getStatisticsTable(self, iObject=None, names=None):
+        """Returns the statistics of an object as a columnar table.
+
+        :param iObject: (optional) object with statistics (e.g. ISpots, ISurfaces, ICells); if omitted, the object
+                        currently selected in the Surpass Scene.
+        :type iObject: Imaris::IDataItem
+        :param names: (optional) names of the statistics to fetch (e.g. ``["Volume", "Intensity Mean"]``); if
+                      omitted, all statistics are fetched.
+        :type names: list
+
+        :return: statistics table.
+        :rtype: StatisticsTable
+
+        **EXAMPLE**
+
+        >>> table = conn.getStatisticsTable(iSpots, ["Intensity Mean", "Diameter X"])
+        >>> rows = table.rowsAtTimeIndex(0)
+        >>> means = table["Intensity Mean Ch=1"][rows]
+
+        **REMARKS**
+
+        * If names are passed and Imaris supports ``GetStatisticsByName()``, only the requested statistics are
+          transferred.
+        * Tables are cached per object and names: call ``clearStatisticsCache()`` when the statistics of the
+          object changed.
+        """
+
+        if not self.isAlive():
+            return None
+
+        if iObject is None:
+            iObject = self._mImarisApplication.GetSurpassSelection()
+            if iObject is None:
+                raise Exception(
+                    "If no object is passed to the function, then an object must be selected in the Surpass Scene."
+                )
+
+        # Serve the table from the cache, if possible
+        key = (self._getObjectKey(iObject), None if names is None else tuple(names))
+        table = self._mStatisticsTables.get(key)
+        if table is None:
+            table = StatisticsTable(self._fetchStatistics(iObject, names))
+            self._mStatisticsTables[key] = table
+        return table
+
+    def getSurfaceMeshes(
+        self,
+        iSurfaces=None,
+        indices=None,
+        workers=8,
+        normals=True,
+        filename=None,
+        batchSize=64,
+    ):
+        """Returns the meshes (vertices, triangles and normals) of the surfaces of an ISurfaces object, packed into
+        a few arrays.
+
+        :param iSurfaces: (optional) surfaces; if omitted, the Surfaces object currently selected in the Surpass
+                          Scene.
+        :type iSurfaces: Imaris::ISurfaces
+        :param indices: (optional) indices of the surfaces; if omitted, all surfaces.
+        :type indices: list or Numpy array
+        :param workers: (optional, default 8) number of threads that fetch the meshes concurrently.
+        :type workers: int
+        :param normals: (optional, default True) set to False to skip fetching the normals.
+        :type normals: bool
+        :param filename: (optional) if set, the arrays are written to this .npz file instead of being returned.
+        :type filename: str
+        :param batchSize: (optional, default 64) number of surfaces fetched by a thread in one go.
+        :type batchSize: int
+
+        :return: dictionary with the following arrays (or the file name, if filename is set):
+
+                 * "indices": surface indices (N).
+                 * "vertices": vertices of all surfaces (V x 3, float32).
+                 * "triangles": triangles of all surfaces (T x 3, int32), as indices into "vertices".
+                 * "normals": normals of all vertices (V x 3, float32), if normals is True.
+                 * "vertexOffsets", "triangleOffsets": offsets (CSR-style, N + 1) of the surfaces into the vertices
+                   and the triangles: the vertices of surface ``indices[i]`` are
+                   ``vertices[vertexOffsets[i] : vertexOffsets[i + 1]]``.
+
+        :rtype: dict
+
+        **EXAMPLE**
+
+        Export all meshes, without keeping them in memory:
+
+        >>> conn.getSurfaceMeshes(iSurfaces, filename="meshes.npz")
+        >>> meshes = np.load("meshes.npz")
+
+        **REMARKS**
+
+        * The triangles refer to the packed vertices: the offsets of the surfaces are already added.
+        * When writing to a file, the meshes are spooled to temporary files batch by batch, so that memory use
+          does not grow with the number of surfaces.
+        """
+
+        if not self.isAlive():
+            return None
+
+        if iSurfaces is None:
+            iSurfaces = self.getSurpassSelection("Surfaces")
+            if iSurfaces is None:
+                raise Exception("No Surfaces object selected in the Surpass Scene.")
+
+        if indices is None:
+            indices = np.arange(iSurfaces.GetNumberOfSurfaces(), dtype=np.int64)
+        else:
+            indices = np.asarray(indices, dtype=np.int64).ravel()
+
+        # Packed arrays: kept in memory, or spooled to temporary files
+        names = ["vertices", "triangles"] + (["normals"] if normals else [])
+        if filename is None:
+            packed = {name: [] for name in names}
+        else:
+            # Only needed to write files: imported here to keep the import of the module fast
+            import shutil
+            import tempfile
+            import zipfile
+
+            packed = {name: tempfile.TemporaryFile() for name in names}
+
+        vertexCounts = np.zeros(indices.size, dtype=np.int64)
+        triangleCounts = np.zeros(indices.size, dtype=np.int64)
+        nVertices = 0
+        try:
+            batches = [
+                indices[i : i + batchSize] for i in range(0, indices.size, batchSize)
+            ]
+            results = self._fetchSurfaceMeshes(iSurfaces, batches, workers, normals)
+            for b, (meshes, vCounts, tCounts) in enumerate(results):
+                first = b * batchSize
+                vertexCounts[first : first + vCounts.size] = vCounts
+                triangleCounts[first : first + tCounts.size] = tCounts
+
+                # Make the triangles refer to the packed vertices
+                starts = nVertices + np.cumsum(vCounts) - vCounts
+                meshes["triangles"] += np.repeat(starts, tCounts)[:, np.newaxis].astype(
+                    np.int32
+                )
+                nVertices += int(vCounts.sum())
+
+                for name in names:
+                    if filename is None:
+                        packed[name].append(meshes[name])
+                    else:
+                        packed[name].write(meshes[name].tobytes())
+
+            # Offsets
+            arrays = {
+                "indices": indices,
+                "vertexOffsets": np.concatenate([[0], np.cumsum(vertexCounts)]),
+                "triangleOffsets": np.concatenate([[0], np.cumsum(triangleCounts)]),
+            }
+
+            if filename is None:
+                for name in names:
+                    dtype = np.int32 if name == "triangles" else np.float32
+                    arrays[name] = np.concatenate(
+                        [np.empty((0, 3), dtype=dtype)] + packed[name]
+                    )
+                return arrays
+
+            # Write the small arrays, then copy the spooled ones into the file
+            shapes = {
+                "vertices": ((nVertices, 3), np.float32),
+                "normals": ((nVertices, 3), np.float32),
+                "triangles": ((int(triangleCounts.sum()), 3), np.int32),
+            }
+            with zipfile.ZipFile(filename, "w", zipfile.ZIP_STORED) as npz:
+                for name, array in arrays.items():
+                    with npz.open(name + ".npy", "w", force_zip64=True) as f:
+                        np.lib.format.write_array(f, array)
+                for name in names:
+                    shape, dtype = shapes[name]
+                    header = {
+                        "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                        "fortran_order": False,
+                        "shape": shape,
+                    }
+                    packed[name].seek(0)
+                    with npz.open(name + ".npy", "w", force_zip64=True) as f:
+                        np.lib.format.write_array_header_1_0(f, header)
+                        shutil.copyfileobj(packed[name], f, 2**22)
+            return filename
+
+        finally:
+            if filename is not None:
+                for spool in packed.values():
+                    spool.close()
 
     def getSurpassCameraRotationMatrix(self):
         """Calculates the rotation matrix that corresponds to current view in the Surpass Scene (from the Camera
@@ -1245,7 +2352,7 @@ class pIceImarisConnector(object):
         # Return R and isI
         return R, isI
 
-    def getSurpassSelection(self, typeFilter=None):
+    def getSurpassSelection(self, typeFilter=None, sceneIndex=None):
         """Returns the auto-cast current surpass selection. If the 'typeFilter' parameter is specified, the object
          class is checked against it and None is returned instead of the object if the type does not match.
 
@@ -1265,6 +2372,10 @@ class pIceImarisConnector(object):
         * 'SurpassCamera'
         * 'Volume'
 
+        :param sceneIndex: (optional) look the type of the selection up in this index of the Surpass Scene (see
+                           ``getSceneIndex()``); only the selection itself is then requested from Imaris.
+        :type sceneIndex: SceneIndex
+
         :return: autocast, currently selected surpass object; if nothing is selected, or if the object class does not
                  match the passed type, selection will be None instead.
         :rtype: One of:
@@ -1289,8 +2400,16 @@ class pIceImarisConnector(object):
         if not self.isAlive():
             return None
 
-        # Get current selection
-        selection = self.autocast(self.mImarisApplication.GetSurpassSelection())
+        # Get current selection (already cast, if it is in the index)
+        selection = self.mImarisApplication.GetSurpassSelection()
+        if selection is None:
+            return None
+        indexed = None if sceneIndex is None else sceneIndex.lookup(selection)
+        if indexed is not None:
+            if typeFilter is not None and not self._isOfType(indexed, typeFilter):
+                return None
+            return indexed
+        selection = self.autocast(selection)
         if selection is None:
             return None
 
@@ -1305,7 +2424,7 @@ class pIceImarisConnector(object):
         # Return the object
         return selection
 
-    def getTracks(self, iObject=None):
+    def getTracks(self, iObject=None, compact=False, workers=8):
         """This method returns the tracks associated to an ISpots or an ISurfaces object. If no object is passed
         as argument, the function will try with the currently selected object in the Surpass Scene. If this is not
         an ISpots nor an ISurfaces object, an empty result set will be returned.
@@ -1313,12 +2432,28 @@ class pIceImarisConnector(object):
         :param iSpots (optional, default None) (optional) either an ISpots or an ISurfaces object. If not passed,
         the function will try with the currently selected object in the Surpass Scene.
         :type Imaris::IDataItem
-
-        :return: tuple containing an array of tracks and and array of starting time indices for each track.
+        :param compact: (optional, default False) if True, return all tracks in a single array (see below).
+        :type compact: Boolean
+        :param workers: (optional, default 8) number of threads used to query the surfaces one by one, if the
+                        positions and time indices of an ISurfaces object cannot be read from its statistics.
+        :type workers: int
+
+        :return: tuple containing an array of tracks and and array of starting time indices for each track; if
+                 ``compact`` is True, tuple ``(positions, offsets, startTimes)``.
         :rtype: tuple
 
         The tracks array will be empty if no tracks exist for the object or if the argument is not an ISpots or an
         ISurfaces object. Each track is in the form [x y z]n, were n is the length of the track.
+
+        If ``compact`` is True, the tracks are returned concatenated in one (N x 3) ``positions`` array, together
+        with an ``offsets`` array of length nTracks + 1 (CSR-style): track i is
+        ``positions[offsets[i] : offsets[i + 1], :]``. ``startTimes`` is then a Numpy array.
+
+        **REMARKS**
+
+        * Tracks are sorted by track ID; the positions of each track are sorted by spot (or surface) index.
+        * The centers of mass and time indices of ISurfaces objects are read in bulk from the "Position X/Y/Z" and
+          "Time Index" statistics. If these are not available, the surfaces are queried one by one, concurrently.
         """
 
         # Initialize tracks and timeIndices
@@ -1341,7 +2476,7 @@ class pIceImarisConnector(object):
                 )
 
         # Check the type
-        factory = self.mImarisApplication.GetFactory()
+        factory = self._getFactory()
 
         if factory.IsSpots(iObject) or factory.IsSurfaces(iObject):
             iObject = self.autocast(iObject)
@@ -1352,51 +2487,47 @@ class pIceImarisConnector(object):
 
         # Get the IDs of the tracks
         ids = np.array(iObject.GetTrackIds())
-        uids = np.unique(iObject.GetTrackIds())
-        nTracks = uids.size
 
         # Get all spot positions and the track edges
 
-        # Get the positions
+        # Get the positions and the time indices
         if factory.IsSpots(iObject):
-            # This is an ISPots object. We can get all positions in one shot.
+            # This is an ISPots object. We can get all positions and time indices
+            # in one shot.
             positions = np.array(iObject.GetPositionsXYZ())
+            timeIndices = np.array(iObject.GetIndicesT())
         else:
-            # This is an ISurfaces object. We query each contained surface for its
-            # center of mass.
-            nSurfaces = iObject.GetNumberOfSurfaces()
-            positions = np.zeros((nSurfaces, 3))
-            for i in range(nSurfaces):
-                positions[i, :] = iObject.GetCenterOfMass(i)[0]
-
-        # Get the time indices
-        if factory.IsSpots(iObject):
-            # This is an ISPots object. We can get all time indices in one shot.
-            timeIndices = iObject.GetIndicesT()
-        else:
-            # This is an ISurfaces object. We query each contained surface for its
-            # center of mass.
-            timeIndices = np.zeros(nSurfaces)
-            for i in range(nSurfaces):
-                timeIndices[i] = iObject.GetTimeIndex(i)
+            # This is an ISurfaces object.
+            positions, timeIndices = self._getSurfacesCentersAndTimes(iObject, workers)
 
         # Get the track edges
         trackEdges = np.array(iObject.GetTrackEdges())
 
-        # Now extract one track after the other and store them into a cell array
-        tracks = []
-        startTimes = []
+        # Group the spots by track in one sweep
+        spotIndices, offsets = self._groupTrackEdges(ids, trackEdges)
+        positions = positions.reshape(-1, 3)[spotIndices, :]
+        startTimes = timeIndices[spotIndices[offsets[:-1]]]
+
+        if compact:
+            return positions, offsets, startTimes
+
+        # Split into one array per track
+        tracks = np.split(positions, offsets[1:-1]) if offsets.size > 1 else []
+        return tracks, startTimes.tolist()
+
+    def getVolumeCacheStatistics(self):
+        """Returns the usage statistics of the volume cache (see ``enableVolumeCache()``).
 
-        for i in range(nTracks):
-            # Get the positions and edges for current track (id)
-            edges = trackEdges[ids == uids[i], :]
-            edges = np.unique(edges)
+        :return: dictionary with the number of cache ``hits``, ``misses`` and ``evictions``, the number of cached
+                 volumes (``entries``), their total size (``bytes``) and the byte budget (``maxBytes``); or None if
+                 the cache is disabled.
+        :rtype: dict
+        """
 
-            # Extract and store the track and the initial time index
-            tracks.append(positions[edges, :])
-            startTimes.append(timeIndices[edges[0]])
+        if self._mVolumeCache is None:
+            return None
 
-        return tracks, startTimes
+        return self._mVolumeCache.getStatistics()
 
     def getVoxelSizes(self):
         """Returns the X, Y, and Z voxel sizes of the dataset.
@@ -1411,30 +2542,25 @@ class pIceImarisConnector(object):
         * voxelSizeZ: voxel Size in Z direction.
         """
 
-        # Voxel size X
-        vX = (
-            self._mImarisApplication.GetDataSet().GetExtendMaxX()
-            - self._mImarisApplication.GetDataSet().GetExtendMinX()
-        ) / self._mImarisApplication.GetDataSet().GetSizeX()
-
-        # Voxel size Y
-        vY = (
-            self._mImarisApplication.GetDataSet().GetExtendMaxY()
-            - self._mImarisApplication.GetDataSet().GetExtendMinY()
-        ) / self._mImarisApplication.GetDataSet().GetSizeY()
-
-        # Voxel size Z
-        vZ = (
-            self._mImarisApplication.GetDataSet().GetExtendMaxZ()
-            - self._mImarisApplication.GetDataSet().GetExtendMinZ()
-        ) / self._mImarisApplication.GetDataSet().GetSizeZ()
+        # Do we have a dataset?
+        iDataSet = self._mImarisApplication.GetDataSet()
+        if iDataSet is None:
+            return None
 
-        # Wrap the voxel sizes into a tuple
-        return vX, vY, vZ
+        # The voxel sizes are calculated from the cached dataset metadata
+        return self._getDatasetInfo(iDataSet).voxelSizes
 
     def info(self):
         """Prints to console the full paths to the Imaris and ImarisServerIce executables  and the ImarisLib module."""
 
+        # The paths to Imaris are not known if the connector was created from a
+        # running Imaris without looking for it
+        if self._mImarisExePath == "":
+            try:
+                self._findImaris()
+            except OSError:
+                pass
+
         # Display info to console
         print("pIceImarisConnector version " + self.version + " using:")
         print("- Imaris path: " + self._mImarisPath)
@@ -1448,20 +2574,173 @@ class pIceImarisConnector(object):
 
         :return: True if the connection is still alive, False otherwise.
         :rtype: Boolean
+
+        **REMARKS**
+
+        Imaris is only queried if no call to Imaris succeeded in the last second (see ``setLivenessTTL()``): the
+        data-transfer methods (``getDataVolume()``, ``setDataSubVolume()``, ...) and the heartbeat (see
+        ``startHeartbeat()``) renew the liveness, and mark the connection as dead when ICE reports that it was
+        lost.
         """
 
         # Do we have an ImarisApplication object?
         if self._mImarisApplication is None:
             return False
 
-        # If we do, we try accessing it
+        # Trust a recent successful call
+        lastAliveTime = self._mLastAliveTime
+        if (
+            lastAliveTime is not None
+            and time.monotonic() - lastAliveTime < self._mLivenessTTL
+        ):
+            return True
+
+        # Otherwise, we try accessing it
         try:
             self.mImarisApplication.GetVersion()
+            self._mLastAliveTime = time.monotonic()
             return True
         except:
-            self._mImarisApplication = None
+            self._markDead()
             return False
 
+    def iterDataTiles(self, channel, timepoint, tileShape, overlap=0, iDataSet=None):
+        """Iterates over a data volume from Imaris tile by tile.
+
+        :param channel: channel index.
+        :type channel: int
+        :param timepoint: timepoint index.
+        :type timepoint: int
+        :param tileShape: size (dZ, dY, dX) of the tiles in voxels. A scalar is used for all three dimensions.
+        :type tileShape: int, tuple, list or Numpy array
+        :param overlap: (optional, default 0) number of voxels (oZ, oY, oX) shared by neighboring tiles. A scalar
+                        is used for all three dimensions. The overlap must be smaller than the tile size.
+        :type overlap: int, tuple, list or Numpy array
+        :param iDataSet: (optional) get the tiles from the passed IDataSet object instead of current one;
+                         if omitted, current dataset (i.e. ``conn.mImarisApplication.GetDataSet()``) will be used.
+        :type iDataSet: Imaris::IDataSet
+
+        :return: generator of ``(z0, y0, x0, tile)`` tuples, where ``tile`` is a 3D Numpy array.
+        :rtype: generator
+
+        **EXAMPLE**
+
+        The full stack can be reassembled from the tiles:
+
+        >>> stack = np.zeros((sizeZ, sizeY, sizeX), dtype=conn.getNumpyDatatype())
+        >>> for z0, y0, x0, tile in conn.iterDataTiles(0, 0, (16, 256, 256)):
+        ...     stack[z0 : z0 + tile.shape[0], y0 : y0 + tile.shape[1], x0 : x0 + tile.shape[2]] = tile
+
+        **REMARKS**
+
+        * Each tile is fetched with a separate ``getDataSubVolume()`` call, so that memory use depends on the tile
+          size and not on the size of the dataset.
+        * Tiles at the upper borders of the dataset are clipped and can therefore be smaller than ``tileShape``.
+        * Coordinates and extensions are in voxels (integers) and not in units!
+        """
+
+        if not self.isAlive():
+            return iter([])
+
+        if iDataSet is None:
+            currentDataSet = self.mImarisApplication.GetDataSet()
+        else:
+            # Is the passed argument a valid iDataSet?
+            if not self._getFactory().IsDataSet(iDataSet):
+                raise Exception("Invalid IDataSet object.")
+            currentDataSet = iDataSet
+
+        if currentDataSet is None:
+            return iter([])
+
+        sizeX, sizeY, sizeZ, _, _ = self._getDatasetInfo(currentDataSet).sizes
+        if sizeX == 0:
+            return iter([])
+
+        # Make sure to have tile shape and overlap for all three dimensions
+        tileShape = self._toVoxelTriplet(tileShape, "tileShape")
+        overlap = self._toVoxelTriplet(overlap, "overlap")
+
+        if any(t < 1 for t in tileShape):
+            raise ValueError("tileShape must be positive.")
+
+        if any(o < 0 or o >= t for o, t in zip(overlap, tileShape)):
+            raise ValueError("overlap must be non-negative and smaller than tileShape.")
+
+        # Calculate the tile origins along each of the dimensions
+        sizes = (sizeZ, sizeY, sizeX)
+        origins = []
+        for size, tile, over in zip(sizes, tileShape, overlap):
+            starts = [0]
+            while starts[-1] + tile < size:
+                starts.append(starts[-1] + tile - over)
+            origins.append(starts)
+
+        return self._generateDataTiles(
+            channel, timepoint, tileShape, sizes, origins, iDataSet
+        )
+
+    def iterTimepoints(self, channel, prefetch=2, timepoints=None, iDataSet=None):
+        """Iterates over the timepoints of a channel, fetching the next volumes in the background.
+
+        :param channel: channel index.
+        :type channel: int
+        :param prefetch: (optional, default 2) number of volumes that are fetched ahead of the one being
+                         processed. If 0, every volume is fetched only when it is requested.
+        :type prefetch: int
+        :param timepoints: (optional) timepoint indices to iterate over; if omitted, all timepoints are used.
+        :type timepoints: list
+        :param iDataSet: (optional) get the data volumes from the passed IDataSet object instead of current one;
+                         if omitted, current dataset (i.e. ``conn.mImarisApplication.GetDataSet()``) will be used.
+        :type iDataSet: Imaris::IDataSet
+
+        :return: generator of ``(timepoint, stack)`` tuples, where ``stack`` is a 3D Numpy array.
+        :rtype: generator
+
+        **EXAMPLE**
+
+        Download, processing and upload overlap (see also ``DataVolumeWriter``):
+
+        >>> with DataVolumeWriter(conn) as writer:
+        ...     for t, stack in conn.iterTimepoints(0):
+        ...         writer.setDataVolume(process(stack), 1, t)
+
+        **REMARKS**
+
+        * While a volume is processed, at most ``prefetch`` more are fetched or held by the iterator. When the next
+          volume is requested, the previous one is still referenced by the caller: up to ``prefetch + 2`` volumes
+          can then be in memory at the same time.
+        * An exception raised while fetching a volume is re-raised when that volume is reached.
+        """
+
+        if not self.isAlive():
+            return iter([])
+
+        if iDataSet is None:
+            currentDataSet = self.mImarisApplication.GetDataSet()
+        else:
+            # Is the passed argument a valid iDataSet?
+            if not self._getFactory().IsDataSet(iDataSet):
+                raise Exception("Invalid IDataSet object.")
+            currentDataSet = iDataSet
+
+        if currentDataSet is None:
+            return iter([])
+
+        sizeX, _, _, _, sizeT = self._getDatasetInfo(currentDataSet).sizes
+        if sizeX == 0:
+            return iter([])
+
+        if prefetch < 0:
+            raise ValueError("prefetch must be non-negative.")
+
+        if timepoints is None:
+            timepoints = range(sizeT)
+
+        return self._generateTimepoints(
+            channel, prefetch, [int(t) for t in timepoints], iDataSet
+        )
+
     @staticmethod
     def mapAxisAngleToQuaternion(r_axis, r_angle):
         """This method converts axis–angle representation to quaternion.
@@ -1641,16 +2920,11 @@ class pIceImarisConnector(object):
             uPos = uPos.astype(np.float32)
 
         # Get the voxel sizes into a Numpy array
-        voxelSizes = np.array(self.getVoxelSizes())
+        info = self._getDatasetInfo(self.mImarisApplication.GetDataSet())
+        voxelSizes = np.array(info.voxelSizes)
 
         # Get the extends into a Numpy array
-        extends = np.array(
-            [
-                self.mImarisApplication.GetDataSet().GetExtendMinX(),
-                self.mImarisApplication.GetDataSet().GetExtendMinY(),
-                self.mImarisApplication.GetDataSet().GetExtendMinZ(),
-            ]
-        )
+        extends = np.array(info.extends[0::2])
 
         # Map units to voxels
         p = (uPos - extends) / voxelSizes + 0.5
@@ -1692,16 +2966,11 @@ class pIceImarisConnector(object):
             vPos = vPos.astype(np.float32)
 
         # Get the voxel sizes
-        voxelSizes = np.array(self.getVoxelSizes())
+        info = self._getDatasetInfo(self.mImarisApplication.GetDataSet())
+        voxelSizes = np.array(info.voxelSizes)
 
         # Get the extends into a Numpy array
-        extends = np.array(
-            [
-                self.mImarisApplication.GetDataSet().GetExtendMinX(),
-                self.mImarisApplication.GetDataSet().GetExtendMinY(),
-                self.mImarisApplication.GetDataSet().GetExtendMinZ(),
-            ]
-        )
+        extends = np.array(info.extends[0::2])
 
         # Map units to voxels
         p = (vPos - 0.5) * voxelSizes + extends
@@ -1805,7 +3074,7 @@ class pIceImarisConnector(object):
 
         # Wrap it into an int32
         rgba = np.frombuffer(rgbaVector.data, dtype=np.int32)
-        return int(rgba)
+        return int(rgba[0])
 
     @staticmethod
     def multiplyQuaternions(q1, q2):
@@ -1909,7 +3178,293 @@ class pIceImarisConnector(object):
 
         return qc
 
-    def setDataVolume(self, stack, channel, timepoint):
+    def refreshDatasetInfo(self, iDataSet=None):
+        """Fetches the dataset metadata from Imaris again (see ``getDatasetInfo()``).
+
+        :param iDataSet: (optional) refresh the metadata of the passed IDataSet object instead of current one;
+                         if omitted, current dataset (i.e. ``conn.mImarisApplication.GetDataSet()``) will be used.
+        :type iDataSet: Imaris::IDataSet
+
+        :return: updated dataset metadata, or None if there is no dataset.
+        :rtype: DatasetInfo
+        """
+
+        if not self.isAlive():
+            return None
+
+        if iDataSet is None:
+            iDataSet = self._mImarisApplication.GetDataSet()
+
+        if iDataSet is None:
+            return None
+
+        self._invalidateDatasetInfo(iDataSet)
+        return self._getDatasetInfo(iDataSet)
+
+    def resetState(self, quiet=True):
+        """Closes current dataset and empties the Surpass Scene, so that the Imaris instance can be reused for an
+        unrelated dataset.
+
+        :param quiet: (optional, default True) If True, current dataset is marked as unmodified, so that Imaris
+                      won't pop-up a save dialog for it.
+        :type quiet: Boolean
+
+        :return: True if the state could be reset, False otherwise.
+        :rtype: Boolean
+
+        **REMARKS**
+
+        * Imaris stays open. All objects are removed from the Surpass Scene (including the default ones, such as
+          the light source and the frame, which ``FileOpen()`` adds again), and current dataset is replaced by an
+          empty one, which also releases its memory in Imaris.
+        * The volume cache, the cached dataset metadata and statistics, and the index of the Surpass Scene are
+          cleared, as by ``closeImaris()``.
+        """
+
+        # Check if the connection is still alive
+        if not self.isAlive():
+            return False
+
+        try:
+
+            iDataSet = self._mImarisApplication.GetDataSet()
+            if quiet and iDataSet is not None:
+                iDataSet.SetModified(False)
+
+            # Remove all objects from the Surpass Scene
+            surpassScene = self._mImarisApplication.GetSurpassScene()
+            if surpassScene is not None:
+                for i in reversed(range(surpassScene.GetNumberOfChildren())):
+                    surpassScene.RemoveChild(surpassScene.GetChild(i))
+
+            # Replace the dataset with an empty one
+            if iDataSet is not None:
+                ImarisTType = iDataSet.GetType()
+                emptyDataSet = self._getFactory().CreateDataSet()
+                emptyDataSet.Create(ImarisTType.eTypeUInt8, 1, 1, 1, 1, 1)
+                if quiet:
+                    emptyDataSet.SetModified(False)
+                self._mImarisApplication.SetDataSet(emptyDataSet)
+
+            self._clearCachedState()
+            return True
+
+        except:
+
+            print("Error: " + str(sys.exc_info()[1]))
+            return False
+
+    @_tracksConnection
+    def setDatasetInfoTTL(self, seconds):
+        """Sets for how long the cached dataset metadata is trusted (see ``getDatasetInfo()``).
+
+        :param seconds: time (in seconds) after which the metadata of a dataset is fetched again from Imaris; 0 to
+                        fetch it on every call.
+        :type seconds: float
+        """
+
+        if seconds < 0:
+            raise ValueError("seconds must be non-negative.")
+
+        self._mDatasetInfoTTL = seconds
+
+    def setDataSubVolume(
+        self, stack, x0, y0, z0, channel, timepoint, iDataSet=None, maxChunkBytes=None
+    ):
+        """Sets a data subvolume to Imaris.
+
+        :param stack: 3D array of shape ``(dZ, dY, dX)`` (a 2D array is set as a single plane).
+        :type stack: np.uint8, np.uint16 or np.float32
+        :param x0: x coordinate of the top-left vertex of the subvolume to be set.
+        :type x0: int
+        :param y0: y coordinate of the top-left vertex of the subvolume to be set.
+        :type y0: int
+        :param z0: z coordinate of the top-left vertex of the subvolume to be set.
+        :type z0: int
+        :param channel: channel index.
+        :type channel: int
+        :param timepoint: timepoint index.
+        :type timepoint: int
+        :param iDataSet: (optional) set the data subvolume to the passed IDataSet object instead of current one;
+                         if omitted, current dataset (i.e. ``conn.mImarisApplication.GetDataSet()``) will be used.
+        :type iDataSet: Imaris::IDataSet
+        :param maxChunkBytes: (optional) if set, the subvolume is sent in Z-slabs (or tiles, if a single plane is
+                              too large) of at most ``maxChunkBytes`` bytes each.
+        :type maxChunkBytes: int
+
+        **EXAMPLE**
+
+        The following sets the voxels ``stack[z0 : z0 + dZ, y0 : y0 + dY, x0 : x0 + dX]``:
+
+        >>> conn.setDataSubVolume(subStack, x0, y0, z0, 0, 0)
+
+        **REMARKS**
+
+        * The datatype of the stack must match the one of the dataset.
+        * Coordinates are in voxels (integers) and not in units!
+        """
+
+        if not self.isAlive():
+            return None
+
+        # Check that we have a numpy array
+        if not isinstance(stack, np.ndarray):
+            raise TypeError("Expected numpy array.")
+
+        if stack.ndim == 2:
+            stack = stack[np.newaxis]
+        if stack.ndim != 3:
+            raise ValueError("Expected a 2D or 3D array.")
+
+        if iDataSet is None:
+            iDataSet = self._mImarisApplication.GetDataSet()
+        else:
+            # Is the passed argument a valid iDataSet?
+            if not self._getFactory().IsDataSet(iDataSet):
+                raise Exception("Invalid IDataSet object.")
+
+        if iDataSet is None:
+            raise Exception("No dataset is loaded in Imaris.")
+
+        # Get sizes
+        (dZ, dY, dX) = stack.shape
+        info = self._getDatasetInfo(
+            iDataSet, (x0 + dX, y0 + dY, z0 + dZ, channel + 1, timepoint + 1)
+        )
+        (sizeX, sizeY, sizeZ, sizeC, sizeT) = info.sizes
+
+        # Check the boundaries
+        if x0 < 0 or x0 + dX > sizeX:
+            raise ValueError("The subvolume is out of bounds in x direction.")
+
+        if y0 < 0 or y0 + dY > sizeY:
+            raise ValueError("The subvolume is out of bounds in y direction.")
+
+        if z0 < 0 or z0 + dZ > sizeZ:
+            raise ValueError("The subvolume is out of bounds in z direction.")
+
+        if channel < 0 or channel > sizeC - 1:
+            raise ValueError("The requested channel index is out of bounds.")
+
+        if timepoint < 0 or timepoint > sizeT - 1:
+            raise ValueError("The requested timepoint index is out of bounds.")
+
+        # Check the datatype (we enforce datatype compatibility)
+        dtype = info.datatype
+        if dtype is None:
+            raise Exception("Bad value for iDataSet::getType().")
+        if stack.dtype != dtype:
+            raise TypeError(
+                "Incompatible datatype (expected numpy." + np.dtype(dtype).name + ")."
+            )
+
+        # Split the subvolume into chunks, if requested
+        if maxChunkBytes is None:
+            chunks = [(0, 0, 0, dZ, dY, dX)]
+        else:
+            chunks = self._splitIntoChunks(stack.shape, stack.itemsize, maxChunkBytes)
+
+        try:
+            for cZ, cY, cX, cdZ, cdY, cdX in chunks:
+                self._writeDataSubVolume(
+                    iDataSet,
+                    info.imarisDataType,
+                    stack[cZ : cZ + cdZ, cY : cY + cdY, cX : cX + cdX],
+                    x0 + cX,
+                    y0 + cY,
+                    z0 + cZ,
+                    channel,
+                    timepoint,
+                )
+        finally:
+            # Cached copies of the volume are outdated
+            if self._mVolumeCache is not None:
+                self._mVolumeCache.invalidate(
+                    self._getObjectKey(iDataSet), channel, timepoint
+                )
+
+    async def setDataSubVolumeAsync(
+        self, stack, x0, y0, z0, channel, timepoint, iDataSet=None
+    ):
+        """Sets a data subvolume to Imaris, asynchronously (see ``setDataSubVolume()``).
+
+        :param stack: 3D array of shape ``(dZ, dY, dX)`` (a 2D array is set as a single plane).
+        :type stack: np.uint8, np.uint16 or np.float32
+        :param x0: x coordinate of the top-left vertex of the subvolume to be set.
+        :type x0: int
+        :param y0: y coordinate of the top-left vertex of the subvolume to be set.
+        :type y0: int
+        :param z0: z coordinate of the top-left vertex of the subvolume to be set.
+        :type z0: int
+        :param channel: channel index.
+        :type channel: int
+        :param timepoint: timepoint index.
+        :type timepoint: int
+        :param iDataSet: (optional) set the data subvolume to the passed IDataSet object instead of current one.
+        :type iDataSet: Imaris::IDataSet
+
+        **REMARKS**
+
+        See ``getDataVolumeAsync()``. The stack must not be modified until the returned awaitable is done.
+        """
+
+        if self._mImarisApplication is None:
+            return None
+
+        # Check that we have a numpy array
+        if not isinstance(stack, np.ndarray):
+            raise TypeError("Expected numpy array.")
+
+        if stack.ndim == 2:
+            stack = stack[np.newaxis]
+        if stack.ndim != 3:
+            raise ValueError("Expected a 2D or 3D array.")
+
+        iDataSet = await self._resolveDataSetAsync(iDataSet)
+        if iDataSet is None:
+            raise Exception("No dataset is loaded in Imaris.")
+
+        # Check the boundaries
+        (dZ, dY, dX) = stack.shape
+        info = self._getDatasetInfo(
+            iDataSet, (x0 + dX, y0 + dY, z0 + dZ, channel + 1, timepoint + 1)
+        )
+        self._checkSubVolumeBounds(
+            info.sizes, x0, y0, z0, channel, timepoint, dX, dY, dZ
+        )
+
+        # Check the datatype (we enforce datatype compatibility)
+        suffix, dtype = self._getPayloadType(info.imarisDataType)
+        if stack.dtype != dtype:
+            raise TypeError(
+                "Incompatible datatype (expected numpy." + np.dtype(dtype).name + ")."
+            )
+
+        try:
+            await self._invokeAsync(
+                iDataSet,
+                "SetDataSubVolumeAs1DArray" + suffix,
+                stack.ravel(),
+                x0,
+                y0,
+                z0,
+                channel,
+                timepoint,
+                dX,
+                dY,
+                dZ,
+            )
+        finally:
+            # Cached copies of the volume are outdated
+            if self._mVolumeCache is not None:
+                self._mVolumeCache.invalidate(
+                    self._getObjectKey(iDataSet), channel, timepoint
+                )
+
+    @_tracksConnection
+    def setDataVolume(
+        self, stack, channel, timepoint, maxChunkBytes=None, returnThroughput=False
+    ):
         """Sets the data volume to Imaris.
 
         :param stack: 3D array.
@@ -1918,11 +3473,28 @@ class pIceImarisConnector(object):
         :type channel: int
         :param timepoint: timepoint index.
         :type timepoint: int
+        :param maxChunkBytes: (optional) if set and the stack is larger than ``maxChunkBytes`` bytes, the stack is
+                              sent in Z-slabs (or tiles, if a single plane is too large) of at most ``maxChunkBytes``
+                              bytes each (see ``setDataSubVolume()``).
+        :type maxChunkBytes: int
+        :param returnThroughput: (optional, default False) if True, return the effective upload speed.
+        :type returnThroughput: Boolean
+
+        :return: if ``returnThroughput`` is True, the effective upload speed in MB/s.
+        :rtype: float
+
+        **EXAMPLE**
+
+        Upload a large float volume in chunks of at most 64 MB:
+
+        >>> speed = conn.setDataVolume(stack, 0, 0, maxChunkBytes=2**26, returnThroughput=True)
 
         **REMARKS**
 
-        If a dataset exists, the X, Y, and Z dimensions must match the ones of the stack being copied in. If no
-        dataset exists, one will be created to fit it with default other values.
+        * If a dataset exists, the X, Y, and Z dimensions must match the ones of the stack being copied in. If no
+          dataset exists, one will be created to fit it with default other values.
+        * A single upload fails if it exceeds the maximum ICE message size (``Ice.MessageSizeMax``). Sending the stack
+          in chunks also avoids converting the whole stack at once.
         """
 
         if not self.isAlive():
@@ -1943,28 +3515,75 @@ class pIceImarisConnector(object):
                 sz = (sz[0], sz[1], 1)
             iDataSet = self.createDataSet(stack.dtype, sz[0], sz[1], sz[2], 1, 1)
 
+        # Get the dataset metadata
+        info = self._getDatasetInfo(iDataSet, (0, 0, 0, channel + 1, timepoint + 1))
+
         # Check that the requested channel and timepoint exist
-        if channel > iDataSet.GetSizeC() - 1:
+        if channel > info.sizes[3] - 1:
             raise Exception("The requested channel index is out of bounds!")
-        if timepoint > iDataSet.GetSizeT() - 1:
+        if timepoint > info.sizes[4] - 1:
             raise Exception("The requested time index is out of bounds!")
 
+        # Upload in chunks, if requested
+        tic = time.perf_counter()
+        if maxChunkBytes is not None and stack.nbytes > maxChunkBytes:
+            if stack.ndim == 2:
+                stack = stack[np.newaxis]
+            if stack.shape != info.sizes[2::-1]:
+                raise ValueError(
+                    "The stack must have shape (sizeZ, sizeY, sizeX) to be uploaded in chunks."
+                )
+            self.setDataSubVolume(
+                stack,
+                0,
+                0,
+                0,
+                channel,
+                timepoint,
+                iDataSet=iDataSet,
+                maxChunkBytes=maxChunkBytes,
+            )
+            return self._throughput(stack.nbytes, tic) if returnThroughput else None
+
         # Get the dataset class (we enforce datatype compatibility)
-        imarisDataType = str(iDataSet.GetType())
-        if imarisDataType == "eTypeUInt8":
-            if stack.dtype != np.uint8:
-                raise TypeError("Incompatible datatype (expected numpy.uint8.")
-            iDataSet.SetDataVolumeAs1DArrayBytes(stack.ravel(), channel, timepoint)
-        elif imarisDataType == "eTypeUInt16":
-            if stack.dtype != np.uint16:
-                raise TypeError("Incompatible datatype (expected numpy.uint16.")
-            iDataSet.SetDataVolumeAs1DArrayShorts(stack.ravel(), channel, timepoint)
-        elif imarisDataType == "eTypeFloat":
-            if stack.dtype != np.float32:
-                raise TypeError("Incompatible datatype (expected numpy.float32.")
-            iDataSet.SetDataVolumeAs1DArrayFloats(stack.ravel(), channel, timepoint)
-        else:
-            raise Exception("Bad value for iDataSet::getType().")
+        imarisDataType = info.imarisDataType
+        try:
+            if imarisDataType == "eTypeUInt8":
+                if stack.dtype != np.uint8:
+                    raise TypeError("Incompatible datatype (expected numpy.uint8.")
+                iDataSet.SetDataVolumeAs1DArrayBytes(stack.ravel(), channel, timepoint)
+            elif imarisDataType == "eTypeUInt16":
+                if stack.dtype != np.uint16:
+                    raise TypeError("Incompatible datatype (expected numpy.uint16.")
+                iDataSet.SetDataVolumeAs1DArrayShorts(stack.ravel(), channel, timepoint)
+            elif imarisDataType == "eTypeFloat":
+                if stack.dtype != np.float32:
+                    raise TypeError("Incompatible datatype (expected numpy.float32.")
+                iDataSet.SetDataVolumeAs1DArrayFloats(stack.ravel(), channel, timepoint)
+            else:
+                raise Exception("Bad value for iDataSet::getType().")
+        finally:
+            # Cached copies of the volume are outdated
+            if self._mVolumeCache is not None:
+                self._mVolumeCache.invalidate(
+                    self._getObjectKey(iDataSet), channel, timepoint
+                )
+
+        if returnThroughput:
+            return self._throughput(stack.nbytes, tic)
+
+    def setLivenessTTL(self, seconds):
+        """Sets for how long a successful call to Imaris is trusted by ``isAlive()``.
+
+        :param seconds: time (in seconds) after a successful call during which ``isAlive()`` does not query Imaris;
+                        0 to query Imaris on every call.
+        :type seconds: float
+        """
+
+        if seconds < 0:
+            raise ValueError("seconds must be non-negative.")
+
+        self._mLivenessTTL = seconds
 
     def setVoxelSizes(self, voxelSizes):
         """Sets the X, Y, and Z voxel sizes of the dataset.
@@ -1994,33 +3613,74 @@ class pIceImarisConnector(object):
         if iDataSet is None:
             return
 
-        # Voxel size X
-        iDataSet.SetExtendMaxX(
-            voxelSizes[0] * iDataSet.GetSizeX() + iDataSet.GetExtendMinX()
-        )
+        # Get the dataset metadata
+        info = self._getDatasetInfo(iDataSet)
+        sizes = info.sizes
+        extends = info.extends
 
-        # Voxel size Y
-        iDataSet.SetExtendMaxY(
-            voxelSizes[1] * iDataSet.GetSizeY() + iDataSet.GetExtendMinY()
-        )
+        try:
+            # Voxel size X
+            iDataSet.SetExtendMaxX(voxelSizes[0] * sizes[0] + extends[0])
 
-        # Voxel size Z
-        iDataSet.SetExtendMaxZ(
-            voxelSizes[2] * iDataSet.GetSizeZ() + iDataSet.GetExtendMinZ()
-        )
+            # Voxel size Y
+            iDataSet.SetExtendMaxY(voxelSizes[1] * sizes[1] + extends[2])
 
-    def startImaris(self, userControl=False):
-        """Starts an Imaris instance and stores the ImarisApplication ICE object.
+            # Voxel size Z
+            iDataSet.SetExtendMaxZ(voxelSizes[2] * sizes[2] + extends[4])
+        finally:
+            # The cached metadata is outdated
+            self._invalidateDatasetInfo(iDataSet)
 
-        :param userControl: (optional, default False) The optional parameter userControl sets the fate of Imaris
-                            when the client is closed: if userControl is True, Imaris terminates when the
-                            pIceImarisConnector object is deleted. If is it set to False, Imaris stays open after
-                            the pIceImarisConnector object is deleted.
-        :type userControl: Boolean
+    def startHeartbeat(self, interval=1.0):
+        """Starts a background thread that queries Imaris at regular intervals, so that ``isAlive()`` can answer
+        without querying Imaris and a closed Imaris is detected early.
 
-        :return: True if starting Imaris was successful, False otherwise.
-        :rtype: Boolean
-        """
+        :param interval: (optional, default 1.0) time (in seconds) between two queries. It should be shorter than
+                         the liveness TTL (see ``setLivenessTTL()``).
+        :type interval: float
+
+        **REMARKS**
+
+        The heartbeat stops by itself when the connection to Imaris is lost, or when ``stopHeartbeat()`` or
+        ``closeImaris()`` are called; other errors of the query (e.g. a timeout) leave the connection alone. Starting the heartbeat again restarts it with the new interval.
+        """
+
+        if interval <= 0:
+            raise ValueError("interval must be positive.")
+
+        self.stopHeartbeat()
+        if self._mImarisApplication is None:
+            return
+
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self._runHeartbeat,
+            args=(weakref.ref(self), self._mImarisApplication, interval, stop),
+            daemon=True,
+        )
+        self._mHeartbeat = (thread, stop)
+        thread.start()
+
+    def startImaris(self, userControl=False, timeout=60.0):
+        """Starts an Imaris instance and stores the ImarisApplication ICE object.
+
+        :param userControl: (optional, default False) The optional parameter userControl sets the fate of Imaris
+                            when the client is closed: if userControl is True, Imaris terminates when the
+                            pIceImarisConnector object is deleted. If is it set to False, Imaris stays open after
+                            the pIceImarisConnector object is deleted.
+        :type userControl: Boolean
+        :param timeout: (optional, default 60) maximum time (in seconds) to wait for ImarisServerIce and Imaris to
+                        be ready. Since Imaris 8, a license selection dialog may delay Imaris considerably.
+        :type timeout: float
+
+        :return: True if starting Imaris was successful, False otherwise.
+        :rtype: Boolean
+
+        **REMARKS**
+
+        ImarisServerIce and Imaris are probed with increasing intervals (from 10 ms up to 0.5 s). The timings of the
+        launch are returned by ``getLaunchStatistics()``.
+        """
 
         # Check the platform
         if not self._isSupportedPlatform():
@@ -2028,6 +3688,11 @@ class pIceImarisConnector(object):
                 "pIceImarisConnector can only work on Windows and Mac OS X."
             )
 
+        # The paths to Imaris are not known if the connector was created from a
+        # running Imaris without looking for it
+        if self._mImarisExePath == "":
+            self._findImaris()
+
         # Store the userControl
         self._mUserControl = userControl
 
@@ -2036,13 +3701,24 @@ class pIceImarisConnector(object):
             self.closeImaris(True)
 
         # Now we open a new one
+        deadline = time.monotonic() + timeout
+        startTime = time.perf_counter()
+        startCpuTime = time.process_time()
+        self._mLaunchStatistics = {
+            "elapsed": 0.0,
+            "cpuTime": 0.0,
+            "serverProbes": 0,
+            "applicationProbes": 0,
+        }
         try:
 
             # Start ImarisServerIce
-            if not self._startImarisServerIce():
+            if not self._startImarisServerIce(deadline):
                 raise Exception("Could not start ImarisServerIce!")
 
             # Launch Imaris
+            import subprocess
+
             args = "id" + str(self._mImarisObjectID)
             try:
                 subprocess.Popen([self._mImarisExePath, args], bufsize=-1)
@@ -2056,36 +3732,12 @@ class pIceImarisConnector(object):
                 print("Unexpected error:", sys.exc_info()[0])
                 return False
 
-            # Try getting the application over a certain time period in case it
-            # takes to long for Imaris to be registered. Since Imaris 8, a
-            # license selection dialog will open that can make the time it takes
-            # for Imaris to be ready to connect quite long. So, we give enough
-            # time to the user to pick the licenses...
-            nAttempts = 0
-            while nAttempts < 500:
-                try:
-                    # A too quick call to mImarisLib.GetApplication() could
-                    # potentially throw an exception and leave the _mImarisLib
-                    # object in an unusable state. As a workaround, we
-                    # reinstantiate ImarisLib() at every iteration. This
-                    # will make sure that sooner or later we will get the
-                    # application.
-                    ImarisLib = self._importImarisLib()
-                    self._mImarisLib = ImarisLib.ImarisLib()
-                    vImaris = self._mImarisLib.GetApplication(self._mImarisObjectID)
-                except:
-                    print(
-                        "Exception when trying to get the Application from ImariServer"
-                    )
-
-                if vImaris is not None:
-                    break
-
-                # Try again in 0.1 s
-                time.sleep(0.1)
-
-                # Increment nAttemps
-                nAttempts += 1
+            # Try getting the application until the timeout expires, in case it
+            # takes long for Imaris to be registered. Since Imaris 8, a license
+            # selection dialog will open that can make the time it takes for
+            # Imaris to be ready to connect quite long. So, we give enough time
+            # to the user to pick the licenses...
+            vImaris = self._pollWithBackoff(self._getLaunchedApplication, deadline)
 
             # At this point we should have the application
             if vImaris is None:
@@ -2101,6 +3753,22 @@ class pIceImarisConnector(object):
         except:
             print("Error: " + str(sys.exc_info()[0]))
 
+        finally:
+            self._mLaunchStatistics["elapsed"] = time.perf_counter() - startTime
+            self._mLaunchStatistics["cpuTime"] = time.process_time() - startCpuTime
+
+    def stopHeartbeat(self):
+        """Stops the heartbeat started by ``startHeartbeat()``, if any."""
+
+        heartbeat = self._mHeartbeat
+        self._mHeartbeat = None
+        if heartbeat is None:
+            return
+        thread, stop = heartbeat
+        stop.set()
+        if thread is not threading.current_thread():
+            thread.join()
+
     @staticmethod
     def getTestFolder():
         """Retrieve the absolute path to the test folder.
@@ -2121,6 +3789,9 @@ class pIceImarisConnector(object):
         )
         if self.isAlive():
             self.mImarisApplication.FileOpen(filename, "")
+            if self._mVolumeCache is not None:
+                self._mVolumeCache.clear()
+            self._invalidateDatasetInfo()
 
     def loadSwimmingAlgaeTestDataset(self):
         """Loads the SwimmingAlgae.ims test dataset."""
@@ -2129,6 +3800,9 @@ class pIceImarisConnector(object):
         )
         if self.isAlive():
             self.mImarisApplication.FileOpen(filename, "")
+            if self._mVolumeCache is not None:
+                self._mVolumeCache.clear()
+            self._invalidateDatasetInfo()
 
     # --------------------------------------------------------------------------
     #
@@ -2137,23 +3811,305 @@ class pIceImarisConnector(object):
     #    Please do not rely on the API of these methods to be preserved!
     #
     # --------------------------------------------------------------------------
+    @staticmethod
+    def _checkOutputBuffer(out, dtype, shape):
+        """Checks that an output buffer can receive an array of given type and shape. For internal use only!
+
+        :param out: output buffer.
+        :type out: Numpy array
+        :param dtype: Numpy datatype of the array.
+        :type dtype: one of ``np.uint8``, ``np.uint16``, ``np.float32``
+        :param shape: shape of the array.
+        :type shape: tuple
+        """
+
+        if not isinstance(out, np.ndarray):
+            raise TypeError("out must be a Numpy array.")
+        if out.dtype != dtype:
+            raise TypeError("out must be of type numpy." + np.dtype(dtype).name + ".")
+        if out.shape != tuple(shape):
+            raise ValueError("out must have shape " + str(tuple(shape)) + ".")
+        if not out.flags.c_contiguous or not out.flags.writeable:
+            raise ValueError("out must be a writeable, C-contiguous array.")
+
+    @staticmethod
+    def _checkSubVolumeBounds(sizes, x0, y0, z0, channel, timepoint, dX, dY, dZ):
+        """Checks that a subvolume lies within a dataset. For internal use only!
+
+        :param sizes: dataset sizes ``(sizeX, sizeY, sizeZ, sizeC, sizeT)``.
+        :type sizes: tuple
+
+        See ``getDataSubVolume()`` for the other parameters.
+        """
+
+        (sizeX, sizeY, sizeZ, sizeC, sizeT) = sizes
+
+        if x0 < 0 or x0 > sizeX - 1:
+            raise ValueError("The requested starting position x0 is out of bounds.")
+
+        if y0 < 0 or y0 > sizeY - 1:
+            raise ValueError("The requested starting position y0 is out of bounds.")
+
+        if z0 < 0 or z0 > sizeZ - 1:
+            raise ValueError("The requested starting position z0 is out of bounds.")
+
+        if channel < 0 or channel > sizeC - 1:
+            raise ValueError("The requested channel index is out of bounds.")
+
+        if timepoint < 0 or timepoint > sizeT - 1:
+            raise ValueError("The requested timepoint index is out of bounds.")
+
+        # Check that we are within bounds
+        if x0 + dX > sizeX:
+            raise ValueError("The requested x range dimension is out of bounds.")
+
+        if y0 + dY > sizeY:
+            raise ValueError("The requested y range dimension is out of bounds.")
+
+        if z0 + dZ > sizeZ:
+            raise ValueError("The requested z range dimension is out of bounds.")
+
+    def _clearCachedState(self):
+        """Clears everything cached about the datasets and the scene of Imaris. For internal use only!"""
+
+        if self._mVolumeCache is not None:
+            self._mVolumeCache.clear()
+        self._invalidateDatasetInfo()
+        self._mStatisticsTables.clear()
+        self._mSceneIndex = None
+        self._mObjectTypes.clear()
+
+    @staticmethod
+    def _copyToOutput(arr, out=None):
+        """Returns a C-contiguous copy of an array, written into out if passed. For internal use only!
+
+        :param arr: array to copy.
+        :type arr: Numpy array
+        :param out: (optional) C-contiguous array of the same type and shape as arr.
+        :type out: Numpy array
+
+        :return: copy of arr (``out``, if passed).
+        :rtype: Numpy array
+        """
+
+        if out is None:
+            return np.array(arr, order="C")
+
+        pIceImarisConnector._checkOutputBuffer(out, arr.dtype, arr.shape)
+        np.copyto(out, arr)
+        return out
+
+    @staticmethod
+    def _decodeDataPayload(payload, dtype, shape, out=None, transposed=False):
+        """Decodes the data returned by the ICE data getters into a C-contiguous Numpy array. For internal use only!
+
+        :param payload: data as returned by ICE: a bytes object (or a sequence of bytes objects, for slices) for
+                        8-bit data, a sequence of (signed) shorts or of floats otherwise.
+        :type payload: bytes, list or Numpy array
+        :param dtype: Numpy datatype of the decoded array.
+        :type dtype: one of ``np.uint8``, ``np.uint16``, ``np.float32``
+        :param shape: shape of the decoded array.
+        :type shape: tuple
+        :param out: (optional) C-contiguous array of given dtype and shape to decode into.
+        :type out: Numpy array
+        :param transposed: (optional, default False) True if the payload stores the array with its axes in reversed
+                           order (as is the case for slices).
+        :type transposed: Boolean
+
+        :return: decoded array (``out``, if passed).
+        :rtype: Numpy array
+        """
+
+        shape = tuple(int(s) for s in shape)
+
+        # Check the output buffer
+        if out is not None:
+            pIceImarisConnector._checkOutputBuffer(out, dtype, shape)
+
+            # Sequences of numbers are decoded straight into the output buffer,
+            # without any intermediate array
+            if dtype != np.uint8 and not isinstance(payload, np.ndarray):
+                target = out.view(np.int16) if dtype == np.uint16 else out
+                target = target.T if transposed else target.reshape(-1)
+                try:
+                    target[...] = payload
+                    return out
+                except (OverflowError, ValueError):
+                    # Fall back to decoding through an intermediate array
+                    pass
+
+        # Wrap the payload into a Numpy array, without copying it if possible
+        if dtype == np.uint8:
+            # Ice returns uint8 as a bytes object (one per row for slices)
+            if not isinstance(payload, (bytes, bytearray, memoryview, np.ndarray)):
+                payload = b"".join(payload)
+            arr = np.frombuffer(payload, dtype=np.uint8)
+        elif dtype == np.uint16:
+            # Ice transfers the uint16 values as (signed) shorts
+            try:
+                arr = np.asarray(payload, dtype=np.int16).view(np.uint16)
+            except OverflowError:
+                arr = np.asarray(payload).astype(np.uint16)
+        else:
+            arr = np.asarray(payload, dtype=dtype)
+
+        # Restore the shape
+        if transposed:
+            arr = np.reshape(arr, shape[::-1]).T
+        else:
+            arr = np.reshape(arr, shape)
+
+        # Decode into the output buffer
+        if out is not None:
+            np.copyto(out, arr)
+            return out
+
+        # Only copy if needed
+        if not arr.flags.c_contiguous or not arr.flags.writeable:
+            arr = np.array(arr, order="C")
+
+        return arr
+
+    @staticmethod
+    def _fetchStatistics(iObject, names=None):
+        """Fetches the statistics of an object as flat Numpy arrays. For internal use only!
+
+        If names are passed and the object supports ``GetStatisticsByName()``, only the requested statistics are
+        fetched (one call per name); otherwise, all statistics are fetched with a single ``GetStatistics()`` call
+        (and filtered by name, if names are passed).
+
+        :param iObject: object with statistics (e.g. ISpots, ISurfaces or ICells).
+        :type iObject: Imaris::IDataItem
+        :param names: (optional) names of the statistics (e.g. "Position X"); if omitted, all statistics.
+        :type names: list
+
+        :return: dictionary with the arrays "names", "units", "ids" and "values" (one entry per value), and the
+                 dictionary "factors" of factor arrays by factor name (e.g. "Time", "Channel", "Category").
+        :rtype: dict
+        """
+
+        if names is not None and hasattr(iObject, "GetStatisticsByName"):
+            statistics = [iObject.GetStatisticsByName(name) for name in names]
+        else:
+            statistics = [iObject.GetStatistics()]
+
+        # Concatenate the parallel arrays
+        factorNames = []
+        for values in statistics:
+            factorNames += [f for f in values.mFactorNames if f not in factorNames]
+        columns = {"names": [], "units": [], "ids": [], "values": []}
+        factors = {f: [] for f in factorNames}
+        for values in statistics:
+            n = len(values.mValues)
+            columns["names"].append(np.array(values.mNames, dtype=object))
+            columns["units"].append(np.array(values.mUnits, dtype=object))
+            columns["ids"].append(np.array(values.mIds, dtype=np.int64))
+            columns["values"].append(np.array(values.mValues, dtype=np.float64))
+            for f in factorNames:
+                if f in values.mFactorNames:
+                    index = list(values.mFactorNames).index(f)
+                    factors[f].append(np.array(values.mFactors[index], dtype=object))
+                else:
+                    factors[f].append(np.full(n, "", dtype=object))
+
+        result = {}
+        for key, arrays in columns.items():
+            result[key] = np.concatenate(arrays) if arrays else np.array([])
+        result["factors"] = {f: np.concatenate(a) for f, a in factors.items()}
+
+        # Keep the requested statistics only
+        if names is not None:
+            keep = np.isin(result["names"], np.array(names, dtype=object))
+            if not np.all(keep):
+                for key in ["names", "units", "ids", "values"]:
+                    result[key] = result[key][keep]
+                for f in factorNames:
+                    result["factors"][f] = result["factors"][f][keep]
+
+        return result
+
+    def _fetchSurfaceMeshes(self, iSurfaces, batches, workers, normals):
+        """Fetches the meshes of batches of surfaces concurrently, and yields them in order. For internal use only!
+
+        At most two batches per thread are fetched ahead of the consumer.
+
+        :param iSurfaces: surfaces.
+        :type iSurfaces: Imaris::ISurfaces
+        :param batches: surface indices of each batch.
+        :type batches: list
+        :param workers: number of threads.
+        :type workers: int
+        :param normals: whether to fetch the normals.
+        :type normals: bool
+
+        :return: for each batch, the tuple ``(meshes, vertexCounts, triangleCounts)``: dictionary of the
+                 concatenated "vertices", "triangles" (indices into the vertices of each surface) and "normals",
+                 and the number of vertices and triangles of each surface.
+        :rtype: generator
+        """
+
+        def fetch(batch):
+            meshes = {"vertices": [], "triangles": [], "normals": []}
+            for i in batch:
+                meshes["vertices"].append(
+                    np.asarray(iSurfaces.GetVertices(int(i)), dtype=np.float32)
+                )
+                meshes["triangles"].append(
+                    np.asarray(iSurfaces.GetTriangles(int(i)), dtype=np.int32)
+                )
+                if normals:
+                    meshes["normals"].append(
+                        np.asarray(iSurfaces.GetNormals(int(i)), dtype=np.float32)
+                    )
+            vertexCounts = np.array([v.size // 3 for v in meshes["vertices"]])
+            triangleCounts = np.array([t.size // 3 for t in meshes["triangles"]])
+            for name, arrays in meshes.items():
+                dtype = np.int32 if name == "triangles" else np.float32
+                meshes[name] = np.concatenate(
+                    [np.empty(0, dtype=dtype)] + [a.ravel() for a in arrays]
+                ).reshape(-1, 3)
+            return meshes, vertexCounts, triangleCounts
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for batch in batches:
+                pending.append(executor.submit(fetch, batch))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
     def _findImaris(self):
-        """Gets or discovers the path to the Imaris executable. For internal use only!"""
+        """Gets or discovers the path to the Imaris executable. For internal use only!
+
+        The result is cached, in this process and in a file in the cache folder of the user, by the modification time
+        of the searched folder: later connectors do not scan the folder again until Imaris is installed or removed.
+        """
 
         # Try getting the environment variable IMARISPATH
         imarisPath = os.getenv("IMARISPATH")
 
-        # If imarisPath is None, we search for Imaris
+        # Search for Imaris in reasonable places
         if imarisPath is None:
-
-            # Search for Imaris in reasonable places
             if self._ispc():
-                tmp = "C:\\Program Files\\Bitplane"
+                tmp = self._WINDOWS_SEARCH_DIR
             elif self._ismac():
-                tmp = "/Applications"
+                tmp = self._MAC_SEARCH_DIR
             else:
                 raise OSError("pIceImarisConnector only works on Windows and Mac OS X.")
 
+        # Reuse the result of a previous discovery if the searched folder (or the
+        # one in IMARISPATH) did not change since
+        if imarisPath is None:
+            key = self._getDiscoveryKey("search", tmp)
+        else:
+            key = self._getDiscoveryKey("IMARISPATH", imarisPath)
+        if key is not None and self._loadDiscovery(key):
+            return
+
+        # If imarisPath is None, we search for Imaris
+        if imarisPath is None:
+
             # Check that the folder exist
             if os.path.isdir(tmp):
 
@@ -2229,6 +4185,10 @@ class pIceImarisConnector(object):
         self._mImarisServerIceExePath = serverExePath
         self._mImarisLibPath = libPath
 
+        # Cache the result for the next connectors (and processes)
+        if key is not None:
+            self._storeDiscovery(key)
+
     def _findNewestVersionDir(self, directory):
         """Scans for candidate Imaris directories and returns the one with highest version number. For internal
         use only!
@@ -2245,6 +4205,8 @@ class pIceImarisConnector(object):
         # be larger, invalid versions might be zero.
         newestVersion = 1
 
+        import glob
+
         # Get all subfolders
         subDirs = glob.glob(directory + "/Imaris*")
 
@@ -2298,6 +4260,317 @@ class pIceImarisConnector(object):
         # Return it
         return newestVersionDir
 
+    def _forgetDiscovery(self, key):
+        """Removes a cached discovery (see ``_findImaris()``) from this process and from the cache file. For
+        internal use only!
+
+        :param key: key of the discovery (see ``_getDiscoveryKey()``).
+        :type key: string
+        """
+
+        self._DISCOVERY_CACHE.pop(key, None)
+        entries = self._readDiscoveryCacheFile()
+        if key in entries:
+            del entries[key]
+            self._writeDiscoveryCacheFile(entries)
+
+    def _generateDataTiles(
+        self, channel, timepoint, tileShape, sizes, origins, iDataSet
+    ):
+        """Yields the tiles of a data volume one after the other. For internal use only!
+
+        :param channel: channel index.
+        :type channel: int
+        :param timepoint: timepoint index.
+        :type timepoint: int
+        :param tileShape: size (dZ, dY, dX) of the tiles in voxels.
+        :type tileShape: tuple
+        :param sizes: size (sizeZ, sizeY, sizeX) of the dataset in voxels.
+        :type sizes: tuple
+        :param origins: lists of tile origins along the Z, Y, and X dimensions.
+        :type origins: list
+        :param iDataSet: IDataSet object to read from, or None for current one.
+        :type iDataSet: Imaris::IDataSet
+
+        :return: generator of ``(z0, y0, x0, tile)`` tuples.
+        :rtype: generator
+        """
+
+        for z0 in origins[0]:
+            dZ = min(tileShape[0], sizes[0] - z0)
+            for y0 in origins[1]:
+                dY = min(tileShape[1], sizes[1] - y0)
+                for x0 in origins[2]:
+                    dX = min(tileShape[2], sizes[2] - x0)
+                    tile = self.getDataSubVolume(
+                        x0, y0, z0, channel, timepoint, dX, dY, dZ, iDataSet
+                    )
+                    yield z0, y0, x0, tile
+
+    def _generateTimepoints(self, channel, prefetch, timepoints, iDataSet):
+        """Yields the volumes of a channel one timepoint after the other, while the next ones are fetched in a
+        background thread. For internal use only!
+
+        :param channel: channel index.
+        :type channel: int
+        :param prefetch: number of volumes to fetch ahead.
+        :type prefetch: int
+        :param timepoints: timepoint indices.
+        :type timepoints: list
+        :param iDataSet: IDataSet object to read from, or None for current one.
+        :type iDataSet: Imaris::IDataSet
+
+        :return: generator of ``(timepoint, stack)`` tuples.
+        :rtype: generator
+        """
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        pending = deque()
+        nextIndex = 0
+        try:
+            while nextIndex < len(timepoints) or pending:
+                # Queue current volume (unless it was already prefetched) and the
+                # next ones
+                while nextIndex < len(timepoints) and len(pending) <= prefetch:
+                    t = timepoints[nextIndex]
+                    future = executor.submit(self.getDataVolume, channel, t, iDataSet)
+                    pending.append((t, future))
+                    nextIndex += 1
+
+                # Wait for the oldest volume and hand it to the caller, while the
+                # next ones are being fetched
+                t, future = pending.popleft()
+                yield t, future.result()
+
+        finally:
+            # The generator may be closed before the end: cancel whatever is left
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def _getDatasetInfo(self, iDataSet, required=None):
+        """Returns the (cached) metadata of a dataset. For internal use only!
+
+        :param iDataSet: dataset.
+        :type iDataSet: Imaris::IDataSet
+        :param required: (optional) minimum sizes (sizeX, sizeY, sizeZ, sizeC, sizeT) the caller is about to access.
+                         If the cached sizes are smaller, the metadata is fetched again once, since the dataset may
+                         have been resized through the IDataSet object (e.g. with ``SetSizeC()``).
+        :type required: tuple
+
+        :return: dataset metadata. It is fetched again once it is older than the TTL (see
+                 ``setDatasetInfoTTL()``).
+        :rtype: DatasetInfo
+        """
+
+        key = self._getObjectKey(iDataSet)
+        previous, fetchedAt = self._mDatasetInfos.get(key, (None, None))
+        info = previous
+        if info is not None and time.monotonic() - fetchedAt >= self._mDatasetInfoTTL:
+            info = None
+        if info is not None and required is not None:
+            if any(r > s for r, s in zip(required, info.sizes)):
+                info = None
+        if info is None:
+            info = DatasetInfo(iDataSet)
+            self._mDatasetInfos[key] = (info, time.monotonic())
+
+            # Volumes cached before the dataset was resized or converted are stale
+            if previous is not None and not previous.hasSameLayout(info):
+                if self._mVolumeCache is not None:
+                    self._mVolumeCache.invalidate(key)
+        return info
+
+    def _getFactory(self):
+        """Returns the (cached) factory of the Imaris application. For internal use only!
+
+        The factory is requested again (and the resolved types are forgotten) if the connector was connected to
+        another Imaris application in the meanwhile.
+
+        :return: factory.
+        :rtype: Imaris::IFactory
+        """
+
+        application = self._mImarisApplication
+        if self._mFactory is None or self._mFactoryApplication is not application:
+            self._mFactory = application.GetFactory()
+            self._mFactoryApplication = application
+            self._mObjectTypes.clear()
+        return self._mFactory
+
+    def _getDiscoveryCacheFile(self):
+        """Returns the path of the file that caches the discovery of Imaris across processes. For internal use only!
+
+        :return: path to the cache file in the cache folder of the user.
+        :rtype: string
+        """
+
+        if self._ispc():
+            base = os.getenv("LOCALAPPDATA", os.path.expanduser("~"))
+        elif self._ismac():
+            base = os.path.join(os.path.expanduser("~"), "Library", "Caches")
+        else:
+            base = os.getenv(
+                "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+            )
+        return os.path.join(base, "pIceImarisConnector", "discovery.json")
+
+    @staticmethod
+    def _getDiscoveryKey(source, directory):
+        """Returns the key of the cached discovery of Imaris in a folder. For internal use only!
+
+        The key contains the modification time of the folder, so that installing or removing a version of Imaris
+        in it invalidates the cached discovery.
+
+        :param source: "IMARISPATH" if the folder is the Imaris folder itself, "search" if it is searched for Imaris.
+        :type source: string
+        :param directory: folder.
+        :type directory: string
+
+        :return: key, or None if the folder does not exist.
+        :rtype: string
+        """
+
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+        return "|".join(
+            [source, os.path.abspath(directory), str(mtime), str(sys.version_info[0])]
+        )
+
+    def _getLaunchedApplication(self):
+        """Asks ImarisServerIce for the Imaris launched by ``startImaris()``. For internal use only!
+
+        The ImarisLib object (and its ICE communicator) is reused across calls. A too quick call to
+        ``GetApplication()`` could throw an exception and leave the ImarisLib object in an unusable state: then a
+        new one is created for the next call.
+
+        :return: application, or None if it is not registered yet.
+        :rtype: Imaris::IApplication
+        """
+
+        if self._mLaunchStatistics is not None:
+            self._mLaunchStatistics["applicationProbes"] += 1
+
+        try:
+            if self._mImarisLib is None:
+                self._mImarisLib = self._importImarisLib().ImarisLib()
+            return self._mImarisLib.GetApplication(self._mImarisObjectID)
+        except Exception:
+            self._mImarisLib = None
+            return None
+
+    @staticmethod
+    def _getObjectKey(iObject):
+        """Returns a hashable key that identifies an Imaris object (e.g. a dataset). For internal use only!
+
+        :param iObject: Imaris object.
+        :type iObject: Imaris::IDataItem
+
+        :return: the ICE identity of the object proxy (or the object itself, if it is not an ICE proxy).
+        :rtype: hashable object
+        """
+
+        try:
+            return iObject.ice_getIdentity()
+        except AttributeError:
+            return iObject
+
+    def _resolveType(self, dataItem):
+        """Returns the type of an Imaris object (e.g. 'Spots'). For internal use only!
+
+        The type is memoized per object, so that the factory is probed only once per object; the memoized types are
+        forgotten when the Surpass Scene changes (see ``getSceneIndex()``) and by ``resetState()``. The types are
+        probed in order of frequency (the most frequently resolved first, in the original order of ``autocast()``
+        on ties); the order is updated after 1, 2, 4, 8, ... resolutions.
+
+        :param dataItem: Imaris object.
+        :type dataItem: Imaris::IDataItem
+
+        :return: type name (the suffix of the ``Is...()`` and ``To...()`` methods of the factory), or None if the type
+                 could not be resolved.
+        :rtype: string
+        """
+
+        factory = self._getFactory()
+        key = self._getObjectKey(dataItem)
+        typeName = self._mObjectTypes.get(key)
+        if typeName is not None:
+            return typeName
+
+        for name in self._mCastTypes:
+            if getattr(factory, "Is" + name)(dataItem):
+                typeName = name
+                break
+        else:
+            # The Reference Frame object does not have an Is...() method
+            try:
+                if factory.ToReferenceFrames(dataItem) is None:
+                    return None
+            except Exception:
+                return None
+            typeName = "ReferenceFrames"
+
+        self._mObjectTypes[key] = typeName
+
+        # Keep the most frequent types at the beginning of the probe chain; sort again
+        # after 1, 2, 4, 8, ... resolutions only, and keep the original order on ties
+        if typeName in self._mCastTypeCounts:
+            self._mCastTypeCounts[typeName] += 1
+            self._mCastTypeResolutions += 1
+            n = self._mCastTypeResolutions
+            if n & (n - 1) == 0:
+                self._mCastTypes.sort(
+                    key=lambda name: (
+                        -self._mCastTypeCounts[name],
+                        self._mCastTypeOrder[name],
+                    )
+                )
+
+        return typeName
+
+    @staticmethod
+    def _getPayloadSize(payload):
+        """Returns the number of values in the data returned by the ICE data getters. For internal use only!
+
+        :param payload: data as returned by ICE: a bytes object or a sequence of numbers, or a sequence of rows
+                        (bytes objects or sequences of numbers) for slices.
+        :type payload: bytes, list or Numpy array
+
+        :return: number of values.
+        :rtype: int
+        """
+
+        if isinstance(payload, np.ndarray):
+            return payload.size
+        if isinstance(payload, (bytes, bytearray)) or len(payload) == 0:
+            return len(payload)
+        if hasattr(payload[0], "__len__"):
+            return len(payload) * len(payload[0])
+        return len(payload)
+
+    @staticmethod
+    def _getPayloadType(imarisDataType):
+        """Returns the suffix of the ICE data methods and the Numpy datatype for an Imaris datatype. For internal
+        use only!
+
+        :param imarisDataType: name of the Imaris datatype (e.g. 'eTypeUInt8').
+        :type imarisDataType: str
+
+        :return: suffix (one of 'Bytes', 'Shorts', 'Floats') and Numpy datatype.
+        :rtype: tuple
+        """
+
+        if imarisDataType == "eTypeUInt8":
+            return "Bytes", np.uint8
+        elif imarisDataType == "eTypeUInt16":
+            return "Shorts", np.uint16
+        elif imarisDataType == "eTypeFloat":
+            return "Floats", np.float32
+        else:
+            raise Exception("Bad value for iDataSet::getType().")
+
     def _getChildrenAtLevel(self, container, recursive, children):
         """Scans the children of a given container recursively. For internal use only!
 
@@ -2316,17 +4589,17 @@ class pIceImarisConnector(object):
 
         for i in range(container.GetNumberOfChildren()):
 
-            # Get current child
-            child = container.GetChild(i)
+            # Get current child (the type is resolved only once)
+            child = self.autocast(container.GetChild(i))
+            if child is None:
+                continue
 
             # Is this a folder? If it is, call this function recursively
-            if self.mImarisApplication.GetFactory().IsDataContainer(child):
+            if self._resolveType(child) == "DataContainer":
                 if recursive:
-                    children = self._getChildrenAtLevel(
-                        self.autocast(child), recursive, children
-                    )
+                    children = self._getChildrenAtLevel(child, recursive, children)
             else:
-                children.append(self.autocast(child))
+                children.append(child)
 
         return children
 
@@ -2364,73 +4637,298 @@ class pIceImarisConnector(object):
 
         for i in range(container.GetNumberOfChildren()):
 
-            child = container.GetChild(i)
+            # Get current child (the type is resolved only once)
+            child = self.autocast(container.GetChild(i))
+            if child is None:
+                continue
 
             # Is this a folder? If it is, call this function recursively
-            if self.mImarisApplication.GetFactory().IsDataContainer(child):
+            typeName = self._resolveType(child)
+            if typeName == "DataContainer":
                 if recursive:
                     children = self._getFilteredChildrenAtLevel(
-                        self.autocast(child), recursive, typeFilter, children
+                        child, recursive, typeFilter, children
                     )
-            else:
-                currentChild = self.autocast(child)
-                if self._isOfType(currentChild, typeFilter):
-                    children.append(currentChild)
+            elif typeName == typeFilter:
+                children.append(child)
 
         return children
 
-    def _importImarisLib(self):
-        """Imports the ImarisLib module. For internal use only!"""
+    @staticmethod
+    def _getStatisticsColumns(iObject, names):
+        """Returns the values of some statistics of an object, by statistics name. For internal use only!
 
-        # Dynamically find and import the ImarisLib module
-        try:
-            ImarisLib = importlib.import_module("ImarisLib")
-        except:
-            # The imp module is deprecated.
-            fileobj, pathname, description = imp.find_module("ImarisLib")
-            ImarisLib = imp.load_module("ImarisLib", fileobj, pathname, description)
-            fileobj.close()
-        return ImarisLib
+        See ``_fetchStatistics()``.
 
-    def _isImarisServerIceRunning(self):
-        """Checks whether an instance of ImarisServerIce is already running and can be reused. For internal use only!
+        :param iObject: object with statistics (e.g. ISpots or ISurfaces).
+        :type iObject: Imaris::IDataItem
+        :param names: names of the statistics (e.g. "Position X").
+        :type names: list
 
-        :return: True is an instance of ImarisServerIce is running and can be reused, False otherwise.
-        :rtype: Boolean
+        :return: dictionary mapping each name to the tuple ``(ids, values, factors)``: object IDs (Numpy array),
+                 values (Numpy array), and dictionary of factor values (e.g. "Time") by factor name. Names without
+                 values are not in the dictionary.
+        :rtype: dict
         """
 
-        # The check will be different on Windows and on Mac OS X
-        if self._ispc():
-            cmd = 'tasklist /NH /FI "IMAGENAME eq ImarisServerIce.exe"'
-            result = str(subprocess.check_output(cmd))
-            if "ImarisServerIce.exe" in result:
-                return True
+        statistics = pIceImarisConnector._fetchStatistics(iObject, names)
+        columns = {}
+        for name in names:
+            indices = np.flatnonzero(statistics["names"] == name)
+            if indices.size == 0:
+                continue
+            columns[name] = (
+                statistics["ids"][indices],
+                statistics["values"][indices],
+                {f: v[indices] for f, v in statistics["factors"].items()},
+            )
+        return columns
 
-        elif self._ismac():
-            result = str(subprocess.check_output(["ps", "aux"]))
-            if self._mImarisServerIceExePath in result:
-                return True
-        else:
-            raise OSError("Unsupported platform.")
+    def _getSurfacesCentersAndTimes(self, iSurfaces, workers=8):
+        """Returns the centers of mass and time indices of all surfaces of an ISurfaces object. For internal use
+        only!
 
-        return False
+        The values are read from the "Position X/Y/Z" and "Time Index" statistics (a few calls in total). If that
+        is not possible, the surfaces are queried one by one with ``GetCenterOfMass()`` and ``GetTimeIndex()``,
+        in batches run by a pool of threads.
 
-    def _ismac(self):
-        """Returns true if pIceImarisConnector is being run on Mac OS X. For internal use only!
+        :param iSurfaces: surfaces.
+        :type iSurfaces: Imaris::ISurfaces
+        :param workers: (optional, default 8) number of threads for the per-surface queries.
+        :type workers: int
 
-        :return: True if pIceImarisConnector is being run on Mac OS X, False otherwise.
-        :rtype: Boolean
+        :return: centers of mass (N x 3) and time indices (N).
+        :rtype: tuple
         """
 
-        return platform.system() == "Darwin"
+        nSurfaces = iSurfaces.GetNumberOfSurfaces()
+        positions = np.zeros((nSurfaces, 3))
+        timeIndices = np.zeros(nSurfaces, dtype=np.int64)
+        if nSurfaces == 0:
+            return positions, timeIndices
 
-    def _isOfType(self, obj, typeValue):
-        """Checks that a passed object is of a given type. For internal use only!
+        # Bulk path: read the values from the statistics
+        names = ["Position X", "Position Y", "Position Z", "Time Index"]
+        try:
+            # Surface index of each surface ID
+            ids = np.array(iSurfaces.GetIds(), dtype=np.int64)
+            sorter = np.argsort(ids)
+            columns = self._getStatisticsColumns(iSurfaces, names)
+            target = [positions[:, 0], positions[:, 1], positions[:, 2], timeIndices]
+            for name, values in zip(names, target):
+                columnIds, columnValues, _ = columns[name]
+                indices = sorter[np.searchsorted(ids, columnIds, sorter=sorter)]
+                if (
+                    columnIds.size != nSurfaces
+                    or not np.array_equal(ids[indices], columnIds)
+                    or np.unique(indices).size != nSurfaces
+                ):
+                    raise ValueError("Incomplete statistics.")
+                values[indices] = columnValues
+
+            # The "Time Index" statistics is one-based
+            timeIndices -= 1
+            return positions, timeIndices
+
+        except (AttributeError, KeyError, IndexError, ValueError):
+            # The statistics are not available (or not complete)
+            pass
 
-        :param obj: object for which the type is to be checked.
-        :type obj: one of the Imaris objects
-        :param typeValue: Required type for the object.
-        :type typeValue: string
+        # Fallback: query the surfaces in batches, concurrently
+        def query(batch):
+            for i in batch:
+                positions[i, :] = iSurfaces.GetCenterOfMass(int(i))[0]
+                timeIndices[i] = iSurfaces.GetTimeIndex(int(i))
+
+        batches = np.array_split(np.arange(nSurfaces), min(nSurfaces, 4 * workers))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for _ in executor.map(query, batches):
+                pass
+
+        return positions, timeIndices
+
+    @staticmethod
+    def _groupTrackEdges(ids, trackEdges):
+        """Groups the spots connected by track edges by track ID. For internal use only!
+
+        :param ids: track ID of each edge.
+        :type ids: Numpy array (nEdges)
+        :param trackEdges: indices of the two spots connected by each edge.
+        :type trackEdges: Numpy array (nEdges x 2)
+
+        :return: spot indices of all tracks (sorted by track ID, then by spot index, without repetitions) and
+                 offsets (CSR-style) of the tracks into them: the spots of track i are
+                 ``spotIndices[offsets[i] : offsets[i + 1]]``.
+        :rtype: tuple
+        """
+
+        ids = np.asarray(ids).ravel()
+        trackEdges = np.asarray(trackEdges, dtype=np.int64).reshape(-1, 2)
+        if ids.size != trackEdges.shape[0]:
+            raise ValueError("There must be one track ID per edge.")
+
+        # (track ID, spot) pair for each end of each edge
+        spots = trackEdges.ravel()
+        tracks = np.repeat(ids, 2)
+
+        # Sort by track ID, then by spot, and drop the repeated pairs
+        order = np.lexsort((spots, tracks))
+        spots = spots[order]
+        tracks = tracks[order]
+        keep = np.ones(spots.size, dtype=bool)
+        keep[1:] = (spots[1:] != spots[:-1]) | (tracks[1:] != tracks[:-1])
+        spots = spots[keep]
+        tracks = tracks[keep]
+
+        # Start of each track
+        _, starts = np.unique(tracks, return_index=True)
+        offsets = np.append(starts, spots.size).astype(np.int64)
+
+        return spots, offsets
+
+    def _importImarisLib(self):
+        """Imports the ImarisLib module. For internal use only!"""
+
+        # Dynamically find and import the ImarisLib module
+        try:
+            ImarisLib = importlib.import_module("ImarisLib")
+        except:
+            # The imp module is deprecated (and removed in Python 3.12).
+            import imp
+
+            fileobj, pathname, description = imp.find_module("ImarisLib")
+            ImarisLib = imp.load_module("ImarisLib", fileobj, pathname, description)
+            fileobj.close()
+        return ImarisLib
+
+    def _invalidateDatasetInfo(self, iDataSet=None):
+        """Removes the cached metadata of a dataset. For internal use only!
+
+        :param iDataSet: (optional) dataset; if omitted, the metadata of all datasets is removed.
+        :type iDataSet: Imaris::IDataSet
+        """
+
+        if iDataSet is None:
+            self._mDatasetInfos.clear()
+        else:
+            self._mDatasetInfos.pop(self._getObjectKey(iDataSet), None)
+
+    async def _invokeAsync(self, proxy, operation, *args):
+        """Invokes an operation on an ICE proxy asynchronously. For internal use only!
+
+        The asynchronous method invocation of Ice 3.7 (``<operation>Async()``) or Ice 3.6
+        (``begin_<operation>()``) is used if available; otherwise, the blocking operation is run in the default
+        executor of the event loop.
+
+        :param proxy: ICE proxy.
+        :type proxy: Ice.ObjectPrx
+        :param operation: name of the operation.
+        :type operation: str
+        :param args: arguments of the operation.
+
+        :return: result of the operation.
+        """
+
+        import asyncio
+
+        loop = asyncio.get_event_loop()
+
+        # Blocking operation
+        if not hasattr(proxy, operation + "Async") and not hasattr(
+            proxy, "begin_" + operation
+        ):
+            return await loop.run_in_executor(
+                None, functools.partial(getattr(proxy, operation), *args)
+            )
+
+        # The ICE callbacks are run by an ICE thread: the result is handed to
+        # the event loop
+        future = loop.create_future()
+
+        def setResult(result):
+            if not future.done():
+                future.set_result(result)
+
+        def setException(exception):
+            if not future.done():
+                future.set_exception(exception)
+
+        def onResponse(*result):
+            loop.call_soon_threadsafe(setResult, result[0] if result else None)
+
+        def onException(exception):
+            loop.call_soon_threadsafe(setException, exception)
+
+        if hasattr(proxy, operation + "Async"):
+
+            def onDone(iceFuture):
+                try:
+                    result = iceFuture.result()
+                except Exception as e:
+                    onException(e)
+                else:
+                    onResponse(result)
+
+            getattr(proxy, operation + "Async")(*args).add_done_callback(onDone)
+        else:
+            getattr(proxy, "begin_" + operation)(
+                *args, _response=onResponse, _ex=onException
+            )
+
+        return await future
+
+    @classmethod
+    def _isConnectionException(cls, exception):
+        """Checks whether an exception raised by ICE signals a lost connection to Imaris. For internal use only!
+
+        :param exception: exception raised by a call to Imaris.
+        :type exception: Exception
+
+        :return: True if the connection was lost, False otherwise.
+        :rtype: Boolean
+        """
+
+        # Compare by name: Ice is only available once ImarisLib is imported
+        return any(
+            c.__name__ in cls._CONNECTION_EXCEPTIONS for c in type(exception).__mro__
+        )
+
+    def _isImarisServerIceRunning(self):
+        """Checks whether an instance of ImarisServerIce is already running and can be reused. For internal use only!
+
+        ImarisServerIce is running if it accepts connections on its endpoint.
+
+        :return: True is an instance of ImarisServerIce is running and can be reused, False otherwise.
+        :rtype: Boolean
+        """
+
+        import socket
+
+        if self._mLaunchStatistics is not None:
+            self._mLaunchStatistics["serverProbes"] += 1
+
+        try:
+            with socket.create_connection(self._SERVER_ENDPOINT, timeout=0.25):
+                return True
+        except OSError:
+            return False
+
+    def _ismac(self):
+        """Returns true if pIceImarisConnector is being run on Mac OS X. For internal use only!
+
+        :return: True if pIceImarisConnector is being run on Mac OS X, False otherwise.
+        :rtype: Boolean
+        """
+
+        return platform.system() == "Darwin"
+
+    def _isOfType(self, obj, typeValue):
+        """Checks that a passed object is of a given type. For internal use only!
+
+        :param obj: object for which the type is to be checked.
+        :type obj: one of the Imaris objects
+        :param typeValue: Required type for the object.
+        :type typeValue: string
 
         typeValue if one of:
             * 'Cells'
@@ -2452,37 +4950,8 @@ class pIceImarisConnector(object):
         if typeValue not in self._mPossibleTypeFilters:
             raise ValueError("Invalid value for typeValue.")
 
-        # Get the factory
-        factory = self.mImarisApplication.GetFactory()
-
-        # Test the object
-        if typeValue == "Cells":
-            return factory.IsCells(obj)
-        elif typeValue == "ClippingPlane":
-            return factory.IsClippingPlane(obj)
-        elif typeValue == "DataSet":
-            return factory.IsDataSet(obj)
-        elif typeValue == "Filaments":
-            return factory.IsFilaments(obj)
-        elif typeValue == "Frame":
-            return factory.IsFrame(obj)
-        elif typeValue == "LightSource":
-            return factory.IsLightSource(obj)
-        elif typeValue == "MeasurementPoints":
-            return factory.IsMeasurementPoints(obj)
-        elif typeValue == "Spots":
-            return factory.IsSpots(obj)
-        elif typeValue == "Surfaces":
-            return factory.IsSurfaces(obj)
-        elif typeValue == "SurpassCamera":
-            return factory.IsSurpassCamera(obj)
-        elif typeValue == "Volume":
-            return factory.IsVolume(obj)
-        elif typeValue == "ReferenceFrames":
-            # The factory does not have a Is...() method for reference frames
-            return factory.ToReferenceFrames(obj) is not None
-        else:
-            raise ValueError("Bad value for " "typeValue" ".")
+        # The type of the object is resolved (and memoized) by autocast()
+        return self._resolveType(obj) == typeValue
 
     def _ispc(self):
         """Returns true if pIceImarisConnector is being run on Windows. For internal use only!
@@ -2493,6 +4962,39 @@ class pIceImarisConnector(object):
 
         return platform.system() == "Windows"
 
+    def _isStalePayload(self, iDataSet, info, payload, nValues):
+        """Checks the data returned by an ICE data getter against the cached metadata it was requested with. For
+        internal use only!
+
+        If the data does not have the expected number of values, the metadata is fetched again, since the dataset
+        may have been resized through the IDataSet object.
+
+        :param iDataSet: dataset.
+        :type iDataSet: Imaris::IDataSet
+        :param info: metadata the data was requested with.
+        :type info: DatasetInfo
+        :param payload: data as returned by ICE.
+        :type payload: bytes, list or Numpy array
+        :param nValues: expected number of values.
+        :type nValues: int
+
+        :return: True if the sizes or the datatype of the dataset changed (the data must then be requested again),
+                 False otherwise.
+        :rtype: Boolean
+        """
+
+        if self._getPayloadSize(payload) == nValues:
+            return False
+
+        self._invalidateDatasetInfo(iDataSet)
+        if info.hasSameLayout(self._getDatasetInfo(iDataSet)):
+            return False
+
+        # Volumes cached with the old sizes are stale
+        if self._mVolumeCache is not None:
+            self._mVolumeCache.invalidate(self._getObjectKey(iDataSet))
+        return True
+
     def _isSupportedPlatform(self):
         """Returns True if running on a supported platform. For internal use only!
 
@@ -2501,10 +5003,200 @@ class pIceImarisConnector(object):
         """
         return self._ispc() or self._ismac()
 
-    def _startImarisServerIce(self):
+    def _loadDiscovery(self, key):
+        """Restores the paths to Imaris from a cached discovery (see ``_findImaris()``). For internal use only!
+
+        :param key: key of the discovery (see ``_getDiscoveryKey()``).
+        :type key: string
+
+        :return: True if a cached discovery was found and its files still exist, False otherwise.
+        :rtype: Boolean
+        """
+
+        entry = self._DISCOVERY_CACHE.get(key)
+        if entry is None:
+            entry = self._readDiscoveryCacheFile().get(key)
+            if not isinstance(entry, dict):
+                return False
+            self._DISCOVERY_CACHE[key] = entry
+
+        # The installation may have been removed or moved without changing the
+        # searched folder: forget the discovery, so that Imaris is searched again
+        try:
+            valid = (
+                os.path.isfile(entry["exePath"])
+                and os.path.isfile(entry["serverExePath"])
+                and os.path.isdir(entry["libPath"])
+            )
+            imarisPath = entry["imarisPath"]
+            version = entry["version"]
+        except (KeyError, TypeError):
+            valid = False
+        if not valid:
+            self._forgetDiscovery(key)
+            return False
+
+        self._mImarisPath = imarisPath
+        self._mImarisExePath = entry["exePath"]
+        self._mImarisServerIceExePath = entry["serverExePath"]
+        self._mImarisLibPath = entry["libPath"]
+        self._mImarisIntegerVersion = version
+        return True
+
+    def _markDead(self):
+        """Forgets the connection to Imaris after it was found to be lost. For internal use only!"""
+
+        self._mImarisApplication = None
+        self._mLastAliveTime = None
+
+    @staticmethod
+    def _pollWithBackoff(probe, deadline, initialDelay=0.01, maxDelay=0.5):
+        """Calls a probe until it returns a true value, waiting longer and longer between calls. For internal use
+        only!
+
+        :param probe: function without arguments.
+        :type probe: callable
+        :param deadline: time (as returned by ``time.monotonic()``) after which to give up.
+        :type deadline: float
+        :param initialDelay: (optional, default 0.01) time (in seconds) to wait after the first call; it is doubled
+                             after every call.
+        :type initialDelay: float
+        :param maxDelay: (optional, default 0.5) maximum time (in seconds) to wait between two calls.
+        :type maxDelay: float
+
+        :return: first true value returned by the probe, or None if the deadline passed.
+        """
+
+        delay = initialDelay
+        while True:
+            result = probe()
+            if result:
+                return result
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(delay, remaining))
+            delay = min(2 * delay, maxDelay)
+
+    def _readDataSubVolume(
+        self,
+        iDataSet,
+        imarisDataType,
+        x0,
+        y0,
+        z0,
+        channel,
+        timepoint,
+        dX,
+        dY,
+        dZ,
+        out=None,
+    ):
+        """Gets and decodes a data subvolume, without any check. For internal use only!
+
+        :param iDataSet: dataset.
+        :type iDataSet: Imaris::IDataSet
+        :param imarisDataType: name of the Imaris datatype of the dataset (e.g. 'eTypeUInt8').
+        :type imarisDataType: str
+        :param out: (optional) C-contiguous array of shape ``(dZ, dY, dX)`` to decode into.
+        :type out: Numpy array
+
+        See ``getDataSubVolume()`` for the other parameters.
+
+        :return: data subvolume (``out``, if passed).
+        :rtype: Numpy array
+        """
+
+        if imarisDataType == "eTypeUInt8":
+            payload = iDataSet.GetDataSubVolumeAs1DArrayBytes(
+                x0, y0, z0, channel, timepoint, dX, dY, dZ
+            )
+            dtype = np.uint8
+        elif imarisDataType == "eTypeUInt16":
+            payload = iDataSet.GetDataSubVolumeAs1DArrayShorts(
+                x0, y0, z0, channel, timepoint, dX, dY, dZ
+            )
+            dtype = np.uint16
+        elif imarisDataType == "eTypeFloat":
+            payload = iDataSet.GetDataSubVolumeAs1DArrayFloats(
+                x0, y0, z0, channel, timepoint, dX, dY, dZ
+            )
+            dtype = np.float32
+        else:
+            raise Exception("Bad value for iDataSet::getType().")
+
+        # Decode
+        return self._decodeDataPayload(payload, dtype, (dZ, dY, dX), out=out)
+
+    def _readDiscoveryCacheFile(self):
+        """Reads the cached discoveries of Imaris from the cache file. For internal use only!
+
+        :return: discoveries by key (empty if the file does not exist or cannot be read).
+        :rtype: dict
+        """
+
+        import json
+
+        try:
+            with open(self._getDiscoveryCacheFile(), "r") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    async def _resolveDataSetAsync(self, iDataSet):
+        """Returns the passed dataset, or current one (fetched asynchronously) if None. For internal use only!
+
+        :param iDataSet: dataset or None.
+        :type iDataSet: Imaris::IDataSet
+
+        :return: dataset (None if there is no dataset).
+        :rtype: Imaris::IDataSet
+        """
+
+        if iDataSet is None:
+            iDataSet = await self._invokeAsync(self._mImarisApplication, "GetDataSet")
+        return iDataSet
+
+    @staticmethod
+    def _runHeartbeat(connRef, application, interval, stop):
+        """Queries Imaris at regular intervals until stopped (see ``startHeartbeat()``). For internal use only!
+
+        :param connRef: weak reference to the connector, so that the heartbeat does not keep it alive.
+        :type connRef: weakref.ref
+        :param application: application to query.
+        :type application: Imaris::IApplication
+        :param interval: time (in seconds) between two queries.
+        :type interval: float
+        :param stop: event that stops the heartbeat.
+        :type stop: threading.Event
+        """
+
+        while not stop.wait(interval):
+            conn = connRef()
+            if conn is None or conn._mImarisApplication is not application:
+                return
+            try:
+                application.GetVersion()
+            except Exception as e:
+                # Other errors (e.g. a timeout while Imaris is busy) are retried at the next tick
+                if not conn._isConnectionException(e):
+                    conn = None
+                    continue
+                if conn._mImarisApplication is application:
+                    conn._markDead()
+                return
+            conn._mLastAliveTime = time.monotonic()
+            conn = None
+
+    def _startImarisServerIce(self, deadline=None):
         """Starts an instance of ImarisServerIce and waits until it is ready to accept connections. For internal
          use only!
 
+        :param deadline: (optional) time (as returned by ``time.monotonic()``) until which to wait; if omitted,
+                         10 s from now.
+        :type deadline: float
+
         :return: True if ImarisServerIce could be started successfully, False otherwise.
         :rtype: Boolean
         """
@@ -2519,7 +5211,9 @@ class pIceImarisConnector(object):
             return True
 
         # We start an instance of ImarisServerIce and wait until it is running
-        # before returning success. We set a 10s time out limit
+        # before returning success
+        import subprocess
+
         try:
             process = subprocess.Popen(self._mImarisServerIceExePath, bufsize=-1)
         except OSError as o:
@@ -2536,12 +5230,1136 @@ class pIceImarisConnector(object):
             return False
 
         # Now wait until ImarisIceServer is running (or we time out)
-        t = time.time()
-        timeout = t + 10
-        while t < timeout:
-            if self._isImarisServerIceRunning():
-                return True
-            # Update the elapsed time
-            t = time.time()
+        if deadline is None:
+            deadline = time.monotonic() + 10
+        running = self._pollWithBackoff(self._isImarisServerIceRunning, deadline)
+        return running is not None
 
-        return False
+    @staticmethod
+    def _splitIntoChunks(shape, itemsize, maxChunkBytes):
+        """Splits a (Z, Y, X) volume into chunks of at most maxChunkBytes bytes. For internal use only!
+
+        The volume is split into Z-slabs; if a single plane is too large, into blocks of rows; if a single row is
+        too large, into pieces of rows.
+
+        :param shape: shape ``(sizeZ, sizeY, sizeX)`` of the volume.
+        :type shape: tuple
+        :param itemsize: size in bytes of one voxel.
+        :type itemsize: int
+        :param maxChunkBytes: maximum size in bytes of a chunk.
+        :type maxChunkBytes: int
+
+        :return: list of chunks ``(z0, y0, x0, dZ, dY, dX)``.
+        :rtype: list
+        """
+
+        if maxChunkBytes < itemsize:
+            raise ValueError("maxChunkBytes must be at least the size of one voxel.")
+
+        (sizeZ, sizeY, sizeX) = shape
+        rowBytes = sizeX * itemsize
+        planeBytes = sizeY * rowBytes
+
+        # Chunk shape
+        if planeBytes <= maxChunkBytes:
+            chunkShape = (maxChunkBytes // planeBytes, sizeY, sizeX)
+        elif rowBytes <= maxChunkBytes:
+            chunkShape = (1, maxChunkBytes // rowBytes, sizeX)
+        else:
+            chunkShape = (1, 1, maxChunkBytes // itemsize)
+
+        chunks = []
+        for z0 in range(0, sizeZ, chunkShape[0]):
+            for y0 in range(0, sizeY, chunkShape[1]):
+                for x0 in range(0, sizeX, chunkShape[2]):
+                    chunks.append(
+                        (
+                            z0,
+                            y0,
+                            x0,
+                            min(chunkShape[0], sizeZ - z0),
+                            min(chunkShape[1], sizeY - y0),
+                            min(chunkShape[2], sizeX - x0),
+                        )
+                    )
+        return chunks
+
+    @staticmethod
+    def _throughput(nBytes, tic):
+        """Returns the speed in MB/s of a transfer of nBytes bytes started at time tic. For internal use only!
+
+        :param nBytes: number of bytes transferred.
+        :type nBytes: int
+        :param tic: start time of the transfer, as returned by ``time.perf_counter()``.
+        :type tic: float
+
+        :return: transfer speed in MB/s.
+        :rtype: float
+        """
+        elapsed = max(time.perf_counter() - tic, 1e-9)
+        return nBytes / 2**20 / elapsed
+
+    @staticmethod
+    def _toVoxelTriplet(value, name):
+        """Expands a scalar or a 3-element sequence into a (Z, Y, X) tuple of integers. For internal use only!
+
+        :param value: scalar or 3-element sequence.
+        :type value: int, tuple, list or Numpy array
+        :param name: name of the argument (used in error messages).
+        :type name: string
+
+        :return: (Z, Y, X) tuple of integers.
+        :rtype: tuple
+        """
+
+        values = np.array(value, dtype=np.int64).ravel()
+        if values.size == 1:
+            values = np.repeat(values, 3)
+        if values.size != 3:
+            raise ValueError(name + " must be a scalar or a (Z, Y, X) triplet.")
+        return tuple(int(v) for v in values)
+
+    def _storeDiscovery(self, key):
+        """Caches the paths to Imaris found by ``_findImaris()``, in this process and in the cache file. For
+        internal use only!
+
+        :param key: key of the discovery (see ``_getDiscoveryKey()``).
+        :type key: string
+        """
+
+        entry = {
+            "imarisPath": self._mImarisPath,
+            "exePath": self._mImarisExePath,
+            "serverExePath": self._mImarisServerIceExePath,
+            "libPath": self._mImarisLibPath,
+            "version": self._mImarisIntegerVersion,
+        }
+        self._DISCOVERY_CACHE[key] = entry
+
+        # Keep the entries of the other folders
+        entries = self._readDiscoveryCacheFile()
+        prefix = key.rsplit("|", 2)[0] + "|"
+        entries = {k: v for k, v in entries.items() if not k.startswith(prefix)}
+        entries[key] = entry
+        self._writeDiscoveryCacheFile(entries)
+
+    @staticmethod
+    def _writeDataSubVolume(
+        iDataSet, imarisDataType, stack, x0, y0, z0, channel, timepoint
+    ):
+        """Sets a data subvolume, without any check. For internal use only!
+
+        :param iDataSet: dataset.
+        :type iDataSet: Imaris::IDataSet
+        :param imarisDataType: name of the Imaris datatype of the dataset (e.g. 'eTypeUInt8').
+        :type imarisDataType: str
+        :param stack: 3D array of shape ``(dZ, dY, dX)`` and of the dataset type.
+        :type stack: Numpy array
+
+        See ``setDataSubVolume()`` for the other parameters.
+        """
+
+        (dZ, dY, dX) = stack.shape
+        if imarisDataType == "eTypeUInt8":
+            setter = iDataSet.SetDataSubVolumeAs1DArrayBytes
+        elif imarisDataType == "eTypeUInt16":
+            setter = iDataSet.SetDataSubVolumeAs1DArrayShorts
+        elif imarisDataType == "eTypeFloat":
+            setter = iDataSet.SetDataSubVolumeAs1DArrayFloats
+        else:
+            raise Exception("Bad value for iDataSet::getType().")
+        setter(stack.ravel(), x0, y0, z0, channel, timepoint, dX, dY, dZ)
+
+    def _writeDiscoveryCacheFile(self, entries):
+        """Replaces the content of the cache file of the discoveries of Imaris (see ``_findImaris()``). For internal
+        use only!
+
+        The cache file is only an optimization: failures to write it are ignored.
+
+        :param entries: cached discoveries by key (see ``_getDiscoveryKey()``).
+        :type entries: dict
+        """
+
+        import json
+
+        filename = self._getDiscoveryCacheFile()
+        try:
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            tmpFilename = filename + "." + str(os.getpid())
+            with open(tmpFilename, "w") as f:
+                json.dump(entries, f, indent=1)
+            os.replace(tmpFilename, filename)
+        except OSError:
+            pass
+
+
+class DatasetInfo(object):
+    """DatasetInfo is an immutable snapshot of the metadata of an Imaris dataset: sizes, extends, voxel sizes,
+    datatype, channel names and colors, and time delta.
+
+    DatasetInfo objects are created and cached by pIceImarisConnector (see
+    ``pIceImarisConnector.getDatasetInfo()``), so that the metadata is fetched from Imaris only once per dataset.
+
+    :param iDataSet: dataset to read the metadata from.
+    :type iDataSet: Imaris::IDataSet
+    """
+
+    def __init__(self, iDataSet):
+        """Initializes the DatasetInfo object by reading all metadata from the passed dataset."""
+
+        # Sizes
+        self._mSizes = (
+            iDataSet.GetSizeX(),
+            iDataSet.GetSizeY(),
+            iDataSet.GetSizeZ(),
+            iDataSet.GetSizeC(),
+            iDataSet.GetSizeT(),
+        )
+
+        # Extends
+        self._mExtends = (
+            iDataSet.GetExtendMinX(),
+            iDataSet.GetExtendMaxX(),
+            iDataSet.GetExtendMinY(),
+            iDataSet.GetExtendMaxY(),
+            iDataSet.GetExtendMinZ(),
+            iDataSet.GetExtendMaxZ(),
+        )
+
+        # Datatype
+        self._mImarisDataType = str(iDataSet.GetType())
+
+        # Channel names and colors
+        self._mChannelNames = tuple(
+            iDataSet.GetChannelName(c) for c in range(self._mSizes[3])
+        )
+        self._mChannelColors = tuple(
+            iDataSet.GetChannelColorRGBA(c) for c in range(self._mSizes[3])
+        )
+
+        # Time delta
+        self._mTimePointsDelta = iDataSet.GetTimePointsDelta()
+
+    def __repr__(self):
+        return (
+            "DatasetInfo(sizes="
+            + str(self._mSizes)
+            + ", extends="
+            + str(self._mExtends)
+            + ", type="
+            + self._mImarisDataType
+            + ")"
+        )
+
+    @property
+    def channelColors(self):
+        """Return the channel colors as RGBA scalars (see ``pIceImarisConnector.mapRgbaScalarToVector()``)."""
+        return self._mChannelColors
+
+    @property
+    def channelNames(self):
+        """Return the channel names."""
+        return self._mChannelNames
+
+    @property
+    def datatype(self):
+        """Return the datatype of the dataset as a Numpy type (or None if the type is unknown in Imaris)."""
+        if self._mImarisDataType == "eTypeUInt8":
+            return np.uint8
+        elif self._mImarisDataType == "eTypeUInt16":
+            return np.uint16
+        elif self._mImarisDataType == "eTypeFloat":
+            return np.float32
+        elif self._mImarisDataType == "eTypeUnknown":
+            return None
+        else:
+            raise Exception("Bad value for iDataSet::GetType().")
+
+    @property
+    def extends(self):
+        """Return the extends ``(minX, maxX, minY, maxY, minZ, maxZ)``."""
+        return self._mExtends
+
+    def hasSameLayout(self, other):
+        """Returns True if another snapshot has the same sizes and datatype, i.e. if the voxels are laid out and
+        decoded in the same way.
+
+        :param other: snapshot to compare with.
+        :type other: DatasetInfo
+
+        :return: True if the sizes and the datatype are the same.
+        :rtype: Boolean
+        """
+        return (
+            self._mSizes == other._mSizes
+            and self._mImarisDataType == other._mImarisDataType
+        )
+
+    @property
+    def imarisDataType(self):
+        """Return the name of the Imaris datatype (e.g. 'eTypeUInt8')."""
+        return self._mImarisDataType
+
+    @property
+    def sizes(self):
+        """Return the sizes ``(sizeX, sizeY, sizeZ, sizeC, sizeT)``."""
+        return self._mSizes
+
+    @property
+    def timePointsDelta(self):
+        """Return the time difference between consecutive time points."""
+        return self._mTimePointsDelta
+
+    @property
+    def voxelSizes(self):
+        """Return the voxel sizes ``(voxelSizeX, voxelSizeY, voxelSizeZ)``."""
+        return (
+            (self._mExtends[1] - self._mExtends[0]) / self._mSizes[0],
+            (self._mExtends[3] - self._mExtends[2]) / self._mSizes[1],
+            (self._mExtends[5] - self._mExtends[4]) / self._mSizes[2],
+        )
+
+
+class LazyDataArray(object):
+    """LazyDataArray is a Numpy-indexable view of an Imaris dataset with shape ``(sizeT, sizeC, sizeZ, sizeY, sizeX)``
+    that transfers only the indexed voxels. It is returned by ``pIceImarisConnector.asLazyArray()``.
+
+    :param conn: connector used to transfer the data.
+    :type conn: pIceImarisConnector
+    :param iDataSet: dataset.
+    :type iDataSet: Imaris::IDataSet
+    :param maxChunkBytes: (optional, default 16 MB) maximum size of the subvolumes sent to Imaris when writing.
+    :type maxChunkBytes: int
+
+    Integers, slices (with any step) and Ellipsis are supported, as in ``arr[5, 0, 10:20, ::2, 100:300]``. Each
+    read is translated into the smallest set of ``getDataVolume()``, ``getDataSlice()`` and ``getDataSubVolume()``
+    calls: one per (timepoint, channel) pair, or one per plane if the z step is larger than 1. Steps along y and x
+    are applied to the bounding box of the selection.
+
+    Assignments (``arr[...] = value``) are sent through ``setDataSubVolume()`` in Z-slabs of at most
+    ``maxChunkBytes`` bytes. If the y or x step is larger than 1, the bounding box is read, modified and written back.
+
+    ``numpy.asarray(arr)`` reads the whole dataset.
+    """
+
+    def __init__(self, conn, iDataSet, maxChunkBytes=2**24):
+        """Initializes the LazyDataArray object."""
+
+        if maxChunkBytes < 1:
+            raise ValueError("maxChunkBytes must be positive.")
+
+        # Connector and dataset
+        self._mConn = conn
+        self._mDataSet = iDataSet
+
+        # Maximum size of the written subvolumes
+        self._mMaxChunkBytes = maxChunkBytes
+
+        # Shape and datatype
+        info = conn.getDatasetInfo(iDataSet)
+        sizeX, sizeY, sizeZ, sizeC, sizeT = info.sizes
+        self._mShape = (sizeT, sizeC, sizeZ, sizeY, sizeX)
+        self._mDtype = np.dtype(info.datatype)
+
+    def __array__(self, dtype=None, copy=None):
+        if copy is False:
+            raise ValueError("A LazyDataArray cannot be converted without copying.")
+        arr = self[...]
+        if dtype is not None:
+            arr = arr.astype(dtype, copy=False)
+        return arr
+
+    def __getitem__(self, key):
+        ranges, reversedAxes, index = self._parseKey(key)
+
+        # Read the selection in ascending order
+        result = np.empty(tuple(len(r) for r in ranges), dtype=self._mDtype)
+        if result.size > 0:
+            rangeT, rangeC, rangeZ, rangeY, rangeX = ranges
+            for i, t in enumerate(rangeT):
+                for j, c in enumerate(rangeC):
+                    self._readVolume(c, t, rangeZ, rangeY, rangeX, result[i, j])
+
+        # Restore the requested order and drop the axes indexed by integers
+        if reversedAxes:
+            result = np.ascontiguousarray(np.flip(result, reversedAxes))
+        return result[index]
+
+    def __len__(self):
+        return self._mShape[0]
+
+    def __repr__(self):
+        return (
+            "LazyDataArray(shape="
+            + str(self._mShape)
+            + ", dtype="
+            + self._mDtype.name
+            + ")"
+        )
+
+    def __setitem__(self, key, value):
+        ranges, reversedAxes, index = self._parseKey(key)
+
+        # Bring the values to the shape of the (ascending) selection
+        shape = tuple(len(r) for r in ranges)
+        values = np.asarray(value, dtype=self._mDtype)
+        selectionShape = tuple(n for n, i in zip(shape, index) if i != 0)
+        values = np.broadcast_to(values, selectionShape).reshape(shape)
+        if reversedAxes:
+            values = np.flip(values, reversedAxes)
+
+        if values.size == 0:
+            return
+
+        rangeT, rangeC, rangeZ, rangeY, rangeX = ranges
+        for i, t in enumerate(rangeT):
+            for j, c in enumerate(rangeC):
+                self._writeVolume(c, t, rangeZ, rangeY, rangeX, values[i, j])
+
+    @property
+    def dtype(self):
+        """Return the Numpy datatype of the dataset."""
+        return self._mDtype
+
+    @property
+    def nbytes(self):
+        """Return the total size of the dataset in bytes."""
+        return self.size * self._mDtype.itemsize
+
+    @property
+    def ndim(self):
+        """Return the number of dimensions (always 5)."""
+        return 5
+
+    @property
+    def shape(self):
+        """Return the shape ``(sizeT, sizeC, sizeZ, sizeY, sizeX)``."""
+        return self._mShape
+
+    @property
+    def size(self):
+        """Return the number of voxels of the dataset."""
+        return int(np.prod(self._mShape))
+
+    # --------------------------------------------------------------------------
+    #
+    # PRIVATE METHODS FOR INTERNAL USE ONLY.
+    #
+    #    Please do not rely on the API of these methods to be preserved!
+    #
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def _boundingBox(r):
+        """Returns the bounding box of an ascending range. For internal use only!
+
+        :return: first index, extension and slice selecting the range within the box.
+        :rtype: tuple
+        """
+        return r[0], r[-1] - r[0] + 1, slice(None, None, r.step)
+
+    def _parseKey(self, key):
+        """Converts an index into ascending ranges along the five axes. For internal use only!
+
+        :param key: index (integers, slices and Ellipsis).
+        :type key: int, slice, Ellipsis or tuple
+
+        :return: list of five ascending ranges; tuple of the axes whose order must be reversed; index dropping the
+                 axes that were indexed by integers.
+        :rtype: tuple
+        """
+
+        if not isinstance(key, tuple):
+            key = (key,)
+
+        # Expand the Ellipsis
+        nEllipsis = sum(1 for k in key if k is Ellipsis)
+        if nEllipsis > 1:
+            raise IndexError("An index can only have a single ellipsis ('...').")
+        if nEllipsis == 1:
+            pos = next(i for i, k in enumerate(key) if k is Ellipsis)
+            fill = (slice(None),) * (5 - len(key) + 1)
+            key = key[:pos] + fill + key[pos + 1 :]
+        if len(key) > 5:
+            raise IndexError("Too many indices: the array is 5-dimensional.")
+        key = key + (slice(None),) * (5 - len(key))
+
+        ranges = []
+        reversedAxes = []
+        index = []
+        for axis, (k, size) in enumerate(zip(key, self._mShape)):
+            if isinstance(k, slice):
+                r = range(*k.indices(size))
+                if r.step < 0:
+                    r = r[::-1]
+                    reversedAxes.append(axis)
+                index.append(slice(None))
+            elif isinstance(k, (int, np.integer)) and not isinstance(k, bool):
+                k = int(k)
+                if k < -size or k >= size:
+                    raise IndexError(
+                        "Index "
+                        + str(k)
+                        + " is out of bounds for axis "
+                        + str(axis)
+                        + " with size "
+                        + str(size)
+                        + "."
+                    )
+                if k < 0:
+                    k += size
+                r = range(k, k + 1)
+                index.append(0)
+            else:
+                raise IndexError(
+                    "Only integers, slices and Ellipsis are valid indices for a LazyDataArray."
+                )
+            ranges.append(r)
+
+        return ranges, tuple(reversedAxes), tuple(index)
+
+    def _readVolume(self, channel, timepoint, rangeZ, rangeY, rangeX, target):
+        """Reads a (strided) subvolume into target. For internal use only!"""
+
+        sizeY, sizeX = self._mShape[3:]
+        (y0, dY, localY) = self._boundingBox(rangeY)
+        (x0, dX, localX) = self._boundingBox(rangeX)
+        fullPlane = dY == sizeY and dX == sizeX
+
+        # Contiguous selections are decoded straight into the target
+        direct = rangeY.step == 1 and rangeX.step == 1
+
+        # A single block, or one block per plane if planes are skipped
+        if rangeZ.step == 1:
+            blocks = [(rangeZ[0], len(rangeZ), slice(None))]
+        else:
+            blocks = [(z, 1, slice(k, k + 1)) for k, z in enumerate(rangeZ)]
+
+        for z0, dZ, planes in blocks:
+            out = target[planes] if direct else None
+            if fullPlane and dZ == self._mShape[2]:
+                data = self._mConn.getDataVolume(
+                    channel, timepoint, iDataSet=self._mDataSet, out=out
+                )
+            elif fullPlane and dZ == 1:
+                data = self._mConn.getDataSlice(
+                    z0,
+                    channel,
+                    timepoint,
+                    iDataSet=self._mDataSet,
+                    out=None if out is None else out[0],
+                )
+                data = data[np.newaxis]
+            else:
+                data = self._mConn.getDataSubVolume(
+                    x0,
+                    y0,
+                    z0,
+                    channel,
+                    timepoint,
+                    dX,
+                    dY,
+                    dZ,
+                    iDataSet=self._mDataSet,
+                    out=out,
+                )
+            if data is None:
+                raise Exception("Could not read the data from Imaris.")
+            if not direct:
+                target[planes] = data[:, localY, localX]
+
+    def _writeVolume(self, channel, timepoint, rangeZ, rangeY, rangeX, values):
+        """Writes values into a (strided) subvolume in chunks. For internal use only!"""
+
+        (y0, dY, localY) = self._boundingBox(rangeY)
+        (x0, dX, localX) = self._boundingBox(rangeX)
+
+        # Strided selections in y and x require to read the bounding box first
+        direct = rangeY.step == 1 and rangeX.step == 1
+
+        # Z-slabs of at most maxChunkBytes bytes (but at least one plane), or
+        # one slab per plane if planes are skipped
+        if rangeZ.step == 1:
+            nPlanes = max(1, self._mMaxChunkBytes // (dY * dX * self._mDtype.itemsize))
+            blocks = [
+                (rangeZ[k], min(nPlanes, len(rangeZ) - k), slice(k, k + nPlanes))
+                for k in range(0, len(rangeZ), nPlanes)
+            ]
+        else:
+            blocks = [(z, 1, slice(k, k + 1)) for k, z in enumerate(rangeZ)]
+
+        for z0, dZ, planes in blocks:
+            if direct:
+                block = np.ascontiguousarray(values[planes])
+            else:
+                block = self._mConn.getDataSubVolume(
+                    x0, y0, z0, channel, timepoint, dX, dY, dZ, iDataSet=self._mDataSet
+                )
+                if block is None:
+                    raise Exception("Could not read the data from Imaris.")
+                block[:, localY, localX] = values[planes]
+            self._mConn.setDataSubVolume(
+                block, x0, y0, z0, channel, timepoint, iDataSet=self._mDataSet
+            )
+
+
+class SceneIndex(object):
+    """SceneIndex is an index of the objects of the Surpass Scene by type, name and folder, built by scanning the
+    scene once.
+
+    Each object is stored already cast (see ``pIceImarisConnector.autocast()``), together with its type, name and
+    path (the names of the folders that contain it). Folders (IDataContainer objects) are indexed as well, but are
+    not returned by ``children()``. Queries do not make any calls to Imaris.
+
+    SceneIndex objects are created and cached by pIceImarisConnector (see ``pIceImarisConnector.getSceneIndex()``).
+
+    :param conn: connector used to cast the objects.
+    :type conn: pIceImarisConnector
+    :param surpassScene: Surpass Scene to scan.
+    :type surpassScene: Imaris::IDataContainer
+
+    **EXAMPLE**
+
+    >>> index = conn.getSceneIndex()
+    >>> spots = index.ofType("Spots")
+    >>> inFolder = [obj for obj in index.ofType("Surfaces") if index.pathOf(obj) == ("Folder",)]
+    """
+
+    def __init__(self, conn, surpassScene):
+        """Initializes the SceneIndex object by scanning the passed Surpass Scene."""
+
+        self._mSceneKey = pIceImarisConnector._getObjectKey(surpassScene)
+
+        # Objects in scene order: (object, type, name, path)
+        self._mItems = []
+
+        # Position in self._mItems by object key
+        self._mPositions = {}
+
+        # Folders with their number of children and name, to detect changes
+        self._mContainers = []
+
+        self._scan(conn, surpassScene, ())
+
+    def __contains__(self, iObject):
+        return self.lookup(iObject) is not None
+
+    def __len__(self):
+        return len(self._mItems)
+
+    def __repr__(self):
+        return (
+            "SceneIndex(objects="
+            + str(len(self._mItems))
+            + ", folders="
+            + str(len(self._mContainers) - 1)
+            + ")"
+        )
+
+    def children(self, recursive=True, typeFilter=None):
+        """Returns the objects of the scene in the order of ``pIceImarisConnector.getAllSurpassChildren()``.
+
+        :param recursive: (optional, default True) if False, only the objects at root level are returned.
+        :type recursive: Boolean
+        :param typeFilter: (optional) return only the objects of this type (e.g. 'Spots').
+        :type typeFilter: string
+
+        :return: objects (without the folders).
+        :rtype: list
+        """
+
+        return [
+            obj
+            for obj, typeName, _, path in self._mItems
+            if typeName != "DataContainer"
+            and (typeFilter is None or typeName == typeFilter)
+            and (recursive or len(path) == 0)
+        ]
+
+    def depthOf(self, iObject):
+        """Returns the depth of an object (0 for the objects at root level), or None if it is not indexed."""
+        path = self.pathOf(iObject)
+        return None if path is None else len(path)
+
+    def isStale(self, surpassScene):
+        """Checks whether the scene changed since it was indexed.
+
+        The number of children and the name of each folder are compared with the indexed ones: this costs two calls
+        per folder.
+
+        :param surpassScene: current Surpass Scene.
+        :type surpassScene: Imaris::IDataContainer
+
+        :return: True if the scene must be scanned again, False otherwise.
+        :rtype: Boolean
+        """
+
+        if pIceImarisConnector._getObjectKey(surpassScene) != self._mSceneKey:
+            return True
+        try:
+            for container, nChildren, name in self._mContainers:
+                if (
+                    container.GetNumberOfChildren() != nChildren
+                    or container.GetName() != name
+                ):
+                    return True
+        except Exception:
+            # A folder does not exist anymore
+            return True
+        return False
+
+    def lookup(self, iObject):
+        """Returns the indexed (cast) object for an object of the scene, or None if it is not indexed."""
+        position = self._mPositions.get(pIceImarisConnector._getObjectKey(iObject))
+        return None if position is None else self._mItems[position][0]
+
+    def ofType(self, typeName):
+        """Returns all objects of a type (e.g. 'Spots', or 'DataContainer' for the folders), in scene order."""
+        return [obj for obj, t, _, _ in self._mItems if t == typeName]
+
+    def pathOf(self, iObject):
+        """Returns the names of the folders that contain an object (outermost first), or None if it is not
+        indexed."""
+        return self._item(iObject, 3)
+
+    def typeOf(self, iObject):
+        """Returns the type of an object (e.g. 'Spots'), or None if it is not indexed."""
+        return self._item(iObject, 1)
+
+    def withName(self, name, typeFilter=None):
+        """Returns all objects with a given name, in scene order.
+
+        :param name: name of the objects.
+        :type name: string
+        :param typeFilter: (optional) return only the objects of this type (e.g. 'Spots').
+        :type typeFilter: string
+
+        :return: objects.
+        :rtype: list
+        """
+
+        return [
+            obj
+            for obj, typeName, objName, _ in self._mItems
+            if objName == name and (typeFilter is None or typeName == typeFilter)
+        ]
+
+    # --------------------------------------------------------------------------
+    #
+    # PRIVATE METHODS FOR INTERNAL USE ONLY.
+    #
+    #    Please do not rely on the API of these methods to be preserved!
+    #
+    # --------------------------------------------------------------------------
+    def _item(self, iObject, field):
+        """Returns a field of the indexed entry of an object, or None if it is not indexed. For internal use only!"""
+        position = self._mPositions.get(pIceImarisConnector._getObjectKey(iObject))
+        return None if position is None else self._mItems[position][field]
+
+    def _scan(self, conn, container, path):
+        """Indexes the children of a folder recursively. For internal use only!
+
+        :param conn: connector used to cast the objects.
+        :type conn: pIceImarisConnector
+        :param container: folder to scan.
+        :type container: Imaris::IDataContainer
+        :param path: names of the folders that contain the children.
+        :type path: tuple
+        """
+
+        nChildren = container.GetNumberOfChildren()
+        self._mContainers.append((container, nChildren, container.GetName()))
+
+        for i in range(nChildren):
+            child = conn.autocast(container.GetChild(i))
+            if child is None:
+                continue
+            typeName = conn._resolveType(child)
+            name = child.GetName()
+            self._mPositions[pIceImarisConnector._getObjectKey(child)] = len(
+                self._mItems
+            )
+            self._mItems.append((child, typeName, name, path))
+            if typeName == "DataContainer":
+                self._scan(conn, child, path + (name,))
+
+
+class StatisticsTable(object):
+    """StatisticsTable is a columnar view of the statistics of an Imaris object (e.g. ISpots or ISurfaces).
+
+    Each row is one (object ID, time index, category) combination, and each column one statistic. Statistics that
+    depend on a channel (or on any factor other than time and category) get one column per factor value, with the
+    factor appended to the name (e.g. "Intensity Mean Ch=1"). Missing values are NaN.
+
+    StatisticsTable objects are created and cached by pIceImarisConnector (see
+    ``pIceImarisConnector.getStatisticsTable()``).
+
+    :param statistics: flat statistics arrays as returned by ``pIceImarisConnector._fetchStatistics()``.
+    :type statistics: dict
+
+    **EXAMPLE**
+
+    >>> table = conn.getStatisticsTable(iSpots)
+    >>> volumes = table["Volume"]
+    >>> rows = table.rowsOfIds([12, 15])
+    >>> firstFrame = table.rowsAtTimeIndex(0)
+    """
+
+    # Factors that identify the rows (all others identify the columns)
+    _ROW_FACTORS = ("Time", "Category")
+
+    def __init__(self, statistics):
+        """Initializes the StatisticsTable object from the flat statistics arrays."""
+
+        ids = statistics["ids"]
+        factors = statistics["factors"]
+        n = len(ids)
+
+        # Time indices (the "Time" factor is 1-based; -1 if unknown)
+        timeIndices = self._decodeTimeIndices(factors.get("Time"), n)
+
+        # Categories
+        if "Category" in factors:
+            categories, categoryCodes = np.unique(
+                factors["Category"].astype(str), return_inverse=True
+            )
+            categoryCodes = categoryCodes.ravel()
+        else:
+            categories, categoryCodes = np.array([""]), np.zeros(n, dtype=np.intp)
+
+        # Rows: unique (id, time index, category) combinations, sorted by id
+        keys = np.stack([ids, timeIndices, categoryCodes]).T.astype(np.int64)
+        rows, rowOfValue = np.unique(keys.reshape(-1, 3), axis=0, return_inverse=True)
+        rowOfValue = rowOfValue.ravel()
+        self._mIds = rows[:, 0].copy()
+        self._mTimeIndices = rows[:, 1].copy()
+        self._mCategories = categories.astype(object)[rows[:, 2]]
+
+        # Columns: unique (name, other factors) combinations
+        columnFactors = [f for f in factors if f not in self._ROW_FACTORS]
+        codes = np.zeros(n, dtype=np.int64)
+        labels = []
+        for values in [statistics["names"]] + [factors[f] for f in columnFactors]:
+            unique, inverse = np.unique(values.astype(str), return_inverse=True)
+            codes = codes * len(unique) + inverse.ravel()
+            labels.append(unique)
+        columnCodes, first, columnOfValue = np.unique(
+            codes, return_index=True, return_inverse=True
+        )
+        columnOfValue = columnOfValue.ravel()
+
+        # Build the column names from the first value of each column
+        self._mNames = []
+        self._mUnits = {}
+        for index in first:
+            name = str(statistics["names"][index])
+            for f in columnFactors:
+                value = str(factors[f][index])
+                if value == "":
+                    continue
+                name += " Ch=" + value if f == "Channel" else " " + f + "=" + value
+            self._mNames.append(name)
+            self._mUnits[name] = str(statistics["units"][index])
+        self._mColumnIndex = {name: i for i, name in enumerate(self._mNames)}
+
+        # Scatter the values into dense columns
+        self._mData = np.full((len(self._mNames), len(self._mIds)), np.nan)
+        self._mData[columnOfValue, rowOfValue] = statistics["values"]
+        self._mData.flags.writeable = False
+
+        # Index of the rows by time index
+        shifted = self._mTimeIndices + 1
+        self._mRowsByTime = np.argsort(shifted, kind="stable")
+        counts = np.bincount(shifted, minlength=1) if len(shifted) > 0 else [0]
+        self._mTimeOffsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def __contains__(self, name):
+        return name in self._mColumnIndex
+
+    def __getitem__(self, name):
+        """Return the (read-only) column with the given name."""
+        try:
+            return self._mData[self._mColumnIndex[name]]
+        except KeyError:
+            raise KeyError("No statistics with name '" + str(name) + "'.")
+
+    def __len__(self):
+        return len(self._mIds)
+
+    def __repr__(self):
+        return (
+            "StatisticsTable(rows="
+            + str(len(self._mIds))
+            + ", columns="
+            + str(len(self._mNames))
+            + ")"
+        )
+
+    @property
+    def categories(self):
+        """Return the category of each row (e.g. "Spot", "Surface" or "Overall")."""
+        return self._mCategories
+
+    @property
+    def ids(self):
+        """Return the object ID of each row (sorted)."""
+        return self._mIds
+
+    @property
+    def names(self):
+        """Return the names of the columns."""
+        return list(self._mNames)
+
+    @property
+    def timeIndices(self):
+        """Return the 0-based time index of each row (-1 if the statistics do not have a time factor)."""
+        return self._mTimeIndices
+
+    @property
+    def units(self):
+        """Return the units of the columns by column name."""
+        return dict(self._mUnits)
+
+    def rowsAtTimeIndex(self, timeIndex):
+        """Returns the rows at the given time index.
+
+        :param timeIndex: 0-based time index (-1 for the rows without time factor).
+        :type timeIndex: int
+
+        :return: row indices (sorted).
+        :rtype: Numpy array
+        """
+
+        k = timeIndex + 1
+        if k < 0 or k >= len(self._mTimeOffsets) - 1:
+            return np.empty(0, dtype=np.intp)
+        return self._mRowsByTime[self._mTimeOffsets[k] : self._mTimeOffsets[k + 1]]
+
+    def rowsOfIds(self, ids):
+        """Returns the rows of the objects with the given IDs.
+
+        :param ids: object IDs.
+        :type ids: list or Numpy array
+
+        :return: index of the first row of each object (-1 for IDs that are not in the table).
+        :rtype: Numpy array
+        """
+
+        ids = np.asarray(ids, dtype=np.int64)
+        rows = np.searchsorted(self._mIds, ids)
+        found = rows < len(self._mIds)
+        found[found] = self._mIds[rows[found]] == ids[found]
+        return np.where(found, rows, -1)
+
+    # --------------------------------------------------------------------------
+    #
+    # PRIVATE METHODS FOR INTERNAL USE ONLY.
+    #
+    #    Please do not rely on the API of these methods to be preserved!
+    #
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def _decodeTimeIndices(times, n):
+        """Decodes the 1-based "Time" factor into 0-based time indices (-1 if unknown). For internal use only!
+
+        :param times: values of the "Time" factor (strings), or None.
+        :type times: Numpy array
+        :param n: number of values.
+        :type n: int
+
+        :return: 0-based time indices.
+        :rtype: Numpy array
+        """
+
+        if times is None:
+            return np.full(n, -1, dtype=np.int64)
+
+        # Decode each distinct string only once
+        unique, inverse = np.unique(times.astype(str), return_inverse=True)
+        decoded = np.array(
+            [int(t) - 1 if t.strip().isdigit() else -1 for t in unique],
+            dtype=np.int64,
+        )
+        return decoded[inverse.ravel()]
+
+
+class VolumeCache(object):
+    """VolumeCache is a thread-safe, least-recently-used cache of data volumes with a byte budget. It is used by
+    pIceImarisConnector (see ``pIceImarisConnector.enableVolumeCache()``) and is not meant to be used directly.
+
+    :param maxBytes: maximum total size (in bytes) of the cached volumes.
+    :type maxBytes: int
+
+    Volumes are stored with keys in the form ``(dataSetKey, channel, timepoint)``. A volume that is being fetched
+    while its dataset is invalidated must not be stored: readers get a generation with ``getGeneration()`` before
+    fetching the volume and pass it to ``put()``, which drops the volume if the generation changed since.
+    """
+
+    def __init__(self, maxBytes):
+        """Initializes the VolumeCache object."""
+
+        # Byte budget
+        self._mMaxBytes = int(maxBytes)
+
+        # Cached volumes, from the least to the most recently used
+        self._mEntries = OrderedDict()
+
+        # Total size of the cached volumes
+        self._mBytes = 0
+
+        # Usage statistics
+        self._mHits = 0
+        self._mMisses = 0
+        self._mEvictions = 0
+
+        # Generations, bumped by invalidate() (per dataset) and clear() (for all datasets)
+        self._mGenerations = {}
+        self._mClearCount = 0
+
+        # The cache is shared by all threads of the connector
+        self._mLock = threading.Lock()
+
+    def __len__(self):
+        return len(self._mEntries)
+
+    def clear(self):
+        """Removes all volumes from the cache (the usage statistics are kept)."""
+
+        with self._mLock:
+            self._mEntries.clear()
+            self._mBytes = 0
+            self._mGenerations.clear()
+            self._mClearCount += 1
+
+    def get(self, key):
+        """Returns the volume stored with the passed key, or None if there is no such volume.
+
+        :param key: key in the form ``(dataSetKey, channel, timepoint)``.
+        :type key: tuple
+
+        :return: cached (read-only) volume, or None.
+        :rtype: Numpy array
+        """
+
+        with self._mLock:
+            arr = self._mEntries.get(key)
+            if arr is None:
+                self._mMisses += 1
+                return None
+            self._mEntries.move_to_end(key)
+            self._mHits += 1
+            return arr
+
+    def getGeneration(self, dataSetKey):
+        """Returns the current generation of a dataset, to be passed to ``put()``.
+
+        :param dataSetKey: key of the dataset.
+        :type dataSetKey: hashable object
+
+        :return: generation; it changes whenever the volumes of the dataset are invalidated or the cache is cleared.
+        :rtype: tuple
+        """
+
+        with self._mLock:
+            return self._mClearCount, self._mGenerations.get(dataSetKey, 0)
+
+    def getStatistics(self):
+        """Returns the usage statistics of the cache.
+
+        :return: dictionary with keys ``hits``, ``misses``, ``evictions``, ``entries``, ``bytes`` and ``maxBytes``.
+        :rtype: dict
+        """
+
+        with self._mLock:
+            return {
+                "hits": self._mHits,
+                "misses": self._mMisses,
+                "evictions": self._mEvictions,
+                "entries": len(self._mEntries),
+                "bytes": self._mBytes,
+                "maxBytes": self._mMaxBytes,
+            }
+
+    def invalidate(self, dataSetKey, channel=None, timepoint=None):
+        """Removes the volumes of a dataset from the cache.
+
+        :param dataSetKey: key of the dataset.
+        :type dataSetKey: hashable object
+        :param channel: (optional) if set, only the volumes of this channel are removed.
+        :type channel: int
+        :param timepoint: (optional) if set, only the volumes of this timepoint are removed.
+        :type timepoint: int
+        """
+
+        with self._mLock:
+            self._mGenerations[dataSetKey] = self._mGenerations.get(dataSetKey, 0) + 1
+            for key in list(self._mEntries.keys()):
+                if (
+                    key[0] == dataSetKey
+                    and (channel is None or key[1] == channel)
+                    and (timepoint is None or key[2] == timepoint)
+                ):
+                    self._mBytes -= self._mEntries.pop(key).nbytes
+
+    def put(self, key, arr, generation=None):
+        """Stores a volume in the cache, evicting the least recently used volumes if needed.
+
+        :param key: key in the form ``(dataSetKey, channel, timepoint)``.
+        :type key: tuple
+        :param arr: volume to be stored. The cache takes ownership of the array and makes it read-only.
+        :type arr: Numpy array
+        :param generation: (optional) generation of the dataset (see ``getGeneration()``) obtained before the volume
+                           was fetched. If it changed since, the volume may be stale and is not stored.
+        :type generation: tuple
+
+        :return: True if the volume was stored, False if it is larger than the byte budget or stale.
+        :rtype: Boolean
+        """
+
+        if arr.nbytes > self._mMaxBytes:
+            return False
+
+        arr.flags.writeable = False
+
+        with self._mLock:
+            if generation is not None and generation != (
+                self._mClearCount,
+                self._mGenerations.get(key[0], 0),
+            ):
+                return False
+            previous = self._mEntries.pop(key, None)
+            if previous is not None:
+                self._mBytes -= previous.nbytes
+            self._mEntries[key] = arr
+            self._mBytes += arr.nbytes
+            self._evict()
+
+        return True
+
+    def resize(self, maxBytes):
+        """Changes the byte budget of the cache, evicting the least recently used volumes if needed.
+
+        :param maxBytes: maximum total size (in bytes) of the cached volumes.
+        :type maxBytes: int
+        """
+
+        with self._mLock:
+            self._mMaxBytes = int(maxBytes)
+            self._evict()
+
+    # --------------------------------------------------------------------------
+    #
+    # PRIVATE METHODS FOR INTERNAL USE ONLY.
+    #
+    #    Please do not rely on the API of these methods to be preserved!
+    #
+    # --------------------------------------------------------------------------
+    def _evict(self):
+        """Evicts the least recently used volumes until the byte budget is respected. For internal use only!
+
+        The lock must be held by the caller.
+        """
+
+        while self._mBytes > self._mMaxBytes:
+            _, arr = self._mEntries.popitem(last=False)
+            self._mBytes -= arr.nbytes
+            self._mEvictions += 1
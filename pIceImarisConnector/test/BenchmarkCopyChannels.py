@@ -0,0 +1,89 @@
+# This file benchmarks copying 3 channels of a 200-timepoint acquisition as done up to
+# pIceImarisConnector 0.4.2 (one SetSizeC per channel, then a serial getDataVolume ->
+# setDataVolume loop) and with the pipelined copyChannels(). It runs against an in-process
+# stand-in for the IDataSet proxy that simulates the round-trip latency to Imaris, and does
+# not require Imaris.
+#
+# Run with:
+#
+#     python -m pIceImarisConnector.test.BenchmarkCopyChannels
+
+import time
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataSet,
+    IApplicationPrx,
+    createConnector,
+    randomData,
+)
+
+SHAPE = (200, 3, 8, 64, 64)
+LATENCY = 0.005
+
+
+def legacyCopyChannels(conn, channelIndices):
+    """copyChannels() as in pIceImarisConnector 0.4.2."""
+    iDataSet = conn.mImarisApplication.GetDataSet()
+    nChannels = iDataSet.GetSizeC()
+    nTimepoints = iDataSet.GetSizeT()
+    channelNames = conn.getChannelNames()
+    for c in channelIndices:
+        nChannels = nChannels + 1
+        iDataSet.SetSizeC(nChannels)
+        conn.refreshDatasetInfo()
+        newChannelIndex = nChannels - 1
+        iDataSet.SetChannelName(newChannelIndex, "Copy of " + channelNames[c])
+        iDataSet.SetChannelColorRGBA(newChannelIndex, iDataSet.GetChannelColorRGBA(c))
+        for t in range(nTimepoints):
+            stack = conn.getDataVolume(c, t)
+            conn.setDataVolume(stack, newChannelIndex, t)
+
+
+def run(label, copy):
+    data = randomData(SHAPE, np.uint16)
+    iDataSet = FakeDataSet(data, "eTypeUInt16", latency=LATENCY)
+    conn = createConnector(IApplicationPrx(iDataSet))
+    tic = time.perf_counter()
+    copy(conn)
+    elapsed = time.perf_counter() - tic
+    assert np.array_equal(iDataSet.data[:, SHAPE[1] :], data)
+    print(
+        "%-34s %7.3f s, %6.1f MB/s, %5d remote calls"
+        % (
+            label,
+            elapsed,
+            data.nbytes / 2**20 / elapsed,
+            sum(iDataSet.calls.values()),
+        )
+    )
+    return elapsed
+
+
+if __name__ == "__main__":
+
+    print(
+        "Copying "
+        + str(SHAPE[1])
+        + " channels of "
+        + str(SHAPE[0])
+        + " timepoints of "
+        + str(SHAPE[2:])
+        + " voxels with a simulated latency of "
+        + str(1000 * LATENCY)
+        + " ms per transfer"
+    )
+
+    channels = list(range(SHAPE[1]))
+    serial = run("legacy loop:", lambda conn: legacyCopyChannels(conn, channels))
+    for workers in [1, 2, 4, 8]:
+        elapsed = run(
+            "pipeline, %d workers:" % workers,
+            lambda conn: conn.copyChannels(channels, workers=workers),
+        )
+        print("    speedup: %5.2fx" % (serial / elapsed))
+    run(
+        "pipeline, 8 workers, 64 kB chunks:",
+        lambda conn: conn.copyChannels(channels, workers=8, maxChunkBytes=2**16),
+    )
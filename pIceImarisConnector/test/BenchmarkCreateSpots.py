@@ -0,0 +1,62 @@
+# This file benchmarks the time and memory needed to create Spots from Numpy arrays, with the
+# conversion to lists required up to pIceImarisConnector 0.4.2 and with the arrays passed as
+# they are. It runs against in-process stand-ins for the ICE proxies and does not require
+# Imaris. The stand-in ISpots proxy receives the arguments without copying them.
+#
+# Run with:
+#
+#     python -m pIceImarisConnector.test.BenchmarkCreateSpots
+
+import time
+import tracemalloc
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeSpots,
+    IApplicationPrx,
+    createConnector,
+)
+
+N_SPOTS = 1000000
+
+
+class ReceivingSpots(FakeSpots):
+    """Fake ISpots proxy that only keeps references to the received arguments."""
+
+    def Set(self, positions, timeIndices, radii):
+        self.received = (positions, timeIndices, radii)
+
+
+def run(mode):
+    app = IApplicationPrx()
+    app.GetFactory().CreateSpots = ReceivingSpots
+    conn = createConnector(app)
+    rng = np.random.RandomState(0)
+    coords = rng.uniform(0, 100, (N_SPOTS, 3)).astype(np.float32)
+    timeIndices = rng.randint(0, 100, N_SPOTS).astype(np.int32)
+    radii = np.ones(N_SPOTS, dtype=np.float32)
+
+    tracemalloc.start()
+    tic = time.perf_counter()
+    if mode == "lists":
+        # As required by createAndSetSpots() in pIceImarisConnector 0.4.2
+        spots = app.GetFactory().CreateSpots()
+        spots.Set(coords.tolist(), timeIndices.tolist(), radii.tolist())
+    else:
+        conn.createAndSetSpots(coords, timeIndices, radii, "Spots", [1, 0, 0, 1])
+    elapsed = time.perf_counter() - tic
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(
+        "%-7s time: %6.3f s, peak temporary memory: %8.1f MB"
+        % (mode, elapsed, peak / 2**20)
+    )
+
+
+if __name__ == "__main__":
+
+    print("Creating " + str(N_SPOTS) + " spots")
+    for mode in ["lists", "arrays"]:
+        run(mode)
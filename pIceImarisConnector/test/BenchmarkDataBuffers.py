@@ -0,0 +1,126 @@
+# This file benchmarks the memory cost of fetching a time-lapse volume by volume, with the
+# decoding used up to pIceImarisConnector 0.4.2 and with a reused output buffer. It runs
+# against an in-process stand-in for the IDataSet proxy and does not require Imaris.
+#
+# Run with:
+#
+#     python -m pIceImarisConnector.test.BenchmarkDataBuffers
+
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataSet,
+    IApplicationPrx,
+    createConnector,
+    randomData,
+)
+
+SHAPE = (10, 1, 32, 256, 256)
+MODES = ["legacy", "new", "out"]
+
+
+class PayloadDataSet(FakeDataSet):
+    """Fake IDataSet that returns precomputed payloads, so that only decoding is measured."""
+
+    def __init__(self, data, datatype):
+        super(PayloadDataSet, self).__init__(data, datatype)
+        self._payloads = {}
+        for t in range(data.shape[0]):
+            for c in range(data.shape[1]):
+                volume = self.data[t, c].ravel()
+                self._payloads[(c, t)] = self._encode(volume)
+
+    def GetDataVolumeAs1DArrayBytes(self, channel, timepoint):
+        return self._payloads[(channel, timepoint)]
+
+    def GetDataVolumeAs1DArrayFloats(self, channel, timepoint):
+        return self._payloads[(channel, timepoint)]
+
+
+def legacyGetDataVolume(iDataSet, channel, timepoint):
+    """Decoding as done by getDataVolume() in pIceImarisConnector 0.4.2."""
+    if str(iDataSet.GetType()) == "eTypeUInt8":
+        arr = np.array(iDataSet.GetDataVolumeAs1DArrayBytes(channel, timepoint))
+        arr = np.frombuffer(arr.data, dtype=np.uint8)
+    else:
+        arr = np.array(
+            iDataSet.GetDataVolumeAs1DArrayFloats(channel, timepoint),
+            dtype=np.float32,
+        )
+    sz = (iDataSet.GetSizeX(), iDataSet.GetSizeY(), iDataSet.GetSizeZ())
+    return np.reshape(arr, (sz[2], sz[1], sz[0]))
+
+
+def peakRssInKB():
+    try:
+        import resource
+    except ImportError:
+        return float("nan")
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 if sys.platform == "darwin" else rss
+
+
+def run(mode, datatype, dtype):
+    iDataSet = PayloadDataSet(randomData(SHAPE, dtype), datatype)
+    conn = createConnector(IApplicationPrx(iDataSet))
+    nBytes = int(np.prod(SHAPE[2:])) * np.dtype(dtype).itemsize
+
+    rssBefore = peakRssInKB()
+    tracemalloc.start()
+    allocated = 0
+    out = None
+    tic = time.perf_counter()
+    for t in range(SHAPE[0]):
+        tracemalloc.reset_peak() if hasattr(tracemalloc, "reset_peak") else None
+        current = tracemalloc.get_traced_memory()[0]
+        if mode == "legacy":
+            stack = legacyGetDataVolume(iDataSet, 0, t)
+        elif mode == "new":
+            stack = conn.getDataVolume(0, t)
+        else:
+            out = conn.getDataVolume(0, t, out=out)
+            stack = out
+        allocated += tracemalloc.get_traced_memory()[1] - current
+        del stack
+    elapsed = time.perf_counter() - tic
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(
+        "%-9s %-6s allocated/volume: %5.2f x volume size, peak traced: %8.1f MB, "
+        "peak RSS increase: %8.1f MB, time: %6.3f s"
+        % (
+            np.dtype(dtype).name,
+            mode,
+            allocated / SHAPE[0] / nBytes,
+            peak / 2**20,
+            (peakRssInKB() - rssBefore) / 1024,
+            elapsed,
+        )
+    )
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) == 4:
+        run(sys.argv[1], sys.argv[2], np.dtype(sys.argv[3]).type)
+    else:
+        # Run each configuration in its own process to get meaningful peak RSS values
+        print("Fetching " + str(SHAPE[0]) + " volumes of " + str(SHAPE[2:]) + " voxels")
+        for datatype, dtype in [("eTypeUInt8", "uint8"), ("eTypeFloat", "float32")]:
+            for mode in MODES:
+                subprocess.check_call(
+                    [
+                        sys.executable,
+                        "-m",
+                        "pIceImarisConnector.test.BenchmarkDataBuffers",
+                        mode,
+                        datatype,
+                        dtype,
+                    ]
+                )
@@ -0,0 +1,67 @@
+# This file benchmarks reading the graphs of the filaments of an IFilaments object: one call per
+# filament and getter in a Python loop, and with getFilamentGraphs() (concurrent calls, packed
+# arrays). It runs against an in-process stand-in for the IFilaments proxy that simulates the
+# round-trip latency to Imaris, and does not require Imaris.
+#
+# Run with:
+#
+#     python -m pIceImarisConnector.test.BenchmarkFilamentGraphs
+
+import time
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeFilaments,
+    IApplicationPrx,
+    createConnector,
+)
+
+N_FILAMENTS = 1000
+LATENCY = 0.001
+
+
+def loopGraphs(iFilaments):
+    """One call per filament and getter, into a list of small arrays."""
+    graphs = []
+    for i in range(iFilaments.GetNumberOfFilaments()):
+        graphs.append(
+            (
+                iFilaments.GetTimeIndex(i),
+                iFilaments.GetBeginningVertexIndex(i),
+                np.array(iFilaments.GetPositionsXYZ(i)),
+                np.array(iFilaments.GetRadii(i)),
+                np.array(iFilaments.GetTypes(i)),
+                np.array(iFilaments.GetEdges(i)),
+            )
+        )
+    return graphs
+
+
+def run(label, function):
+    iFilaments = FakeFilaments(N_FILAMENTS, latency=LATENCY)
+    tic = time.perf_counter()
+    function(iFilaments)
+    elapsed = time.perf_counter() - tic
+    print(
+        "%-28s %8.3f s, %6d remote calls"
+        % (label, elapsed, sum(iFilaments.calls.values()))
+    )
+
+
+if __name__ == "__main__":
+
+    conn = createConnector(IApplicationPrx())
+    print(
+        "Reading the graphs of "
+        + str(N_FILAMENTS)
+        + " filaments with a simulated latency of "
+        + str(1000 * LATENCY)
+        + " ms per call"
+    )
+    run("loop:", loopGraphs)
+    for workers in [1, 8, 32]:
+        run(
+            "packed, %d workers:" % workers,
+            lambda f: conn.getFilamentGraphs(f, workers=workers),
+        )
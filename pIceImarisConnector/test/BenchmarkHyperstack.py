@@ -0,0 +1,66 @@
+# This file benchmarks fetching a 4-channel, 200-timepoint acquisition volume by volume in a
+# serial loop and with getDataHyperstack(). It runs against an in-process stand-in for the
+# IDataSet proxy that simulates the round-trip latency to Imaris, and does not require Imaris.
+#
+# Run with:
+#
+#     python -m pIceImarisConnector.test.BenchmarkHyperstack
+
+import time
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataSet,
+    IApplicationPrx,
+    createConnector,
+    randomData,
+)
+
+SHAPE = (200, 4, 8, 64, 64)
+LATENCY = 0.005
+
+
+if __name__ == "__main__":
+
+    data = randomData(SHAPE, np.uint16)
+    conn = createConnector(
+        IApplicationPrx(FakeDataSet(data, "eTypeUInt16", latency=LATENCY))
+    )
+    print(
+        "Fetching "
+        + str(SHAPE[0] * SHAPE[1])
+        + " volumes of "
+        + str(SHAPE[2:])
+        + " voxels with a simulated latency of "
+        + str(1000 * LATENCY)
+        + " ms per call"
+    )
+
+    # Serial loop
+    tic = time.perf_counter()
+    for t in range(SHAPE[0]):
+        for c in range(SHAPE[1]):
+            conn.getDataVolume(c, t)
+    serial = time.perf_counter() - tic
+    print("serial loop:          %7.3f s" % serial)
+
+    # Concurrent fetch
+    for workers in [1, 2, 4, 8, 16]:
+        tic = time.perf_counter()
+        hyperstack, timings = conn.getDataHyperstack(
+            workers=workers, returnTimings=True
+        )
+        elapsed = time.perf_counter() - tic
+        assert np.array_equal(hyperstack, data)
+        print(
+            "%2d workers:           %7.3f s (speedup %5.2fx), per call: "
+            "median %6.2f ms, max %6.2f ms"
+            % (
+                workers,
+                elapsed,
+                serial / elapsed,
+                1000 * np.median(timings),
+                1000 * np.max(timings),
+            )
+        )
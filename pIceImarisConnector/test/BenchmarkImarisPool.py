@@ -0,0 +1,84 @@
+# This file benchmarks the processing of a batch of files with a new Imaris instance per file
+# and with a pool of Imaris instances. The launch of Imaris and the processing of a file are
+# simulated (by LAUNCH_TIME and PROCESSING_TIME seconds) on fake applications, so the
+# benchmark does not require Imaris.
+#
+# Run with:
+#
+#     python -m pIceImarisConnector.test.BenchmarkImarisPool
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from pIceImarisConnector import ImarisPool, pIceImarisConnector
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataSet,
+    IApplicationPrx,
+    createConnector,
+)
+
+N_FILES = 40
+WORKERS = 4
+LAUNCH_TIME = 0.5
+PROCESSING_TIME = 0.05
+
+# createConnector() patches the connector class: connectors are created one at a time
+CREATE_LOCK = threading.Lock()
+
+
+def startImaris(self, userControl=False, timeout=60.0):
+    time.sleep(LAUNCH_TIME)
+    self._mImarisApplication = IApplicationPrx(FakeDataSet())
+    return True
+
+
+def process(conn):
+    time.sleep(PROCESSING_TIME)
+    conn.mImarisApplication.GetDataSet().SetModified(True)
+
+
+def newConnector():
+    with CREATE_LOCK:
+        return createConnector(None)
+
+
+def newInstancePerFile(_):
+    conn = newConnector()
+    conn.startImaris()
+    process(conn)
+    conn.closeImaris(quiet=True)
+
+
+def run(label, function, setup=None):
+    tic = time.perf_counter()
+    if setup is not None:
+        setup()
+    with ThreadPoolExecutor(WORKERS) as executor:
+        list(executor.map(function, range(N_FILES)))
+    elapsed = time.perf_counter() - tic
+    print("%-30s %8.2f s %8.3f s/file" % (label, elapsed, elapsed / N_FILES))
+
+
+print(
+    "%d files, %d workers, launch %.2f s, processing %.2f s per file"
+    % (N_FILES, WORKERS, LAUNCH_TIME, PROCESSING_TIME)
+)
+
+with mock.patch.object(
+    pIceImarisConnector, "startImaris", autospec=True, side_effect=startImaris
+):
+    run("new instance per file:", newInstancePerFile)
+
+    pools = []
+
+    def startPool():
+        pools.append(ImarisPool(WORKERS, connectorFactory=newConnector))
+
+    def leaseAndProcess(_):
+        with pools[0].lease() as conn:
+            process(conn)
+
+    run("pool (including its start):", leaseAndProcess, startPool)
+    pools[0].close()
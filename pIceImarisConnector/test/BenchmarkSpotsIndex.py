@@ -0,0 +1,71 @@
+# This file benchmarks the neighbor queries of SpotsIndex against the brute-force O(N^2)
+# distance computation, for random spots spread over a few timepoints. It does not require
+# Imaris.
+#
+# Run with:
+#
+#     python -m pIceImarisConnector.test.BenchmarkSpotsIndex
+
+import time
+
+import numpy as np
+
+from pIceImarisConnector import SpotsIndex
+
+N_TIMEPOINTS = 10
+RADIUS = 2.0
+K = 5
+
+
+def randomSpots(nSpots):
+    rng = np.random.RandomState(0)
+    positions = rng.uniform(0, 100, (nSpots, 3))
+    timeIndices = rng.randint(0, N_TIMEPOINTS, nSpots)
+    return positions, timeIndices
+
+
+def bruteForcePairs(positions, timeIndices):
+    """Pairs within RADIUS, one distance matrix per timepoint."""
+    pairs = []
+    for t in range(N_TIMEPOINTS):
+        spots = np.flatnonzero(timeIndices == t)
+        p = positions[spots]
+        d = np.sqrt(np.sum((p[:, None, :] - p[None, :, :]) ** 2, axis=2))
+        i, j = np.nonzero(np.triu(d <= RADIUS, k=1))
+        pairs.append(np.stack([spots[i], spots[j]], axis=1))
+    return np.concatenate(pairs)
+
+
+def run(nSpots):
+    positions, timeIndices = randomSpots(nSpots)
+
+    tic = time.perf_counter()
+    index = SpotsIndex(positions, timeIndices)
+    build = time.perf_counter() - tic
+
+    tic = time.perf_counter()
+    pairs = index.queryPairs(RADIUS)
+    pairsTime = time.perf_counter() - tic
+
+    tic = time.perf_counter()
+    index.queryKNearest(positions, K, timeIndices)
+    knnTime = time.perf_counter() - tic
+
+    if nSpots <= 20000:
+        tic = time.perf_counter()
+        expected = bruteForcePairs(positions, timeIndices)
+        bruteTime = "%8.3f s" % (time.perf_counter() - tic)
+        assert len(expected) == len(pairs)
+    else:
+        bruteTime = "     n/a"
+
+    print(
+        "%8d spots: build %7.3f s, pairs %7.3f s (%7d), %d-nn %7.3f s, brute-force pairs %s"
+        % (nSpots, build, pairsTime, len(pairs), K, knnTime, bruteTime)
+    )
+
+
+if __name__ == "__main__":
+
+    for nSpots in [2000, 20000, 200000]:
+        run(nSpots)
@@ -0,0 +1,75 @@
+# This file benchmarks SpotsLinker on synthetic Brownian tracks, with and without gap closing,
+# and reports the fraction of the true links that were recovered. It does not require Imaris.
+#
+# Run with:
+#
+#     python -m pIceImarisConnector.test.BenchmarkSpotsLinker
+
+import time
+
+import numpy as np
+
+from pIceImarisConnector import SpotsLinker
+from pIceImarisConnector.test.FakeImaris import brownianTracks
+
+# (tracks, frames)
+SIZES = [(100, 100), (1000, 100), (1000, 1000)]
+MISSING = 0.01
+
+
+def recovered(edges, trueEdges):
+    """Fraction of the true edges found by the linker."""
+    n = max(edges.max(initial=0), trueEdges.max(initial=0)) + 1
+    codes = edges[:, 0] * n + edges[:, 1]
+    trueCodes = trueEdges[:, 0] * n + trueEdges[:, 1]
+    return np.isin(trueCodes, codes).mean()
+
+
+def run(nTracks, nFrames):
+    positions, timeIndices, trueEdges = brownianTracks(
+        nTracks, nFrames, step=1.0, size=200.0
+    )
+
+    tic = time.perf_counter()
+    edges = SpotsLinker(maxDistance=5.0).link(positions, timeIndices)
+    elapsed = time.perf_counter() - tic
+    print(
+        "%5d tracks x %5d frames (%8d spots): %7.2f s, %6.2f%% of the links recovered"
+        % (
+            nTracks,
+            nFrames,
+            positions.shape[0],
+            elapsed,
+            100 * recovered(edges, trueEdges),
+        )
+    )
+
+    # Drop detections and bridge the gaps
+    rng = np.random.RandomState(1)
+    keep = np.flatnonzero(rng.rand(positions.shape[0]) >= MISSING)
+    newIndex = np.full(positions.shape[0], -1)
+    newIndex[keep] = np.arange(keep.size)
+    nextSpot = np.full(positions.shape[0], -1)
+    nextSpot[trueEdges[:, 0]] = trueEdges[:, 1]
+    bridged = nextSpot[keep]
+    while np.any((bridged >= 0) & (newIndex[np.maximum(bridged, 0)] < 0)):
+        gap = (bridged >= 0) & (newIndex[np.maximum(bridged, 0)] < 0)
+        bridged[gap] = nextSpot[bridged[gap]]
+    valid = bridged >= 0
+    expected = np.stack([np.arange(keep.size)[valid], newIndex[bridged[valid]]], axis=1)
+
+    tic = time.perf_counter()
+    edges = SpotsLinker(maxDistance=5.0, maxGap=2).link(
+        positions[keep], timeIndices[keep]
+    )
+    elapsed = time.perf_counter() - tic
+    print(
+        "      %4.1f%% missing, gap closing         : %7.2f s, %6.2f%% of the links recovered"
+        % (100 * MISSING, elapsed, 100 * recovered(edges, expected))
+    )
+
+
+if __name__ == "__main__":
+
+    for nTracks, nFrames in SIZES:
+        run(nTracks, nFrames)
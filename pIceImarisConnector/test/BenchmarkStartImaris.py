@@ -0,0 +1,92 @@
+# This file benchmarks the readiness probes of startImaris() for increasing launch times of
+# ImarisServerIce and Imaris: the wall-clock time until the connector is ready, the CPU time
+# spent by this process while waiting, and the number of probes. The previous scheme (a busy
+# loop on the process list for ImarisServerIce, and a new ImarisLib every 0.1 s for Imaris)
+# is reproduced for comparison. Both run against local stand-ins and do not require Imaris.
+#
+# Run with:
+#
+#     python -m pIceImarisConnector.test.BenchmarkStartImaris
+
+import socket
+import time
+
+from pIceImarisConnector.test.FakeImaris import FakeLauncher, freePort, startImarisWith
+
+# Delays (in seconds) of ImarisServerIce and of Imaris after their launch
+DELAYS = [(0.1, 0.2), (0.5, 1.0), (1.0, 3.0)]
+
+
+def legacyStartImaris(launcher):
+    """Previous scheme: busy wait on ImarisServerIce, then a new ImarisLib every 0.1 s."""
+
+    serverProbes = 0
+    applicationProbes = 0
+    launcher.Popen("ImarisServerIce")
+    while True:
+        serverProbes += 1
+        try:
+            with socket.create_connection(("127.0.0.1", launcher.port), 0.25):
+                break
+        except OSError:
+            pass
+    launcher.Popen(["Imaris", "id0"])
+    while True:
+        applicationProbes += 1
+        try:
+            if launcher.ImarisLib().GetApplication(0) is not None:
+                break
+        except Exception:
+            pass
+        time.sleep(0.1)
+    return serverProbes, applicationProbes
+
+
+def report(label, elapsed, cpuTime, serverProbes, applicationProbes, communicators):
+    print(
+        "%-10s %8.3f s %8.3f s %10d %10d %10d"
+        % (label, elapsed, cpuTime, serverProbes, applicationProbes, communicators)
+    )
+
+
+print(
+    "%-10s %10s %10s %10s %10s %10s"
+    % ("", "wall", "CPU", "server", "Imaris", "ImarisLib")
+)
+for serverDelay, applicationDelay in DELAYS:
+    print(
+        "ImarisServerIce after %.1f s, Imaris after %.1f s"
+        % (serverDelay, applicationDelay)
+    )
+
+    launcher = FakeLauncher(freePort(), serverDelay, applicationDelay)
+    tic = time.perf_counter()
+    cpuTic = time.process_time()
+    try:
+        serverProbes, applicationProbes = legacyStartImaris(launcher)
+    finally:
+        launcher.close()
+    report(
+        "previous",
+        time.perf_counter() - tic,
+        time.process_time() - cpuTic,
+        serverProbes,
+        applicationProbes,
+        launcher.communicators,
+    )
+
+    launcher = FakeLauncher(freePort(), serverDelay, applicationDelay)
+    try:
+        conn, result = startImarisWith(launcher, timeout=60)
+    finally:
+        launcher.close()
+    assert result
+    statistics = conn.getLaunchStatistics()
+    report(
+        "backoff",
+        statistics["elapsed"],
+        statistics["cpuTime"],
+        statistics["serverProbes"],
+        statistics["applicationProbes"],
+        launcher.communicators,
+    )
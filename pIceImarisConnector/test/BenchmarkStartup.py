@@ -0,0 +1,124 @@
+# This file benchmarks the startup of an XT function: the import of pIceImarisConnector (in a
+# fresh interpreter) and the construction of a connector, with and without the cached
+# discovery of Imaris, and from an application ID with ImarisLib already importable. The
+# discovery runs against a fake Mac OS X installation tree, so it runs on any platform and
+# does not require Imaris.
+#
+# Run with:
+#
+#     python -m pIceImarisConnector.test.BenchmarkStartup
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from pIceImarisConnector import pIceImarisConnector
+from pIceImarisConnector.test.FakeImaris import (
+    IApplicationPrx,
+    createInstallTree,
+    fakeImarisLibModule,
+    fakeInstall,
+)
+
+N_IMPORTS = 5
+N_CONSTRUCTIONS = 200
+VERSIONS = ["9.%d.%d" % (minor, patch) for minor in range(10) for patch in range(3)]
+OTHER_APPLICATIONS = ["Application %d" % i for i in range(300)]
+
+# Modules that are only imported when they are needed
+DEFERRED = [
+    "asyncio",
+    "glob",
+    "imp",
+    "random",
+    "shutil",
+    "subprocess",
+    "tempfile",
+    "zipfile",
+]
+
+IMPORT_SCRIPT = """
+import sys, time
+tic = time.perf_counter()
+import pIceImarisConnector
+print(time.perf_counter() - tic)
+print(" ".join(m for m in sys.argv[1:] if m in sys.modules))
+"""
+
+
+def timeImport():
+    times = []
+    for _ in range(N_IMPORTS):
+        output = subprocess.check_output(
+            [sys.executable, "-c", IMPORT_SCRIPT] + DEFERRED, universal_newlines=True
+        ).splitlines()
+        times.append(float(output[0]))
+        loaded = output[1] if len(output) > 1 else ""
+    times.sort()
+    print("%-40s %8.2f ms" % ("import (median):", 1000 * times[len(times) // 2]))
+    print("%-40s %s" % ("deferred modules loaded by the import:", loaded or "none"))
+
+
+def timeConstruction(label, root, cacheFile, prepare):
+    with fakeInstall(root, cacheFile):
+        tic = time.perf_counter()
+        for _ in range(N_CONSTRUCTIONS):
+            prepare()
+            pIceImarisConnector()
+        elapsed = (time.perf_counter() - tic) / N_CONSTRUCTIONS
+    print("%-40s %8.3f ms" % (label, 1000 * elapsed))
+
+
+def clearMemory():
+    pIceImarisConnector._DISCOVERY_CACHE.clear()
+
+
+def clearAll(cacheFile):
+    clearMemory()
+    if os.path.exists(cacheFile):
+        os.remove(cacheFile)
+
+
+def timeConnectFromXT():
+    sys.modules["ImarisLib"] = fakeImarisLibModule(IApplicationPrx(), 17)
+    try:
+        tic = time.perf_counter()
+        for _ in range(N_CONSTRUCTIONS):
+            pIceImarisConnector(17)
+        elapsed = (time.perf_counter() - tic) / N_CONSTRUCTIONS
+    finally:
+        del sys.modules["ImarisLib"]
+    print("%-40s %8.3f ms" % ("construct from an ID (XT):", 1000 * elapsed))
+
+
+if __name__ == "__main__":
+
+    timeImport()
+
+    folder = tempfile.mkdtemp()
+    try:
+        root = os.path.join(folder, "Applications")
+        os.makedirs(root)
+        createInstallTree(root, VERSIONS, others=OTHER_APPLICATIONS)
+        cacheFile = os.path.join(folder, "cache", "discovery.json")
+
+        print(
+            "Constructing connectors with "
+            + str(len(VERSIONS))
+            + " versions of Imaris and "
+            + str(len(OTHER_APPLICATIONS))
+            + " other applications installed"
+        )
+        timeConstruction(
+            "construct, no cache:", root, cacheFile, lambda: clearAll(cacheFile)
+        )
+        timeConstruction(
+            "construct, cache file (new process):", root, cacheFile, clearMemory
+        )
+        timeConstruction("construct, cache in memory:", root, cacheFile, lambda: None)
+        timeConnectFromXT()
+    finally:
+        shutil.rmtree(folder)
@@ -0,0 +1,86 @@
+# This file benchmarks reading the centers of mass and time indices of the surfaces of an
+# ISurfaces object, as done by getTracks(): one GetCenterOfMass() and one GetTimeIndex() call
+# per surface (as up to pIceImarisConnector 0.4.2), from the statistics, and with concurrent
+# per-surface calls. It runs against an in-process stand-in for the ISurfaces proxy that
+# simulates the round-trip latency to Imaris, and does not require Imaris.
+#
+# Run with:
+#
+#     python -m pIceImarisConnector.test.BenchmarkSurfaceCenters
+
+import time
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeSurfaces,
+    IApplicationPrx,
+    createConnector,
+    randomTracks,
+)
+
+N_SURFACES = 2000
+LATENCY = 0.001
+
+
+def legacyCentersAndTimes(iSurfaces):
+    """As done by getTracks() in pIceImarisConnector 0.4.2."""
+    nSurfaces = iSurfaces.GetNumberOfSurfaces()
+    positions = np.zeros((nSurfaces, 3))
+    for i in range(nSurfaces):
+        positions[i, :] = iSurfaces.GetCenterOfMass(i)[0]
+    timeIndices = np.zeros(nSurfaces)
+    for i in range(nSurfaces):
+        timeIndices[i] = iSurfaces.GetTimeIndex(i)
+    return positions, timeIndices
+
+
+def run(label, statistics, statisticsByName, function):
+    positions, timeIndices, _, _ = randomTracks(N_SURFACES // 10, 10)
+    iSurfaces = FakeSurfaces(
+        positions,
+        timeIndices,
+        statistics=statistics,
+        statisticsByName=statisticsByName,
+        latency=LATENCY,
+    )
+    tic = time.perf_counter()
+    centers, times = function(iSurfaces)
+    elapsed = time.perf_counter() - tic
+    assert np.allclose(centers, positions) and np.array_equal(times, timeIndices)
+    print(
+        "%-28s %8.3f s, %6d remote calls"
+        % (label, elapsed, sum(iSurfaces.calls.values()))
+    )
+
+
+if __name__ == "__main__":
+
+    conn = createConnector(IApplicationPrx())
+    print(
+        "Reading the centers of "
+        + str(N_SURFACES)
+        + " surfaces with a simulated latency of "
+        + str(1000 * LATENCY)
+        + " ms per call"
+    )
+    run("legacy loop:", True, False, legacyCentersAndTimes)
+    run(
+        "GetStatistics():",
+        True,
+        False,
+        lambda s: conn._getSurfacesCentersAndTimes(s),
+    )
+    run(
+        "GetStatisticsByName():",
+        True,
+        True,
+        lambda s: conn._getSurfacesCentersAndTimes(s),
+    )
+    for workers in [1, 8, 32]:
+        run(
+            "per surface, %d workers:" % workers,
+            False,
+            False,
+            lambda s: conn._getSurfacesCentersAndTimes(s, workers),
+        )
@@ -0,0 +1,76 @@
+# This file benchmarks reading the meshes of the surfaces of an ISurfaces object: one
+# GetVertices(), GetTriangles() and GetNormals() call per surface into a list of arrays, and with
+# getSurfaceMeshes() (concurrent calls, packed arrays, in memory or streamed to a .npz file). It
+# runs against an in-process stand-in for the ISurfaces proxy that simulates the round-trip
+# latency to Imaris, and does not require Imaris.
+#
+# Run with:
+#
+#     python -m pIceImarisConnector.test.BenchmarkSurfaceMeshes
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeSurfaces,
+    IApplicationPrx,
+    createConnector,
+)
+
+N_SURFACES = 2000
+LATENCY = 0.001
+
+
+def loopMeshes(iSurfaces):
+    """One call per surface and array, into a list of small arrays."""
+    meshes = []
+    for i in range(iSurfaces.GetNumberOfSurfaces()):
+        meshes.append(
+            (
+                np.array(iSurfaces.GetVertices(i), dtype=np.float32),
+                np.array(iSurfaces.GetTriangles(i), dtype=np.int32),
+                np.array(iSurfaces.GetNormals(i), dtype=np.float32),
+            )
+        )
+    return meshes
+
+
+def run(label, function):
+    centers = np.random.RandomState(0).uniform(0, 100, (N_SURFACES, 3))
+    iSurfaces = FakeSurfaces(centers, statistics=False, latency=LATENCY)
+    tracemalloc.start()
+    tic = time.perf_counter()
+    function(iSurfaces)
+    elapsed = time.perf_counter() - tic
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("%-28s %8.3f s, peak %8.1f kB" % (label, elapsed, peak / 1024))
+
+
+if __name__ == "__main__":
+
+    conn = createConnector(IApplicationPrx())
+    filename = os.path.join(tempfile.mkdtemp(), "meshes.npz")
+    print(
+        "Reading the meshes of "
+        + str(N_SURFACES)
+        + " surfaces with a simulated latency of "
+        + str(1000 * LATENCY)
+        + " ms per call"
+    )
+    run("loop:", loopMeshes)
+    for workers in [1, 8, 32]:
+        run(
+            "packed, %d workers:" % workers,
+            lambda s: conn.getSurfaceMeshes(s, workers=workers),
+        )
+    run(
+        ".npz file, 8 workers:",
+        lambda s: conn.getSurfaceMeshes(s, workers=8, filename=filename),
+    )
+    os.remove(filename)
+    os.rmdir(os.path.dirname(filename))
@@ -0,0 +1,104 @@
+# This file benchmarks the traversal of a Surpass Scene by getAllSurpassChildren() with the
+# type resolution used up to pIceImarisConnector 0.4.2 (factory requested and types probed
+# again for every object and call) and with the cached factory and memoized types. It runs
+# against in-process stand-ins for the Imaris proxies that simulate the round-trip latency
+# of the factory calls, and does not require Imaris.
+#
+# Run with:
+#
+#     python -m pIceImarisConnector.test.BenchmarkSurpassChildren
+
+import time
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataContainer,
+    FakeFilaments,
+    FakeSpots,
+    FakeSurfaces,
+    IApplicationPrx,
+    createConnector,
+)
+
+N_FOLDERS = 20
+N_OBJECTS_PER_FOLDER = 20
+LATENCY = 0.0002
+
+LEGACY_ORDER = [
+    "LightSource",
+    "Frame",
+    "Volume",
+    "Spots",
+    "Surfaces",
+    "DataSet",
+    "SurpassCamera",
+    "Filaments",
+    "ClippingPlane",
+    "Application",
+    "MeasurementPoints",
+    "DataContainer",
+    "Cells",
+    "Factory",
+    "ImageProcessing",
+]
+
+
+def legacyAutocast(app, dataItem):
+    """autocast() as in pIceImarisConnector 0.4.2."""
+    factory = app.GetFactory()
+    for name in LEGACY_ORDER:
+        if getattr(factory, "Is" + name)(dataItem):
+            return getattr(factory, "To" + name)(dataItem)
+    return None
+
+
+def legacyChildren(app, container, typeFilter, children):
+    """_getFilteredChildrenAtLevel() as in pIceImarisConnector 0.4.2."""
+    for i in range(container.GetNumberOfChildren()):
+        child = container.GetChild(i)
+        if app.GetFactory().IsDataContainer(child):
+            legacyChildren(app, legacyAutocast(app, child), typeFilter, children)
+        else:
+            currentChild = legacyAutocast(app, child)
+            if getattr(app.GetFactory(), "Is" + typeFilter)(currentChild):
+                children.append(currentChild)
+    return children
+
+
+def createApplication():
+    app = IApplicationPrx()
+    types = [FakeSpots, FakeSurfaces, FakeFilaments]
+    for i in range(N_FOLDERS):
+        folder = FakeDataContainer(
+            [types[j % 3]() for j in range(N_OBJECTS_PER_FOLDER)]
+        )
+        app.GetSurpassScene().AddChild(folder, -1)
+    app.GetFactory().latency = LATENCY
+    app.factoryCalls = 0
+    return app
+
+
+def run(label, function, repeats=3):
+    app = createApplication()
+    conn = createConnector(app)
+    tic = time.perf_counter()
+    for _ in range(repeats):
+        function(app, conn)
+    elapsed = (time.perf_counter() - tic) / repeats
+    calls = app.factoryCalls + sum(app._factory.calls.values())
+    print("%-12s %8.3f s per scan, %6d factory calls" % (label, elapsed, calls))
+
+
+if __name__ == "__main__":
+
+    print(
+        "Scanning a scene of "
+        + str(N_FOLDERS * N_OBJECTS_PER_FOLDER)
+        + " objects for Filaments (3 scans) with a simulated latency of "
+        + str(1000 * LATENCY)
+        + " ms per factory call"
+    )
+    run(
+        "legacy:",
+        lambda app, conn: legacyChildren(app, app.GetSurpassScene(), "Filaments", []),
+    )
+    run("memoized:", lambda app, conn: conn.getAllSurpassChildren(True, "Filaments"))
@@ -0,0 +1,80 @@
+# This file benchmarks the extraction of tracks by getTracks() with the per-track loop used
+# up to pIceImarisConnector 0.4.2 and with the sort-based grouping, on synthetic tracks of
+# 21 spots (20 edges) each. It does not require Imaris.
+#
+# Run with:
+#
+#     python -m pIceImarisConnector.test.BenchmarkTracks
+
+import time
+
+import numpy as np
+
+from pIceImarisConnector import pIceImarisConnector
+from pIceImarisConnector.test.FakeImaris import randomTracks
+
+TRACK_LENGTH = 21
+N_EDGES = [10000, 100000, 1000000]
+
+# The per-track loop is timed on at most this many tracks and extrapolated
+MAX_LEGACY_TRACKS = 200
+
+
+def legacyExtract(positions, timeIndices, ids, trackEdges, nTracks=None):
+    """Track extraction as done by getTracks() in pIceImarisConnector 0.4.2."""
+    uids = np.unique(ids)
+    tracks = []
+    startTimes = []
+    for i in range(uids.size if nTracks is None else nTracks):
+        edges = trackEdges[ids == uids[i], :]
+        edges = np.unique(edges)
+        tracks.append(positions[edges, :])
+        startTimes.append(timeIndices[edges[0]])
+    return tracks, startTimes
+
+
+def newExtract(positions, timeIndices, ids, trackEdges, compact):
+    """Track extraction as done by getTracks()."""
+    spotIndices, offsets = pIceImarisConnector._groupTrackEdges(ids, trackEdges)
+    positions = positions[spotIndices, :]
+    startTimes = timeIndices[spotIndices[offsets[:-1]]]
+    if compact:
+        return positions, offsets, startTimes
+    return np.split(positions, offsets[1:-1]), startTimes.tolist()
+
+
+if __name__ == "__main__":
+
+    print("%9s %8s %14s %14s %14s" % ("edges", "tracks", "legacy", "new", "compact"))
+    for nEdges in N_EDGES:
+        nTracks = nEdges // (TRACK_LENGTH - 1)
+        positions, timeIndices, ids, edges = randomTracks(nTracks, TRACK_LENGTH)
+
+        # Legacy loop (extrapolated if too slow)
+        nLegacy = min(nTracks, MAX_LEGACY_TRACKS)
+        tic = time.perf_counter()
+        legacyTracks, _ = legacyExtract(positions, timeIndices, ids, edges, nLegacy)
+        legacy = (time.perf_counter() - tic) * nTracks / nLegacy
+
+        tic = time.perf_counter()
+        tracks, _ = newExtract(positions, timeIndices, ids, edges, False)
+        new = time.perf_counter() - tic
+
+        tic = time.perf_counter()
+        newExtract(positions, timeIndices, ids, edges, True)
+        compact = time.perf_counter() - tic
+
+        assert all(np.array_equal(a, b) for a, b in zip(legacyTracks, tracks))
+        print(
+            "%9d %8d %12.3f s%s %12.3f s %12.3f s   (speedup %.0fx)"
+            % (
+                nEdges,
+                nTracks,
+                legacy,
+                "*" if nLegacy < nTracks else " ",
+                new,
+                compact,
+                legacy / compact,
+            )
+        )
+    print("* extrapolated from the first " + str(MAX_LEGACY_TRACKS) + " tracks")
@@ -0,0 +1,1163 @@
+# In-process stand-ins for the Imaris ICE proxies. They allow testing the data-transfer
+# logic of pIceImarisConnector without a running Imaris instance.
+
+import contextlib
+import heapq
+import itertools
+import os
+import socket
+import sys
+import threading
+import time
+import types
+from concurrent.futures import Future
+from unittest import mock
+
+import numpy as np
+
+from pIceImarisConnector import pIceImarisConnector
+
+
+class tType(object):
+    """Stand-in for the Imaris.tType enumeration."""
+
+    eTypeUnknown = None
+    eTypeUInt8 = None
+    eTypeUInt16 = None
+    eTypeFloat = None
+
+    def __init__(self, name):
+        self._name = name
+
+    def __str__(self):
+        return self._name
+
+    def __eq__(self, other):
+        return str(self) == str(other)
+
+    def __hash__(self):
+        return hash(self._name)
+
+
+tType.eTypeUnknown = tType("eTypeUnknown")
+tType.eTypeUInt8 = tType("eTypeUInt8")
+tType.eTypeUInt16 = tType("eTypeUInt16")
+tType.eTypeFloat = tType("eTypeFloat")
+
+_DTYPES = {
+    "eTypeUInt8": np.uint8,
+    "eTypeUInt16": np.uint16,
+    "eTypeFloat": np.float32,
+}
+
+
+class AmiScheduler(object):
+    """Completes asynchronous invocations after their latency from a single thread, as the
+    client thread pool of ICE does: no thread is blocked while a request is in flight."""
+
+    # Set in the scheduler thread: the simulated latency is not slept there
+    local = threading.local()
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def schedule(self, delay, function):
+        with self._condition:
+            deadline = time.perf_counter() + delay
+            heapq.heappush(self._heap, (deadline, next(self._counter), function))
+            self._condition.notify()
+
+    def _run(self):
+        AmiScheduler.local.active = True
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.perf_counter():
+                    timeout = (
+                        self._heap[0][0] - time.perf_counter() if self._heap else None
+                    )
+                    self._condition.wait(timeout)
+                _, _, function = heapq.heappop(self._heap)
+            function()
+
+
+_scheduler = None
+
+
+def _getScheduler():
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = AmiScheduler()
+    return _scheduler
+
+
+class AmiProxy(object):
+    """Adds the asynchronous method invocation of ICE to a fake proxy: ``<operation>Async()``
+    returning a future (Ice 3.7, if ``ami`` is "3.7"), or ``begin_<operation>()`` with
+    ``_response`` and ``_ex`` callbacks (Ice 3.6, if ``ami`` is "3.6"). Requests complete
+    after ``latency`` seconds. ``maxInFlight`` records the largest number of concurrent
+    requests."""
+
+    ami = None
+    latency = 0.0
+
+    def __getattr__(self, name):
+        ami = object.__getattribute__(self, "ami")
+        if ami == "3.7" and name.endswith("Async"):
+            operation = name[: -len("Async")]
+        elif ami == "3.6" and name.startswith("begin_"):
+            operation = name[len("begin_") :]
+        else:
+            raise AttributeError(name)
+
+        # Raise AttributeError for unknown operations (without counting the call)
+        object.__getattribute__(self, operation)
+        if ami == "3.7":
+            return lambda *args: self._invokeAsync(getattr(self, operation), args)
+        return lambda *args, **kwargs: self._beginInvoke(
+            getattr(self, operation), args, **kwargs
+        )
+
+    def _invokeAsync(self, operation, args):
+        future = Future()
+
+        def complete(result, exception):
+            if exception is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exception)
+
+        self._schedule(operation, args, complete)
+        return future
+
+    def _beginInvoke(self, operation, args, _response=None, _ex=None):
+        def complete(result, exception):
+            if exception is None:
+                _response(result)
+            else:
+                _ex(exception)
+
+        self._schedule(operation, args, complete)
+
+    def _schedule(self, operation, args, complete):
+        with self._amiLock:
+            self.inFlight += 1
+            self.maxInFlight = max(self.maxInFlight, self.inFlight)
+
+        def run():
+            try:
+                result, exception = operation(*args), None
+            except Exception as e:
+                result, exception = None, e
+            with self._amiLock:
+                self.inFlight -= 1
+            complete(result, exception)
+
+        _getScheduler().schedule(self.latency, run)
+
+    def _initAmi(self, ami):
+        self.ami = ami
+        self.inFlight = 0
+        self.maxInFlight = 0
+        self._amiLock = threading.Lock()
+
+    def _simulateLatency(self):
+        if self.latency > 0 and not getattr(AmiScheduler.local, "active", False):
+            time.sleep(self.latency)
+
+
+class FakeProxy(AmiProxy):
+    """Base class of the fake proxies: every remote call (any method starting with an
+    uppercase letter) is counted in the ``calls`` dictionary."""
+
+    def __getattribute__(self, name):
+        attribute = object.__getattribute__(self, name)
+        if name[0].isupper() and callable(attribute):
+            calls = object.__getattribute__(self, "calls")
+
+            def call(*args, **kwargs):
+                calls[name] = calls.get(name, 0) + 1
+                return attribute(*args, **kwargs)
+
+            return call
+        return attribute
+
+    def numberOfCalls(self, prefix=""):
+        return sum(n for name, n in self.calls.items() if name.startswith(prefix))
+
+
+class FakeDataSet(FakeProxy):
+    """Stand-in for an Imaris::IDataSet proxy backed by a (T, C, Z, Y, X) Numpy array.
+
+    Every remote call is counted in the ``calls`` dictionary. Data transfers can be slowed
+    down by ``latency`` seconds to simulate the round trip to Imaris. Uploads larger than
+    ``messageSizeMax`` bytes fail, as with ``Ice.MessageSizeMax``. See ``AmiProxy`` for
+    ``ami``.
+    """
+
+    def __init__(
+        self,
+        data=None,
+        datatype="eTypeUInt8",
+        latency=0.0,
+        messageSizeMax=None,
+        ami=None,
+    ):
+        self.calls = {}
+        self._initAmi(ami)
+        self.latency = latency
+        self.messageSizeMax = messageSizeMax
+        self.largestMessage = 0
+        self._type = tType(datatype)
+        if data is None:
+            data = np.zeros((1, 1, 0, 0, 0), dtype=_DTYPES[datatype])
+        self._data = np.asarray(data, dtype=_DTYPES[datatype])
+        self._extends = [0.0, float(self._data.shape[4]), 0.0]
+        self._extends += [float(self._data.shape[3]), 0.0, float(self._data.shape[2])]
+        self._channelNames = ["Channel " + str(c) for c in range(self._data.shape[1])]
+        self._channelColors = [0] * self._data.shape[1]
+        self._timePointsDelta = 1.0
+        self._modified = False
+
+    @property
+    def data(self):
+        return self._data
+
+    # Type and sizes
+
+    def GetType(self):
+        return self._type
+
+    def Create(self, datatype, sizeX, sizeY, sizeZ, sizeC, sizeT):
+        self._type = tType(str(datatype))
+        self._data = np.zeros(
+            (sizeT, sizeC, sizeZ, sizeY, sizeX), dtype=_DTYPES[str(datatype)]
+        )
+        self._channelNames = ["Channel " + str(c) for c in range(sizeC)]
+        self._channelColors = [0] * sizeC
+
+    def Clone(self):
+        clone = FakeDataSet(self._data.copy(), str(self._type))
+        clone._extends = list(self._extends)
+        clone._channelNames = list(self._channelNames)
+        clone._channelColors = list(self._channelColors)
+        clone._timePointsDelta = self._timePointsDelta
+        return clone
+
+    def GetSizeX(self):
+        return self._data.shape[4]
+
+    def GetSizeY(self):
+        return self._data.shape[3]
+
+    def GetSizeZ(self):
+        return self._data.shape[2]
+
+    def GetSizeC(self):
+        return self._data.shape[1]
+
+    def GetSizeT(self):
+        return self._data.shape[0]
+
+    def SetSizeC(self, sizeC):
+        shape = list(self._data.shape)
+        nOld = shape[1]
+        shape[1] = sizeC
+        data = np.zeros(shape, dtype=self._data.dtype)
+        n = min(nOld, sizeC)
+        data[:, :n] = self._data[:, :n]
+        self._data = data
+        self._channelNames = (self._channelNames + ["Channel"] * sizeC)[:sizeC]
+        self._channelColors = (self._channelColors + [0] * sizeC)[:sizeC]
+
+    # Calibration
+
+    def GetExtendMinX(self):
+        return self._extends[0]
+
+    def GetExtendMaxX(self):
+        return self._extends[1]
+
+    def GetExtendMinY(self):
+        return self._extends[2]
+
+    def GetExtendMaxY(self):
+        return self._extends[3]
+
+    def GetExtendMinZ(self):
+        return self._extends[4]
+
+    def GetExtendMaxZ(self):
+        return self._extends[5]
+
+    def SetExtendMinX(self, value):
+        self._extends[0] = value
+
+    def SetExtendMaxX(self, value):
+        self._extends[1] = value
+
+    def SetExtendMinY(self, value):
+        self._extends[2] = value
+
+    def SetExtendMaxY(self, value):
+        self._extends[3] = value
+
+    def SetExtendMinZ(self, value):
+        self._extends[4] = value
+
+    def SetExtendMaxZ(self, value):
+        self._extends[5] = value
+
+    def GetTimePointsDelta(self):
+        return self._timePointsDelta
+
+    def SetTimePointsDelta(self, value):
+        self._timePointsDelta = value
+
+    def SetModified(self, modified):
+        self._modified = modified
+
+    # Channels
+
+    def GetChannelName(self, channel):
+        return self._channelNames[channel]
+
+    def SetChannelName(self, channel, name):
+        self._channelNames[channel] = name
+
+    def GetChannelColorRGBA(self, channel):
+        return self._channelColors[channel]
+
+    def SetChannelColorRGBA(self, channel, color):
+        self._channelColors[channel] = color
+
+    # Data access. As ICE does, bytes are returned as a bytes object, while shorts
+    # (signed!) and floats are returned as Python lists.
+
+    def _encode(self, arr):
+        self._simulateLatency()
+        if arr.dtype == np.uint8:
+            return arr.tobytes()
+        elif arr.dtype == np.uint16:
+            return arr.view(np.int16).tolist()
+        return arr.tolist()
+
+    def _decode(self, values):
+        self._simulateLatency()
+        nBytes = len(values) * self._data.itemsize
+        self.largestMessage = max(self.largestMessage, nBytes)
+        if self.messageSizeMax is not None and nBytes > self.messageSizeMax:
+            raise MemoryLimitException("Message size " + str(nBytes))
+        if isinstance(values, (bytes, bytearray)):
+            return np.frombuffer(values, dtype=np.uint8)
+        values = np.asarray(values)
+        if self._data.dtype == np.uint16:
+            return values.astype(np.int16).view(np.uint16)
+        return values.astype(self._data.dtype)
+
+    def GetDataVolumeAs1DArrayBytes(self, channel, timepoint):
+        return self._encode(self._data[timepoint, channel].ravel())
+
+    def GetDataVolumeAs1DArrayShorts(self, channel, timepoint):
+        return self._encode(self._data[timepoint, channel].ravel())
+
+    def GetDataVolumeAs1DArrayFloats(self, channel, timepoint):
+        return self._encode(self._data[timepoint, channel].ravel())
+
+    def _subVolume(self, x0, y0, z0, channel, timepoint, dX, dY, dZ):
+        return self._data[
+            timepoint, channel, z0 : z0 + dZ, y0 : y0 + dY, x0 : x0 + dX
+        ].ravel()
+
+    def GetDataSubVolumeAs1DArrayBytes(self, *args):
+        return self._encode(self._subVolume(*args))
+
+    def GetDataSubVolumeAs1DArrayShorts(self, *args):
+        return self._encode(self._subVolume(*args))
+
+    def GetDataSubVolumeAs1DArrayFloats(self, *args):
+        return self._encode(self._subVolume(*args))
+
+    def _slice(self, plane, channel, timepoint):
+        # Slices are returned as [x][y] sequences
+        self._simulateLatency()
+        xy = self._data[timepoint, channel, plane].T
+        if xy.dtype == np.uint8:
+            return [row.tobytes() for row in xy]
+        elif xy.dtype == np.uint16:
+            return xy.view(np.int16).tolist()
+        return xy.tolist()
+
+    def GetDataSliceBytes(self, plane, channel, timepoint):
+        return self._slice(plane, channel, timepoint)
+
+    def GetDataSliceShorts(self, plane, channel, timepoint):
+        return self._slice(plane, channel, timepoint)
+
+    def GetDataSliceFloats(self, plane, channel, timepoint):
+        return self._slice(plane, channel, timepoint)
+
+    def _setVolume(self, values, channel, timepoint):
+        shape = self._data.shape[2:]
+        self._data[timepoint, channel] = self._decode(values).reshape(shape)
+
+    def SetDataVolumeAs1DArrayBytes(self, values, channel, timepoint):
+        self._setVolume(values, channel, timepoint)
+
+    def SetDataVolumeAs1DArrayShorts(self, values, channel, timepoint):
+        self._setVolume(values, channel, timepoint)
+
+    def SetDataVolumeAs1DArrayFloats(self, values, channel, timepoint):
+        self._setVolume(values, channel, timepoint)
+
+    def _setSubVolume(self, values, x0, y0, z0, channel, timepoint, dX, dY, dZ):
+        self._data[
+            timepoint, channel, z0 : z0 + dZ, y0 : y0 + dY, x0 : x0 + dX
+        ] = self._decode(values).reshape((dZ, dY, dX))
+
+    def SetDataSubVolumeAs1DArrayBytes(self, values, *args):
+        self._setSubVolume(values, *args)
+
+    def SetDataSubVolumeAs1DArrayShorts(self, values, *args):
+        self._setSubVolume(values, *args)
+
+    def SetDataSubVolumeAs1DArrayFloats(self, values, *args):
+        self._setSubVolume(values, *args)
+
+
+class MemoryLimitException(Exception):
+    """Stand-in for Ice.MemoryLimitException."""
+
+
+class ConnectionLostException(Exception):
+    """Stand-in for Ice.ConnectionLostException."""
+
+
+class FakeDataItem(FakeProxy):
+    """Stand-in for an Imaris::IDataItem proxy.
+
+    Statistics are added with ``addStatistics()``. ``GetStatisticsByName()`` is only available
+    if ``statisticsByName`` is True (as in recent Imaris versions). Remote calls take
+    ``latency`` seconds.
+    """
+
+    def __init__(self, name="", latency=0.0, ami=None, statisticsByName=False):
+        self.calls = {}
+        self._initAmi(ami)
+        self.latency = latency
+        self.statisticsByName = statisticsByName
+        self._name = name
+        self._color = 0
+        self._statistics = []
+
+    def __getattr__(self, name):
+        if name == "GetStatisticsByName" and object.__getattribute__(
+            self, "statisticsByName"
+        ):
+            return object.__getattribute__(self, "_getStatisticsByName")
+        return super(FakeDataItem, self).__getattr__(name)
+
+    def addStatistics(self, name, ids, values, unit="", factors=None):
+        """Adds the values of a statistics; factors maps factor names to one string per value."""
+        factors = {} if factors is None else factors
+        for i, (objectId, value) in enumerate(zip(ids, values)):
+            objectFactors = {f: str(v[i]) for f, v in factors.items()}
+            self._statistics.append(
+                (name, unit, objectFactors, int(objectId), float(value))
+            )
+
+    def _statisticValues(self, statistics):
+        factorNames = sorted(set(f for s in statistics for f in s[2]))
+        return types.SimpleNamespace(
+            mNames=[s[0] for s in statistics],
+            mUnits=[s[1] for s in statistics],
+            mFactorNames=factorNames,
+            mFactors=[[s[2].get(f, "") for s in statistics] for f in factorNames],
+            mIds=[s[3] for s in statistics],
+            mValues=[s[4] for s in statistics],
+        )
+
+    def GetStatistics(self):
+        self._simulateLatency()
+        return self._statisticValues(self._statistics)
+
+    def _getStatisticsByName(self, name):
+        self.calls["GetStatisticsByName"] = self.calls.get("GetStatisticsByName", 0) + 1
+        self._simulateLatency()
+        return self._statisticValues([s for s in self._statistics if s[0] == name])
+
+    def GetName(self):
+        return self._name
+
+    def SetName(self, name):
+        self._name = name
+
+    def GetColorRGBA(self):
+        return self._color
+
+    def SetColorRGBA(self, color):
+        self._color = color
+
+
+class FakeDataContainer(FakeDataItem):
+    """Stand-in for an Imaris::IDataContainer proxy."""
+
+    def __init__(self, children=None, **kwargs):
+        super(FakeDataContainer, self).__init__(**kwargs)
+        self._children = [] if children is None else list(children)
+
+    def AddChild(self, child, position):
+        if position < 0:
+            self._children.append(child)
+        else:
+            self._children.insert(position, child)
+
+    def GetChild(self, index):
+        return self._children[index]
+
+    def GetNumberOfChildren(self):
+        return len(self._children)
+
+    def RemoveChild(self, child):
+        self._children.remove(child)
+
+
+class FakeSpots(FakeDataItem):
+    """Stand-in for an Imaris::ISpots proxy.
+
+    Setters whose arguments are larger than ``messageSizeMax`` bytes fail, as with
+    ``Ice.MessageSizeMax``.
+    """
+
+    def __init__(
+        self,
+        positions=None,
+        timeIndices=None,
+        radii=None,
+        trackIds=None,
+        trackEdges=None,
+        messageSizeMax=None,
+        **kwargs
+    ):
+        super(FakeSpots, self).__init__(**kwargs)
+        self.messageSizeMax = messageSizeMax
+        positions = np.zeros((0, 3)) if positions is None else positions
+        self._positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        n = self._positions.shape[0]
+        self._timeIndices = np.zeros(n, dtype=np.int32)
+        if timeIndices is not None:
+            self._timeIndices[:] = timeIndices
+        self._radii = np.ones((n, 3), dtype=np.float32)
+        if radii is not None:
+            self._radii[:] = np.asarray(radii, dtype=np.float32).reshape(n, -1)
+        self._trackIds = [] if trackIds is None else list(trackIds)
+        self._trackEdges = [] if trackEdges is None else np.asarray(trackEdges).tolist()
+
+    def GetPositionsXYZ(self):
+        return self._positions.tolist()
+
+    def GetIndicesT(self):
+        return self._timeIndices.tolist()
+
+    def GetRadii(self):
+        return self._radii[:, 0].tolist()
+
+    def GetRadiiXYZ(self):
+        return self._radii.tolist()
+
+    def GetTrackIds(self):
+        return list(self._trackIds)
+
+    def GetTrackEdges(self):
+        return [list(e) for e in self._trackEdges]
+
+    def Set(self, positions, timeIndices, radii):
+        self._checkMessageSize(positions, timeIndices, radii)
+        positions = self._receive(positions, 3)
+        n = positions.shape[0]
+        self._positions = positions.astype(np.float32)
+        self._timeIndices = self._receive(timeIndices).astype(np.int32)
+        self._radii = np.repeat(self._receive(radii), 3).reshape(n, 3)
+        self._trackIds = []
+        self._trackEdges = []
+
+    def SetRadiiXYZ(self, radii):
+        self._checkMessageSize(radii)
+        self._radii = self._receive(radii, 3).astype(np.float32)
+
+    def SetTrackEdges(self, edges, ids=None):
+        self._checkMessageSize(edges)
+        edges = self._receive(edges, 2).astype(np.int64)
+        if ids is None:
+            # Imaris assigns one track ID per connected component
+            parent = list(range(self._positions.shape[0]))
+
+            def find(i):
+                while parent[i] != i:
+                    parent[i] = parent[parent[i]]
+                    i = parent[i]
+                return i
+
+            for a, b in edges:
+                parent[find(a)] = find(b)
+            roots = [find(a) for a, _ in edges]
+            _, ids = np.unique(roots, return_inverse=True)
+            ids = 1000000000 + ids.ravel()
+        self._trackEdges = edges.tolist()
+        self._trackIds = list(ids)
+
+    def _checkMessageSize(self, *args):
+        """Fails as Ice does if the arguments exceed ``messageSizeMax`` bytes."""
+        nBytes = sum(np.asarray(values).nbytes for values in args)
+        if self.messageSizeMax is not None and nBytes > self.messageSizeMax:
+            raise MemoryLimitException("Message size " + str(nBytes))
+
+    def _receive(self, values, columns=None):
+        """Decodes a sequence argument, recording its size and whether it was a list."""
+        self.receivedLists = getattr(self, "receivedLists", 0) + isinstance(
+            values, list
+        )
+        values = np.asarray(values)
+        self.largestMessage = max(getattr(self, "largestMessage", 0), values.nbytes)
+        return values if columns is None else values.reshape(-1, columns)
+
+
+class FakeSurfaces(FakeDataItem):
+    """Stand-in for an Imaris::ISurfaces proxy.
+
+    If ``statistics`` is True, the "Position X/Y/Z" and "Time Index" statistics are added,
+    in shuffled order. The surface IDs are not the surface indices. The mesh of each surface
+    is a fan of 3 to 6 triangles around its center (see ``fanMesh()``).
+    """
+
+    def __init__(
+        self,
+        centers=None,
+        timeIndices=None,
+        trackIds=None,
+        trackEdges=None,
+        statistics=True,
+        **kwargs
+    ):
+        super(FakeSurfaces, self).__init__(**kwargs)
+        centers = np.zeros((0, 3)) if centers is None else centers
+        self._centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+        n = self._centers.shape[0]
+        self._timeIndices = np.zeros(n, dtype=np.int32)
+        if timeIndices is not None:
+            self._timeIndices[:] = timeIndices
+        self._trackIds = [] if trackIds is None else list(trackIds)
+        self._trackEdges = [] if trackEdges is None else np.asarray(trackEdges).tolist()
+        self._ids = 1000 + 3 * np.arange(n)
+        if statistics:
+            order = np.random.RandomState(0).permutation(n)
+            ids = self._ids[order]
+            factors = {
+                "Category": ["Surface"] * n,
+                "Time": self._timeIndices[order] + 1,
+            }
+            for c, axis in enumerate("XYZ"):
+                values = self._centers[order, c]
+                self.addStatistics("Position " + axis, ids, values, "um", factors)
+            values = self._timeIndices[order] + 1
+            self.addStatistics("Time Index", ids, values, "", factors)
+
+    def GetIds(self):
+        self._simulateLatency()
+        return self._ids.tolist()
+
+    def GetNumberOfSurfaces(self):
+        self._simulateLatency()
+        return self._centers.shape[0]
+
+    def GetCenterOfMass(self, index):
+        self._simulateLatency()
+        return [self._centers[index].tolist()]
+
+    def GetTimeIndex(self, index):
+        self._simulateLatency()
+        return int(self._timeIndices[index])
+
+    def GetVertices(self, index):
+        self._simulateLatency()
+        return fanMesh(self._centers[index], index)[0].tolist()
+
+    def GetTriangles(self, index):
+        self._simulateLatency()
+        return fanMesh(self._centers[index], index)[1].tolist()
+
+    def GetNormals(self, index):
+        self._simulateLatency()
+        return fanMesh(self._centers[index], index)[2].tolist()
+
+    def GetTrackIds(self):
+        return list(self._trackIds)
+
+    def GetTrackEdges(self):
+        return [list(e) for e in self._trackEdges]
+
+
+class FakeFilaments(FakeDataItem):
+    """Stand-in for an Imaris::IFilaments proxy with nFilaments random trees (see ``randomTree()``).
+
+    Filament i is at time index i % 3; the filament IDs are not the filament indices.
+    """
+
+    def __init__(self, nFilaments=0, **kwargs):
+        super(FakeFilaments, self).__init__(**kwargs)
+        self._trees = [randomTree(i) for i in range(nFilaments)]
+        self._ids = 5000 + 2 * np.arange(nFilaments)
+
+    def GetIds(self):
+        self._simulateLatency()
+        return self._ids.tolist()
+
+    def GetNumberOfFilaments(self):
+        self._simulateLatency()
+        return len(self._trees)
+
+    def GetTimeIndex(self, index):
+        self._simulateLatency()
+        return index % 3
+
+    def GetPositionsXYZ(self, index):
+        self._simulateLatency()
+        return self._trees[index]["positions"].tolist()
+
+    def GetRadii(self, index):
+        self._simulateLatency()
+        return self._trees[index]["radii"].tolist()
+
+    def GetTypes(self, index):
+        self._simulateLatency()
+        return self._trees[index]["types"].tolist()
+
+    def GetEdges(self, index):
+        self._simulateLatency()
+        return self._trees[index]["edges"].tolist()
+
+    def GetBeginningVertexIndex(self, index):
+        self._simulateLatency()
+        return int(self._trees[index]["root"])
+
+
+class FakeFactory(object):
+    """Stand-in for an Imaris::IFactory proxy.
+
+    ``Is<Type>()`` and ``To<Type>()`` are supported for the fake types below; ``Is<Type>()``
+    returns False for all other types. Calls are counted in the ``calls`` dictionary and take
+    ``latency`` seconds. ``CreateSpots()`` passes ``messageSizeMax`` to the new spots.
+    """
+
+    TYPES = {
+        "DataContainer": FakeDataContainer,
+        "DataItem": FakeDataItem,
+        "DataSet": FakeDataSet,
+        "Spots": FakeSpots,
+        "Surfaces": FakeSurfaces,
+        "Filaments": FakeFilaments,
+    }
+
+    def __init__(self, latency=0.0, messageSizeMax=None):
+        self.calls = {}
+        self.latency = latency
+        self.messageSizeMax = messageSizeMax
+
+    def __getattr__(self, name):
+        if name.startswith("Is"):
+            cls = self.TYPES.get(name[2:])
+            return self._count(
+                name, lambda obj: cls is not None and isinstance(obj, cls)
+            )
+        if name.startswith("To") and name[2:] in self.TYPES:
+            cls = self.TYPES[name[2:]]
+            return self._count(name, lambda obj: obj if isinstance(obj, cls) else None)
+        raise AttributeError(name)
+
+    def _count(self, name, function):
+        def call(obj):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if self.latency > 0:
+                time.sleep(self.latency)
+            return function(obj)
+
+        return call
+
+    def CreateDataSet(self):
+        return FakeDataSet()
+
+    def CreateSpots(self):
+        return FakeSpots(messageSizeMax=self.messageSizeMax)
+
+
+class IApplicationPrx(AmiProxy):
+    """Stand-in for an Imaris::IApplication proxy.
+
+    The class name matches the one of the ICE proxy, so that pIceImarisConnector accepts it.
+    See ``AmiProxy`` for ``ami``. After ``disconnect()``, ``GetVersion()`` raises
+    ``ConnectionLostException``, as if Imaris had been closed.
+    """
+
+    def __init__(self, iDataSet=None, ami=None):
+        self._initAmi(ami)
+        self._dataSet = iDataSet
+        self._selection = None
+        self._factory = FakeFactory()
+        self._scene = FakeDataContainer(name="Scene")
+        self.versionCalls = 0
+        self.factoryCalls = 0
+        self._connected = True
+
+    def disconnect(self):
+        self._connected = False
+
+    def GetVersion(self):
+        self.versionCalls += 1
+        if not self._connected:
+            raise ConnectionLostException("Connection lost")
+        return "Imaris 9.9.0"
+
+    def GetFactory(self):
+        self.factoryCalls += 1
+        return self._factory
+
+    def GetDataSet(self):
+        return self._dataSet
+
+    def SetDataSet(self, iDataSet):
+        self._dataSet = iDataSet
+
+    def GetSurpassScene(self):
+        return self._scene
+
+    def GetSurpassSelection(self):
+        return self._selection
+
+    def SetSurpassSelection(self, selection):
+        self._selection = selection
+
+    def SetVisible(self, visible):
+        pass
+
+    def Quit(self):
+        pass
+
+
+# Serializes createConnector(), which patches the class (e.g. when called by the pool's threads)
+_createConnectorLock = threading.Lock()
+
+
+def createConnector(application):
+    """Creates a pIceImarisConnector connected to a fake application.
+
+    Discovery of the Imaris installation and import of ImarisLib are bypassed.
+    """
+
+    fakeImarisLib = types.SimpleNamespace(ImarisLib=lambda: None)
+    with _createConnectorLock:
+        pathLength = len(sys.path)
+        with mock.patch.object(pIceImarisConnector, "_findImaris"), mock.patch.object(
+            pIceImarisConnector, "_importImarisLib", return_value=fakeImarisLib
+        ), mock.patch("os.chdir"):
+            conn = pIceImarisConnector(application)
+        del sys.path[pathLength:]
+    return conn
+
+
+class FakeImarisServer(object):
+    """Stand-in for the Imaris server of ImarisLib, with one registered application."""
+
+    def __init__(self, application, objectId):
+        self._application = application
+        self._objectId = objectId
+
+    def GetNumberOfObjects(self):
+        return 1
+
+    def GetObjectID(self, index):
+        return self._objectId
+
+
+def fakeImarisLibModule(application=None, objectId=1):
+    """Returns a stand-in for the ImarisLib module, whose server has ``application``
+    registered with ID ``objectId``."""
+
+    server = FakeImarisServer(application, objectId)
+    imarisLib = types.SimpleNamespace(
+        GetServer=lambda: server,
+        GetApplication=lambda i: application if i == objectId else None,
+    )
+    return types.SimpleNamespace(ImarisLib=lambda: imarisLib)
+
+
+def createInstallTree(root, versions, others=()):
+    """Creates fake Mac OS X installations of the given versions of Imaris (e.g. "9.5.1") in
+    root, next to the given other applications."""
+
+    for version in versions:
+        contents = os.path.join(root, "Imaris " + version + ".app", "Contents")
+        macOS = os.path.join(contents, "MacOS")
+        os.makedirs(macOS)
+        for name in ["Imaris", "ImarisServerIce"]:
+            open(os.path.join(macOS, name), "w").close()
+        for name in ["python", "python3"]:
+            os.makedirs(os.path.join(contents, "SharedSupport", "XT", name))
+    for name in others:
+        os.makedirs(os.path.join(root, name + ".app", "Contents"))
+
+
+@contextlib.contextmanager
+def fakeInstall(root, cacheFile):
+    """Makes pIceImarisConnector look for Imaris as on Mac OS X, in root instead of
+    /Applications, and cache the discovery in cacheFile. ImarisLib is replaced by
+    ``fakeImarisLibModule()``, and the working directory and paths are restored on exit."""
+
+    pathLength = len(sys.path)
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(mock.patch.dict(os.environ))
+        os.environ.pop("IMARISPATH", None)
+        stack.enter_context(mock.patch("os.chdir"))
+        for name, value in [("_ispc", False), ("_ismac", True)]:
+            stack.enter_context(
+                mock.patch.object(pIceImarisConnector, name, return_value=value)
+            )
+        stack.enter_context(
+            mock.patch.object(pIceImarisConnector, "_MAC_SEARCH_DIR", root)
+        )
+        stack.enter_context(
+            mock.patch.object(
+                pIceImarisConnector, "_getDiscoveryCacheFile", return_value=cacheFile
+            )
+        )
+        stack.enter_context(
+            mock.patch.object(
+                pIceImarisConnector,
+                "_importImarisLib",
+                return_value=fakeImarisLibModule(),
+            )
+        )
+        try:
+            yield
+        finally:
+            del sys.path[pathLength:]
+
+
+def randomData(shape, dtype, seed=0):
+    """Returns a reproducible random (T, C, Z, Y, X) array of the requested type."""
+
+    rng = np.random.RandomState(seed)
+    if dtype == np.float32:
+        return rng.standard_normal(shape).astype(np.float32)
+    return rng.randint(0, np.iinfo(dtype).max + 1, size=shape).astype(dtype)
+
+
+def randomTracks(nTracks, trackLength, seed=0):
+    """Returns reproducible random tracks of trackLength spots each, as ISpots stores them.
+
+    The spots of all tracks are shuffled, and so are the edges.
+
+    :return: positions (N x 3), time indices (N), track IDs (one per edge) and track edges
+             (nEdges x 2).
+    """
+
+    rng = np.random.RandomState(seed)
+    nSpots = nTracks * trackLength
+
+    # Spot index of the n-th spot of each track
+    spotIndices = rng.permutation(nSpots).reshape(nTracks, trackLength)
+
+    # Random walks starting at random timepoints
+    positions = np.zeros((nSpots, 3))
+    steps = rng.standard_normal((nTracks, trackLength, 3)).cumsum(axis=1)
+    positions[spotIndices.ravel()] = steps.reshape(-1, 3) + 100 * rng.rand(
+        nTracks, 1, 3
+    ).repeat(trackLength, axis=1).reshape(-1, 3)
+    timeIndices = np.zeros(nSpots, dtype=np.int64)
+    startTimes = rng.randint(0, 100, size=nTracks)
+    timeIndices[spotIndices.ravel()] = (
+        startTimes[:, np.newaxis] + np.arange(trackLength)
+    ).ravel()
+
+    # Edges between consecutive spots
+    trackEdges = np.stack(
+        [spotIndices[:, :-1].ravel(), spotIndices[:, 1:].ravel()], axis=1
+    )
+    trackIds = np.repeat(1000000000 + np.arange(nTracks), trackLength - 1)
+    order = rng.permutation(trackEdges.shape[0])
+    return positions, timeIndices, trackIds[order], trackEdges[order]
+
+
+def brownianTracks(nTracks, nFrames, step=1.0, size=100.0, seed=0):
+    """Returns reproducible Brownian tracks that span all nFrames frames, with shuffled spots.
+
+    Each track starts at a random position in a cube of the given size and moves by a normally
+    distributed displacement with standard deviation step (per axis) per frame.
+
+    :return: positions (N x 3), time indices (N) and the true track edges (nEdges x 2),
+             sorted by first spot.
+    """
+
+    rng = np.random.RandomState(seed)
+    nSpots = nTracks * nFrames
+
+    # Spot index of the spot of each track in each frame
+    spotIndices = rng.permutation(nSpots).reshape(nTracks, nFrames)
+
+    walks = step * rng.standard_normal((nTracks, nFrames, 3))
+    walks[:, 0, :] = size * rng.rand(nTracks, 3)
+    positions = np.zeros((nSpots, 3))
+    positions[spotIndices.ravel()] = walks.cumsum(axis=1).reshape(-1, 3)
+    timeIndices = np.zeros(nSpots, dtype=np.int64)
+    timeIndices[spotIndices.ravel()] = np.tile(np.arange(nFrames), nTracks)
+
+    trackEdges = np.stack(
+        [spotIndices[:, :-1].ravel(), spotIndices[:, 1:].ravel()], axis=1
+    )
+    return positions, timeIndices, trackEdges[np.argsort(trackEdges[:, 0])]
+
+
+def fanMesh(center, index):
+    """Returns the mesh of surface index of FakeSurfaces: a fan of 3 + index % 4 triangles.
+
+    :return: vertices (V x 3), triangles (T x 3) and normals (V x 3).
+    """
+
+    n = 3 + index % 4
+    angles = 2 * np.pi * np.arange(n) / n
+    ring = np.stack([np.cos(angles), np.sin(angles), np.zeros(n)], axis=1)
+    vertices = np.concatenate([[center], center + ring]).astype(np.float32)
+    triangles = np.stack(
+        [np.zeros(n), 1 + np.arange(n), 1 + (np.arange(n) + 1) % n], axis=1
+    ).astype(np.int32)
+    normals = np.tile(np.array([0, 0, 1], dtype=np.float32), (n + 1, 1))
+    return vertices, triangles, normals
+
+
+def randomTree(index):
+    """Returns filament index of FakeFilaments: a reproducible random tree of 5 + index % 7 vertices.
+
+    :return: dictionary with positions (V x 3), radii (V), types (V; 0 for dendrites, 1 for spines),
+             edges (E x 2, indices of the vertices of the tree) and root (index of the beginning vertex).
+    """
+
+    rng = np.random.RandomState(index)
+    n = 5 + index % 7
+    parents = np.array([rng.randint(v) for v in range(1, n)])
+    return {
+        "positions": rng.uniform(0, 100, (n, 3)),
+        "radii": rng.uniform(0.5, 2, n),
+        "types": (rng.rand(n) < 0.2).astype(np.int32),
+        "edges": np.stack([parents, np.arange(1, n)], axis=1),
+        "root": 0,
+    }
+
+
+def freePort():
+    """Returns a local TCP port that is currently free."""
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class StandInServer(object):
+    """Accepts (and closes) connections on a local port, as ImarisServerIce on its endpoint."""
+
+    def __init__(self, port, delay=0.0):
+        self._socket = None
+        self._port = port
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(delay,), daemon=True)
+        self._thread.start()
+
+    def _run(self, delay):
+        if self._stop.wait(delay):
+            return
+        self._socket = socket.socket()
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(("127.0.0.1", self._port))
+        self._socket.listen(8)
+        self._socket.settimeout(0.05)
+        while not self._stop.is_set():
+            try:
+                connection, _ = self._socket.accept()
+                connection.close()
+            except socket.timeout:
+                pass
+        self._socket.close()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class FakeLauncher(object):
+    """Stands in for the launched processes and ImarisLib: ImarisServerIce accepts
+    connections serverDelay seconds after its launch, and Imaris registers applicationDelay
+    seconds after its launch. The first call to GetApplication() fails, as a too quick call
+    can do."""
+
+    def __init__(self, port, serverDelay, applicationDelay):
+        self.port = port
+        self.serverDelay = serverDelay
+        self.applicationDelay = applicationDelay
+        self.application = IApplicationPrx()
+        self.server = None
+        self.launchTime = None
+        self.communicators = 0
+        self.calls = 0
+
+    def Popen(self, args, bufsize=-1):
+        if args == "ImarisServerIce":
+            self.server = StandInServer(self.port, self.serverDelay)
+        else:
+            self.launchTime = time.monotonic()
+        return mock.MagicMock()
+
+    def ImarisLib(self):
+        self.communicators += 1
+        return types.SimpleNamespace(GetApplication=self.GetApplication)
+
+    def GetApplication(self, objectId):
+        self.calls += 1
+        if self.calls == 1:
+            raise Exception("Not ready")
+        if (
+            self.launchTime is None
+            or self.applicationDelay is None
+            or time.monotonic() - self.launchTime < self.applicationDelay
+        ):
+            return None
+        return self.application
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+
+
+def startImarisWith(launcher, timeout):
+    """Calls startImaris() on a new connector, with the processes and ImarisLib
+    replaced by a FakeLauncher.
+
+    :return: connector and result of startImaris().
+    """
+
+    conn = createConnector(None)
+    conn._mImarisExePath = "Imaris"
+    conn._mImarisServerIceExePath = "ImarisServerIce"
+    with mock.patch.object(
+        pIceImarisConnector, "_isSupportedPlatform", return_value=True
+    ), mock.patch.object(
+        pIceImarisConnector, "_SERVER_ENDPOINT", ("127.0.0.1", launcher.port)
+    ), mock.patch.object(
+        pIceImarisConnector,
+        "_importImarisLib",
+        return_value=types.SimpleNamespace(ImarisLib=launcher.ImarisLib),
+    ), mock.patch(
+        "subprocess.Popen", side_effect=launcher.Popen
+    ):
+        result = conn.startImaris(timeout=timeout)
+    return conn, result
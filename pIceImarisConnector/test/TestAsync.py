@@ -0,0 +1,158 @@
+# Round trips of getDataVolumeAsync(), getDataSubVolumeAsync(), getDataSliceAsync() and
+# setDataSubVolumeAsync(), many requests in flight, and errors raised by the proxies. The fakes
+# answer "begin_" calls (Ice 3.6) or "Async" calls (Ice 3.7) after a fixed latency.
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataSet,
+    IApplicationPrx,
+    createConnector,
+    randomData,
+)
+
+DATATYPES = [
+    ("eTypeUInt8", np.uint8),
+    ("eTypeUInt16", np.uint16),
+    ("eTypeFloat", np.float32),
+]
+
+
+class FailingDataSet(FakeDataSet):
+    """Fake IDataSet whose subvolume reads fail."""
+
+    def GetDataSubVolumeAs1DArrayBytes(self, *args):
+        raise RuntimeError("Connection lost")
+
+
+# testGetAndSet
+def testGetAndSet(datatype, dtype, ami):
+    data = randomData((2, 2, 3, 4, 5), dtype)
+    iDataSet = FakeDataSet(data.copy(), datatype, latency=0.001, ami=ami)
+    conn = createConnector(IApplicationPrx(iDataSet, ami=ami))
+
+    async def run():
+        volume = await conn.getDataVolumeAsync(1, 1)
+        subVolume = await conn.getDataSubVolumeAsync(1, 2, 0, 0, 1, 3, 2, 2)
+        out = np.empty((4, 5), dtype=dtype)
+        plane = await conn.getDataSliceAsync(2, 1, 0, out=out)
+        if not (
+            np.array_equal(volume, data[1, 1])
+            and np.array_equal(subVolume, data[1, 0, 0:2, 2:4, 1:4])
+            and plane is out
+            and np.array_equal(plane, data[0, 1, 2])
+        ):
+            return False
+        values = randomData((2, 2, 3), dtype, seed=1)
+        await conn.setDataSubVolumeAsync(values, 2, 1, 1, 0, 1)
+        data[1, 0, 1:3, 1:3, 2:5] = values
+        return np.array_equal(iDataSet.data, data)
+
+    return asyncio.run(run())
+
+
+# testManyRequestsInFlight
+def testManyRequestsInFlight():
+    data = randomData((1, 1, 1, 160, 160), np.uint16)
+    latency = 0.05
+    iDataSet = FakeDataSet(data, "eTypeUInt16", latency=latency, ami="3.7")
+    conn = createConnector(IApplicationPrx(iDataSet, ami="3.7"))
+    conn.getDatasetInfo()
+    nThreads = threading.active_count()
+
+    async def run():
+        origins = [(y, x) for y in range(0, 160, 8) for x in range(0, 160, 16)]
+        tiles = await asyncio.gather(
+            *[
+                conn.getDataSubVolumeAsync(x, y, 0, 0, 0, 16, 8, 1, iDataSet=iDataSet)
+                for y, x in origins
+            ]
+        )
+        return all(
+            np.array_equal(tile[0], data[0, 0, 0, y : y + 8, x : x + 16])
+            for tile, (y, x) in zip(tiles, origins)
+        )
+
+    tic = time.perf_counter()
+    correct = asyncio.run(run())
+    elapsed = time.perf_counter() - tic
+
+    # 200 requests: about one latency instead of 200
+    return (
+        correct
+        and iDataSet.maxInFlight == 200
+        and elapsed < 50 * latency
+        and threading.active_count() <= nThreads + 1
+    )
+
+
+# testErrors
+def testErrors(ami):
+    data = randomData((1, 1, 2, 3, 4), np.uint8)
+    iDataSet = FailingDataSet(data, "eTypeUInt8", ami=ami)
+    conn = createConnector(IApplicationPrx(iDataSet, ami=ami))
+
+    async def run():
+        try:
+            await conn.getDataSubVolumeAsync(0, 0, 0, 0, 0, 2, 2, 2)
+            return False
+        except RuntimeError:
+            pass
+        try:
+            await conn.getDataSubVolumeAsync(3, 0, 0, 0, 0, 2, 2, 1)
+            return False
+        except ValueError:
+            pass
+        try:
+            await conn.setDataSubVolumeAsync(
+                np.zeros((1, 2, 2), np.uint16), 0, 0, 0, 0, 0
+            )
+            return False
+        except TypeError:
+            pass
+        return np.array_equal(await conn.getDataVolumeAsync(0, 0), data[0, 0])
+
+    return asyncio.run(run())
+
+
+# testVolumeCacheIsUpdated
+def testVolumeCacheIsUpdated():
+    data = randomData((1, 1, 2, 3, 4), np.float32)
+    iDataSet = FakeDataSet(data, "eTypeFloat", ami="3.7")
+    conn = createConnector(IApplicationPrx(iDataSet, ami="3.7"))
+    conn.enableVolumeCache(2**20)
+
+    async def run():
+        await conn.getDataVolumeAsync(0, 0)
+        await conn.getDataVolumeAsync(0, 0)
+        if iDataSet.calls.get("GetDataVolumeAs1DArrayFloats") != 1:
+            return False
+        await conn.setDataSubVolumeAsync(np.ones((2, 3, 4), np.float32), 0, 0, 0, 0, 0)
+        return np.all(await conn.getDataVolumeAsync(0, 0) == 1)
+
+    return asyncio.run(run())
+
+
+# ======================================================================================================================
+
+#
+# Asynchronous invocation with Ice 3.7, Ice 3.6, and blocking proxies
+#
+for ami in ["3.7", "3.6", None]:
+    for datatype, dtype in DATATYPES:
+        assert testGetAndSet(datatype, dtype, ami)
+    assert testErrors(ami)
+
+#
+# Concurrency
+#
+assert testManyRequestsInFlight()
+
+#
+# Volume cache
+#
+assert testVolumeCacheIsUpdated()
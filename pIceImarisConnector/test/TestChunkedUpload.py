@@ -0,0 +1,125 @@
+# _splitIntoChunks() and the chunked uploads of setDataVolume(), copyChannels() and
+# DataVolumeWriter when a volume is larger than the configured message size; volumes of the
+# wrong shape are rejected before anything is sent.
+
+import numpy as np
+
+from pIceImarisConnector import DataVolumeWriter, pIceImarisConnector
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataSet,
+    IApplicationPrx,
+    MemoryLimitException,
+    createConnector,
+    randomData,
+)
+
+DATATYPES = [
+    ("eTypeUInt8", np.uint8),
+    ("eTypeUInt16", np.uint16),
+    ("eTypeFloat", np.float32),
+]
+
+
+# testSplitIntoChunks
+def testSplitIntoChunks(shape, itemsize, maxChunkBytes, expectedChunkShape):
+    chunks = pIceImarisConnector._splitIntoChunks(shape, itemsize, maxChunkBytes)
+    covered = np.zeros(shape, dtype=np.int32)
+    for z0, y0, x0, dZ, dY, dX in chunks:
+        if dZ * dY * dX * itemsize > maxChunkBytes:
+            return False
+        covered[z0 : z0 + dZ, y0 : y0 + dY, x0 : x0 + dX] += 1
+    return np.all(covered == 1) and chunks[0][3:] == expectedChunkShape
+
+
+# testChunkedSetDataVolume
+def testChunkedSetDataVolume(datatype, dtype):
+    data = randomData((1, 2, 9, 6, 5), dtype)
+    iDataSet = FakeDataSet(np.zeros_like(data), datatype, messageSizeMax=200)
+    conn = createConnector(IApplicationPrx(iDataSet))
+
+    # A single upload is too large
+    try:
+        conn.setDataVolume(data[0, 1], 1, 0)
+        return False
+    except MemoryLimitException:
+        iDataSet.largestMessage = 0
+
+    speed = conn.setDataVolume(
+        data[0, 1], 1, 0, maxChunkBytes=200, returnThroughput=True
+    )
+    return (
+        speed > 0
+        and iDataSet.largestMessage <= 200
+        and np.array_equal(iDataSet.data[0, 1], data[0, 1])
+        and not np.any(iDataSet.data[0, 0])
+    )
+
+
+# testSmallVolumeIsNotSplit
+def testSmallVolumeIsNotSplit():
+    data = randomData((1, 1, 2, 3, 4), np.uint8)
+    iDataSet = FakeDataSet(np.zeros_like(data), "eTypeUInt8")
+    conn = createConnector(IApplicationPrx(iDataSet))
+    conn.setDataVolume(data[0, 0], 0, 0, maxChunkBytes=1024)
+    return (
+        iDataSet.calls.get("SetDataVolumeAs1DArrayBytes") == 1
+        and "SetDataSubVolumeAs1DArrayBytes" not in iDataSet.calls
+        and np.array_equal(iDataSet.data, data)
+    )
+
+
+# testChunkedCopyChannels
+def testChunkedCopyChannels():
+    data = randomData((3, 2, 4, 8, 8), np.float32)
+    iDataSet = FakeDataSet(data, "eTypeFloat", messageSizeMax=1024)
+    conn = createConnector(IApplicationPrx(iDataSet))
+    speed = conn.copyChannels([1, 0], maxChunkBytes=1024, returnThroughput=True)
+    return (
+        speed > 0
+        and iDataSet.largestMessage <= 1024
+        and np.array_equal(iDataSet.data[:, 2], data[:, 1])
+        and np.array_equal(iDataSet.data[:, 3], data[:, 0])
+    )
+
+
+# testChunkedWriter
+def testChunkedWriter():
+    data = randomData((4, 1, 4, 8, 8), np.uint16)
+    iDataSet = FakeDataSet(np.zeros_like(data), "eTypeUInt16", messageSizeMax=256)
+    conn = createConnector(IApplicationPrx(iDataSet))
+    with DataVolumeWriter(conn, maxChunkBytes=256) as writer:
+        for t in range(4):
+            writer.setDataVolume(data[t, 0], 0, t)
+    return np.array_equal(iDataSet.data, data)
+
+
+# testWrongShape
+def testWrongShape():
+    iDataSet = FakeDataSet(np.zeros((1, 1, 4, 8, 8), np.uint8), "eTypeUInt8")
+    conn = createConnector(IApplicationPrx(iDataSet))
+    try:
+        conn.setDataVolume(np.zeros((8, 8, 4), np.uint8), 0, 0, maxChunkBytes=64)
+    except ValueError:
+        return True
+    return False
+
+
+# ======================================================================================================================
+
+#
+# Chunks
+#
+assert testSplitIntoChunks((10, 4, 4), 2, 100, (3, 4, 4))
+assert testSplitIntoChunks((2, 10, 7), 1, 30, (1, 4, 7))
+assert testSplitIntoChunks((2, 3, 50), 4, 64, (1, 1, 16))
+assert testSplitIntoChunks((2, 3, 4), 1, 1000, (2, 3, 4))
+
+#
+# Chunked uploads
+#
+for datatype, dtype in DATATYPES:
+    assert testChunkedSetDataVolume(datatype, dtype)
+assert testSmallVolumeIsNotSplit()
+assert testChunkedCopyChannels()
+assert testChunkedWriter()
+assert testWrongShape()
@@ -0,0 +1,146 @@
+# copyChannels(): copied voxels, names and colors, no per-channel metadata calls, the bound on
+# the number of blocks in flight and the cleanup of the new channels on failure.
+
+import threading
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataSet,
+    IApplicationPrx,
+    createConnector,
+    randomData,
+)
+
+DATATYPES = [
+    ("eTypeUInt8", np.uint8),
+    ("eTypeUInt16", np.uint16),
+    ("eTypeFloat", np.float32),
+]
+
+
+class ConcurrencyDataSet(FakeDataSet):
+    """Fake IDataSet that records the largest number of concurrent subvolume transfers."""
+
+    def __init__(self, *args, **kwargs):
+        super(ConcurrencyDataSet, self).__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.maxActive = 0
+
+    def GetDataSubVolumeAs1DArrayBytes(self, *args):
+        with self._lock:
+            self.active += 1
+            self.maxActive = max(self.maxActive, self.active)
+        try:
+            return super(ConcurrencyDataSet, self).GetDataSubVolumeAs1DArrayBytes(*args)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class FailingDataSet(FakeDataSet):
+    """Fake IDataSet whose subvolume reads fail from the given timepoint on."""
+
+    def GetDataSubVolumeAs1DArrayBytes(self, x0, y0, z0, channel, timepoint, *args):
+        if timepoint >= 2:
+            raise RuntimeError("Connection lost")
+        return super(FailingDataSet, self).GetDataSubVolumeAs1DArrayBytes(
+            x0, y0, z0, channel, timepoint, *args
+        )
+
+
+# testCopyChannels
+def testCopyChannels(datatype, dtype, maxChunkBytes, workers):
+    data = randomData((5, 3, 4, 6, 7), dtype)
+    iDataSet = FakeDataSet(data, datatype)
+    iDataSet.SetChannelColorRGBA(2, 255)
+    conn = createConnector(IApplicationPrx(iDataSet))
+    conn.copyChannels([2, 0], maxChunkBytes=maxChunkBytes, workers=workers)
+    return (
+        iDataSet.calls["SetSizeC"] == 1
+        and conn.getSizes()[3] == 5
+        and conn.getChannelNames()[3:] == ["Copy of Channel 2", "Copy of Channel 0"]
+        and iDataSet.GetChannelColorRGBA(3) == 255
+        and np.array_equal(iDataSet.data[:, :3], data)
+        and np.array_equal(iDataSet.data[:, 3], data[:, 2])
+        and np.array_equal(iDataSet.data[:, 4], data[:, 0])
+    )
+
+
+# testNoMetadataCalls
+def testNoMetadataCalls():
+    iDataSet = FakeDataSet(randomData((20, 2, 2, 3, 4), np.uint8), "eTypeUInt8")
+    conn = createConnector(IApplicationPrx(iDataSet))
+    conn.copyChannels([0, 1], maxChunkBytes=12)
+    return (
+        iDataSet.calls["GetSizeX"] == 1
+        and iDataSet.calls["GetChannelName"] == 2
+        and iDataSet.calls["GetDataSubVolumeAs1DArrayBytes"] == 20 * 2 * 2
+    )
+
+
+# testInFlightBudget
+def testInFlightBudget(workers, maxInFlightBytes, expectedMaxActive):
+    data = randomData((8, 1, 4, 8, 8), np.uint8)
+    iDataSet = ConcurrencyDataSet(data, "eTypeUInt8", latency=0.005)
+    conn = createConnector(IApplicationPrx(iDataSet))
+    speed = conn.copyChannels(
+        0,
+        maxChunkBytes=64,
+        workers=workers,
+        maxInFlightBytes=maxInFlightBytes,
+        returnThroughput=True,
+    )
+    return (
+        speed > 0
+        and iDataSet.maxActive == expectedMaxActive
+        and np.array_equal(iDataSet.data[:, 1], data[:, 0])
+    )
+
+
+# testFailure
+def testFailure():
+    iDataSet = FailingDataSet(randomData((4, 1, 2, 3, 4), np.uint8), "eTypeUInt8")
+    conn = createConnector(IApplicationPrx(iDataSet))
+    try:
+        conn.copyChannels(0, workers=3)
+    except RuntimeError:
+        return conn.getSizes()[3] == 2
+    return False
+
+
+# testInvalidIndices
+def testInvalidIndices():
+    iDataSet = FakeDataSet(randomData((1, 2, 2, 3, 4), np.uint8), "eTypeUInt8")
+    conn = createConnector(IApplicationPrx(iDataSet))
+    try:
+        conn.copyChannels([0, 2])
+    except ValueError:
+        return iDataSet.GetSizeC() == 2
+    return False
+
+
+# ======================================================================================================================
+
+#
+# Copy
+#
+for datatype, dtype in DATATYPES:
+    for maxChunkBytes in [None, 100, 10]:
+        for workers in [1, 4]:
+            assert testCopyChannels(datatype, dtype, maxChunkBytes, workers)
+assert testNoMetadataCalls()
+
+#
+# Concurrency
+#
+assert testInFlightBudget(1, 2**20, 1)
+assert testInFlightBudget(4, 2**20, 4)
+assert testInFlightBudget(4, 128, 2)
+
+#
+# Errors
+#
+assert testFailure()
+assert testInvalidIndices()
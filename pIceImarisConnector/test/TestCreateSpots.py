@@ -0,0 +1,155 @@
+# createAndSetSpots() with Numpy arrays and plain lists, per-axis radii and track edges, spots
+# that do not fit into one ICE message, and the validation of its arguments.
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataContainer,
+    IApplicationPrx,
+    createConnector,
+    randomTracks,
+)
+
+
+# testCreateFromArrays
+def testCreateFromArrays():
+    app = IApplicationPrx()
+    conn = createConnector(app)
+    coords = np.random.RandomState(0).uniform(0, 100, (1000, 3))
+    timeIndices = np.arange(1000) % 10
+    radii = np.full(1000, 2.0)
+    spots = conn.createAndSetSpots(coords, timeIndices, radii, "Test", [1, 0, 0, 1])
+    return (
+        spots is app.GetSurpassScene().GetChild(0)
+        and spots.GetName() == "Test"
+        and spots.receivedLists == 0
+        and spots.largestMessage == 1000 * 3 * 4
+        and np.allclose(spots.GetPositionsXYZ(), coords)
+        and spots.GetIndicesT() == timeIndices.tolist()
+        and np.array_equal(spots.GetRadii(), radii)
+    )
+
+
+# testCreateFromLists
+def testCreateFromLists():
+    conn = createConnector(IApplicationPrx())
+    container = FakeDataContainer()
+    spots = conn.createAndSetSpots(
+        [[1, 2, 3], [4, 5, 6]], [0, 1], [0.5, 1.5], "Test", [1, 0, 0, 1], container
+    )
+    return (
+        container.GetChild(0) is spots
+        and spots.GetPositionsXYZ() == [[1, 2, 3], [4, 5, 6]]
+        and spots.GetIndicesT() == [0, 1]
+        and spots.GetRadii() == [0.5, 1.5]
+        and conn.createAndSetSpots([], [], [], "Empty", [1, 0, 0, 1]) is None
+    )
+
+
+# testAnisotropicRadii
+def testAnisotropicRadii():
+    conn = createConnector(IApplicationPrx())
+    radii = np.array([[1, 1, 3], [2, 2, 6]], dtype=np.float32)
+    spots = conn.createAndSetSpots(
+        np.zeros((2, 3)), [0, 0], radii, "Test", [1, 0, 0, 1]
+    )
+    return np.array_equal(spots.GetRadiiXYZ(), radii) and spots.GetRadii() == [1, 2]
+
+
+# testTrackEdges
+def testTrackEdges():
+    positions, timeIndices, ids, edges = randomTracks(50, 4)
+    conn = createConnector(IApplicationPrx())
+    spots = conn.createAndSetSpots(
+        positions, timeIndices, np.ones(200), "Test", [1, 0, 0, 1], trackEdges=edges
+    )
+    tracks, startTimes = conn.getTracks(spots)
+    return (
+        spots.receivedLists == 0
+        and len(set(spots.GetTrackIds())) == 50
+        and np.array_equal(spots.GetTrackEdges(), edges)
+        and len(tracks) == 50
+        and all(len(track) == 4 for track in tracks)
+    )
+
+
+# testMessageSize
+def testMessageSize():
+    app = IApplicationPrx()
+    app.GetFactory().messageSizeMax = 20 * 999
+    conn = createConnector(app)
+    coords = np.zeros((1000, 3))
+
+    # Checked before anything is created
+    try:
+        conn.createAndSetSpots(
+            coords,
+            np.zeros(1000),
+            np.ones(1000),
+            "Test",
+            [1, 0, 0, 1],
+            maxMessageBytes=20 * 999,
+        )
+    except ValueError:
+        pass
+    else:
+        return False
+    if app.GetSurpassScene().GetNumberOfChildren() != 0:
+        return False
+
+    # Rejected by Ice: a clear error, and no Spots object in the scene
+    try:
+        conn.createAndSetSpots(
+            coords, np.zeros(1000), np.ones(1000), "Test", [1, 0, 0, 1]
+        )
+    except Exception as e:
+        if "Ice.MessageSizeMax" not in str(e):
+            return False
+    else:
+        return False
+    if app.GetSurpassScene().GetNumberOfChildren() != 0:
+        return False
+
+    # Just fits
+    spots = conn.createAndSetSpots(
+        coords[:999],
+        np.zeros(999),
+        np.ones(999),
+        "Test",
+        [1, 0, 0, 1],
+        maxMessageBytes=20 * 999,
+    )
+    return spots.largestMessage == 999 * 3 * 4
+
+
+# testInvalidArguments
+def testInvalidArguments(coords, timeIndices, radii, trackEdges=None):
+    conn = createConnector(IApplicationPrx())
+    try:
+        conn.createAndSetSpots(
+            coords, timeIndices, radii, "Test", [1, 0, 0, 1], trackEdges=trackEdges
+        )
+    except ValueError:
+        return True
+    return False
+
+
+# ======================================================================================================================
+
+#
+# Creation
+#
+assert testCreateFromArrays()
+assert testCreateFromLists()
+assert testAnisotropicRadii()
+assert testTrackEdges()
+assert testMessageSize()
+
+#
+# Invalid arguments
+#
+assert testInvalidArguments(np.zeros((3, 2)), [0, 0, 0], [1, 1, 1])
+assert testInvalidArguments(np.zeros((3, 3)), [0, 0], [1, 1, 1])
+assert testInvalidArguments(np.zeros((3, 3)), [0, 0, 0], np.ones((3, 2)))
+assert testInvalidArguments(np.zeros((3, 3)), [0, 0, 0], [1, 1, 1], [[0, 3]])
+assert testInvalidArguments(np.zeros((3, 3)), [0, 0, 0], [1, 1, 1], [0, 1])
@@ -0,0 +1,84 @@
+# iterDataTiles(): tiles cover the volume exactly once (or with the requested overlap) and
+# invalid tile sizes are rejected.
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataSet,
+    IApplicationPrx,
+    createConnector,
+    randomData,
+)
+
+
+# testIterDataTiles
+def testIterDataTiles(datatype, dtype, tileShape, overlap=0):
+    data = randomData((2, 2, 7, 19, 23), dtype)
+    conn = createConnector(IApplicationPrx(FakeDataSet(data, datatype)))
+
+    for c in range(2):
+        for t in range(2):
+            expected = conn.getDataVolume(c, t)
+            stack = np.zeros(expected.shape, dtype=expected.dtype)
+            covered = np.zeros(expected.shape, dtype=np.int32)
+            for z0, y0, x0, tile in conn.iterDataTiles(c, t, tileShape, overlap):
+                dZ, dY, dX = tile.shape
+                if np.any(np.array(tile.shape) > np.array(tileShape)):
+                    return False
+                region = (slice(z0, z0 + dZ), slice(y0, y0 + dY), slice(x0, x0 + dX))
+                stack[region] = tile
+                covered[region] += 1
+            if not np.all(covered > 0):
+                return False
+            if stack.tobytes() != expected.tobytes():
+                return False
+    return True
+
+
+# testIterDataTilesOverlap
+def testIterDataTilesOverlap(tileShape, overlap, expectedOrigins):
+    data = randomData((1, 1, 10, 10, 10), np.uint8)
+    conn = createConnector(IApplicationPrx(FakeDataSet(data, "eTypeUInt8")))
+    origins = [
+        (z0, y0, x0) for z0, y0, x0, _ in conn.iterDataTiles(0, 0, tileShape, overlap)
+    ]
+    return origins == expectedOrigins
+
+
+# testIterDataTilesInvalid
+def testIterDataTilesInvalid(tileShape, overlap):
+    data = randomData((1, 1, 4, 4, 4), np.uint8)
+    conn = createConnector(IApplicationPrx(FakeDataSet(data, "eTypeUInt8")))
+    try:
+        conn.iterDataTiles(0, 0, tileShape, overlap)
+    except ValueError:
+        return True
+    return False
+
+
+# ======================================================================================================================
+
+#
+# iterDataTiles
+#
+assert testIterDataTiles("eTypeUInt8", np.uint8, (3, 8, 8))
+assert testIterDataTiles("eTypeUInt16", np.uint16, (7, 19, 23))
+assert testIterDataTiles("eTypeFloat", np.float32, (2, 5, 100))
+assert testIterDataTiles("eTypeUInt8", np.uint8, 4, overlap=1)
+assert testIterDataTiles("eTypeFloat", np.float32, (3, 6, 9), overlap=(1, 2, 3))
+
+#
+# Tile origins with overlap
+#
+assert testIterDataTilesOverlap(
+    (10, 10, 4), (0, 0, 2), [(0, 0, 0), (0, 0, 2), (0, 0, 4), (0, 0, 6)]
+)
+assert testIterDataTilesOverlap((10, 10, 6), 0, [(0, 0, 0), (0, 0, 6)])
+
+#
+# Invalid arguments
+#
+assert testIterDataTilesInvalid(0, 0)
+assert testIterDataTilesInvalid((2, 2), 0)
+assert testIterDataTilesInvalid(2, 2)
+assert testIterDataTilesInvalid(2, -1)
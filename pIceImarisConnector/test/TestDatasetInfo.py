@@ -0,0 +1,170 @@
+# The DatasetInfo snapshot: getters served without calls to IDataSet, data access without
+# metadata calls, and refreshes after changes made by the connector or directly on IDataSet
+# (at once for resizes, after the TTL otherwise).
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataSet,
+    IApplicationPrx,
+    createConnector,
+    randomData,
+)
+
+
+# testGetters
+def testGetters():
+    iDataSet = FakeDataSet(randomData((2, 3, 4, 5, 6), np.uint16), "eTypeUInt16")
+    iDataSet.SetExtendMaxX(12.0)
+    iDataSet.SetExtendMaxY(5.0)
+    iDataSet.SetExtendMaxZ(2.0)
+    conn = createConnector(IApplicationPrx(iDataSet))
+    for _ in range(3):
+        if conn.getSizes() != (6, 5, 4, 3, 2):
+            return False
+        if conn.getExtends() != (0.0, 12.0, 0.0, 5.0, 0.0, 2.0):
+            return False
+        if not np.allclose(conn.getVoxelSizes(), (2.0, 1.0, 0.5)):
+            return False
+        if conn.getNumpyDatatype() != np.uint16:
+            return False
+    info = conn.getDatasetInfo()
+    return (
+        info.channelNames == ("Channel 0", "Channel 1", "Channel 2")
+        and info.timePointsDelta == 1.0
+        and iDataSet.calls["GetSizeX"] == 1
+        and iDataSet.calls["GetExtendMaxX"] == 1
+        and iDataSet.calls["GetType"] == 1
+    )
+
+
+# testDataAccessWithoutMetadataCalls
+def testDataAccessWithoutMetadataCalls():
+    data = randomData((2, 1, 4, 5, 6), np.uint8)
+    iDataSet = FakeDataSet(data, "eTypeUInt8")
+    conn = createConnector(IApplicationPrx(iDataSet))
+    conn.getDataSlice(0, 0, 0)
+    nCalls = iDataSet.numberOfCalls("GetSize") + iDataSet.numberOfCalls("GetType")
+    for t in range(2):
+        for z in range(4):
+            if not np.array_equal(conn.getDataSlice(z, 0, t), data[t, 0, z]):
+                return False
+        if not np.array_equal(conn.getDataVolume(0, t), data[t, 0]):
+            return False
+    return (
+        iDataSet.numberOfCalls("GetSize") + iDataSet.numberOfCalls("GetType") == nCalls
+    )
+
+
+# testUpdates
+def testUpdates():
+    iDataSet = FakeDataSet(randomData((1, 1, 4, 5, 6), np.uint8), "eTypeUInt8")
+    conn = createConnector(IApplicationPrx(iDataSet))
+
+    # Changes made through the connector update the metadata
+    conn.setVoxelSizes([0.5, 0.5, 2.0])
+    if not np.allclose(conn.getVoxelSizes(), (0.5, 0.5, 2.0)):
+        return False
+    conn.copyChannels(0)
+    if conn.getSizes()[3] != 2 or conn.getChannelNames()[1] != "Copy of Channel 0":
+        return False
+
+    # External changes require a refresh
+    iDataSet.SetExtendMaxX(12.0)
+    if conn.getExtends()[1] == 12.0:
+        return False
+    if conn.refreshDatasetInfo().extends[1] != 12.0 or conn.getExtends()[1] != 12.0:
+        return False
+
+    # A new dataset comes with new metadata
+    conn.createDataSet("uint16", 10, 20, 30, 2, 3)
+    return (
+        conn.getSizes() == (10, 20, 30, 2, 3) and conn.getNumpyDatatype() == np.uint16
+    )
+
+
+# testExternalResize
+def testExternalResize():
+    data = randomData((1, 1, 4, 5, 6), np.uint8)
+    iDataSet = FakeDataSet(data, "eTypeUInt8")
+    conn = createConnector(IApplicationPrx(iDataSet))
+    conn.getSizes()
+
+    # A channel added through the IDataSet object can be written and read
+    iDataSet.SetSizeC(2)
+    conn.setDataVolume(data[0, 0], 1, 0)
+    if not np.array_equal(conn.getDataVolume(1, 0), data[0, 0]):
+        return False
+
+    # Indices out of the actual sizes still fail
+    try:
+        conn.setDataVolume(data[0, 0], 2, 0)
+        return False
+    except Exception:
+        pass
+
+    # copyChannels() copies the current channel names
+    iDataSet.SetChannelName(0, "One")
+    conn.copyChannels(0)
+    names = conn.getChannelNames()
+    return len(names) == 3 and names[0] == "One" and names[2] == "Copy of One"
+
+
+# testExternalChanges
+def testExternalChanges():
+    data = randomData((1, 1, 4, 5, 6), np.uint8)
+    iDataSet = FakeDataSet(data, "eTypeUInt8")
+    conn = createConnector(IApplicationPrx(iDataSet))
+    conn.getDataVolume(0, 0)
+
+    # Resized through the IDataSet object: the returned volumes and slices have the
+    # new sizes at once
+    iDataSet.Create("eTypeUInt8", 7, 3, 2, 1, 1)
+    iDataSet.data[...] = randomData((1, 1, 2, 3, 7), np.uint8)
+    if not np.array_equal(conn.getDataSlice(1, 0, 0), iDataSet.data[0, 0, 1]):
+        return False
+    if not np.array_equal(conn.getDataVolume(0, 0), iDataSet.data[0, 0]):
+        return False
+    if conn.getSizes() != (7, 3, 2, 1, 1):
+        return False
+
+    # Converted and recalibrated through the IDataSet object: picked up once the
+    # cached metadata expires, and the cached volume is dropped
+    conn.enableVolumeCache(10**6)
+    conn.getDataVolume(0, 0)
+    iDataSet.Create("eTypeUInt16", 7, 3, 2, 1, 1)
+    iDataSet.data[...] = randomData((1, 1, 2, 3, 7), np.uint16)
+    iDataSet.SetExtendMinX(-7.0)
+    conn.setDatasetInfoTTL(0)
+    volume = conn.getDataVolume(0, 0)
+    return (
+        volume.dtype == np.uint16
+        and np.array_equal(volume, iDataSet.data[0, 0])
+        and conn.getExtends()[0] == -7.0
+        and conn.getVolumeCacheStatistics()["entries"] == 1
+    )
+
+
+# testImmutable
+def testImmutable():
+    iDataSet = FakeDataSet(randomData((1, 1, 4, 5, 6), np.uint8), "eTypeUInt8")
+    conn = createConnector(IApplicationPrx(iDataSet))
+    info = conn.getDatasetInfo()
+    try:
+        info.sizes = (1, 1, 1, 1, 1)
+    except AttributeError:
+        return info.sizes == (6, 5, 4, 1, 1)
+    return False
+
+
+# ======================================================================================================================
+
+#
+# Cached metadata
+#
+assert testGetters()
+assert testDataAccessWithoutMetadataCalls()
+assert testUpdates()
+assert testExternalResize()
+assert testExternalChanges()
+assert testImmutable()
@@ -0,0 +1,152 @@
+# The on-disk cache of the Imaris discovery (hits, new installations, removed installations,
+# unreadable cache files) and connecting from an XT function. A fake installation tree replaces Imaris, so this runs on
+# any platform.
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+from unittest import mock
+
+from pIceImarisConnector import pIceImarisConnector
+from pIceImarisConnector.test.FakeImaris import (
+    IApplicationPrx,
+    createInstallTree,
+    fakeImarisLibModule,
+    fakeInstall,
+)
+
+
+def connectAndCountScans(root, cacheFile):
+    """Creates a connector and returns it with the number of scans of root."""
+    with fakeInstall(root, cacheFile), mock.patch.object(
+        pIceImarisConnector,
+        "_findNewestVersionDir",
+        autospec=True,
+        side_effect=pIceImarisConnector._findNewestVersionDir,
+    ) as scan:
+        conn = pIceImarisConnector()
+    return conn, scan.call_count
+
+
+def touch(directory):
+    """Moves the modification time of a folder forward (the resolution may be coarse)."""
+    stat = os.stat(directory)
+    os.utime(directory, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+
+
+# testCachedDiscovery
+def testCachedDiscovery(root, cacheFile):
+    others = ["Safari", "ImarisFileConverter 9.9.0"]
+    createInstallTree(root, ["9.3.1", "9.5.0"], others=others)
+    pIceImarisConnector._DISCOVERY_CACHE.clear()
+
+    # First connector: the folder is scanned
+    conn, scans = connectAndCountScans(root, cacheFile)
+    expected = os.path.join(root, "Imaris 9.5.0.app")
+    if scans != 1 or conn._mImarisPath != expected:
+        return False
+    if conn._mImarisIntegerVersion != 9050000:
+        return False
+
+    # Next connectors in this process and in a new process (simulated by clearing the
+    # cache of this process): served from the cache
+    for clear in [False, True]:
+        if clear:
+            pIceImarisConnector._DISCOVERY_CACHE.clear()
+        conn, scans = connectAndCountScans(root, cacheFile)
+        if scans != 0 or conn._mImarisPath != expected:
+            return False
+        if conn._mImarisServerIceExePath != os.path.join(
+            expected, "Contents", "MacOS", "ImarisServerIce"
+        ):
+            return False
+    return True
+
+
+# testNewInstallation
+def testNewInstallation(root, cacheFile):
+    createInstallTree(root, ["9.5.0"])
+    pIceImarisConnector._DISCOVERY_CACHE.clear()
+    connectAndCountScans(root, cacheFile)
+
+    # A new version of Imaris is installed
+    createInstallTree(root, ["9.7.2"])
+    touch(root)
+    conn, scans = connectAndCountScans(root, cacheFile)
+    return scans == 1 and conn._mImarisPath == os.path.join(root, "Imaris 9.7.2.app")
+
+
+# testRemovedInstallation
+def testRemovedInstallation(root, cacheFile):
+    createInstallTree(root, ["9.5.0"])
+    pIceImarisConnector._DISCOVERY_CACHE.clear()
+    connectAndCountScans(root, cacheFile)
+
+    # The library folder is removed without changing the modification time of root:
+    # the cached discovery is dropped (here, without storing the new one) and Imaris
+    # is searched again
+    lib = os.path.join(root, "Imaris 9.5.0.app", "Contents", "SharedSupport", "XT")
+    shutil.rmtree(lib)
+    with mock.patch.object(pIceImarisConnector, "_storeDiscovery"):
+        _, scans = connectAndCountScans(root, cacheFile)
+    with open(cacheFile) as f:
+        entries = json.load(f)
+    return scans == 1 and entries == {} and not pIceImarisConnector._DISCOVERY_CACHE
+
+
+# testUnreadableCache
+def testUnreadableCache(root, cacheFile):
+    createInstallTree(root, ["9.5.0"])
+    pIceImarisConnector._DISCOVERY_CACHE.clear()
+    os.makedirs(os.path.dirname(cacheFile))
+    with open(cacheFile, "w") as f:
+        f.write("not json")
+    _, scans = connectAndCountScans(root, cacheFile)
+    if scans != 1:
+        return False
+
+    # The cache file was rewritten
+    pIceImarisConnector._DISCOVERY_CACHE.clear()
+    _, scans = connectAndCountScans(root, cacheFile)
+    return scans == 0
+
+
+# testConnectFromXT
+def testConnectFromXT():
+    application = IApplicationPrx()
+    sys.modules["ImarisLib"] = fakeImarisLibModule(application, 17)
+    try:
+        with mock.patch.object(
+            pIceImarisConnector, "_findImaris", side_effect=AssertionError
+        ), mock.patch("os.chdir", side_effect=AssertionError):
+            conn = pIceImarisConnector(17)
+    finally:
+        del sys.modules["ImarisLib"]
+    return conn.mImarisApplication is application and conn._mImarisPath == ""
+
+
+# ======================================================================================================================
+
+#
+# Discovery
+#
+for test in [
+    testCachedDiscovery,
+    testNewInstallation,
+    testRemovedInstallation,
+    testUnreadableCache,
+]:
+    folder = tempfile.mkdtemp()
+    try:
+        root = os.path.join(folder, "Applications")
+        os.makedirs(root)
+        assert test(root, os.path.join(folder, "cache", "discovery.json"))
+    finally:
+        shutil.rmtree(folder)
+
+#
+# Connection
+#
+assert testConnectFromXT()
@@ -0,0 +1,119 @@
+# getFilamentGraphs(): packed vertices and edges per filament, connected components, the
+# current Surpass selection as default object, and objects without filaments.
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeFilaments,
+    FakeSpots,
+    IApplicationPrx,
+    createConnector,
+    randomTree,
+)
+
+
+def checkGraphs(graphs, n):
+    """Compares the packed graphs with the graphs of the single filaments."""
+    vertexOffsets = graphs["vertexOffsets"]
+    edgeOffsets = graphs["edgeOffsets"]
+    if vertexOffsets.size != n + 1 or edgeOffsets.size != n + 1:
+        return False
+    if graphs["edges"].dtype != np.int32 or graphs["positions"].dtype != np.float32:
+        return False
+    if not np.array_equal(graphs["ids"], 5000 + 2 * np.arange(n)):
+        return False
+    if not np.array_equal(graphs["timeIndices"], np.arange(n) % 3):
+        return False
+    for i in range(n):
+        tree = randomTree(i)
+        v = slice(vertexOffsets[i], vertexOffsets[i + 1])
+        e = slice(edgeOffsets[i], edgeOffsets[i + 1])
+        if not (
+            np.array_equal(graphs["positions"][v], tree["positions"].astype(np.float32))
+            and np.array_equal(graphs["radii"][v], tree["radii"].astype(np.float32))
+            and np.array_equal(graphs["types"][v], tree["types"])
+            and np.array_equal(graphs["edges"][e], tree["edges"] + vertexOffsets[i])
+            and graphs["roots"][i] == vertexOffsets[i] + tree["root"]
+        ):
+            return False
+    return True
+
+
+# testGraphs
+def testGraphs(workers):
+    conn = createConnector(IApplicationPrx())
+    return checkGraphs(conn.getFilamentGraphs(FakeFilaments(60), workers=workers), 60)
+
+
+# testConnectedComponents
+def testConnectedComponents():
+    conn = createConnector(IApplicationPrx())
+    graphs = conn.getFilamentGraphs(FakeFilaments(20))
+
+    # Each filament is a tree: label the vertices by union-find over the packed edges
+    n = graphs["positions"].shape[0]
+    labels = np.arange(n)
+    for a, b in graphs["edges"]:
+        while labels[a] != a:
+            a = labels[a]
+        while labels[b] != b:
+            b = labels[b]
+        labels[max(a, b)] = min(a, b)
+    for v in range(n):
+        labels[v] = labels[labels[v]]
+    filamentOfVertex = np.repeat(np.arange(20), np.diff(graphs["vertexOffsets"]))
+    return graphs["edges"].shape[0] == n - 20 and np.array_equal(
+        labels, graphs["vertexOffsets"][filamentOfVertex]
+    )
+
+
+# testSelection
+def testSelection():
+    app = IApplicationPrx()
+    app.SetSurpassSelection(FakeFilaments(5))
+    conn = createConnector(app)
+    if not checkGraphs(conn.getFilamentGraphs(), 5):
+        return False
+
+    # Nothing (or not a Filaments object) selected
+    app.SetSurpassSelection(FakeSpots())
+    try:
+        conn.getFilamentGraphs()
+    except Exception:
+        pass
+    else:
+        return False
+
+    # Not an IFilaments object
+    try:
+        conn.getFilamentGraphs(FakeSpots())
+    except Exception:
+        return True
+    return False
+
+
+# testNoFilaments
+def testNoFilaments():
+    conn = createConnector(IApplicationPrx())
+    graphs = conn.getFilamentGraphs(FakeFilaments(0))
+    return (
+        graphs["positions"].shape == (0, 3)
+        and graphs["edges"].shape == (0, 2)
+        and np.array_equal(graphs["vertexOffsets"], [0])
+    )
+
+
+# ======================================================================================================================
+
+#
+# Graphs
+#
+for workers in [1, 4]:
+    assert testGraphs(workers)
+assert testConnectedComponents()
+assert testNoFilaments()
+
+#
+# Input
+#
+assert testSelection()
@@ -0,0 +1,60 @@
+# getDataHyperstack(): channels and timepoints are fetched concurrently into one 5D array,
+# and requests outside the dataset fail.
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataSet,
+    IApplicationPrx,
+    createConnector,
+    randomData,
+)
+
+
+# testGetDataHyperstack
+def testGetDataHyperstack(datatype, dtype, channels, timepoints, workers):
+    data = randomData((5, 3, 4, 6, 7), dtype)
+    conn = createConnector(IApplicationPrx(FakeDataSet(data, datatype)))
+    hyperstack, timings = conn.getDataHyperstack(
+        channels, timepoints, workers=workers, returnTimings=True
+    )
+    if channels is None:
+        channels = range(3)
+    if timepoints is None:
+        timepoints = range(5)
+    expected = data[np.ix_(np.atleast_1d(timepoints), np.atleast_1d(channels))]
+    return (
+        hyperstack.dtype == dtype
+        and hyperstack.flags.c_contiguous
+        and np.array_equal(hyperstack, expected)
+        and timings.shape == hyperstack.shape[:2]
+        and np.all(timings > 0)
+    )
+
+
+# testGetDataHyperstackOutOfBounds
+def testGetDataHyperstackOutOfBounds(channels, timepoints):
+    data = randomData((2, 2, 2, 2, 2), np.uint8)
+    conn = createConnector(IApplicationPrx(FakeDataSet(data, "eTypeUInt8")))
+    try:
+        conn.getDataHyperstack(channels, timepoints)
+    except Exception:
+        return True
+    return False
+
+
+# ======================================================================================================================
+
+#
+# getDataHyperstack
+#
+assert testGetDataHyperstack("eTypeUInt8", np.uint8, None, None, 1)
+assert testGetDataHyperstack("eTypeUInt16", np.uint16, None, None, 4)
+assert testGetDataHyperstack("eTypeFloat", np.float32, [2, 0], [4, 1, 3], 3)
+assert testGetDataHyperstack("eTypeUInt8", np.uint8, 1, [0], 8)
+
+#
+# Out of bounds indices
+#
+assert testGetDataHyperstackOutOfBounds([0, 2], None)
+assert testGetDataHyperstackOutOfBounds(None, [-1])
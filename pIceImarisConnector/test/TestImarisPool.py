@@ -0,0 +1,308 @@
+# ImarisPool: leasing, unique object IDs, waiting for an idle instance, recycling of dead or
+# worn-out instances, errors while starting instances, and closing. The instances are connectors to stand-in applications.
+
+import itertools
+import threading
+import time
+from unittest import mock
+
+from pIceImarisConnector import ImarisPool, pIceImarisConnector
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataSet,
+    FakeSpots,
+    IApplicationPrx,
+    createConnector,
+)
+
+
+def createFactory(connectors, objectIDs=None):
+    """Returns a connector factory for the pool: every connector is connected to a new fake
+    application and always queries it in isAlive()."""
+
+    def factory():
+        conn = createConnector(IApplicationPrx(FakeDataSet()))
+        conn.setLivenessTTL(0)
+        if objectIDs is not None:
+            conn._mImarisObjectID = next(objectIDs)
+        connectors.append(conn)
+        return conn
+
+    return factory
+
+
+def waitFor(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+# testLease
+def testLease():
+    connectors = []
+    with ImarisPool(2, connectorFactory=createFactory(connectors)) as pool:
+        if len(pool) != 2 or len(connectors) != 2:
+            return False
+
+        with pool.lease() as conn:
+            app = conn.mImarisApplication
+            iDataSet = app.GetDataSet()
+            iDataSet.SetModified(True)
+            app.GetSurpassScene().AddChild(FakeSpots(), -1)
+            conn.getSceneIndex()
+            if pool.getStatistics()["leased"] != 1:
+                return False
+
+        # The dataset is closed quietly, the scene is emptied and the cached state
+        # is cleared
+        if iDataSet._modified or conn._mSceneIndex is not None:
+            return False
+        if app.GetSurpassScene().GetNumberOfChildren() != 0:
+            return False
+        if app.GetDataSet() is iDataSet or app.GetDataSet().GetSizeX() != 1:
+            return False
+
+        statistics = pool.getStatistics()
+        if statistics["idle"] != 2 or statistics["leases"] != 1:
+            return False
+
+    # Closing the pool closes the instances
+    return all(c.mImarisApplication is None for c in connectors)
+
+
+# testObjectIDs
+def testObjectIDs():
+    connectors = []
+    factory = createFactory(connectors, iter([7, 7, 8, 7, 8, 9]))
+    with ImarisPool(3, connectorFactory=factory) as pool:
+        # Connectors with an object ID in use are dropped
+        return len(connectors) == 6 and pool._mObjectIDs == {7, 8, 9}
+
+
+# testWait
+def testWait():
+    with ImarisPool(1, connectorFactory=createFactory([])) as pool:
+        leased = threading.Event()
+
+        def hold():
+            with pool.lease():
+                leased.set()
+                time.sleep(0.2)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        leased.wait()
+
+        # The only instance is leased
+        try:
+            with pool.lease(timeout=0.05):
+                return False
+        except Exception:
+            pass
+
+        # ... until it is returned
+        with pool.lease(timeout=2):
+            pass
+        thread.join()
+        return pool.getStatistics()["leases"] == 2
+
+
+# testRecycle
+def testRecycle():
+    connectors = []
+    with ImarisPool(1, connectorFactory=createFactory(connectors)) as pool:
+        with pool.lease() as conn:
+            conn.mImarisApplication.disconnect()
+
+        # The dead instance is replaced in the background
+        if not waitFor(lambda: pool.getStatistics()["idle"] == 1):
+            return False
+        with pool.lease() as replacement:
+            if replacement is conn or not replacement.isAlive():
+                return False
+
+        # An instance that died while idle is replaced when it is leased
+        replacement.mImarisApplication.disconnect()
+        with pool.lease(timeout=2) as other:
+            if other is replacement or not other.isAlive():
+                return False
+
+        statistics = pool.getStatistics()
+        return (
+            len(pool) == 1
+            and len(connectors) == 3
+            and statistics["recycled"] == 2
+            and statistics["leases"] == 3
+            and statistics["started"] == 3
+        )
+
+
+# testMaxLeases
+def testMaxLeases():
+    connectors = []
+    factory = createFactory(connectors)
+    with ImarisPool(1, maxLeases=2, connectorFactory=factory) as pool:
+        for _ in range(6):
+            with pool.lease(timeout=2):
+                pass
+        waitFor(lambda: pool.getStatistics()["idle"] == 1)
+        closed = [c.mImarisApplication is None for c in connectors]
+        return closed == [True, True, True, False] and len(pool) == 1
+
+
+# testStartImaris
+def testStartImaris():
+    connectors = []
+    calls = itertools.count()
+    failing = set()
+
+    def startImaris(self, userControl=False, timeout=60.0):
+        if next(calls) in failing:
+            return False
+        self._mImarisApplication = IApplicationPrx()
+        connectors.append(self)
+        return True
+
+    with mock.patch.object(
+        pIceImarisConnector, "startImaris", autospec=True, side_effect=startImaris
+    ):
+
+        def factory():
+            return createConnector(None)
+
+        with ImarisPool(3, connectorFactory=factory) as pool:
+            if len(pool) != 3 or len(connectors) != 3:
+                return False
+
+        # If an instance cannot be started, the others are closed
+        connectors = []
+        calls = itertools.count()
+        failing.add(1)
+        try:
+            ImarisPool(3, connectorFactory=factory)
+            return False
+        except Exception:
+            pass
+        return len(connectors) == 2 and all(
+            c.mImarisApplication is None for c in connectors
+        )
+
+
+# testLaunchErrors
+def testLaunchErrors():
+    connectors = []
+    createOne = createFactory(connectors)
+    barrier = threading.Barrier(2, timeout=2.0)
+
+    # The connectors after the first one are created in parallel
+    def factory():
+        if connectors:
+            barrier.wait()
+        return createOne()
+
+    with ImarisPool(3, connectorFactory=factory) as pool:
+        if len(pool) != 3 or pool.getStatistics()["lastError"] is not None:
+            return False
+
+    # The error of a connector that cannot be created is kept
+    failAt = []
+
+    def failingFactory():
+        if len(connectors) in failAt:
+            raise RuntimeError("No license")
+        return createOne()
+
+    del connectors[:]
+    failAt.append(1)
+    try:
+        ImarisPool(2, connectorFactory=failingFactory)
+        return False
+    except Exception as e:
+        if "No license" not in str(e):
+            return False
+
+    # Here, the third replacement fails
+    del connectors[:]
+    failAt[:] = [3]
+    with ImarisPool(1, connectorFactory=failingFactory, maxLeases=1) as pool:
+        for _ in range(3):
+            with pool.lease():
+                pass
+            waitFor(lambda: pool.getStatistics()["starting"] == 0)
+        statistics = pool.getStatistics()
+    return (
+        statistics["failed"] == 1
+        and statistics["lastError"] == "No license"
+        and len(connectors) == 3
+    )
+
+
+# testClose
+def testClose():
+    connectors = []
+    pool = ImarisPool(2, connectorFactory=createFactory(connectors))
+    with pool.lease() as conn:
+        pool.close()
+        if conn.mImarisApplication is None:
+            return False
+
+    # The leased instance is closed when its lease ends
+    if conn.mImarisApplication is not None or len(pool) != 0:
+        return False
+
+    try:
+        with pool.lease():
+            return False
+    except Exception:
+        return all(c.mImarisApplication is None for c in connectors)
+
+
+# testConcurrentLeases
+def testConcurrentLeases():
+    inUse = set()
+    errors = []
+    lock = threading.Lock()
+
+    with ImarisPool(4, connectorFactory=createFactory([])) as pool:
+
+        def work():
+            for _ in range(20):
+                with pool.lease() as conn:
+                    with lock:
+                        if id(conn) in inUse:
+                            errors.append(conn)
+                        inUse.add(id(conn))
+                    time.sleep(0.001)
+                    with lock:
+                        inUse.discard(id(conn))
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        statistics = pool.getStatistics()
+        return not errors and statistics["leases"] == 160 and statistics["idle"] == 4
+
+
+# ======================================================================================================================
+
+#
+# Leases
+#
+assert testLease()
+assert testObjectIDs()
+assert testWait()
+assert testConcurrentLeases()
+
+#
+# Instances
+#
+assert testRecycle()
+assert testMaxLeases()
+assert testStartImaris()
+assert testLaunchErrors()
+assert testClose()
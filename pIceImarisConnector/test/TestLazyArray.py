@@ -0,0 +1,166 @@
+# LazyDataArray: shape, slicing translated into subvolume requests (and the number of voxels
+# actually transferred), chunked assignment and the refresh of the volume cache.
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataSet,
+    IApplicationPrx,
+    createConnector,
+    randomData,
+)
+
+DATATYPES = [
+    ("eTypeUInt8", np.uint8),
+    ("eTypeUInt16", np.uint16),
+    ("eTypeFloat", np.float32),
+]
+
+KEYS = [
+    (Ellipsis,),
+    (1,),
+    (-1, 0),
+    (0, 1, 2),
+    (1, 0, slice(1, 3), slice(None), slice(2, 6)),
+    (slice(None), slice(None), slice(None, None, 2), 3, slice(1, None, 3)),
+    (Ellipsis, slice(None, None, -2)),
+    (0, slice(None), slice(3, 0, -1), slice(1, 4), -2),
+    (1, 1, 2, 3, 4),
+    (Ellipsis, slice(5, 2)),
+]
+
+
+# testShape
+def testShape(datatype, dtype):
+    data = randomData((2, 3, 4, 5, 6), dtype)
+    conn = createConnector(IApplicationPrx(FakeDataSet(data, datatype)))
+    arr = conn.asLazyArray()
+    return (
+        arr.shape == data.shape
+        and arr.dtype == dtype
+        and arr.ndim == 5
+        and len(arr) == 2
+        and arr.nbytes == data.nbytes
+    )
+
+
+# testGetItem
+def testGetItem(datatype, dtype):
+    data = randomData((2, 2, 4, 5, 7), dtype)
+    conn = createConnector(IApplicationPrx(FakeDataSet(data, datatype)))
+    arr = conn.asLazyArray()
+    for key in KEYS:
+        expected = data[key]
+        result = arr[key]
+        if np.shape(result) != expected.shape or not np.array_equal(result, expected):
+            return False
+    return np.array_equal(np.asarray(arr), data)
+
+
+# testTransferredVoxels
+def testTransferredVoxels():
+    data = randomData((2, 1, 8, 10, 12), np.uint8)
+    iDataSet = FakeDataSet(data, "eTypeUInt8")
+    conn = createConnector(IApplicationPrx(iDataSet))
+    arr = conn.asLazyArray()
+
+    # A box is a single subvolume call
+    arr[1, 0, 2:5, :, 3:9]
+    if iDataSet.calls.get("GetDataSubVolumeAs1DArrayBytes") != 1:
+        return False
+
+    # Full planes are slices
+    arr[0, 0, 3]
+    arr[0, 0, ::4]
+    if iDataSet.calls.get("GetDataSliceBytes") != 3:
+        return False
+
+    # Full volumes are volumes
+    arr[:, 0]
+    return (
+        iDataSet.calls.get("GetDataVolumeAs1DArrayBytes") == 2
+        and iDataSet.calls.get("GetDataSubVolumeAs1DArrayBytes") == 1
+    )
+
+
+# testSetItem
+def testSetItem(datatype, dtype):
+    data = randomData((2, 2, 4, 5, 7), dtype)
+    iDataSet = FakeDataSet(data.copy(), datatype)
+    conn = createConnector(IApplicationPrx(iDataSet))
+    arr = conn.asLazyArray()
+    for n, key in enumerate(KEYS):
+        values = randomData(data[key].shape, dtype, seed=n + 1)
+        data[key] = values
+        arr[key] = values
+        if not np.array_equal(iDataSet.data, data):
+            return False
+
+    # Broadcasting
+    arr[0, :, 1] = 7
+    data[0, :, 1] = 7
+    return np.array_equal(iDataSet.data, data)
+
+
+# testChunkedSetItem
+def testChunkedSetItem():
+    data = np.zeros((1, 1, 10, 4, 4), dtype=np.uint16)
+    iDataSet = FakeDataSet(data, "eTypeUInt16")
+    conn = createConnector(IApplicationPrx(iDataSet))
+
+    # Three planes (3 * 4 * 4 * 2 bytes) per chunk
+    arr = conn.asLazyArray(maxChunkBytes=100)
+    values = randomData((10, 4, 4), np.uint16)
+    arr[0, 0] = values
+    return iDataSet.calls.get(
+        "SetDataSubVolumeAs1DArrayShorts"
+    ) == 4 and np.array_equal(iDataSet.data[0, 0], values)
+
+
+# testVolumeCacheIsUpdated
+def testVolumeCacheIsUpdated():
+    data = randomData((1, 1, 3, 4, 5), np.uint8)
+    conn = createConnector(IApplicationPrx(FakeDataSet(data, "eTypeUInt8")))
+    conn.enableVolumeCache(2**20)
+    arr = conn.asLazyArray()
+    arr[0, 0]
+    arr[0, 0, 1, 2] = 0
+    return np.all(conn.getDataVolume(0, 0)[1, 2] == 0)
+
+
+# testInvalidIndices
+def testInvalidIndices(key):
+    data = randomData((1, 1, 3, 4, 5), np.uint8)
+    conn = createConnector(IApplicationPrx(FakeDataSet(data, "eTypeUInt8")))
+    try:
+        conn.asLazyArray()[key]
+    except IndexError:
+        return True
+    return False
+
+
+# ======================================================================================================================
+
+#
+# Reading
+#
+for datatype, dtype in DATATYPES:
+    assert testShape(datatype, dtype)
+    assert testGetItem(datatype, dtype)
+assert testTransferredVoxels()
+
+#
+# Writing
+#
+for datatype, dtype in DATATYPES:
+    assert testSetItem(datatype, dtype)
+assert testChunkedSetItem()
+assert testVolumeCacheIsUpdated()
+
+#
+# Invalid indices
+#
+assert testInvalidIndices(1)
+assert testInvalidIndices((0, 0, 0, 0, 0, 0))
+assert testInvalidIndices((0, [0, 1]))
+assert testInvalidIndices((Ellipsis, 0, Ellipsis))
@@ -0,0 +1,180 @@
+# isAlive() with and without a TTL, a lost connection detected from the exceptions raised by
+# the proxies (other exceptions leave it alone), and the background heartbeat (which also
+# survives errors other than a lost connection).
+
+import time
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    ConnectionLostException,
+    FakeDataSet,
+    IApplicationPrx,
+    createConnector,
+    randomData,
+)
+
+
+def createApplication():
+    return IApplicationPrx(FakeDataSet(randomData((2, 1, 4, 8, 8), np.uint8)))
+
+
+def readTiles(conn, n):
+    for i in range(n):
+        conn.getDataSubVolume(i % 4, 0, 0, 0, i % 2, 4, 4, 2)
+
+
+# testTTL
+def testTTL():
+    app = createApplication()
+    conn = createConnector(app)
+
+    # The successful calls renew the liveness: Imaris is queried only once
+    readTiles(conn, 100)
+    if app.versionCalls != 1:
+        return False
+
+    # Once the TTL has expired, Imaris is queried again
+    conn.setLivenessTTL(0.05)
+    time.sleep(0.1)
+    readTiles(conn, 10)
+    return app.versionCalls == 2
+
+
+# testNoTTL
+def testNoTTL():
+    app = createApplication()
+    conn = createConnector(app)
+    conn.setLivenessTTL(0)
+    readTiles(conn, 10)
+    return app.versionCalls == 10
+
+
+# testLostConnection
+def testLostConnection():
+    app = createApplication()
+    conn = createConnector(app)
+    readTiles(conn, 1)
+
+    # The exception raised by the actual call is passed on...
+    def lost(*args):
+        raise ConnectionLostException("Connection lost")
+
+    app.GetDataSet().GetDataSubVolumeAs1DArrayBytes = lost
+    try:
+        readTiles(conn, 1)
+    except ConnectionLostException:
+        pass
+    else:
+        return False
+
+    # ...and the connection is dead
+    return (
+        conn.mImarisApplication is None
+        and not conn.isAlive()
+        and conn.getDataSubVolume(0, 0, 0, 0, 0, 4, 4, 2) is None
+    )
+
+
+# testOtherExceptions
+def testOtherExceptions():
+    app = createApplication()
+    conn = createConnector(app)
+    try:
+        conn.getDataSubVolume(0, 0, 0, 0, 0, 4, 4, 2, iDataSet=app.GetSurpassScene())
+    except Exception:
+        pass
+    else:
+        return False
+    return conn.mImarisApplication is app and conn.isAlive()
+
+
+# testHeartbeat
+def testHeartbeat():
+    app = createApplication()
+    conn = createConnector(app)
+    conn.startHeartbeat(0.01)
+    time.sleep(0.1)
+    if app.versionCalls < 2:
+        return False
+
+    # Imaris is closed: the heartbeat finds out and stops
+    app.disconnect()
+    for _ in range(100):
+        if conn.mImarisApplication is None:
+            break
+        time.sleep(0.01)
+    else:
+        return False
+    thread, _ = conn._mHeartbeat
+    thread.join(1.0)
+    conn.stopHeartbeat()
+    return not thread.is_alive() and not conn.isAlive()
+
+
+# testHeartbeatOtherExceptions
+def testHeartbeatOtherExceptions():
+    app = createApplication()
+    conn = createConnector(app)
+
+    # Imaris times out twice: the heartbeat keeps the connection and goes on
+    getVersion = app.GetVersion
+    failures = [2]
+
+    def busy():
+        if failures[0] > 0:
+            failures[0] -= 1
+            raise TimeoutError("Imaris is busy")
+        return getVersion()
+
+    app.GetVersion = busy
+    conn.startHeartbeat(0.01)
+    for _ in range(100):
+        if failures[0] == 0 and app.versionCalls >= 2:
+            break
+        time.sleep(0.01)
+    else:
+        return False
+    thread, _ = conn._mHeartbeat
+    alive = thread.is_alive()
+    conn.stopHeartbeat()
+    return alive and conn.mImarisApplication is app and conn.isAlive()
+
+
+# testStopHeartbeat
+def testStopHeartbeat():
+    app = createApplication()
+    conn = createConnector(app)
+    conn.startHeartbeat(0.01)
+    thread, _ = conn._mHeartbeat
+    conn.stopHeartbeat()
+    versionCalls = app.versionCalls
+    time.sleep(0.05)
+    return (
+        not thread.is_alive()
+        and conn._mHeartbeat is None
+        and app.versionCalls == versionCalls
+        and conn.isAlive()
+    )
+
+
+# ======================================================================================================================
+
+#
+# TTL
+#
+assert testTTL()
+assert testNoTTL()
+
+#
+# Lost connection
+#
+assert testLostConnection()
+assert testOtherExceptions()
+
+#
+# Heartbeat
+#
+assert testHeartbeat()
+assert testHeartbeatOtherExceptions()
+assert testStopHeartbeat()
@@ -0,0 +1,89 @@
+# The "out" argument of getDataVolume(), getDataSubVolume() and getDataSlice(): results are
+# decoded in place, and buffers of the wrong shape, type or layout are rejected.
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataSet,
+    IApplicationPrx,
+    createConnector,
+    randomData,
+)
+
+DATATYPES = [
+    ("eTypeUInt8", np.uint8),
+    ("eTypeUInt16", np.uint16),
+    ("eTypeFloat", np.float32),
+]
+
+
+# testGetDataVolumeOut
+def testGetDataVolumeOut(datatype, dtype):
+    data = randomData((3, 2, 4, 5, 6), dtype)
+    conn = createConnector(IApplicationPrx(FakeDataSet(data, datatype)))
+    out = np.empty((4, 5, 6), dtype=dtype)
+    for t in range(3):
+        arr = conn.getDataVolume(1, t, out=out)
+        if arr is not out or not np.array_equal(out, data[t, 1]):
+            return False
+    arr = conn.getDataVolume(0, 2)
+    return (
+        arr.flags.c_contiguous
+        and arr.flags.writeable
+        and arr.dtype == dtype
+        and np.array_equal(arr, data[2, 0])
+    )
+
+
+# testGetDataSubVolumeOut
+def testGetDataSubVolumeOut(datatype, dtype):
+    data = randomData((1, 1, 4, 5, 6), dtype)
+    conn = createConnector(IApplicationPrx(FakeDataSet(data, datatype)))
+    out = np.empty((2, 3, 4), dtype=dtype)
+    arr = conn.getDataSubVolume(1, 2, 1, 0, 0, 4, 3, 2, out=out)
+    if arr is not out or not np.array_equal(out, data[0, 0, 1:3, 2:5, 1:5]):
+        return False
+    arr = conn.getDataSubVolume(1, 2, 1, 0, 0, 4, 3, 2)
+    return arr.flags.c_contiguous and np.array_equal(arr, out)
+
+
+# testGetDataSliceOut
+def testGetDataSliceOut(datatype, dtype):
+    data = randomData((1, 1, 4, 5, 6), dtype)
+    conn = createConnector(IApplicationPrx(FakeDataSet(data, datatype)))
+    out = np.empty((5, 6), dtype=dtype)
+    arr = conn.getDataSlice(3, 0, 0, out=out)
+    if arr is not out or not np.array_equal(out, data[0, 0, 3]):
+        return False
+    arr = conn.getDataSlice(2, 0, 0)
+    return arr.flags.c_contiguous and np.array_equal(arr, data[0, 0, 2])
+
+
+# testInvalidOut
+def testInvalidOut(out):
+    data = randomData((1, 1, 4, 5, 6), np.uint16)
+    conn = createConnector(IApplicationPrx(FakeDataSet(data, "eTypeUInt16")))
+    try:
+        conn.getDataVolume(0, 0, out=out)
+    except (TypeError, ValueError):
+        return True
+    return False
+
+
+# ======================================================================================================================
+
+#
+# out parameter
+#
+for datatype, dtype in DATATYPES:
+    assert testGetDataVolumeOut(datatype, dtype)
+    assert testGetDataSubVolumeOut(datatype, dtype)
+    assert testGetDataSliceOut(datatype, dtype)
+
+#
+# Invalid output buffers
+#
+assert testInvalidOut([0] * 120)
+assert testInvalidOut(np.empty((4, 5, 6), dtype=np.uint8))
+assert testInvalidOut(np.empty((4, 6, 5), dtype=np.uint16))
+assert testInvalidOut(np.empty((6, 5, 4), dtype=np.uint16).T)
@@ -0,0 +1,137 @@
+# iterTimepoints() (order, memory bound, early exit, errors raised by the prefetch thread)
+# and the write-behind uploads of DataVolumeWriter.
+
+import threading
+import time
+import weakref
+
+import numpy as np
+
+from pIceImarisConnector import DataVolumeWriter
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataSet,
+    IApplicationPrx,
+    createConnector,
+    randomData,
+)
+
+
+# testIterTimepoints
+def testIterTimepoints(prefetch, timepoints=None):
+    data = randomData((6, 2, 3, 4, 5), np.uint16)
+    conn = createConnector(
+        IApplicationPrx(FakeDataSet(data, "eTypeUInt16", latency=0.001))
+    )
+    result = list(conn.iterTimepoints(1, prefetch, timepoints))
+    if timepoints is None:
+        timepoints = range(6)
+    return [t for t, _ in result] == list(timepoints) and all(
+        np.array_equal(stack, data[t, 1]) for t, stack in result
+    )
+
+
+# testIterTimepointsMemory
+def testIterTimepointsMemory(prefetch):
+    data = randomData((8, 1, 3, 4, 5), np.uint8)
+    conn = createConnector(IApplicationPrx(FakeDataSet(data, "eTypeUInt8")))
+
+    # Count the fetched volumes that are still alive
+    lock = threading.Lock()
+    alive = [0]
+    peak = [0]
+    getDataVolume = conn.getDataVolume
+
+    def released():
+        with lock:
+            alive[0] -= 1
+
+    def trackedGetDataVolume(*args):
+        stack = getDataVolume(*args)
+        with lock:
+            alive[0] += 1
+            peak[0] = max(peak[0], alive[0])
+        weakref.finalize(stack, released)
+        return stack
+
+    conn.getDataVolume = trackedGetDataVolume
+    for t, stack in conn.iterTimepoints(0, prefetch):
+        # Give the background thread time to fetch ahead
+        time.sleep(0.01)
+    del stack
+    return 1 < peak[0] <= prefetch + 2
+
+
+# testIterTimepointsEarlyExit
+def testIterTimepointsEarlyExit():
+    data = randomData((6, 1, 3, 4, 5), np.uint8)
+    conn = createConnector(IApplicationPrx(FakeDataSet(data, "eTypeUInt8")))
+    iterator = conn.iterTimepoints(0, prefetch=3)
+    t, _ = next(iterator)
+    iterator.close()
+    return t == 0
+
+
+# testIterTimepointsError
+def testIterTimepointsError():
+    data = randomData((3, 1, 3, 4, 5), np.uint8)
+    conn = createConnector(IApplicationPrx(FakeDataSet(data, "eTypeUInt8")))
+    received = []
+    try:
+        for t, _ in conn.iterTimepoints(0, prefetch=2, timepoints=[0, 1, 7]):
+            received.append(t)
+    except Exception:
+        return received == [0, 1]
+    return False
+
+
+# testDataVolumeWriter
+def testDataVolumeWriter(maxPending):
+    data = randomData((5, 2, 3, 4, 5), np.float32)
+    iDataSet = FakeDataSet(data, "eTypeFloat", latency=0.001)
+    conn = createConnector(IApplicationPrx(iDataSet))
+    with DataVolumeWriter(conn, maxPending) as writer:
+        for t, stack in conn.iterTimepoints(0):
+            writer.setDataVolume(2 * stack, 1, t)
+            if writer.pending > maxPending:
+                return False
+    return np.array_equal(iDataSet.data[:, 1], 2 * data[:, 0])
+
+
+# testDataVolumeWriterError
+def testDataVolumeWriterError():
+    data = randomData((2, 1, 3, 4, 5), np.uint8)
+    iDataSet = FakeDataSet(data, "eTypeUInt8")
+    conn = createConnector(IApplicationPrx(iDataSet))
+    writer = DataVolumeWriter(conn)
+    writer.setDataVolume(np.zeros((3, 4, 5), dtype=np.uint16), 0, 0)
+    try:
+        # The error is raised by whichever call comes after the failed upload
+        writer.setDataVolume(np.zeros((3, 4, 5), dtype=np.uint8), 0, 1)
+        writer.flush()
+    except TypeError:
+        writer.close()
+        return np.array_equal(iDataSet.data[0, 0], data[0, 0])
+    return False
+
+
+# ======================================================================================================================
+
+#
+# iterTimepoints
+#
+assert testIterTimepoints(0)
+assert testIterTimepoints(1)
+assert testIterTimepoints(2)
+assert testIterTimepoints(10)
+assert testIterTimepoints(2, [5, 0, 3])
+assert testIterTimepointsMemory(0)
+assert testIterTimepointsMemory(2)
+assert testIterTimepointsEarlyExit()
+assert testIterTimepointsError()
+
+#
+# DataVolumeWriter
+#
+assert testDataVolumeWriter(1)
+assert testDataVolumeWriter(3)
+assert testDataVolumeWriterError()
@@ -0,0 +1,153 @@
+# SceneIndex: queries by name and type, answers served without calls to Imaris, detection of
+# changes to the Surpass Scene, and the selection.
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataContainer,
+    FakeFilaments,
+    FakeSpots,
+    FakeSurfaces,
+    IApplicationPrx,
+    createConnector,
+)
+
+
+def createScene():
+    """Creates an application whose scene contains 2 spots and 1 surfaces at root level,
+    and 1 spots and 1 filaments in a folder."""
+    app = IApplicationPrx()
+    spots = [FakeSpots(name="Spots %d" % i) for i in range(3)]
+    surfaces = FakeSurfaces(name="Spots 0")
+    filaments = FakeFilaments(name="Neurons")
+    folder = FakeDataContainer([spots[2], filaments], name="Folder")
+    for child in [spots[0], folder, surfaces, spots[1]]:
+        app.GetSurpassScene().AddChild(child, -1)
+    objects = [app.GetSurpassScene(), folder, surfaces, filaments] + spots
+    return app, objects, spots, surfaces, filaments, folder
+
+
+def numberOfCalls(app, objects):
+    """Number of calls to the objects and to the factory since the last reset."""
+    calls = sum(sum(o.calls.values()) for o in objects)
+    return calls + sum(app._factory.calls.values())
+
+
+def resetCalls(app, objects):
+    for o in objects:
+        o.calls.clear()
+    app._factory.calls.clear()
+
+
+# testQueries
+def testQueries():
+    app, _, spots, surfaces, filaments, folder = createScene()
+    conn = createConnector(app)
+    index = conn.getSceneIndex()
+
+    return (
+        len(index) == 6
+        and index.children() == conn.getAllSurpassChildren(True)
+        and index.children(False) == conn.getAllSurpassChildren(False)
+        and index.children(True, "Spots") == conn.getAllSurpassChildren(True, "Spots")
+        and index.ofType("DataContainer") == [folder]
+        and index.ofType("Filaments") == [filaments]
+        and index.typeOf(surfaces) == "Surfaces"
+        and index.pathOf(filaments) == ("Folder",)
+        and index.depthOf(spots[0]) == 0
+        and index.depthOf(spots[2]) == 1
+        and index.withName("Spots 0") == [spots[0], surfaces]
+        and index.withName("Spots 0", "Surfaces") == [surfaces]
+        and index.typeOf(FakeSpots()) is None
+        and FakeSpots() not in index
+        and spots[1] in index
+    )
+
+
+# testNoCalls
+def testNoCalls():
+    app, objects, spots, _, _, _ = createScene()
+    conn = createConnector(app)
+    index = conn.getSceneIndex()
+    resetCalls(app, objects)
+
+    result = (
+        conn.getAllSurpassChildren(True, "Spots", sceneIndex=index)
+        == [spots[0], spots[2], spots[1]]
+        and conn.getAllSurpassChildren(False, "Filaments", sceneIndex=index) == []
+        and len(conn.getAllSurpassChildren(True, sceneIndex=index)) == 5
+    )
+    return result and numberOfCalls(app, objects) == 0
+
+
+# testStaleness
+def testStaleness():
+    app, objects, _, _, _, folder = createScene()
+    conn = createConnector(app)
+    index = conn.getSceneIndex()
+
+    # Unchanged scene: 2 calls per folder (including the scene)
+    resetCalls(app, objects)
+    if conn.getSceneIndex() is not index or numberOfCalls(app, objects) != 4:
+        return False
+
+    # Forced refresh
+    index = conn.getSceneIndex(refresh=True)
+    if conn.getSceneIndex() is not index:
+        return False
+
+    # New object in a folder
+    newSpots = FakeSpots(name="New")
+    folder.AddChild(newSpots, -1)
+    index = conn.getSceneIndex()
+    if index.pathOf(newSpots) != ("Folder",):
+        return False
+
+    # Renamed folder
+    folder.SetName("Renamed")
+    index = conn.getSceneIndex()
+    if index.pathOf(newSpots) != ("Renamed",):
+        return False
+
+    # New scene
+    app._scene = FakeDataContainer([newSpots], name="Scene")
+    return conn.getSceneIndex().children() == [newSpots]
+
+
+# testSelection
+def testSelection():
+    app, objects, spots, surfaces, _, _ = createScene()
+    conn = createConnector(app)
+    index = conn.getSceneIndex()
+
+    # Selection found in the index: no cast needed
+    app.SetSurpassSelection(surfaces)
+    resetCalls(app, objects)
+    if conn.getSurpassSelection("Surfaces", sceneIndex=index) is not surfaces:
+        return False
+    if conn.getSurpassSelection("Spots", sceneIndex=index) is not None:
+        return False
+    if numberOfCalls(app, objects) != 0:
+        return False
+
+    # Selection not in the index
+    other = FakeSpots()
+    app.SetSurpassSelection(other)
+    return conn.getSurpassSelection("Spots", sceneIndex=index) is other
+
+
+# ======================================================================================================================
+
+#
+# Queries
+#
+assert testQueries()
+assert testNoCalls()
+
+#
+# Change detection
+#
+assert testStaleness()
+
+#
+# Selection
+#
+assert testSelection()
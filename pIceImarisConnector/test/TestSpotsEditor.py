@@ -0,0 +1,145 @@
+# SpotsEditor.commit() picks the cheapest ISpots setter for the edits it holds: nothing,
+# SetRadiiXYZ() only, or Set() followed by SetTrackEdges() when tracks must be remapped.
+
+import numpy as np
+
+from pIceImarisConnector import SpotsEditor
+from pIceImarisConnector.test.FakeImaris import FakeSpots
+
+
+def createSpots():
+    """Creates 6 spots in two tracks: 0 -> 1 -> 2 and 3 -> 4 -> 5."""
+    positions = np.arange(18, dtype=np.float32).reshape(6, 3)
+    iSpots = FakeSpots(positions, [0, 1, 2, 0, 1, 2], radii=[1, 1, 1, 2, 2, 2])
+    iSpots.SetTrackEdges([[0, 1], [1, 2], [3, 4], [4, 5]])
+    iSpots.calls.clear()
+    return iSpots
+
+
+def remoteState(iSpots):
+    return (
+        np.array(iSpots.GetPositionsXYZ()),
+        iSpots.GetIndicesT(),
+        np.array(iSpots.GetRadiiXYZ()),
+        sorted(map(tuple, iSpots.GetTrackEdges())),
+    )
+
+
+# testNoChanges
+def testNoChanges():
+    iSpots = createSpots()
+    editor = SpotsEditor(iSpots)
+    reads = iSpots.numberOfCalls()
+    editor.positions[2] += 0
+    return (
+        not editor.hasChanges
+        and editor.commit() == "none"
+        and iSpots.numberOfCalls() == reads
+    )
+
+
+# testRadiiOnly
+def testRadiiOnly():
+    iSpots = createSpots()
+    editor = SpotsEditor(iSpots)
+    editor.radii[4] = [2, 2, 6]
+    if editor.commit() != "radii" or iSpots.numberOfCalls("Set") != 1:
+        return False
+    positions, timeIndices, radii, edges = remoteState(iSpots)
+    return np.array_equal(radii[4], [2, 2, 6]) and len(edges) == 4
+
+
+# testRadiiOnlyAvoidsSet
+def testRadiiOnlyAvoidsSet():
+    iSpots = createSpots()
+    editor = SpotsEditor(iSpots)
+
+    # Even when the radius of every spot changes, the spots are not replaced
+    editor.radii[:] *= 2
+    if editor.commit() != "radii":
+        return False
+    positions, timeIndices, radii, edges = remoteState(iSpots)
+    return (
+        iSpots.calls.get("Set") is None
+        and iSpots.calls.get("SetTrackEdges") is None
+        and iSpots.calls["SetRadiiXYZ"] == 1
+        and np.array_equal(positions, np.arange(18).reshape(6, 3))
+        and np.array_equal(radii[:, 0], [2, 2, 2, 4, 4, 4])
+        and len(edges) == 4
+    )
+
+
+# testMoveKeepsTracks
+def testMoveKeepsTracks():
+    iSpots = createSpots()
+    editor = SpotsEditor(iSpots)
+    editor.positions[1] = [100, 100, 100]
+    editor.timeIndices[5] = 3
+    if editor.commit() != "all" or iSpots.calls.get("SetRadiiXYZ") is not None:
+        return False
+    positions, timeIndices, radii, edges = remoteState(iSpots)
+    return (
+        np.array_equal(positions[1], [100, 100, 100])
+        and timeIndices[5] == 3
+        and np.array_equal(radii[:, 0], [1, 1, 1, 2, 2, 2])
+        and edges == [(0, 1), (1, 2), (3, 4), (4, 5)]
+    )
+
+
+# testAddAndRemove
+def testAddAndRemove():
+    iSpots = createSpots()
+    with SpotsEditor(iSpots) as editor:
+        editor.remove([1, 3])
+        added = editor.add([[50, 50, 50], [60, 60, 60]], [3, 3], [[1, 1, 2], [1, 1, 2]])
+    positions, timeIndices, radii, edges = remoteState(iSpots)
+    return (
+        np.array_equal(added, [4, 5])
+        and len(editor) == 6
+        and np.array_equal(positions[:4], np.arange(18).reshape(6, 3)[[0, 2, 4, 5]])
+        and np.array_equal(positions[4:], [[50, 50, 50], [60, 60, 60]])
+        and timeIndices == [0, 2, 1, 2, 3, 3]
+        and np.array_equal(radii[4], [1, 1, 2])
+        and edges == [(2, 3)]
+        and not editor.hasChanges
+    )
+
+
+# testRevert
+def testRevert():
+    iSpots = createSpots()
+    editor = SpotsEditor(iSpots)
+    editor.remove([0])
+    editor.positions[0] = [7, 7, 7]
+    editor.revert()
+    return len(editor) == 6 and not editor.hasChanges and editor.commit() == "none"
+
+
+# testNoCommitOnError
+def testNoCommitOnError():
+    iSpots = createSpots()
+    try:
+        with SpotsEditor(iSpots) as editor:
+            editor.positions[0] = [7, 7, 7]
+            raise RuntimeError("curation failed")
+    except RuntimeError:
+        pass
+    return iSpots.numberOfCalls("Set") == 0
+
+
+# ======================================================================================================================
+
+#
+# Commits
+#
+assert testNoChanges()
+assert testRadiiOnly()
+assert testRadiiOnlyAvoidsSet()
+assert testMoveKeepsTracks()
+assert testAddAndRemove()
+
+#
+# Discarded changes
+#
+assert testRevert()
+assert testNoCommitOnError()
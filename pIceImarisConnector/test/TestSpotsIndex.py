@@ -0,0 +1,164 @@
+# SpotsIndex queries (radius, k nearest neighbors, pairs, per timepoint) compared with
+# brute-force distance matrices.
+
+import numpy as np
+
+from pIceImarisConnector import SpotsIndex
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataSet,
+    FakeSpots,
+    IApplicationPrx,
+    createConnector,
+)
+
+VOXEL_SIZES = np.array([0.5, 0.5, 2.0])
+
+
+def randomSpots(n, nTimepoints, seed=0):
+    rng = np.random.RandomState(seed)
+    positions = rng.uniform(0, 20, (n, 3))
+    timeIndices = rng.randint(0, nTimepoints, n)
+    return positions, timeIndices
+
+
+def bruteForceDistances(points, pointTimes, positions, timeIndices, scales):
+    """Returns the (m x n) distance matrix, with inf between different time indices."""
+    d = np.sqrt(
+        np.sum(((positions[None, :, :] - points[:, None, :]) / scales) ** 2, axis=2)
+    )
+    d[pointTimes[:, None] != timeIndices[None, :]] = np.inf
+    return d
+
+
+# testQueryRadius
+def testQueryRadius(units, cellSize):
+    positions, timeIndices = randomSpots(500, 3)
+    index = SpotsIndex(positions, timeIndices, VOXEL_SIZES, cellSize)
+    points, pointTimes = randomSpots(50, 4, seed=1)
+    radius = 3.0
+    indices, offsets, distances = index.queryRadius(
+        points, radius, pointTimes, units, returnDistances=True
+    )
+    scales = VOXEL_SIZES if units == "voxels" else np.ones(3)
+    expected = bruteForceDistances(points, pointTimes, positions, timeIndices, scales)
+    for i in range(points.shape[0]):
+        found = indices[offsets[i] : offsets[i + 1]]
+        if not np.array_equal(found, np.flatnonzero(expected[i] <= radius)):
+            return False
+        if not np.allclose(distances[offsets[i] : offsets[i + 1]], expected[i, found]):
+            return False
+    return True
+
+
+# testQueryKNearest
+def testQueryKNearest(units, cellSize):
+    positions, timeIndices = randomSpots(500, 3)
+    index = SpotsIndex(positions, timeIndices, VOXEL_SIZES, cellSize)
+
+    # Include points far outside the grid and at a time index without spots
+    points, pointTimes = randomSpots(50, 3, seed=2)
+    points[:5] *= 10
+    pointTimes[5:10] = 7
+    k = 6
+    indices, distances = index.queryKNearest(points, k, pointTimes, units)
+    scales = VOXEL_SIZES if units == "voxels" else np.ones(3)
+    expected = bruteForceDistances(points, pointTimes, positions, timeIndices, scales)
+    expectedDistances = np.sort(expected, axis=1)[:, :k]
+    return (
+        np.allclose(distances, expectedDistances)
+        and np.all(indices[5:10] == -1)
+        and np.allclose(
+            np.take_along_axis(expected[10:], indices[10:], axis=1),
+            expectedDistances[10:],
+        )
+    )
+
+
+# testQueryPairs
+def testQueryPairs(units):
+    positions, timeIndices = randomSpots(400, 2)
+    index = SpotsIndex(positions, timeIndices, VOXEL_SIZES)
+    radius = 2.0
+    pairs, distances = index.queryPairs(radius, units=units, returnDistances=True)
+    scales = VOXEL_SIZES if units == "voxels" else np.ones(3)
+    expected = bruteForceDistances(
+        positions, timeIndices, positions, timeIndices, scales
+    )
+    expectedPairs = np.argwhere(np.triu(expected <= radius, k=1))
+    atTime1 = index.queryPairs(radius, timeIndex=1, units=units)
+    return (
+        np.array_equal(pairs, expectedPairs)
+        and np.allclose(distances, expected[pairs[:, 0], pairs[:, 1]])
+        and np.array_equal(atTime1, pairs[timeIndices[pairs[:, 0]] == 1])
+    )
+
+
+# testSpotsAtTimeIndex
+def testSpotsAtTimeIndex():
+    positions, timeIndices = randomSpots(100, 5)
+    index = SpotsIndex(positions, timeIndices)
+    return all(
+        np.array_equal(index.spotsAtTimeIndex(t), np.flatnonzero(timeIndices == t))
+        for t in range(-1, 7)
+    )
+
+
+# testFromSpots
+def testFromSpots():
+    positions, timeIndices = randomSpots(100, 2)
+    iSpots = FakeSpots(positions, timeIndices)
+    iDataSet = FakeDataSet(np.zeros((1, 1, 10, 40, 40), dtype=np.uint8), "eTypeUInt8")
+    iDataSet.SetExtendMaxX(20.0)
+    iDataSet.SetExtendMaxY(20.0)
+    iDataSet.SetExtendMaxZ(20.0)
+    app = IApplicationPrx(iDataSet)
+    app.SetSurpassSelection(iSpots)
+    index = SpotsIndex.fromSpots(createConnector(app))
+    return (
+        len(index) == 100
+        and np.allclose(index.voxelSizes, VOXEL_SIZES)
+        and np.allclose(index.positions, positions.astype(np.float32))
+    )
+
+
+# testEmpty
+def testEmpty():
+    index = SpotsIndex(np.zeros((0, 3)))
+    indices, offsets = index.queryRadius([[0, 0, 0]], 1.0)
+    nearest, distances = index.queryKNearest([[0, 0, 0]], 2)
+    return (
+        indices.size == 0
+        and np.array_equal(offsets, [0, 0])
+        and np.all(nearest == -1)
+        and index.queryPairs(1.0).shape == (0, 2)
+    )
+
+
+# testInvalidUnits
+def testInvalidUnits():
+    index = SpotsIndex(np.zeros((1, 3)))
+    try:
+        index.queryRadius([[0, 0, 0]], 1.0, units="voxels")
+    except ValueError:
+        return True
+    return False
+
+
+# ======================================================================================================================
+
+#
+# Queries
+#
+for units in ["dataset", "voxels"]:
+    for cellSize in [None, 0.7, 5.0]:
+        assert testQueryRadius(units, cellSize)
+        assert testQueryKNearest(units, cellSize)
+    assert testQueryPairs(units)
+assert testSpotsAtTimeIndex()
+
+#
+# Construction
+#
+assert testFromSpots()
+assert testEmpty()
+assert testInvalidUnits()
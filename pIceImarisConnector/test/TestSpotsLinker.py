@@ -0,0 +1,119 @@
+# SpotsLinker on synthetic Brownian tracks: optimal frame-to-frame assignment, spots too far
+# apart to be linked, gap closing, and writing the track edges back to ISpots.
+
+import numpy as np
+
+from pIceImarisConnector import SpotsLinker
+from pIceImarisConnector.test.FakeImaris import (
+    FakeSpots,
+    IApplicationPrx,
+    brownianTracks,
+    createConnector,
+)
+
+
+def sameEdges(a, b):
+    a = np.asarray(a).reshape(-1, 2)
+    b = np.asarray(b).reshape(-1, 2)
+    return np.array_equal(
+        a[np.lexsort((a[:, 1], a[:, 0]))], b[np.lexsort((b[:, 1], b[:, 0]))]
+    )
+
+
+# testBrownianTracks
+def testBrownianTracks():
+    positions, timeIndices, trueEdges = brownianTracks(200, 30, step=0.5, size=200)
+    edges = SpotsLinker(maxDistance=3.0).link(positions, timeIndices)
+    if not sameEdges(edges, trueEdges):
+        return False
+
+    # In denser tracks, crossing tracks may be swapped, but never at a higher cost
+    positions, timeIndices, trueEdges = brownianTracks(200, 30, step=0.5)
+    edges = SpotsLinker(maxDistance=3.0).link(positions, timeIndices)
+    cost = lambda e: np.sum((positions[e[:, 0]] - positions[e[:, 1]]) ** 2)
+    return edges.shape == trueEdges.shape and cost(edges) <= cost(trueEdges)
+
+
+# testOptimalAssignment
+def testOptimalAssignment():
+    # Linking the closest pair first (b -> x) would leave a unlinked
+    positions = [[0, 0, 0], [2, 0, 0], [1.1, 0, 0], [3.5, 0, 0]]
+    timeIndices = [0, 0, 1, 1]
+    edges = SpotsLinker(maxDistance=2.0).link(positions, timeIndices)
+    return sameEdges(edges, [[0, 2], [1, 3]])
+
+
+# testNoLinks
+def testNoLinks():
+    linker = SpotsLinker(maxDistance=1.0, maxGap=2)
+    far = linker.link([[0, 0, 0], [5, 0, 0], [10, 0, 0]], [0, 1, 2])
+    single = linker.link([[0, 0, 0], [0.5, 0, 0]], [0, 0])
+    empty = linker.link(np.zeros((0, 3)), [])
+    return far.shape == (0, 2) and single.shape == (0, 2) and empty.shape == (0, 2)
+
+
+# testGapClosing
+def testGapClosing(maxGap):
+    positions, timeIndices, trueEdges = brownianTracks(50, 20, step=0.5, seed=1)
+
+    # Remove a few detections in the middle of the tracks
+    rng = np.random.RandomState(0)
+    missing = rng.choice(np.flatnonzero((timeIndices > 2) & (timeIndices < 17)), 10)
+    keep = np.setdiff1d(np.arange(len(timeIndices)), missing)
+    newIndex = np.full(len(timeIndices), -1)
+    newIndex[keep] = np.arange(keep.size)
+
+    # Bridge the true edges over at most maxGap missing detections
+    nextSpot = np.full(len(timeIndices), -1)
+    nextSpot[trueEdges[:, 0]] = trueEdges[:, 1]
+    expected = []
+    for source in keep:
+        target = nextSpot[source]
+        while target >= 0 and newIndex[target] < 0:
+            target = nextSpot[target]
+        if target >= 0 and timeIndices[target] - timeIndices[source] <= maxGap + 1:
+            expected.append([newIndex[source], newIndex[target]])
+
+    edges = SpotsLinker(maxDistance=3.0, maxGap=maxGap).link(
+        positions[keep], timeIndices[keep]
+    )
+    return sameEdges(edges, expected)
+
+
+# testLinkSpots
+def testLinkSpots():
+    positions, timeIndices, _ = brownianTracks(20, 10, step=0.5, seed=2)
+
+    # Imaris stores the spots sorted by time index
+    order = np.argsort(timeIndices, kind="stable")
+    iSpots = FakeSpots(positions[order], timeIndices[order])
+    conn = createConnector(IApplicationPrx())
+    edges = SpotsLinker(maxDistance=3.0).linkSpots(iSpots)
+    tracks, startTimes = conn.getTracks(iSpots)
+    return (
+        sameEdges(iSpots.GetTrackEdges(), edges)
+        and len(tracks) == 20
+        and all(len(track) == 10 for track in tracks)
+        and startTimes == [0] * 20
+    )
+
+
+# ======================================================================================================================
+
+#
+# Frame-to-frame linking
+#
+assert testBrownianTracks()
+assert testOptimalAssignment()
+assert testNoLinks()
+
+#
+# Gap closing
+#
+for maxGap in [0, 1, 2]:
+    assert testGapClosing(maxGap)
+
+#
+# ISpots
+#
+assert testLinkSpots()
@@ -0,0 +1,98 @@
+# The readiness probes of startImaris(): a local TCP server stands in for ImarisServerIce and
+# a stub ImarisLib answers the application lookups. Nothing is launched.
+
+import time
+from unittest import mock
+
+from pIceImarisConnector import pIceImarisConnector
+from pIceImarisConnector.test.FakeImaris import (
+    FakeLauncher,
+    StandInServer,
+    createConnector,
+    freePort,
+    startImarisWith,
+)
+
+
+# testServerProbe
+def testServerProbe():
+    conn = createConnector(None)
+    port = freePort()
+    endpoint = ("127.0.0.1", port)
+    with mock.patch.object(pIceImarisConnector, "_SERVER_ENDPOINT", endpoint):
+        if conn._isImarisServerIceRunning():
+            return False
+        server = StandInServer(port)
+        try:
+            for _ in range(100):
+                if conn._isImarisServerIceRunning():
+                    return True
+                time.sleep(0.01)
+            return False
+        finally:
+            server.close()
+
+
+# testLaunch
+def testLaunch():
+    launcher = FakeLauncher(freePort(), serverDelay=0.2, applicationDelay=0.3)
+    try:
+        conn, result = startImarisWith(launcher, timeout=5)
+    finally:
+        launcher.close()
+    statistics = conn.getLaunchStatistics()
+    return (
+        result is True
+        and conn.mImarisApplication is launcher.application
+        and launcher.communicators == 2
+        and 0.5 <= statistics["elapsed"] < 2
+        and 1 < statistics["serverProbes"] < 15
+        and 1 < statistics["applicationProbes"] < 15
+    )
+
+
+# testServerTimeout
+def testServerTimeout():
+    launcher = FakeLauncher(freePort(), serverDelay=60, applicationDelay=0)
+    try:
+        conn, result = startImarisWith(launcher, timeout=0.3)
+    finally:
+        launcher.close()
+    statistics = conn.getLaunchStatistics()
+    return (
+        not result
+        and conn.mImarisApplication is None
+        and launcher.launchTime is None
+        and statistics["elapsed"] < 1.5
+    )
+
+
+# testApplicationTimeout
+def testApplicationTimeout():
+    launcher = FakeLauncher(freePort(), serverDelay=0, applicationDelay=None)
+    try:
+        conn, result = startImarisWith(launcher, timeout=0.5)
+    finally:
+        launcher.close()
+    statistics = conn.getLaunchStatistics()
+    return (
+        result is False
+        and conn.mImarisApplication is None
+        and 0.5 <= statistics["elapsed"] < 1.5
+        and statistics["applicationProbes"] < 15
+    )
+
+
+# ======================================================================================================================
+
+#
+# Server probe
+#
+assert testServerProbe()
+
+#
+# Launch
+#
+assert testLaunch()
+assert testServerTimeout()
+assert testApplicationTimeout()
@@ -0,0 +1,174 @@
+# getStatisticsTable(): columns, indexes, lookup by name, one cached table per object and
+# selection of names, and objects without statistics.
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeSpots,
+    IApplicationPrx,
+    createConnector,
+)
+
+
+def createSpots(statisticsByName=False):
+    """Creates spots with ids 10..15 at time indices 0, 0, 1, 1, 2, 2 and some statistics."""
+    iSpots = FakeSpots(np.zeros((6, 3)), statisticsByName=statisticsByName)
+    ids = np.arange(10, 16)
+    times = [str(t) for t in [1, 1, 2, 2, 3, 3]]
+    category = ["Spot"] * 6
+
+    # Shuffled, to check that the table does not rely on the order of the values
+    order = [3, 0, 5, 1, 4, 2]
+    iSpots.addStatistics(
+        "Volume",
+        ids[order],
+        (ids * 2.0)[order],
+        "um^3",
+        {"Time": [times[i] for i in order], "Category": category},
+    )
+    for channel in [1, 2]:
+        iSpots.addStatistics(
+            "Intensity Mean",
+            ids,
+            ids * 10.0 + channel,
+            "",
+            {"Time": times, "Category": category, "Channel": [channel] * 6},
+        )
+
+    # Not all spots have a value
+    iSpots.addStatistics(
+        "Distance to Image Border XYZ",
+        ids[:3],
+        [1.0, 2.0, 3.0],
+        "um",
+        {"Time": times[:3], "Category": category[:3]},
+    )
+
+    # Overall statistics
+    iSpots.addStatistics(
+        "Total Number of Spots",
+        [-1, -1, -1],
+        [2, 2, 2],
+        "",
+        {"Time": ["1", "2", "3"], "Category": ["Overall"] * 3},
+    )
+    return iSpots
+
+
+# testColumns
+def testColumns():
+    conn = createConnector(IApplicationPrx())
+    table = conn.getStatisticsTable(createSpots())
+    rows = table.rowsOfIds(np.arange(10, 16))
+    return (
+        len(table) == 9
+        and sorted(table.names)
+        == [
+            "Distance to Image Border XYZ",
+            "Intensity Mean Ch=1",
+            "Intensity Mean Ch=2",
+            "Total Number of Spots",
+            "Volume",
+        ]
+        and "Volume" in table
+        and table.units["Volume"] == "um^3"
+        and np.array_equal(table["Volume"][rows], np.arange(10, 16) * 2.0)
+        and np.array_equal(
+            table["Intensity Mean Ch=2"][rows], np.arange(10, 16) * 10.0 + 2
+        )
+        and np.array_equal(table["Distance to Image Border XYZ"][rows[:3]], [1, 2, 3])
+        and np.all(np.isnan(table["Distance to Image Border XYZ"][rows[3:]]))
+        and np.array_equal(table.timeIndices[rows], [0, 0, 1, 1, 2, 2])
+        and list(table.categories[rows]) == ["Spot"] * 6
+    )
+
+
+# testIndexes
+def testIndexes():
+    conn = createConnector(IApplicationPrx())
+    table = conn.getStatisticsTable(createSpots())
+    if not np.array_equal(table.ids[table.rowsOfIds([12, 99, 10])[[0, 2]]], [12, 10]):
+        return False
+    if table.rowsOfIds([99])[0] != -1:
+        return False
+    rows = table.rowsAtTimeIndex(1)
+    return (
+        sorted(table.ids[rows]) == [-1, 12, 13]
+        and table.rowsAtTimeIndex(3).size == 0
+        and table.rowsAtTimeIndex(-1).size == 0
+        and np.array_equal(
+            table["Total Number of Spots"][rows][table.categories[rows] == "Overall"],
+            [2],
+        )
+    )
+
+
+# testGetStatisticsByName
+def testGetStatisticsByName(statisticsByName):
+    iSpots = createSpots(statisticsByName)
+    conn = createConnector(IApplicationPrx())
+    table = conn.getStatisticsTable(iSpots, ["Volume", "Intensity Mean"])
+    if sorted(table.names) != ["Intensity Mean Ch=1", "Intensity Mean Ch=2", "Volume"]:
+        return False
+    if statisticsByName:
+        return (
+            iSpots.calls.get("GetStatisticsByName") == 2
+            and "GetStatistics" not in iSpots.calls
+        )
+    return iSpots.calls.get("GetStatistics") == 1
+
+
+# testCache
+def testCache():
+    iSpots = createSpots()
+    app = IApplicationPrx()
+    app.SetSurpassSelection(iSpots)
+    conn = createConnector(app)
+    table = conn.getStatisticsTable()
+    if (
+        conn.getStatisticsTable(iSpots) is not table
+        or iSpots.calls["GetStatistics"] != 1
+    ):
+        return False
+
+    # A different selection of names is a different table
+    conn.getStatisticsTable(iSpots, ["Volume"])
+    if iSpots.calls["GetStatistics"] != 2:
+        return False
+
+    # Explicit invalidation
+    iSpots.addStatistics("Sphericity", [10], [0.5])
+    conn.clearStatisticsCache(iSpots)
+    table = conn.getStatisticsTable(iSpots)
+    return (
+        iSpots.calls["GetStatistics"] == 3
+        and table["Sphericity"][table.rowsOfIds([10])[0]] == 0.5
+    )
+
+
+# testNoStatistics
+def testNoStatistics():
+    conn = createConnector(IApplicationPrx())
+    table = conn.getStatisticsTable(FakeSpots())
+    return len(table) == 0 and table.names == [] and table.rowsAtTimeIndex(0).size == 0
+
+
+# ======================================================================================================================
+
+#
+# Table content
+#
+assert testColumns()
+assert testIndexes()
+assert testNoStatistics()
+
+#
+# Transfer
+#
+assert testGetStatisticsByName(True)
+assert testGetStatisticsByName(False)
+
+#
+# Cache
+#
+assert testCache()
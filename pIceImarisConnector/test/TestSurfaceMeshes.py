@@ -0,0 +1,152 @@
+# getSurfaceMeshes(): packed meshes for all or selected surfaces, the .npz export, the
+# bound on concurrent requests and failures of single surfaces.
+
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeSurfaces,
+    IApplicationPrx,
+    createConnector,
+    fanMesh,
+)
+
+
+class ConcurrencySurfaces(FakeSurfaces):
+    """Fake ISurfaces that records the largest number of concurrent vertex transfers."""
+
+    def __init__(self, *args, **kwargs):
+        super(ConcurrencySurfaces, self).__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.maxActive = 0
+
+    def GetVertices(self, index):
+        with self._lock:
+            self.active += 1
+            self.maxActive = max(self.maxActive, self.active)
+        try:
+            return super(ConcurrencySurfaces, self).GetVertices(index)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class FailingSurfaces(FakeSurfaces):
+    """Fake ISurfaces whose triangles cannot be read from surface 10 on."""
+
+    def GetTriangles(self, index):
+        if index >= 10:
+            raise RuntimeError("Connection lost")
+        return super(FailingSurfaces, self).GetTriangles(index)
+
+
+def createSurfaces(n, cls=FakeSurfaces, **kwargs):
+    centers = np.random.RandomState(0).uniform(0, 100, (n, 3))
+    return cls(centers, statistics=False, **kwargs), centers
+
+
+def checkMeshes(meshes, centers, indices, normals=True):
+    """Compares the packed meshes with the meshes of the single surfaces."""
+    if not np.array_equal(meshes["indices"], indices):
+        return False
+    vertexOffsets = meshes["vertexOffsets"]
+    triangleOffsets = meshes["triangleOffsets"]
+    if (
+        vertexOffsets.size != len(indices) + 1
+        or triangleOffsets.size != len(indices) + 1
+    ):
+        return False
+    if meshes["triangles"].dtype != np.int32 or meshes["vertices"].dtype != np.float32:
+        return False
+    for i, index in enumerate(indices):
+        vertices, triangles, vertexNormals = fanMesh(centers[index], index)
+        v = slice(vertexOffsets[i], vertexOffsets[i + 1])
+        t = slice(triangleOffsets[i], triangleOffsets[i + 1])
+        if not np.array_equal(meshes["vertices"][v], vertices):
+            return False
+        if not np.array_equal(meshes["triangles"][t], triangles + vertexOffsets[i]):
+            return False
+        if normals and not np.array_equal(meshes["normals"][v], vertexNormals):
+            return False
+    return normals or "normals" not in meshes
+
+
+# testAllSurfaces
+def testAllSurfaces(workers, batchSize):
+    iSurfaces, centers = createSurfaces(50)
+    app = IApplicationPrx()
+    app.SetSurpassSelection(iSurfaces)
+    conn = createConnector(app)
+    meshes = conn.getSurfaceMeshes(workers=workers, batchSize=batchSize)
+    return checkMeshes(meshes, centers, np.arange(50))
+
+
+# testSelectedSurfaces
+def testSelectedSurfaces():
+    iSurfaces, centers = createSurfaces(50)
+    conn = createConnector(IApplicationPrx())
+    meshes = conn.getSurfaceMeshes(iSurfaces, [40, 3, 7], normals=False)
+    empty = conn.getSurfaceMeshes(iSurfaces, [])
+    return (
+        checkMeshes(meshes, centers, [40, 3, 7], normals=False)
+        and iSurfaces.numberOfCalls("GetNormals") == 0
+        and empty["vertices"].shape == (0, 3)
+        and np.array_equal(empty["vertexOffsets"], [0])
+    )
+
+
+# testNpz
+def testNpz():
+    iSurfaces, centers = createSurfaces(100)
+    conn = createConnector(IApplicationPrx())
+    filename = os.path.join(tempfile.mkdtemp(), "meshes.npz")
+    try:
+        result = conn.getSurfaceMeshes(
+            iSurfaces, workers=4, filename=filename, batchSize=7
+        )
+        with np.load(filename) as npz:
+            meshes = {name: npz[name] for name in npz.files}
+        return result == filename and checkMeshes(meshes, centers, np.arange(100))
+    finally:
+        os.remove(filename)
+        os.rmdir(os.path.dirname(filename))
+
+
+# testConcurrency
+def testConcurrency():
+    iSurfaces, centers = createSurfaces(40, ConcurrencySurfaces, latency=0.005)
+    conn = createConnector(IApplicationPrx())
+    meshes = conn.getSurfaceMeshes(iSurfaces, workers=4, batchSize=2)
+    return checkMeshes(meshes, centers, np.arange(40)) and 1 < iSurfaces.maxActive <= 4
+
+
+# testFailure
+def testFailure():
+    iSurfaces, _ = createSurfaces(40, FailingSurfaces)
+    conn = createConnector(IApplicationPrx())
+    try:
+        conn.getSurfaceMeshes(iSurfaces, workers=4, batchSize=3)
+    except RuntimeError:
+        return True
+    return False
+
+
+# ======================================================================================================================
+
+#
+# In memory
+#
+for workers, batchSize in [(1, 64), (4, 3)]:
+    assert testAllSurfaces(workers, batchSize)
+assert testSelectedSurfaces()
+assert testConcurrency()
+assert testFailure()
+
+#
+# .npz file
+#
+assert testNpz()
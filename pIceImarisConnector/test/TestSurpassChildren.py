@@ -0,0 +1,163 @@
+# getAllSurpassChildren(): recursive traversal, object types resolved once per object (and
+# forgotten when the scene changes), the order of the type probes, getSurpassSelection() by
+# type, and switching to another application.
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataContainer,
+    FakeFilaments,
+    FakeSpots,
+    FakeSurfaces,
+    IApplicationPrx,
+    createConnector,
+)
+
+
+def createScene(app):
+    """Fills the scene with 3 spots and 2 surfaces at root level, and 2 spots and 1 filaments
+    in a subfolder."""
+    spots = [FakeSpots(name="Spots %d" % i) for i in range(5)]
+    surfaces = [FakeSurfaces(name="Surfaces %d" % i) for i in range(2)]
+    filaments = FakeFilaments(name="Filaments")
+    folder = FakeDataContainer([spots[3], filaments, spots[4]], name="Folder")
+    for child in [spots[0], surfaces[0], folder, spots[1], surfaces[1], spots[2]]:
+        app.GetSurpassScene().AddChild(child, -1)
+    return spots, surfaces, filaments
+
+
+def numberOfProbes(app):
+    return sum(n for name, n in app._factory.calls.items() if name.startswith("Is"))
+
+
+# testTraversal
+def testTraversal():
+    app = IApplicationPrx()
+    spots, surfaces, filaments = createScene(app)
+    conn = createConnector(app)
+
+    allChildren = conn.getAllSurpassChildren(True)
+    rootChildren = conn.getAllSurpassChildren(False)
+    return (
+        allChildren
+        == [spots[0], surfaces[0], spots[3], filaments, spots[4]]
+        + [spots[1], surfaces[1], spots[2]]
+        and rootChildren == [spots[0], surfaces[0], spots[1], surfaces[1], spots[2]]
+        and conn.getAllSurpassChildren(True, "Spots")
+        == [spots[i] for i in [0, 3, 4, 1, 2]]
+        and conn.getAllSurpassChildren(False, "Filaments") == []
+        and conn.getAllSurpassChildren(True, "Filaments") == [filaments]
+        and conn.getAllSurpassChildren(True, "Volume") == []
+    )
+
+
+# testTypesResolvedOnce
+def testTypesResolvedOnce():
+    app = IApplicationPrx()
+    createScene(app)
+    conn = createConnector(app)
+
+    # Each object is probed only once, and the factory is requested only once
+    conn.getAllSurpassChildren(True)
+    probes = numberOfProbes(app)
+    app._factory.calls.clear()
+    conn.getAllSurpassChildren(True, "Spots")
+    conn.getAllSurpassChildren(True)
+    if numberOfProbes(app) > 0:
+        return False
+
+    # 9 objects (including the folder), at most 15 probes each
+    return 9 <= probes < 9 * 15 and app.factoryCalls == 1
+
+
+# testProbeOrder
+def testProbeOrder():
+    app = IApplicationPrx()
+    for i in range(50):
+        app.GetSurpassScene().AddChild(FakeSpots(), -1)
+    conn = createConnector(app)
+
+    # After the first spots, Spots is probed first
+    conn.getAllSurpassChildren(False)
+    probes = numberOfProbes(app)
+    return probes == 4 + 49
+
+
+# testProbeOrderTies
+def testProbeOrderTies():
+    app = IApplicationPrx()
+    conn = createConnector(app)
+
+    # Surfaces is probed first after one surfaces; after one spots as well, the
+    # original order (Spots before Surfaces) decides
+    app.GetSurpassScene().AddChild(FakeSurfaces(), -1)
+    conn.getAllSurpassChildren(False)
+    if conn._mCastTypes[0] != "Surfaces":
+        return False
+    app.GetSurpassScene().AddChild(FakeSpots(), -1)
+    conn.getAllSurpassChildren(False)
+    return conn._mCastTypes[:2] == ["Spots", "Surfaces"]
+
+
+# testTypesForgotten
+def testTypesForgotten():
+    app = IApplicationPrx()
+    spots, surfaces, filaments = createScene(app)
+    conn = createConnector(app)
+    conn.getSceneIndex()
+    if len(conn._mObjectTypes) != 9:
+        return False
+
+    # The types of removed objects are forgotten when the index detects the change
+    app.GetSurpassScene().RemoveChild(spots[0])
+    app.GetSurpassScene().RemoveChild(surfaces[0])
+    conn.getSceneIndex()
+    if len(conn._mObjectTypes) != 7:
+        return False
+
+    # ... and by resetState()
+    conn.resetState()
+    return len(conn._mObjectTypes) == 0
+
+
+# testSelection
+def testSelection():
+    app = IApplicationPrx()
+    conn = createConnector(app)
+    app.SetSurpassSelection(FakeSurfaces())
+    if conn.getSurpassSelection("Spots") is not None:
+        return False
+    if conn.getSurpassSelection("Surfaces") is not app.GetSurpassSelection():
+        return False
+    app.SetSurpassSelection(None)
+    return conn.getSurpassSelection() is None
+
+
+# testNewApplication
+def testNewApplication():
+    app = IApplicationPrx()
+    createScene(app)
+    conn = createConnector(app)
+    conn.getAllSurpassChildren(True)
+
+    # The factory and the resolved types belong to the application
+    other = IApplicationPrx()
+    createScene(other)
+    conn._mImarisApplication = other
+    return len(conn.getAllSurpassChildren(True)) == 8 and other.factoryCalls == 1
+
+
+# ======================================================================================================================
+
+#
+# Traversal
+#
+assert testTraversal()
+assert testTypesResolvedOnce()
+assert testProbeOrder()
+assert testProbeOrderTies()
+assert testTypesForgotten()
+assert testNewApplication()
+
+#
+# Selection
+#
+assert testSelection()
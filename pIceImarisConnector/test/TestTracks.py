@@ -0,0 +1,161 @@
+# getTracks() for spots and surfaces: track membership, surface centers, the packed layout
+# with offsets, branching tracks and objects without tracks.
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeSpots,
+    FakeSurfaces,
+    IApplicationPrx,
+    createConnector,
+    randomTracks,
+)
+
+
+def legacyGetTracks(positions, timeIndices, ids, trackEdges):
+    """Track extraction as done by getTracks() in pIceImarisConnector 0.4.2."""
+    ids = np.array(ids)
+    uids = np.unique(ids)
+    tracks = []
+    startTimes = []
+    for i in range(uids.size):
+        edges = trackEdges[ids == uids[i], :]
+        edges = np.unique(edges)
+        tracks.append(positions[edges, :])
+        startTimes.append(timeIndices[edges[0]])
+    return tracks, startTimes
+
+
+# testSpotTracks
+def testSpotTracks(nTracks, trackLength):
+    positions, timeIndices, ids, edges = randomTracks(nTracks, trackLength)
+    iSpots = FakeSpots(positions, timeIndices, trackIds=ids, trackEdges=edges)
+    conn = createConnector(IApplicationPrx())
+    tracks, startTimes = conn.getTracks(iSpots)
+    expectedTracks, expectedStartTimes = legacyGetTracks(
+        np.array(iSpots.GetPositionsXYZ()), timeIndices, ids, edges
+    )
+    return (
+        len(tracks) == nTracks
+        and all(np.array_equal(a, b) for a, b in zip(tracks, expectedTracks))
+        and startTimes == expectedStartTimes
+    )
+
+
+# testSurfaceTracks
+def testSurfaceTracks():
+    positions, timeIndices, ids, edges = randomTracks(20, 5, seed=1)
+    iSurfaces = FakeSurfaces(positions, timeIndices, trackIds=ids, trackEdges=edges)
+    app = IApplicationPrx()
+    app.SetSurpassSelection(iSurfaces)
+    conn = createConnector(app)
+    tracks, startTimes = conn.getTracks()
+    expectedTracks, expectedStartTimes = legacyGetTracks(
+        positions, timeIndices, ids, edges
+    )
+    return all(
+        np.array_equal(a, b) for a, b in zip(tracks, expectedTracks)
+    ) and np.array_equal(startTimes, expectedStartTimes)
+
+
+# testSurfaceCenters
+def testSurfaceCenters(statistics, statisticsByName):
+    positions, timeIndices, ids, edges = randomTracks(30, 4, seed=3)
+    iSurfaces = FakeSurfaces(
+        positions,
+        timeIndices,
+        trackIds=ids,
+        trackEdges=edges,
+        statistics=statistics,
+        statisticsByName=statisticsByName,
+    )
+    conn = createConnector(IApplicationPrx())
+    tracks, startTimes = conn.getTracks(iSurfaces, workers=4)
+    expectedTracks, expectedStartTimes = legacyGetTracks(
+        positions, timeIndices, ids, edges
+    )
+    if not all(np.array_equal(a, b) for a, b in zip(tracks, expectedTracks)):
+        return False
+    if startTimes != expectedStartTimes:
+        return False
+
+    # Number of remote calls per surface
+    nPerSurface = iSurfaces.numberOfCalls("GetCenterOfMass") + iSurfaces.numberOfCalls(
+        "GetTimeIndex"
+    )
+    if not statistics:
+        return nPerSurface == 2 * 120
+    if statisticsByName:
+        return nPerSurface == 0 and iSurfaces.calls["GetStatisticsByName"] == 4
+    return nPerSurface == 0 and iSurfaces.calls["GetStatistics"] == 1
+
+
+# testCompact
+def testCompact():
+    positions, timeIndices, ids, edges = randomTracks(50, 7, seed=2)
+    iSpots = FakeSpots(positions, timeIndices, trackIds=ids, trackEdges=edges)
+    conn = createConnector(IApplicationPrx())
+    tracks, startTimes = conn.getTracks(iSpots)
+    packed, offsets, compactStartTimes = conn.getTracks(iSpots, compact=True)
+    return (
+        packed.shape == (350, 3)
+        and offsets.size == 51
+        and offsets[0] == 0
+        and offsets[-1] == 350
+        and all(
+            np.array_equal(packed[offsets[i] : offsets[i + 1]], tracks[i])
+            for i in range(50)
+        )
+        and np.array_equal(compactStartTimes, startTimes)
+    )
+
+
+# testBranchingTrack
+def testBranchingTrack():
+    # A track that splits: spot 1 is shared by two edges
+    positions = np.arange(15, dtype=np.float32).reshape(5, 3)
+    iSpots = FakeSpots(
+        positions,
+        [3, 4, 5, 5, 0],
+        trackIds=[7, 7, 7, 2],
+        trackEdges=[[1, 2], [0, 1], [1, 3], [4, 4]],
+    )
+    conn = createConnector(IApplicationPrx())
+    tracks, startTimes = conn.getTracks(iSpots)
+    return (
+        len(tracks) == 2
+        and np.array_equal(tracks[0], positions[[4]])
+        and np.array_equal(tracks[1], positions[[0, 1, 2, 3]])
+        and startTimes == [0, 3]
+    )
+
+
+# testNoTracks
+def testNoTracks():
+    iSpots = FakeSpots(np.zeros((4, 3)))
+    conn = createConnector(IApplicationPrx())
+    tracks, startTimes = conn.getTracks(iSpots)
+    packed, offsets, compactStartTimes = conn.getTracks(iSpots, compact=True)
+    return (
+        tracks == []
+        and startTimes == []
+        and packed.shape == (0, 3)
+        and np.array_equal(offsets, [0])
+        and compactStartTimes.size == 0
+    )
+
+
+# ======================================================================================================================
+
+#
+# Tracks
+#
+assert testSpotTracks(100, 10)
+assert testSpotTracks(1, 2)
+assert testSurfaceTracks()
+assert testSurfaceCenters(True, False)
+assert testSurfaceCenters(True, True)
+assert testSurfaceCenters(False, False)
+assert testCompact()
+assert testBranchingTrack()
+assert testNoTracks()
@@ -0,0 +1,171 @@
+# VolumeCache through getDataVolume(): hits, LRU eviction, volumes larger than the cache,
+# invalidation by writes (also while a volume is being fetched), and a disabled cache.
+
+import numpy as np
+
+from pIceImarisConnector.test.FakeImaris import (
+    FakeDataSet,
+    IApplicationPrx,
+    createConnector,
+    randomData,
+)
+
+
+class WriteDuringReadDataSet(FakeDataSet):
+    """Runs a callback (once) while a volume is being fetched, after the volume was read."""
+
+    onRead = None
+
+    def GetDataVolumeAs1DArrayShorts(self, channel, timepoint):
+        payload = FakeDataSet.GetDataVolumeAs1DArrayShorts(self, channel, timepoint)
+        onRead, self.onRead = self.onRead, None
+        if onRead is not None:
+            onRead()
+        return payload
+
+
+def createCachedConnector(maxBytes, shape=(3, 2, 4, 5, 6), dtype=np.uint16):
+    datatype = "eTypeUInt16" if dtype == np.uint16 else "eTypeFloat"
+    data = randomData(shape, dtype)
+    iDataSet = FakeDataSet(data, datatype)
+    conn = createConnector(IApplicationPrx(iDataSet))
+    conn.enableVolumeCache(maxBytes)
+    return conn, iDataSet, data
+
+
+# testCacheHits
+def testCacheHits():
+    conn, iDataSet, data = createCachedConnector(10**6)
+    first = conn.getDataVolume(1, 2)
+    nCalls = iDataSet.numberOfCalls("GetData")
+    second = conn.getDataVolume(1, 2)
+    plane = conn.getDataSlice(3, 1, 2)
+    sub = conn.getDataSubVolume(1, 2, 1, 1, 2, 4, 3, 2)
+    out = np.empty((4, 5, 6), dtype=np.uint16)
+    conn.getDataVolume(1, 2, out=out)
+
+    # The returned arrays are independent of the cached volume
+    second[0, 0, 0] += 1
+    third = conn.getDataVolume(1, 2)
+
+    stats = conn.getVolumeCacheStatistics()
+    return (
+        iDataSet.numberOfCalls("GetData") == nCalls
+        and np.array_equal(first, data[2, 1])
+        and np.array_equal(third, data[2, 1])
+        and np.array_equal(out, data[2, 1])
+        and np.array_equal(plane, data[2, 1, 3])
+        and np.array_equal(sub, data[2, 1, 1:3, 2:5, 1:5])
+        and plane.flags.c_contiguous
+        and sub.flags.c_contiguous
+        and stats["hits"] == 5
+        and stats["misses"] == 1
+        and stats["entries"] == 1
+        and stats["bytes"] == first.nbytes
+    )
+
+
+# testCacheEviction
+def testCacheEviction():
+    volumeBytes = 4 * 5 * 6 * 2
+    conn, iDataSet, data = createCachedConnector(2 * volumeBytes)
+    conn.getDataVolume(0, 0)
+    conn.getDataVolume(0, 1)
+    conn.getDataVolume(0, 0)  # Hit: (0, 1) is now the least recently used
+    conn.getDataVolume(0, 2)  # Evicts (0, 1)
+    nCalls = iDataSet.numberOfCalls("GetDataVolume")
+    conn.getDataVolume(0, 0)
+    conn.getDataVolume(0, 2)
+    if iDataSet.numberOfCalls("GetDataVolume") != nCalls:
+        return False
+    conn.getDataVolume(0, 1)
+    stats = conn.getVolumeCacheStatistics()
+    return (
+        iDataSet.numberOfCalls("GetDataVolume") == nCalls + 1
+        and stats["evictions"] == 2
+        and stats["entries"] == 2
+        and stats["bytes"] <= stats["maxBytes"]
+    )
+
+
+# testCacheTooSmall
+def testCacheTooSmall():
+    conn, iDataSet, data = createCachedConnector(100)
+    conn.getDataVolume(0, 0)
+    conn.getDataVolume(0, 0)
+    return (
+        iDataSet.numberOfCalls("GetDataVolume") == 2
+        and conn.getVolumeCacheStatistics()["entries"] == 0
+    )
+
+
+# testCacheInvalidation
+def testCacheInvalidation():
+    conn, iDataSet, data = createCachedConnector(10**6)
+    conn.getDataVolume(0, 0)
+    conn.getDataVolume(1, 0)
+
+    # setDataVolume invalidates the written volume only
+    stack = np.full((4, 5, 6), 7, dtype=np.uint16)
+    conn.setDataVolume(stack, 0, 0)
+    if conn.getVolumeCacheStatistics()["entries"] != 1:
+        return False
+    if not np.array_equal(conn.getDataVolume(0, 0), stack):
+        return False
+
+    # copyChannels invalidates the whole dataset
+    conn.copyChannels(1)
+    if conn.getVolumeCacheStatistics()["entries"] != 0:
+        return False
+    if not np.array_equal(conn.getDataVolume(2, 1), data[1, 1]):
+        return False
+
+    # createDataSet clears the cache
+    conn.createDataSet("uint16", 6, 5, 4, 1, 1)
+    if conn.getVolumeCacheStatistics()["entries"] != 0:
+        return False
+    return np.all(conn.getDataVolume(0, 0) == 0)
+
+
+# testCacheInvalidationDuringRead
+def testCacheInvalidationDuringRead():
+    data = randomData((1, 2, 4, 5, 6), np.uint16)
+    iDataSet = WriteDuringReadDataSet(data, "eTypeUInt16")
+    conn = createConnector(IApplicationPrx(iDataSet))
+    conn.enableVolumeCache(10**6)
+
+    # The volume is overwritten after it was read, but before it is cached
+    stack = np.full((4, 5, 6), 7, dtype=np.uint16)
+    iDataSet.onRead = lambda: conn.setDataVolume(stack, 1, 0)
+    conn.getDataVolume(1, 0)
+    if conn.getVolumeCacheStatistics()["entries"] != 0:
+        return False
+    if not np.array_equal(conn.getDataVolume(1, 0), stack):
+        return False
+
+    # Same if the cache is cleared
+    iDataSet.onRead = conn.clearVolumeCache
+    conn.getDataVolume(0, 0)
+    return conn.getVolumeCacheStatistics()["entries"] == 0
+
+
+# testCacheDisabled
+def testCacheDisabled():
+    conn, iDataSet, data = createCachedConnector(10**6)
+    conn.disableVolumeCache()
+    conn.getDataVolume(0, 0)
+    conn.getDataVolume(0, 0)
+    return (
+        conn.getVolumeCacheStatistics() is None
+        and iDataSet.numberOfCalls("GetDataVolume") == 2
+    )
+
+
+# ======================================================================================================================
+
+assert testCacheHits()
+assert testCacheEviction()
+assert testCacheTooSmall()
+assert testCacheInvalidation()
+assert testCacheInvalidationDuringRead()
+assert testCacheDisabled()